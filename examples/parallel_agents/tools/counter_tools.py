@@ -13,9 +13,10 @@ if TYPE_CHECKING:
 
 def increment(stack: "Stack") -> ToolResponse:
     """Increment this agent's counter by 1."""
-    count = stack.get_shared_state(key="count", default=0)
-    count += 1
-    stack.set_shared_state(key="count", value=count)
+    # Agents may be stepped in parallel threads, update atomically
+    count = stack.update_shared_state(
+        key="count", func=lambda count: count + 1, default=0
+    )
     return ToolResponse(
         is_error=False,
         content={
@@ -2,13 +2,14 @@
 
 import logging
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, FrozenSet, List, Optional
 
 from gimle.hugin.agent.config import Config
 from gimle.hugin.agent.config_state_machine import ConfigStateMachine
 from gimle.hugin.agent.environment import Environment
 from gimle.hugin.interaction.stack import Stack
 from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.utils.dirty import DirtyTracked
 from gimle.hugin.utils.uuid import with_uuid
 
 logger = logging.getLogger(__name__)
@@ -20,13 +21,15 @@ if TYPE_CHECKING:
 
 
 @with_uuid
-class Agent:
+class Agent(DirtyTracked):
     """An agent is a collection of interactions.
 
     Supports optional config state machine for dynamic configuration
     transitions based on rules during execution.
     """
 
+    _untracked_attributes: ClassVar[FrozenSet[str]] = frozenset({"session"})
+
     def __init__(
         self, session: "Session", config: Config, stack: Optional[Stack] = None
     ):
@@ -57,6 +60,12 @@ class Agent:
             # Record initial state (before stack has interactions)
             self._record_config_history(initial, None)
 
+    @property
+    def is_dirty(self) -> bool:
+        """Whether the agent or the stack it serializes changed."""
+        stack = self.__dict__.get("stack")
+        return super().is_dirty or bool(stack is not None and stack.is_dirty)
+
     @staticmethod
     def create_from_task(
         session: "Session",
@@ -132,15 +141,31 @@ class Agent:
         logger.debug(f"Stepping agent {self.id}")
 
         result = self.stack.step()
+        self._after_step()
+        return result
+
+    async def astep(self) -> bool:
+        """Step the agent inside an event loop.
+
+        Like ``step``, but awaits the oracle, so other agents can step
+        while this one waits on its LLM call.
+
+        Returns:
+            True if the agent stepped, False otherwise.
+        """
+        logger.debug(f"Stepping agent {self.id}")
+
+        result = await self.stack.astep()
+        self._after_step()
+        return result
 
-        # Check for state machine transitions after step
+    def _after_step(self) -> None:
+        """Check for state machine transitions after a step."""
         if self._state_machine:
             next_state = self._check_transitions()
             if next_state and next_state != self._current_state:
                 self._transition_to(next_state)
 
-        return result
-
     def rewind_to(self, index: int) -> int:
         """Rewind the agent's stack to a specific interaction index.
 
@@ -181,6 +206,7 @@ class Agent:
                         sm = self._state_machine
                         self.config = registry.get(last_state)
                         self._current_state = last_state
+                        self.stack.invalidate_tool_cache()
                         if self._state_machine is None:
                             self._state_machine = sm
 
@@ -320,6 +346,7 @@ class Agent:
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
         )
+        self.mark_dirty()
 
     def _transition_to(self, state_name: str) -> None:
         """Transition to a new config state.
@@ -341,6 +368,7 @@ class Agent:
         state_machine = self._state_machine
         self.config = new_config
         self._current_state = state_name
+        self.stack.invalidate_tool_cache()
 
         # Restore state machine if the new config doesn't have one
         if self._state_machine is None:
@@ -434,6 +462,11 @@ class Agent:
 
         # Deserialize stack (needs agent reference)
         stack_data = data.get("stack", {})
-        agent.stack = Stack.from_dict(stack_data, agent=agent, storage=storage)
+        agent.stack = Stack.from_dict(
+            stack_data,
+            agent=agent,
+            storage=storage,
+            lazy=getattr(storage, "lazy_stacks", False) is True,
+        )
 
         return agent
@@ -5,18 +5,28 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, ClassVar, Dict, Optional, Set
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Optional,
+    Set,
+)
 
 import yaml
 
 from gimle.hugin.agent.config import Config
 from gimle.hugin.agent.task import Task
 from gimle.hugin.artifacts.query_engine import ArtifactQueryEngine
+from gimle.hugin.llm.completion_cache import CompletionCache
 from gimle.hugin.llm.prompt.template import Template
 from gimle.hugin.tools.tool import Tool
 from gimle.hugin.utils.registry import Registry
 
 if TYPE_CHECKING:
+    from gimle.hugin.llm.models.model import StreamDelta
     from gimle.hugin.storage.storage import Storage
 
 logger = logging.getLogger(__name__)
@@ -45,6 +55,8 @@ class Environment:
         env_vars: Optional[Dict[str, Any]] = None,
         package_path: Optional[str] = None,
         capture_rendered_prompts: Optional[bool] = None,
+        completion_cache: Optional[CompletionCache] = None,
+        stream_callback: Optional[Callable[[str, "StreamDelta"], None]] = None,
     ) -> None:
         """Initialize an environment with empty registries.
 
@@ -55,6 +67,12 @@ class Environment:
             capture_rendered_prompts: If set, overrides the
                 HUGIN_CAPTURE_RENDERED_PROMPTS env var; when truthy, each
                 OracleResponse records the rendered system + user prompt.
+            completion_cache: Optional cache of LLM completions; if None,
+                the HUGIN_COMPLETION_CACHE (path) and
+                HUGIN_COMPLETION_CACHE_MODE env vars configure one.
+            stream_callback: If set, LLM responses are streamed and this
+                is called with (agent id, delta) as they arrive, e.g. the
+                monitor's get_monitor_stream_callback().
         """
         self.config_registry: Registry[Config] = Registry()
         self.task_registry: Registry[Task] = Registry()
@@ -68,6 +86,12 @@ class Environment:
             if capture_rendered_prompts is not None
             else _env_truthy("HUGIN_CAPTURE_RENDERED_PROMPTS")
         )
+        self.completion_cache: Optional[CompletionCache] = (
+            completion_cache
+            if completion_cache is not None
+            else CompletionCache.from_env()
+        )
+        self.stream_callback = stream_callback
 
     @property
     def tool_registry(self) -> Registry[Tool]:
@@ -186,6 +210,8 @@ class Environment:
         storage: Optional["Storage"] = None,
         env_vars: Optional[Dict[str, Any]] = None,
         capture_rendered_prompts: Optional[bool] = None,
+        completion_cache: Optional[CompletionCache] = None,
+        stream_callback: Optional[Callable[[str, "StreamDelta"], None]] = None,
     ) -> "Environment":
         """Load the environment from a path.
 
@@ -195,6 +221,8 @@ class Environment:
             env_vars: Optional dictionary of environment variables accessible to tools
             capture_rendered_prompts: Forwarded to the Environment constructor
                 (see Environment.__init__).
+            completion_cache: Forwarded to the Environment constructor.
+            stream_callback: Forwarded to the Environment constructor.
 
         Returns:
             The environment.
@@ -212,6 +240,8 @@ class Environment:
             env_vars=env_vars,
             package_path=str(package_path_obj),
             capture_rendered_prompts=capture_rendered_prompts,
+            completion_cache=completion_cache,
+            stream_callback=stream_callback,
         )
 
         project_root = package_path_obj.parent
@@ -0,0 +1,291 @@
+"""Scheduling of the agents of a running session."""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from gimle.hugin.interaction.oracle_response import OracleResponse
+
+if TYPE_CHECKING:
+    from gimle.hugin.agent.agent import Agent
+    from gimle.hugin.interaction.interaction import Interaction
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Usage:
+    """What an agent used while the session ran.
+
+    Attributes:
+        steps: The steps in which the agent had activity.
+        seconds: The seconds spent stepping the agent.
+        tokens: The input and output tokens of its oracle responses.
+    """
+
+    steps: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+
+
+@dataclass
+class Budget:
+    """The limits of the usage of an agent, None for no limit.
+
+    Attributes:
+        max_steps: The steps in which the agent had activity.
+        max_seconds: The seconds spent stepping the agent.
+        max_tokens: The input and output tokens of its oracle responses.
+    """
+
+    max_steps: Optional[int] = None
+    max_seconds: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+    def exceeded(self, usage: Usage) -> Optional[str]:
+        """Get the limit a usage has reached.
+
+        Args:
+            usage: The usage of the agent.
+
+        Returns:
+            The name of the limit, or None if the usage is within budget.
+        """
+        if self.max_steps is not None and usage.steps >= self.max_steps:
+            return "steps"
+        if self.max_seconds is not None and usage.seconds >= self.max_seconds:
+            return "seconds"
+        if self.max_tokens is not None and usage.tokens >= self.max_tokens:
+            return "tokens"
+        return None
+
+
+@dataclass
+class Share:
+    """The share of the session an agent gets.
+
+    Attributes:
+        priority: The priority class. Agents of a higher class step first.
+        weight: The weight of the agent within its class. An agent gets
+            steps in proportion to its weight.
+    """
+
+    priority: int = 0
+    weight: float = 1.0
+
+
+class Scheduler:
+    """Chooses the agents a running session steps, and tracks their usage.
+
+    Ready agents are ranked by priority class, highest first, and within a
+    class by the steps they were given divided by their weight, so agents
+    of a class share the steps in proportion to their weights. Agents of
+    equal rank keep the order of the session. The session steps the
+    agents in order of rank; with ``max_agents`` set, it stops once that
+    many agents had activity, so finished agents do not hold a place.
+
+    Agents that reach their budget are parked: they are skipped, but stay
+    in the session unchanged and step again once their budget is raised.
+
+    Shares and budgets are set per agent id or per config name, so they
+    also apply to agents created while the session runs.
+    """
+
+    def __init__(
+        self,
+        max_agents: Optional[int] = None,
+        budget: Optional[Budget] = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_agents: The most agents with activity per step, None for
+                all.
+            budget: The budget of agents without a budget of their own.
+        """
+        if max_agents is not None and max_agents < 1:
+            raise ValueError(f"max_agents must be at least 1, got {max_agents}")
+        self.max_agents = max_agents
+        self.budget = budget if budget is not None else Budget()
+        self._shares: Dict[str, Share] = {}
+        self._budgets: Dict[str, Budget] = {}
+        self._usage: Dict[str, Usage] = {}
+        self._given: Dict[str, float] = {}
+        self._parked: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def set_share(
+        self, key: str, priority: int = 0, weight: float = 1.0
+    ) -> None:
+        """Set the priority class and weight of agents.
+
+        Args:
+            key: The agent id, or the config name of the agents.
+            priority: The priority class, higher steps first.
+            weight: The weight within the class.
+        """
+        if weight <= 0:
+            raise ValueError(f"weight must be > 0, got {weight}")
+        self._shares[key] = Share(priority=priority, weight=weight)
+
+    def set_budget(self, key: str, budget: Budget) -> None:
+        """Set the budget of agents, unparking them if it was raised.
+
+        Args:
+            key: The agent id, or the config name of the agents.
+            budget: The budget.
+        """
+        self._budgets[key] = budget
+
+    def get_share(self, agent: "Agent") -> Share:
+        """Get the share of an agent, by id, then by config name."""
+        return self._lookup(self._shares, agent) or Share()
+
+    def get_budget(self, agent: "Agent") -> Budget:
+        """Get the budget of an agent, by id, then by config name."""
+        return self._lookup(self._budgets, agent) or self.budget
+
+    def get_usage(self, agent_id: str) -> Usage:
+        """Get a copy of the usage of an agent.
+
+        Args:
+            agent_id: The agent.
+
+        Returns:
+            The usage, all zero if the agent has not stepped.
+        """
+        with self._lock:
+            usage = self._usage.get(agent_id, Usage())
+            return Usage(usage.steps, usage.seconds, usage.tokens)
+
+    @property
+    def parked(self) -> Set[str]:
+        """Get the ids of the parked agents."""
+        return set(self._parked)
+
+    def is_parked(self, agent: "Agent") -> bool:
+        """Check if an agent reached its budget.
+
+        Args:
+            agent: The agent.
+
+        Returns:
+            True if the agent must not step.
+        """
+        limit = self.get_budget(agent).exceeded(self.get_usage(agent.id))
+        if limit is None:
+            self._parked.discard(agent.id)
+            return False
+        if agent.id not in self._parked:
+            logger.info(f"Parking agent {agent.id}: {limit} budget used up")
+            self._parked.add(agent.id)
+        return True
+
+    def select(self, agents: Iterable["Agent"]) -> List["Agent"]:
+        """Rank the agents that are not parked.
+
+        Args:
+            agents: The ready agents, in the order of the session.
+
+        Returns:
+            The agents, in the order to step them.
+        """
+        ready = [agent for agent in agents if not self.is_parked(agent)]
+        shares = {agent.id: self.get_share(agent) for agent in ready}
+        with self._lock:
+            for agent in ready:
+                if agent.id not in self._given:
+                    # New agents start even with their class, not ahead of it
+                    priority = shares[agent.id].priority
+                    self._given[agent.id] = min(
+                        (
+                            self._given[other.id]
+                            for other in ready
+                            if other.id in self._given
+                            and shares[other.id].priority == priority
+                        ),
+                        default=0.0,
+                    )
+            given = dict(self._given)
+        return sorted(
+            ready,
+            key=lambda agent: (-shares[agent.id].priority, given[agent.id]),
+        )
+
+    def record(
+        self, agent: "Agent", active: bool, seconds: float, tokens: int
+    ) -> None:
+        """Record a step of an agent.
+
+        Args:
+            agent: The agent that stepped.
+            active: Whether the agent had activity other than waiting.
+            seconds: The seconds the step took.
+            tokens: The tokens of the oracle responses of the step.
+        """
+        weight = self.get_share(agent).weight
+        with self._lock:
+            usage = self._usage.setdefault(agent.id, Usage())
+            usage.steps += int(active)
+            usage.seconds += seconds
+            usage.tokens += tokens
+            self._given[agent.id] = self._given.get(agent.id, 0.0) + 1 / weight
+
+    def clear(self, agent_id: Optional[str] = None) -> None:
+        """Forget the usage of one agent, or of all agents.
+
+        Args:
+            agent_id: The agent, None for all agents.
+        """
+        with self._lock:
+            if agent_id is None:
+                self._usage.clear()
+                self._given.clear()
+                self._parked.clear()
+                return
+            self._usage.pop(agent_id, None)
+            self._given.pop(agent_id, None)
+            self._parked.discard(agent_id)
+
+    @staticmethod
+    def count_tokens(interactions: Iterable["Interaction"]) -> int:
+        """Count the tokens of the oracle responses among interactions.
+
+        Args:
+            interactions: The interactions added by a step.
+
+        Returns:
+            The input, cached input and output tokens reported by the
+            model.
+        """
+        tokens = 0
+        for interaction in interactions:
+            if isinstance(interaction, OracleResponse) and interaction.response:
+                tokens += sum(
+                    interaction.response.get(key) or 0
+                    for key in (
+                        "input_tokens",
+                        "cache_read_tokens",
+                        "cache_write_tokens",
+                        "output_tokens",
+                    )
+                )
+        return tokens
+
+    @staticmethod
+    def _lookup(values: Dict[str, T], agent: "Agent") -> Optional[T]:
+        """Get the value of an agent by id, then by config name."""
+        if agent.id in values:
+            return values[agent.id]
+        return values.get(agent.config.name)
@@ -1,12 +1,28 @@
 """Session module."""
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
 
 from gimle.hugin.agent.agent import Agent
 from gimle.hugin.agent.config import Config
 from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.scheduler import Scheduler
 from gimle.hugin.agent.session_state import SessionState
+from gimle.hugin.agent.wakeups import Wakeups
 from gimle.hugin.utils.uuid import with_uuid
 
 if TYPE_CHECKING:
@@ -23,6 +39,10 @@ class Session:
 
     Each session has its own SessionState instance that manages namespace-based
     shared state between agents.
+
+    While running, agents that only wait are skipped until their wakeup,
+    see ``Wakeups``, and the ``Scheduler`` chooses which of the other
+    agents step.
     """
 
     def __init__(
@@ -30,6 +50,7 @@ class Session:
         environment: Environment,
         agents: Optional[List["Agent"]] = None,
         state: Optional[SessionState] = None,
+        scheduler: Optional[Scheduler] = None,
     ):
         """Initialize a session.
 
@@ -37,10 +58,13 @@ class Session:
             environment: The environment containing configs, tasks, etc.
             agents: Optional list of agents in this session
             state: Optional SessionState instance (creates new if not provided)
+            scheduler: Optional Scheduler (steps all agents if not provided)
         """
         self.environment = environment
         self.agents = agents if agents else []
         self.state = state if state is not None else SessionState(session=self)
+        self.wakeups = Wakeups()
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
         # Update state's session reference if it was passed in without one
         if self.state._session is None:
             self.state._session = self
@@ -126,73 +150,313 @@ class Session:
         Returns:
             The interaction with the given uuid.
         """
-        return next(
-            (
-                interaction
-                for agent in self.agents
-                for interaction in agent.stack.interactions
-                if interaction.id == uuid
-            ),
-            None,
-        )
+        for agent in self.agents:
+            interaction = agent.stack.get_interaction(uuid)
+            if interaction is not None:
+                return interaction
+        return None
 
-    def step(self) -> bool:
+    def step(self, max_workers: Optional[int] = None) -> bool:
         """Step the session.
 
+        Args:
+            max_workers: If greater than 1, step the agents in parallel on
+                up to this many threads, see ``run``.
+
         Returns:
             True if there is any activity in the session, False otherwise.
         """
-        any_activity = False
-        for agent in self.agents:
-            agent_activity = agent.step()
-            if agent_activity:
-                any_activity = True
-        return any_activity
+        with self._agent_executor(max_workers) as executor:
+            return bool(self._step_agents(executor))
+
+    @contextmanager
+    def stepper(
+        self, max_workers: Optional[int] = None
+    ) -> Iterator[Callable[[], bool]]:
+        """Step the session one step at a time, like ``run`` does.
+
+        Use it instead of calling ``step`` in a loop, which steps blocked
+        agents, bypasses the scheduler and creates a new thread pool for
+        every step.
+
+        Args:
+            max_workers: If greater than 1, step the agents in parallel on
+                up to this many threads, see ``run``.
+
+        Yields:
+            A function running one step of the session, sleeping while
+            every agent waits. It returns False once no agent can step.
+        """
+        self.wakeups.clear()
+        with self._agent_executor(max_workers) as executor:
+            yield lambda: bool(self._next_step(executor))
 
     def run(
         self,
         max_steps: Optional[int] = None,
         step_callback: Optional[Callable[[int, "Agent"], None]] = None,
+        max_workers: Optional[int] = None,
+        max_seconds: Optional[float] = None,
     ) -> int:
         """Run the session.
 
+        Agents blocked on Waiting interactions are skipped until their
+        deadline or an event wakes them, and steps in which all agents only
+        waited are not counted. When every agent waits, the session sleeps
+        until the next deadline; it stops when no agent can be woken.
+
+        The scheduler chooses the agents stepped in each step and parks
+        agents that used up their budget. The session stops when only
+        parked agents are left; raise their budget and run it again to
+        continue them.
+
         Args:
             max_steps: The maximum number of steps to run.
             step_callback: Optional callback called after each agent step.
                 Signature: (step_number: int, agent: Agent) -> None
-                Called for each agent that had activity in a step.
+                Called for each agent that had activity in a step, before
+                the step is saved; an error raised by it stops the run
+                without saving the step.
+            max_workers: If greater than 1, step the agents in parallel on
+                up to this many threads, so a step takes as long as the
+                slowest agent instead of all agents together. Agents added
+                during a parallel step are first stepped in the next step.
+            max_seconds: Stop after the step that ends this many seconds
+                after the start, e.g. to step a session for a time slice.
+                Sleeping until a deadline also ends by then.
 
         Returns:
             The number of steps run.
         """
         step_count = 0
         logger.info(f"Running session {self.id}")
+        self.wakeups.clear()
+        stop_at = self._stop_at(max_seconds)
+        with self._agent_executor(max_workers) as executor:
+            while True:
+                # Track which agents had activity
+                active_agents = self._next_step(executor, stop_at)
+                if not active_agents:
+                    break
+
+                step_count += 1
+                # Call the callback for each active agent, before saving so
+                # it can stop the run without the step being saved
+                if step_callback:
+                    for agent in active_agents:
+                        step_callback(step_count, agent)
+
+                if self.storage:
+                    self.storage.save_session(self)
+
+                if max_steps and step_count >= max_steps:
+                    logger.info(f"Max steps reached ({max_steps})")
+                    break
+                if stop_at is not None and time.monotonic() >= stop_at:
+                    logger.info(f"Max seconds reached ({max_seconds})")
+                    break
+                logger.info(f"Step {step_count} completed")
+        if self.storage:
+            self.storage.save_session(self)
+            # Write-behind storages write in the background, wait for them
+            self.storage.flush()
+        return step_count
+
+    def _next_step(
+        self,
+        executor: Optional[ThreadPoolExecutor],
+        stop_at: Optional[float] = None,
+    ) -> List["Agent"]:
+        """Step the scheduled agents until one of them has activity.
+
+        Args:
+            executor: The thread pool to step the agents on.
+            stop_at: The ``time.monotonic()`` to sleep until at most.
+
+        Returns:
+            The agents that had activity, none if no agent can step before
+            ``stop_at``.
+        """
         while True:
-            # Track which agents had activity
-            active_agents: List[Agent] = []
-            for agent in self.agents:
-                if agent.step():
-                    active_agents.append(agent)
+            woken = self.wakeups.woken
+            active_agents = self._step_agents(executor, scheduled=True)
+            if active_agents:
+                return active_agents
+            # Step again if an event woke an agent meanwhile, otherwise
+            # sleep until a deadline
+            if self.wakeups.woken == woken and not self._sleep(stop_at):
+                return []
+
+    @staticmethod
+    def _stop_at(max_seconds: Optional[float]) -> Optional[float]:
+        """Get the ``time.monotonic()`` a run stops at, if limited."""
+        if max_seconds is None:
+            return None
+        return time.monotonic() + max_seconds
+
+    def _sleep(self, stop_at: Optional[float]) -> bool:
+        """Sleep until a blocked agent can step, at most until ``stop_at``.
 
-            if not active_agents:
-                break
+        Returns:
+            False if no agent can step before ``stop_at``, or without a
+            deadline only another thread could wake one.
+        """
+        if stop_at is None:
+            return self.wakeups.wait()
+        remaining = stop_at - time.monotonic()
+        return remaining > 0 and self.wakeups.wait(remaining)
 
-            if self.storage:
-                self.storage.save_session(self)
-            step_count += 1
+    @staticmethod
+    def _agent_executor(
+        max_workers: Optional[int],
+    ) -> ContextManager[Optional[ThreadPoolExecutor]]:
+        """Create the thread pool agents are stepped on, if any.
 
-            # Call the callback for each active agent
-            if step_callback:
-                for agent in active_agents:
-                    step_callback(step_count, agent)
+        Args:
+            max_workers: The number of threads, no pool if None or 1.
 
-            if max_steps and step_count >= max_steps:
-                logger.info(f"Max steps reached ({max_steps})")
-                break
-            logger.info(f"Step {step_count} completed")
-        if self.storage:
-            self.storage.save_session(self)
-        return step_count
+        Returns:
+            A context manager giving the pool, or None to step the agents
+            one after another.
+        """
+        if max_workers is None or max_workers <= 1:
+            return nullcontext()
+        return ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hugin-agent"
+        )
+
+    def _step_agents(
+        self,
+        executor: Optional[ThreadPoolExecutor] = None,
+        scheduled: bool = False,
+    ) -> List["Agent"]:
+        """Step all agents, in parallel if an executor is given.
+
+        In parallel, all agents finish their step before an error of any
+        of them is raised.
+
+        Args:
+            executor: The thread pool to step the agents on.
+            scheduled: Whether to step the agents the scheduler chooses,
+                skipping blocked agents, see ``_step_agent``.
+
+        Returns:
+            The agents that had activity, in the order they were stepped.
+        """
+        if not scheduled:
+            if executor is None:
+                return [agent for agent in self.agents if agent.step()]
+            agents = list(self.agents)
+            futures = [executor.submit(agent.step) for agent in agents]
+            wait(futures)
+            return [
+                agent
+                for agent, future in zip(agents, futures)
+                if future.result()
+            ]
+        limit = self.scheduler.max_agents
+        active_agents: List["Agent"] = []
+        agents = self._schedule(self.agents)
+        if executor is None:
+            known = len(self.agents)
+            while agents:
+                for agent in agents:
+                    if limit is not None and len(active_agents) >= limit:
+                        return active_agents
+                    if self._step_agent(agent):
+                        active_agents.append(agent)
+                # Agents added during the step, like the agents it called,
+                # step in it too
+                added = self.agents[known:]
+                known = len(self.agents)
+                agents = self._schedule(added)
+            return active_agents
+        # Step in batches until enough agents had activity
+        while agents and (limit is None or len(active_agents) < limit):
+            size = len(agents) if limit is None else limit - len(active_agents)
+            batch, agents = agents[:size], agents[size:]
+            futures = [
+                executor.submit(self._step_agent, agent) for agent in batch
+            ]
+            wait(futures)
+            active_agents += [
+                agent
+                for agent, future in zip(batch, futures)
+                if future.result()
+            ]
+        return active_agents
+
+    def _schedule(self, agents: List["Agent"]) -> List["Agent"]:
+        """Choose the agents to step among those not blocked.
+
+        Args:
+            agents: The agents, in the order of the session.
+
+        Returns:
+            The agents to step, in order.
+        """
+        return self.scheduler.select(
+            agent for agent in agents if not self.wakeups.is_blocked(agent.id)
+        )
+
+    def _step_agent(self, agent: "Agent") -> bool:
+        """Step a scheduled agent, recording its usage.
+
+        Args:
+            agent: The agent to step.
+
+        Returns:
+            True if the agent had activity. A step in which the agent only
+            waited does not count, and blocks the agent until its wakeup.
+        """
+        since = self.wakeups.sequence
+        ninteractions = agent.stack.ninteractions()
+        start = time.monotonic()
+        active = self._block_waiting(agent, agent.step(), since, ninteractions)
+        self._record_step(agent, active, start, ninteractions)
+        return active
+
+    def _record_step(
+        self, agent: "Agent", active: bool, start: float, ninteractions: int
+    ) -> None:
+        """Record the usage of a step of an agent with the scheduler.
+
+        Args:
+            agent: The agent that stepped.
+            active: Whether the step had activity other than waiting.
+            start: The ``time.monotonic()`` the step started at.
+            ninteractions: The size of the stack before the step.
+        """
+        self.scheduler.record(
+            agent,
+            active,
+            time.monotonic() - start,
+            Scheduler.count_tokens(agent.stack.interactions[ninteractions:]),
+        )
+
+    def _block_waiting(
+        self, agent: "Agent", active: bool, since: int, ninteractions: int
+    ) -> bool:
+        """Block an agent after a step if all its branches wait.
+
+        Args:
+            agent: The agent that stepped.
+            active: Whether the step of the agent had activity.
+            since: The sequence of the wakeups before the step.
+            ninteractions: The size of the stack before the step.
+
+        Returns:
+            Whether the step had activity other than waiting.
+        """
+        # Agents that are done are not blocked, or a passed deadline of
+        # their last Waiting would wake them over and over
+        if not active:
+            return False
+        wakeup = agent.stack.get_wakeup()
+        if wakeup is None:
+            return active
+        self.wakeups.block(agent.id, wakeup, since)
+        return agent.stack.ninteractions() != ninteractions
 
     def to_dict(self) -> Dict[str, Any]:
         """Serialize the session to a dictionary.
@@ -257,3 +521,175 @@ class Session:
             temp_session.agents.append(agent)
 
         return temp_session
+
+    @classmethod
+    def resume(cls, uuid: str, environment: "Environment") -> "Session":
+        """Load a saved session to continue running it.
+
+        Loads the last checkpoint of the session in one read if the
+        storage keeps checkpoints (see ``LocalStorage``), so a session
+        whose process died mid-step resumes from its last completed step.
+        Otherwise the session is loaded with ``Storage.load_session``.
+
+        Args:
+            uuid: The UUID of the session.
+            environment: The environment of the session, with its storage.
+
+        Returns:
+            The session.
+
+        Raises:
+            ValueError: If the environment has no storage.
+        """
+        storage = environment.storage
+        if storage is None:
+            raise ValueError("Cannot resume a session without storage")
+        session = storage.load_checkpoint(uuid, environment)
+        if session is None:
+            session = storage.load_session(uuid, environment)
+        return session
+
+
+class AsyncSession(Session):
+    """A session that steps its agents concurrently in an event loop.
+
+    Each step awaits the steps of all agents together, so agents waiting on
+    the oracle overlap their LLM calls instead of waiting for each other.
+    Agents are started in the order of ``agents``, step results and
+    callbacks follow that order, and agents added during a step are first
+    stepped in the next step.
+
+    Run it from async code, e.g. ``asyncio.run(session.run())``.
+    """
+
+    async def step(self) -> bool:  # type: ignore[override]
+        """Step all agents of the session concurrently.
+
+        Returns:
+            True if there is any activity in the session, False otherwise.
+        """
+        return bool(await self._astep_agents())
+
+    async def run(  # type: ignore[override]
+        self,
+        max_steps: Optional[int] = None,
+        step_callback: Optional[Callable[[int, "Agent"], None]] = None,
+        max_seconds: Optional[float] = None,
+    ) -> int:
+        """Run the session, stepping all agents concurrently.
+
+        Like ``Session.run``, blocked agents are skipped and the session
+        sleeps until the next deadline when every agent waits.
+
+        Args:
+            max_steps: The maximum number of steps to run.
+            step_callback: Optional callback called after each agent step.
+                Signature: (step_number: int, agent: Agent) -> None
+                Called for each agent that had activity in a step, before
+                the step is saved.
+            max_seconds: Stop after the step that ends this many seconds
+                after the start.
+
+        Returns:
+            The number of steps run.
+        """
+        step_count = 0
+        logger.info(f"Running async session {self.id}")
+        self.wakeups.clear()
+        stop_at = self._stop_at(max_seconds)
+        while True:
+            woken = self.wakeups.woken
+            active_agents = await self._astep_agents(scheduled=True)
+            if not active_agents:
+                if self.wakeups.woken != woken or await asyncio.to_thread(
+                    self._sleep, stop_at
+                ):
+                    continue
+                break
+
+            step_count += 1
+            if step_callback:
+                for agent in active_agents:
+                    step_callback(step_count, agent)
+
+            if self.storage:
+                self.storage.save_session(self)
+
+            if max_steps and step_count >= max_steps:
+                logger.info(f"Max steps reached ({max_steps})")
+                break
+            if stop_at is not None and time.monotonic() >= stop_at:
+                logger.info(f"Max seconds reached ({max_seconds})")
+                break
+            logger.info(f"Step {step_count} completed")
+        if self.storage:
+            self.storage.save_session(self)
+            # Write-behind storages write in the background, wait for them
+            self.storage.flush()
+        return step_count
+
+    async def _astep_agents(self, scheduled: bool = False) -> List[Agent]:
+        """Step all agents concurrently.
+
+        All agents finish their step before an error of any of them is
+        raised, so no agent is left stepping in the background.
+
+        Args:
+            scheduled: Whether to step the agents the scheduler chooses,
+                skipping blocked agents, see ``Session._step_agent``.
+
+        Returns:
+            The agents that had activity, in the order they were started.
+        """
+        if not scheduled:
+            return await self._agather(
+                lambda agent: agent.astep(), list(self.agents)
+            )
+        limit = self.scheduler.max_agents
+        active_agents: List[Agent] = []
+        agents = self._schedule(self.agents)
+        # Step in batches until enough agents had activity
+        while agents and (limit is None or len(active_agents) < limit):
+            size = len(agents) if limit is None else limit - len(active_agents)
+            batch, agents = agents[:size], agents[size:]
+            active_agents += await self._agather(self._astep_agent, batch)
+        return active_agents
+
+    @staticmethod
+    async def _agather(
+        step: Callable[[Agent], Awaitable[bool]], agents: List[Agent]
+    ) -> List[Agent]:
+        """Step agents concurrently, raising the first error after all.
+
+        Args:
+            step: The step function.
+            agents: The agents to step.
+
+        Returns:
+            The agents that had activity, in the order of ``agents``.
+        """
+        results = await asyncio.gather(
+            *(step(agent) for agent in agents), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return [agent for agent, active in zip(agents, results) if active]
+
+    async def _astep_agent(self, agent: Agent) -> bool:
+        """Step a scheduled agent, see ``Session._step_agent``.
+
+        Args:
+            agent: The agent to step.
+
+        Returns:
+            True if the agent had activity other than waiting.
+        """
+        since = self.wakeups.sequence
+        ninteractions = agent.stack.ninteractions()
+        start = time.monotonic()
+        active = self._block_waiting(
+            agent, await agent.astep(), since, ninteractions
+        )
+        self._record_step(agent, active, start, ninteractions)
+        return active
@@ -1,7 +1,10 @@
 """Session state management with namespace support."""
 
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from gimle.hugin.agent.wakeups import Wakeups, state_event
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +32,8 @@ class SessionState:
         self._state: Dict[str, Dict[str, Any]] = {"common": {}}
         self._permissions: Dict[str, List[str]] = {}
         self._session = session
+        # Agents stepped in parallel threads share the state
+        self._lock = threading.RLock()
 
     def create_namespace(
         self, namespace: str, agent_ids: Optional[List[str]] = None
@@ -40,21 +45,22 @@ class SessionState:
             agent_ids: Optional list of agent IDs that can access this namespace.
                       If None, all agents can access (but must declare it in config).
         """
-        if namespace in self._state:
-            logger.warning(
-                f"Namespace '{namespace}' already exists, skipping creation"
-            )
-            return
-
-        self._state[namespace] = {}
-
-        if agent_ids is not None:
-            self._permissions[namespace] = agent_ids
-            logger.info(
-                f"Created namespace '{namespace}' with access for {len(agent_ids)} agents"
-            )
-        else:
-            logger.info(f"Created namespace '{namespace}' with open access")
+        with self._lock:
+            if namespace in self._state:
+                logger.warning(
+                    f"Namespace '{namespace}' already exists, skipping creation"
+                )
+                return
+
+            self._state[namespace] = {}
+
+            if agent_ids is not None:
+                self._permissions[namespace] = agent_ids
+                logger.info(
+                    f"Created namespace '{namespace}' with access for {len(agent_ids)} agents"
+                )
+            else:
+                logger.info(f"Created namespace '{namespace}' with open access")
 
     def namespace_exists(self, namespace: str) -> bool:
         """Check if a namespace exists.
@@ -85,15 +91,16 @@ class SessionState:
             PermissionError: If agent doesn't have access to namespace
             ValueError: If namespace doesn't exist
         """
-        if not self.namespace_exists(namespace):
-            raise ValueError(f"Namespace '{namespace}' does not exist")
+        with self._lock:
+            if not self.namespace_exists(namespace):
+                raise ValueError(f"Namespace '{namespace}' does not exist")
 
-        if not self._can_access(agent_id, namespace):
-            raise PermissionError(
-                f"Agent {agent_id} does not have access to namespace '{namespace}'"
-            )
+            if not self._can_access(agent_id, namespace):
+                raise PermissionError(
+                    f"Agent {agent_id} does not have access to namespace '{namespace}'"
+                )
 
-        return self._state[namespace].get(key, default)
+            return self._state[namespace].get(key, default)
 
     def get_all(self, namespace: str, agent_id: str) -> Dict[str, Any]:
         """Get all key-value pairs from a namespace.
@@ -109,15 +116,16 @@ class SessionState:
             PermissionError: If agent doesn't have access to namespace
             ValueError: If namespace doesn't exist
         """
-        if not self.namespace_exists(namespace):
-            raise ValueError(f"Namespace '{namespace}' does not exist")
+        with self._lock:
+            if not self.namespace_exists(namespace):
+                raise ValueError(f"Namespace '{namespace}' does not exist")
 
-        if not self._can_access(agent_id, namespace):
-            raise PermissionError(
-                f"Agent {agent_id} does not have access to namespace '{namespace}'"
-            )
+            if not self._can_access(agent_id, namespace):
+                raise PermissionError(
+                    f"Agent {agent_id} does not have access to namespace '{namespace}'"
+                )
 
-        return self._state[namespace].copy()
+            return self._state[namespace].copy()
 
     def set(self, namespace: str, key: str, value: Any, agent_id: str) -> None:
         """Set a value in a namespace.
@@ -132,16 +140,52 @@ class SessionState:
             PermissionError: If agent doesn't have access to namespace
             ValueError: If namespace doesn't exist
         """
-        if not self.namespace_exists(namespace):
-            raise ValueError(f"Namespace '{namespace}' does not exist")
-
-        if not self._can_access(agent_id, namespace):
-            raise PermissionError(
-                f"Agent {agent_id} does not have access to namespace '{namespace}'"
+        with self._lock:
+            if not self.namespace_exists(namespace):
+                raise ValueError(f"Namespace '{namespace}' does not exist")
+
+            if not self._can_access(agent_id, namespace):
+                raise PermissionError(
+                    f"Agent {agent_id} does not have access to namespace '{namespace}'"
+                )
+
+            self._state[namespace][key] = value
+            logger.debug(
+                f"Agent {agent_id} set '{key}' in namespace '{namespace}'"
             )
+        self._notify(namespace, key)
+
+    def update(
+        self,
+        namespace: str,
+        key: str,
+        func: Callable[[Any], Any],
+        agent_id: str,
+        default: Any = None,
+    ) -> Any:
+        """Atomically replace a value with a function of it.
+
+        Unlike a ``get`` followed by a ``set``, no other agent can change
+        the value in between, also when agents are stepped in parallel.
+
+        Args:
+            namespace: Namespace to write to
+            key: Key to update
+            func: Called with the current value, returns the new value
+            agent_id: ID of the agent requesting access
+            default: Value passed to func if the key doesn't exist
+
+        Returns:
+            The new value
 
-        self._state[namespace][key] = value
-        logger.debug(f"Agent {agent_id} set '{key}' in namespace '{namespace}'")
+        Raises:
+            PermissionError: If agent doesn't have access to namespace
+            ValueError: If namespace doesn't exist
+        """
+        with self._lock:
+            value = func(self.get(namespace, key, agent_id, default))
+            self.set(namespace, key, value, agent_id)
+            return value
 
     def delete(self, namespace: str, key: str, agent_id: str) -> None:
         """Delete a key from a namespace.
@@ -156,18 +200,26 @@ class SessionState:
             ValueError: If namespace doesn't exist
             KeyError: If key doesn't exist in namespace
         """
-        if not self.namespace_exists(namespace):
-            raise ValueError(f"Namespace '{namespace}' does not exist")
-
-        if not self._can_access(agent_id, namespace):
-            raise PermissionError(
-                f"Agent {agent_id} does not have access to namespace '{namespace}'"
+        with self._lock:
+            if not self.namespace_exists(namespace):
+                raise ValueError(f"Namespace '{namespace}' does not exist")
+
+            if not self._can_access(agent_id, namespace):
+                raise PermissionError(
+                    f"Agent {agent_id} does not have access to namespace '{namespace}'"
+                )
+
+            del self._state[namespace][key]
+            logger.debug(
+                f"Agent {agent_id} deleted '{key}' from namespace '{namespace}'"
             )
+        self._notify(namespace, key)
 
-        del self._state[namespace][key]
-        logger.debug(
-            f"Agent {agent_id} deleted '{key}' from namespace '{namespace}'"
-        )
+    def _notify(self, namespace: str, key: str) -> None:
+        """Wake the agents of the session waiting for a key to change."""
+        wakeups = getattr(self._session, "wakeups", None)
+        if isinstance(wakeups, Wakeups):
+            wakeups.notify(state_event(namespace, key))
 
     def grant_access(self, namespace: str, agent_id: str) -> None:
         """Grant an agent access to a namespace.
@@ -179,17 +231,18 @@ class SessionState:
         Raises:
             ValueError: If namespace doesn't exist
         """
-        if not self.namespace_exists(namespace):
-            raise ValueError(f"Namespace '{namespace}' does not exist")
+        with self._lock:
+            if not self.namespace_exists(namespace):
+                raise ValueError(f"Namespace '{namespace}' does not exist")
 
-        if namespace not in self._permissions:
-            self._permissions[namespace] = []
+            if namespace not in self._permissions:
+                self._permissions[namespace] = []
 
-        if agent_id not in self._permissions[namespace]:
-            self._permissions[namespace].append(agent_id)
-            logger.info(
-                f"Granted agent {agent_id} access to namespace '{namespace}'"
-            )
+            if agent_id not in self._permissions[namespace]:
+                self._permissions[namespace].append(agent_id)
+                logger.info(
+                    f"Granted agent {agent_id} access to namespace '{namespace}'"
+                )
 
     def revoke_access(self, namespace: str, agent_id: str) -> None:
         """Revoke an agent's access to a namespace.
@@ -201,17 +254,18 @@ class SessionState:
         Raises:
             ValueError: If namespace doesn't exist
         """
-        if not self.namespace_exists(namespace):
-            raise ValueError(f"Namespace '{namespace}' does not exist")
-
-        if (
-            namespace in self._permissions
-            and agent_id in self._permissions[namespace]
-        ):
-            self._permissions[namespace].remove(agent_id)
-            logger.info(
-                f"Revoked agent {agent_id} access from namespace '{namespace}'"
-            )
+        with self._lock:
+            if not self.namespace_exists(namespace):
+                raise ValueError(f"Namespace '{namespace}' does not exist")
+
+            if (
+                namespace in self._permissions
+                and agent_id in self._permissions[namespace]
+            ):
+                self._permissions[namespace].remove(agent_id)
+                logger.info(
+                    f"Revoked agent {agent_id} access from namespace '{namespace}'"
+                )
 
     def list_namespaces(self, agent_id: Optional[str] = None) -> List[str]:
         """List all namespaces, optionally filtered by agent access.
@@ -222,12 +276,15 @@ class SessionState:
         Returns:
             List of namespace names
         """
-        if agent_id is None:
-            return list(self._state.keys())
+        with self._lock:
+            if agent_id is None:
+                return list(self._state.keys())
 
-        return [
-            ns for ns in self._state.keys() if self._can_access(agent_id, ns)
-        ]
+            return [
+                ns
+                for ns in self._state.keys()
+                if self._can_access(agent_id, ns)
+            ]
 
     def _can_access(self, agent_id: str, namespace: str) -> bool:
         """Check if an agent can access a namespace.
@@ -277,29 +334,30 @@ class SessionState:
         Returns:
             Dictionary representation of the state
         """
-        serialized_state: Dict[str, Dict[str, Any]] = {}
-
-        for namespace, namespace_data in self._state.items():
-            serialized_state[namespace] = {}
-            for key, value in namespace_data.items():
-                # Check if value has to_dict method (custom serialization)
-                if hasattr(value, "to_dict") and callable(
-                    getattr(value, "to_dict")
-                ):
-                    serialized_value = value.to_dict()
-                    # Store type information for deserialization
-                    serialized_value["__type__"] = (
-                        f"{value.__class__.__module__}.{value.__class__.__name__}"
-                    )
-                    serialized_state[namespace][key] = serialized_value
-                else:
-                    # Store value as-is (must be JSON serializable)
-                    serialized_state[namespace][key] = value
-
-        return {
-            "state": serialized_state,
-            "permissions": self._permissions,
-        }
+        with self._lock:
+            serialized_state: Dict[str, Dict[str, Any]] = {}
+
+            for namespace, namespace_data in self._state.items():
+                serialized_state[namespace] = {}
+                for key, value in namespace_data.items():
+                    # Check if value has to_dict method (custom serialization)
+                    if hasattr(value, "to_dict") and callable(
+                        getattr(value, "to_dict")
+                    ):
+                        serialized_value = value.to_dict()
+                        # Store type information for deserialization
+                        serialized_value["__type__"] = (
+                            f"{value.__class__.__module__}.{value.__class__.__name__}"
+                        )
+                        serialized_state[namespace][key] = serialized_value
+                    else:
+                        # Store value as-is (must be JSON serializable)
+                        serialized_state[namespace][key] = value
+
+            return {
+                "state": serialized_state,
+                "permissions": self._permissions,
+            }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "SessionState":
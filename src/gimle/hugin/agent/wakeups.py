@@ -0,0 +1,167 @@
+"""Wait and notify for agents that are blocked on Waiting interactions."""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional
+
+
+def stack_event(agent_id: str) -> str:
+    """Get the event of an interaction added to the stack of an agent."""
+    return f"stack:{agent_id}"
+
+
+def state_event(namespace: str, key: str) -> str:
+    """Get the event of a change of a shared state key."""
+    return f"state:{namespace}:{key}"
+
+
+@dataclass(frozen=True)
+class Wakeup:
+    """When a blocked agent can make progress again.
+
+    Attributes:
+        deadline: The ``time.time()`` at which the agent can step again.
+        events: The events after which the agent can step again, see
+            ``stack_event`` and ``state_event``.
+    """
+
+    deadline: Optional[float] = None
+    events: FrozenSet[str] = frozenset()
+
+    @staticmethod
+    def merge(wakeups: Iterable["Wakeup"]) -> "Wakeup":
+        """Combine wakeups, waking at the earliest deadline or any event.
+
+        Args:
+            wakeups: The wakeups to combine.
+
+        Returns:
+            The combined wakeup.
+        """
+        deadlines = []
+        events: FrozenSet[str] = frozenset()
+        for wakeup in wakeups:
+            if wakeup.deadline is not None:
+                deadlines.append(wakeup.deadline)
+            events |= wakeup.events
+        return Wakeup(deadline=min(deadlines, default=None), events=events)
+
+
+class Wakeups:
+    """The blocked agents of a session and the events that wake them.
+
+    Events are notified from any thread. Each event is numbered, so an
+    agent that is blocked after stepping is not blocked if one of its
+    events was notified while it stepped.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without blocked agents."""
+        self._condition = threading.Condition()
+        self._blocked: Dict[str, Wakeup] = {}
+        self._notified: Dict[str, int] = {}
+        self.sequence = 0
+        # Number of times a blocked agent was woken by an event
+        self.woken = 0
+
+    def notify(self, event: str) -> None:
+        """Notify an event, waking the agents blocked on it.
+
+        Args:
+            event: The event.
+        """
+        with self._condition:
+            self.sequence += 1
+            self._notified[event] = self.sequence
+            woken = [
+                agent_id
+                for agent_id, wakeup in self._blocked.items()
+                if event in wakeup.events
+            ]
+            for agent_id in woken:
+                del self._blocked[agent_id]
+            if woken:
+                self.woken += 1
+                self._condition.notify_all()
+
+    def block(self, agent_id: str, wakeup: Wakeup, since: int) -> bool:
+        """Block an agent until its wakeup.
+
+        Args:
+            agent_id: The agent.
+            wakeup: When the agent can step again.
+            since: The ``sequence`` before the agent stepped.
+
+        A deadline that has already passed does not wake the agent again,
+        so an agent that still waits after its deadline is only woken by
+        its events.
+
+        Returns:
+            True if the agent was blocked, False if one of its events was
+            notified since.
+        """
+        with self._condition:
+            if any(
+                self._notified.get(event, 0) > since for event in wakeup.events
+            ):
+                return False
+            if wakeup.deadline is not None and wakeup.deadline <= time.time():
+                wakeup = Wakeup(events=wakeup.events)
+            self._blocked[agent_id] = wakeup
+            return True
+
+    def is_blocked(self, agent_id: str) -> bool:
+        """Check if an agent is blocked, unblocking it after its deadline.
+
+        Args:
+            agent_id: The agent.
+
+        Returns:
+            True if the agent is blocked.
+        """
+        with self._condition:
+            wakeup = self._blocked.get(agent_id)
+            if wakeup is None:
+                return False
+            if wakeup.deadline is not None and time.time() >= wakeup.deadline:
+                del self._blocked[agent_id]
+                return False
+            return True
+
+    def clear(self) -> None:
+        """Unblock all agents."""
+        with self._condition:
+            self._blocked.clear()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep until the next deadline of a blocked agent or an event.
+
+        Args:
+            timeout: The most seconds to sleep, None for no limit.
+
+        Returns:
+            False without sleeping if no blocked agent has a deadline, so
+            only another thread could wake them. Deadlines that had passed
+            when their agent was blocked do not count, see ``block``.
+        """
+        with self._condition:
+            woken = self.woken
+            deadline = min(
+                (
+                    wakeup.deadline
+                    for wakeup in self._blocked.values()
+                    if wakeup.deadline is not None
+                ),
+                default=None,
+            )
+            if deadline is None:
+                return False
+            if timeout is not None:
+                deadline = min(deadline, time.time() + timeout)
+            while self.woken == woken:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return True
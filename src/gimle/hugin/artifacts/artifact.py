@@ -1,8 +1,18 @@
 """Gimle Artifacts."""
 
 from dataclasses import asdict, dataclass, fields
-from typing import TYPE_CHECKING, Any, Callable, ClassVar, Dict, Optional, Type
-
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Optional,
+    Type,
+)
+
+from gimle.hugin.utils.dirty import DirtyTracked
 from gimle.hugin.utils.uuid import with_uuid
 
 if TYPE_CHECKING:
@@ -13,7 +23,7 @@ if TYPE_CHECKING:
 
 @with_uuid
 @dataclass
-class Artifact:
+class Artifact(DirtyTracked):
     """An artifact is a collection of interactions.
 
     Attributes:
@@ -22,6 +32,7 @@ class Artifact:
     """
 
     _registry: ClassVar[Dict[str, Type["Artifact"]]] = {}
+    _untracked_attributes: ClassVar[FrozenSet[str]] = frozenset({"_storage"})
     interaction: Optional["Interaction"]
 
     @property
@@ -2,7 +2,6 @@
 
 import logging
 import re
-from collections import defaultdict
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
@@ -90,8 +89,8 @@ class ArtifactQueryEngine:
         Returns:
             A list of ArtifactQueryResult objects, sorted by relevance score.
         """
-        # Get all artifact IDs from storage
-        artifact_ids = self.storage.list_artifacts()
+        # Get candidate artifact IDs (indexed storages filter by type)
+        artifact_ids = self.storage.query_artifacts(artifact_type=artifact_type)
 
         # Pre-load all ratings to avoid N+1 queries
         ratings_by_artifact = self._load_ratings_map()
@@ -198,11 +197,16 @@ class ArtifactQueryEngine:
         Returns:
             A list of ArtifactQueryResult objects, sorted by creation time.
         """
-        artifact_ids = self.storage.list_artifacts()
+        artifact_ids = self.storage.query_artifacts(
+            artifact_type=artifact_type, newest_first=True
+        )
         ratings_by_artifact = self._load_ratings_map()
         results: List[ArtifactQueryResult] = []
 
         for artifact_id in artifact_ids:
+            # IDs are sorted newest first, so stop once we have enough
+            if len(results) >= limit:
+                break
             try:
                 artifact = self.storage.load_artifact(artifact_id)
 
@@ -371,14 +375,7 @@ class ArtifactQueryEngine:
         Returns:
             Dict mapping artifact_id to list of ratings.
         """
-        ratings: Dict[str, List[int]] = defaultdict(list)
-        for feedback_uuid in self.storage.list_feedback():
-            try:
-                feedback = self.storage.load_feedback(feedback_uuid)
-                ratings[feedback.artifact_id].append(feedback.rating)
-            except (ValueError, OSError) as e:
-                logger.warning("Skipping feedback %s: %s", feedback_uuid, e)
-        return dict(ratings)
+        return self.storage.load_feedback_ratings()
 
     def _get_rating_boost(
         self,
@@ -71,6 +71,8 @@ def cmd_run(args: argparse.Namespace) -> int:
         sys.argv.extend(["--parameters", args.parameters])
     if args.max_steps:
         sys.argv.extend(["--max-steps", str(args.max_steps)])
+    if args.max_workers:
+        sys.argv.extend(["--max-workers", str(args.max_workers)])
     if args.storage_path:
         sys.argv.extend(["--storage-path", args.storage_path])
     if args.log_level:
@@ -85,6 +87,68 @@ def cmd_run(args: argparse.Namespace) -> int:
     return run_main()
 
 
+def cmd_batch(args: argparse.Namespace) -> int:
+    """Run many sessions in worker processes."""
+    from gimle.hugin.cli.run_batch import main as batch_main
+
+    sys.argv = ["hugin batch", args.batch_file]
+    if args.task_path:
+        sys.argv.extend(["--task-path", args.task_path])
+    if args.workers:
+        sys.argv.extend(["--workers", str(args.workers)])
+    if args.max_steps:
+        sys.argv.extend(["--max-steps", str(args.max_steps)])
+    if args.retries:
+        sys.argv.extend(["--retries", str(args.retries)])
+    if args.storage_path:
+        sys.argv.extend(["--storage-path", args.storage_path])
+    if args.per_worker_storage:
+        sys.argv.append("--per-worker-storage")
+    if args.cache_entries:
+        sys.argv.extend(["--cache-entries", str(args.cache_entries)])
+    if args.results:
+        sys.argv.extend(["--results", args.results])
+    if args.queue:
+        sys.argv.extend(["--queue", args.queue])
+    if args.model:
+        sys.argv.extend(["--model", args.model])
+    if args.log_level:
+        sys.argv.extend(["--log-level", args.log_level])
+
+    return batch_main()
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    """Step the sessions of a job queue."""
+    from gimle.hugin.cli.run_worker import main as worker_main
+
+    sys.argv = ["hugin worker", args.queue_path]
+    if args.task_path:
+        sys.argv.extend(["--task-path", args.task_path])
+    if args.storage_path:
+        sys.argv.extend(["--storage-path", args.storage_path])
+    if args.processes:
+        sys.argv.extend(["--processes", str(args.processes)])
+    if args.slice_seconds:
+        sys.argv.extend(["--slice-seconds", str(args.slice_seconds)])
+    if args.slice_steps:
+        sys.argv.extend(["--slice-steps", str(args.slice_steps)])
+    if args.lease_seconds:
+        sys.argv.extend(["--lease-seconds", str(args.lease_seconds)])
+    if args.max_attempts:
+        sys.argv.extend(["--max-attempts", str(args.max_attempts)])
+    if args.exit_when_empty:
+        sys.argv.append("--exit-when-empty")
+    if args.checkpoints:
+        sys.argv.append("--checkpoints")
+    if args.cache_entries:
+        sys.argv.extend(["--cache-entries", str(args.cache_entries)])
+    if args.log_level:
+        sys.argv.extend(["--log-level", args.log_level])
+
+    return worker_main()
+
+
 def cmd_interactive(args: argparse.Namespace) -> int:
     """Run the interactive TUI for agent management."""
     from gimle.hugin.cli.interactive import InteractiveApp
@@ -260,6 +324,8 @@ def main() -> int:
 Examples:
     hugin create              Interactive agent builder
     hugin run -t hello        Run an agent task
+    hugin batch tasks.jsonl   Run many sessions in worker processes
+    hugin worker jobs.db      Step the sessions of a job queue
     hugin monitor             Launch monitoring dashboard
     hugin apps                List available apps
     hugin app rap-machine     Run the rap-machine app
@@ -321,6 +387,11 @@ Examples:
     run_parser.add_argument(
         "--max-steps", type=int, help="Maximum steps (default: 100)"
     )
+    run_parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="Step up to this many agents in parallel threads",
+    )
     run_parser.add_argument("--storage-path", help="Path for agent storage")
     run_parser.add_argument(
         "-l",
@@ -328,7 +399,10 @@ Examples:
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
         help="Logging level",
     )
-    run_parser.add_argument("--model", help="Override LLM model")
+    run_parser.add_argument(
+        "--model",
+        help="Override LLM model (fake:<script> for a scripted model)",
+    )
     run_parser.add_argument(
         "--monitor",
         action="store_true",
@@ -342,6 +416,107 @@ Examples:
     )
     run_parser.set_defaults(func=cmd_run)
 
+    # batch command
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run many independent sessions in worker processes",
+        description="Run the sessions of a JSON lines file in parallel",
+    )
+    batch_parser.add_argument(
+        "batch_file", help="JSON lines file of task, config, parameters"
+    )
+    batch_parser.add_argument(
+        "-p", "--task-path", help="Agent directory of the sessions"
+    )
+    batch_parser.add_argument(
+        "-w", "--workers", type=int, help="Worker processes (default: CPUs)"
+    )
+    batch_parser.add_argument(
+        "--max-steps", type=int, help="Maximum steps per session"
+    )
+    batch_parser.add_argument(
+        "--retries", type=int, help="Retries of failed sessions"
+    )
+    batch_parser.add_argument("--storage-path", help="Path for agent storage")
+    batch_parser.add_argument(
+        "--per-worker-storage",
+        action="store_true",
+        help="Give each worker its own storage",
+    )
+    batch_parser.add_argument(
+        "--cache-entries",
+        type=int,
+        help="Most objects a worker's storage keeps in memory",
+    )
+    batch_parser.add_argument(
+        "--results", help="JSON lines file for the session results"
+    )
+    batch_parser.add_argument(
+        "--queue", help="Queue the sessions in this job queue for workers"
+    )
+    batch_parser.add_argument(
+        "--model",
+        help="Override LLM model (fake:<script> for a scripted model)",
+    )
+    batch_parser.add_argument(
+        "-l",
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging level",
+    )
+    batch_parser.set_defaults(func=cmd_batch)
+
+    # worker command
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Step the sessions of a job queue",
+        description="Lease sessions from a SQLite job queue and step them",
+    )
+    worker_parser.add_argument("queue_path", help="SQLite job queue file")
+    worker_parser.add_argument(
+        "-p", "--task-path", help="Agent directory of jobs without one"
+    )
+    worker_parser.add_argument(
+        "--storage-path", help="Storage shared by the workers"
+    )
+    worker_parser.add_argument(
+        "-n", "--processes", type=int, help="Worker processes (default: 1)"
+    )
+    worker_parser.add_argument(
+        "--slice-seconds", type=float, help="Seconds per session per lease"
+    )
+    worker_parser.add_argument(
+        "--slice-steps", type=int, help="Maximum steps per lease"
+    )
+    worker_parser.add_argument(
+        "--lease-seconds", type=float, help="Seconds a lease lasts"
+    )
+    worker_parser.add_argument(
+        "--max-attempts", type=int, help="Failed leases before a job fails"
+    )
+    worker_parser.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="Exit when no job is left instead of waiting",
+    )
+    worker_parser.add_argument(
+        "--checkpoints",
+        action="store_true",
+        help="Keep a checkpoint log per session for fast resume",
+    )
+    worker_parser.add_argument(
+        "--cache-entries",
+        type=int,
+        help="Most objects the storage keeps in memory",
+    )
+    worker_parser.add_argument(
+        "-l",
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging level",
+    )
+    worker_parser.set_defaults(func=cmd_worker)
+
     # interactive command
     interactive_parser = subparsers.add_parser(
         "interactive",
@@ -377,8 +377,9 @@ class AppState:
                             continue
 
                         try:
-                            with open(agent_file) as af:
-                                agent_data = json.load(af)
+                            agent_data = self.storage.load_agent_metadata(
+                                agent_id
+                            )
 
                             # Get interactions
                             interactions = agent_data.get("stack", {}).get(
@@ -455,8 +456,7 @@ class AppState:
                     continue
 
                 try:
-                    with open(agent_file) as f:
-                        agent_data = json.load(f)
+                    agent_data = self.storage.load_agent_metadata(agent_id)
 
                     config_name = "unknown"
                     if "config" in agent_data:
@@ -611,8 +611,7 @@ class AppState:
         try:
             import json
 
-            with open(agent_file) as f:
-                agent_data = json.load(f)
+            agent_data = self.storage.load_agent_metadata(agent_id)
 
             stack_data = agent_data.get("stack", {})
             interaction_ids = stack_data.get("interactions", [])
@@ -925,8 +924,7 @@ class AppState:
 
         try:
             # Load the agent data
-            with open(agent_file) as f:
-                agent_data = json.load(f)
+            agent_data = self.storage.load_agent_metadata(agent_id)
 
             stack_data = agent_data.get("stack", {})
             interaction_ids = stack_data.get("interactions", [])
@@ -1019,16 +1017,13 @@ class AppState:
         Returns:
             True if deletion was successful, False otherwise
         """
-        import json
-
         agent_file = self.storage_path / "agents" / agent_id
         if not agent_file.exists():
             return False
 
         try:
             # Load agent to get interaction list
-            with open(agent_file) as f:
-                agent_data = json.load(f)
+            agent_data = self.storage.load_agent_metadata(agent_id)
 
             # Delete all interactions
             stack_data = agent_data.get("stack", {})
@@ -1041,8 +1036,9 @@ class AppState:
                         )
                         interaction_file.unlink(missing_ok=True)
 
-            # Delete the agent file
+            # Delete the agent file and its stack journal
             agent_file.unlink(missing_ok=True)
+            (self.storage_path / "stacks" / agent_id).unlink(missing_ok=True)
 
             # Remove controller if exists
             if agent_id in self.controllers:
@@ -1126,8 +1122,7 @@ class AppState:
 
         try:
             # Load the agent data
-            with open(agent_file) as f:
-                agent_data = json.load(f)
+            agent_data = self.storage.load_agent_metadata(agent_id)
 
             # Generate a UUID for the interaction
             interaction_id = generate_uuid()
@@ -4,7 +4,9 @@
 This monitor provides live updates through two mechanisms:
 
 1. File watching (default): Monitors the storage directory for file changes.
-   Used when agents run in separate processes from the monitor.
+   Used when agents run in separate processes from the monitor. For SQLite
+   storage (a ``.db`` storage path) the database is polled for new rows
+   instead.
 
 2. Direct callbacks: When agents run in the same process, they can use
    LocalStorage with get_monitor_callback() for immediate updates without
@@ -18,6 +20,17 @@ Example with direct callback:
     callback = get_monitor_callback()
     storage = LocalStorage(base_path="./storage", callback=callback)
     # Now any saves will immediately trigger monitor updates
+
+   The environment can also stream the LLM responses of the agents to the
+   monitor as they are generated:
+
+    from gimle.hugin.cli.monitor_agents import get_monitor_stream_callback
+
+    env = Environment.load(
+        "./my_agent",
+        storage=storage,
+        stream_callback=get_monitor_stream_callback(),
+    )
 """
 
 import argparse
@@ -36,7 +49,10 @@ from urllib.parse import parse_qs, urlparse
 from gimle.hugin.agent.agent import Agent
 from gimle.hugin.agent.environment import Environment
 from gimle.hugin.artifacts.feedback import ArtifactFeedback
-from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.llm.models.model import StreamDelta
+from gimle.hugin.storage.factory import create_storage
+from gimle.hugin.storage.sqlite import SqliteStorage, is_sqlite_path
+from gimle.hugin.storage.storage import Storage
 from gimle.hugin.ui.components import ComponentRegistry
 from gimle.hugin.ui.static import (
     get_mime_type,
@@ -54,8 +70,9 @@ _loaded_extension_paths: set = set()
 def load_extensions_from_storage(storage_path: Path) -> bool:
     """Load custom artifact types and UI components from storage metadata.
 
-    Checks for .hugin_metadata.json in the storage directory and loads
-    any extensions specified by the package_paths field.
+    Checks for .hugin_metadata.json in the storage directory (or the
+    package paths recorded in a SQLite storage database) and loads any
+    extensions specified by the package_paths field.
 
     Tracks loaded paths to avoid reloading on subsequent calls.
 
@@ -68,13 +85,20 @@ def load_extensions_from_storage(storage_path: Path) -> bool:
     metadata_path = storage_path / ".hugin_metadata.json"
     new_extensions_loaded = False
 
+    if is_sqlite_path(storage_path):
+        metadata_path = storage_path
     if not metadata_path.exists():
         logger.debug(f"No metadata file found at {metadata_path}")
         return False
 
     try:
-        with open(metadata_path) as f:
-            package_paths = json.load(f).get("package_paths", [])
+        if is_sqlite_path(storage_path):
+            storage = _open_storage(storage_path)
+            assert isinstance(storage, SqliteStorage)
+            package_paths = storage.list_package_paths()
+        else:
+            with open(metadata_path) as f:
+                package_paths = json.load(f).get("package_paths", [])
 
         for package_path in package_paths:
             if package_path in _loaded_extension_paths:
@@ -104,7 +128,11 @@ def load_extensions_from_storage(storage_path: Path) -> bool:
 
 
 # Global queue for storage update events
-_update_queue: "queue.Queue[Dict[str, str]]" = queue.Queue()
+_update_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+# Number of connected live update streams. Streamed responses are only
+# queued while a client is listening, to not fill the queue with tokens.
+_stream_clients = 0
+_stream_clients_lock = threading.Lock()
 
 # Cache for discover_agents results (to avoid repeated slow disk reads)
 _agents_cache_lock = threading.Lock()
@@ -159,13 +187,25 @@ def to_jsonable(value: Any) -> Any:
     return str(value)
 
 
+def _stream_delta_callback(agent_id: str, delta: StreamDelta) -> None:
+    """For streamed LLM responses - pushes deltas to the update queue."""
+    if not _stream_clients:
+        return
+    _update_queue.put(
+        {"type": "stream", "agent_id": agent_id, **delta.to_dict()}
+    )
+
+
 def _storage_update_callback(obj_type: str, obj_id: str) -> None:
     """For storage updates - pushes to update queue.
 
-    Note: We no longer invalidate the cache here. The cache TTL (3 seconds)
-    provides natural rate limiting. This prevents cache thrashing when an
-    agent is actively creating many interactions.
+    Note: We no longer invalidate the agents cache here. The cache TTL (3
+    seconds) provides natural rate limiting. This prevents cache thrashing
+    when an agent is actively creating many interactions. The object cache
+    of the monitor storage is cleared, since the objects are written by
+    other processes.
     """
+    _clear_storage_caches()
     update = {"type": "update", "object_type": obj_type, "object_id": obj_id}
     _update_queue.put(update)
     logger.debug(f"Storage update: {obj_type} {obj_id}")
@@ -188,6 +228,20 @@ def get_monitor_callback() -> Callable[[str, str], None]:
     return _storage_update_callback
 
 
+def get_monitor_stream_callback() -> Callable[[str, StreamDelta], None]:
+    """Get the callback function for streamed LLM responses.
+
+    Pass it as the ``stream_callback`` of an Environment in the same
+    process, to send the text and tool call arguments of the responses to
+    the live update stream as they are generated.
+
+    Returns:
+        Callable[[str, StreamDelta], None]: Callback function that takes
+            (agent_id, delta) as parameters.
+    """
+    return _stream_delta_callback
+
+
 def _watch_storage_directory(
     storage_path: Path, stop_event: threading.Event
 ) -> None:
@@ -197,6 +251,10 @@ def _watch_storage_directory(
     When agents run in the same process, they can use LocalStorage with
     _storage_update_callback directly for more immediate updates.
     """
+    if is_sqlite_path(storage_path):
+        _watch_sqlite_storage(storage_path, stop_event)
+        return
+
     # Track file modification times
     file_mtimes: Dict[Path, float] = {}
     did_initial_scan = False
@@ -254,6 +312,66 @@ def _watch_storage_directory(
         stop_event.wait(1.0)
 
 
+def _watch_sqlite_storage(db_path: Path, stop_event: threading.Event) -> None:
+    """Poll a SQLite storage database for new or updated rows.
+
+    Uses the updated_at indexes, so each poll only reads changed rows.
+    """
+    storage: Optional[SqliteStorage] = None
+    # Only report changes made after the monitor started
+    last_seen = time.time()
+
+    while not stop_event.is_set():
+        try:
+            if storage is None and db_path.exists():
+                opened = _open_storage(db_path)
+                assert isinstance(opened, SqliteStorage)
+                storage = opened
+            if storage is not None:
+                for obj_type, uuid, updated_at in storage.list_changes(
+                    last_seen
+                ):
+                    last_seen = max(last_seen, updated_at)
+                    _storage_update_callback(obj_type, uuid)
+        except Exception as e:
+            logger.debug(f"Error polling {db_path}: {e}")
+        stop_event.wait(1.0)
+
+
+# Storages of the monitored storage paths, opened once per process
+_storages: Dict[Path, Storage] = {}
+_storages_lock = threading.Lock()
+
+
+def _open_storage(storage_path: Path) -> Storage:
+    """Get the storage at a storage path, opening it on first use.
+
+    The storage is shared by the request threads and the watcher, so the
+    directory or database is opened once per process.
+    """
+    with _storages_lock:
+        storage = _storages.get(storage_path)
+        if storage is None:
+            storage = create_storage(storage_path)
+            _storages[storage_path] = storage
+        return storage
+
+
+def _clear_storage_caches() -> None:
+    """Drop the cached objects of the open storages."""
+    with _storages_lock:
+        for storage in _storages.values():
+            storage.store.clear()
+
+
+def _close_storages() -> None:
+    """Close the open storages."""
+    with _storages_lock:
+        for storage in _storages.values():
+            storage.close()
+        _storages.clear()
+
+
 class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for agent monitoring."""
 
@@ -369,7 +487,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
     def serve_feedback_list(self, artifact_id: str) -> None:
         """Serve all feedback for an artifact as JSON."""
         try:
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
             fb_ids = storage.list_feedback(artifact_id=artifact_id)
 
             feedback_list = []
@@ -421,7 +539,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
                 self.send_error(400, "Comment exceeds 200 characters")
                 return
 
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
 
             # Verify artifact exists
             try:
@@ -491,7 +609,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
     def delete_session(self, session_id: str) -> None:
         """Delete a session and all its components."""
         try:
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
             environment = Environment(storage=storage)
 
             # Load the session
@@ -550,6 +668,9 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
                 logger.debug("Cache was refreshed while waiting for lock")
                 return _agents_cache_data
 
+            if is_sqlite_path(self.storage_path):
+                return self._discover_sqlite_agents()
+
             agents: List[Dict[str, Any]] = []
             storage_path = self.storage_path
 
@@ -566,6 +687,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
                 # Read session files directly (lightweight)
                 sessions_dir = storage_path / "sessions"
                 agents_dir = storage_path / "agents"
+                storage = _open_storage(storage_path)
 
                 if not sessions_dir.exists():
                     # Update cache even for empty result
@@ -594,8 +716,9 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
                                 continue
 
                             try:
-                                with open(agent_file, "r") as f:
-                                    agent_data = json.load(f)
+                                agent_data = storage.load_agent_metadata(
+                                    agent_uuid
+                                )
 
                                 config_data = agent_data.get("config", {})
                                 config_name = config_data.get("name", "Unknown")
@@ -658,13 +781,33 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
         finally:
             _agents_cache_lock.release()
 
+    def _discover_sqlite_agents(self) -> List[Dict[str, Any]]:
+        """Discover all agents with a single indexed query.
+
+        Must be called with _agents_cache_lock held.
+        """
+        global _agents_cache_data, _agents_cache_timestamp
+
+        agents: List[Dict[str, Any]] = []
+        if self.storage_path.exists():
+            try:
+                storage = _open_storage(self.storage_path)
+                assert isinstance(storage, SqliteStorage)
+                agents = storage.list_agent_summaries()
+            except Exception as e:
+                logger.error(f"Error discovering agents: {e}")
+
+        _agents_cache_data = agents
+        _agents_cache_timestamp = time.time()
+        return agents
+
     def load_agent(self, agent_id: str) -> Optional["Agent"]:
         """Load an agent by ID - searches through sessions."""
         try:
             from gimle.hugin.agent.session import Session
 
             logger.info(f"Loading agent {agent_id}")
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
             environment = Environment(storage=storage)
 
             # First check if it's an agent file directly
@@ -724,19 +867,18 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
         agents_dir = self.storage_path / "agents"
         agent_file = agents_dir / agent_id
 
-        if not agent_file.exists():
+        if not is_sqlite_path(self.storage_path) and not agent_file.exists():
             logger.debug(f"Agent file not found: {agent_id}")
             return None
 
         try:
             start_time = time.time()
 
-            # Read agent JSON directly
-            with open(agent_file, "r") as f:
-                agent_data = json.load(f)
-
             # Load interaction metadata (not full interactions with artifacts)
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
+
+            # Read agent JSON directly
+            agent_data = storage.load_agent_metadata(agent_id)
             interaction_summaries = []
 
             stack_data = agent_data.get("stack", {})
@@ -1353,6 +1495,10 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
     def serve_session_data(self, session_id: str) -> None:
         """Serve session details and agents list as JSON (lightweight loading)."""
         try:
+            if is_sqlite_path(self.storage_path):
+                self._serve_sqlite_session_data(session_id)
+                return
+
             storage_path = self.storage_path
             session_file = storage_path / "sessions" / session_id
 
@@ -1369,6 +1515,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
 
             # Read agent data directly (no full deserialization)
             agents_dir = storage_path / "agents"
+            storage = _open_storage(storage_path)
             agents: List[Dict[str, Any]] = []
 
             for agent_uuid in agent_uuids:
@@ -1377,8 +1524,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
                     continue
 
                 try:
-                    with open(agent_file, "r") as f:
-                        agent_data = json.load(f)
+                    agent_data = storage.load_agent_metadata(agent_uuid)
 
                     config_data = agent_data.get("config", {})
                     stack_data = agent_data.get("stack", {})
@@ -1426,6 +1572,38 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
             logger.error(f"Error loading session {session_id}: {e}")
             self.send_error(500, f"Error loading session: {str(e)}")
 
+    def _serve_sqlite_session_data(self, session_id: str) -> None:
+        """Serve session details from a SQLite storage using its indexes."""
+        storage = _open_storage(self.storage_path)
+        assert isinstance(storage, SqliteStorage)
+        try:
+            session_data = storage.load_session_metadata(session_id)
+        except ValueError:
+            self.send_error(404, "Session not found")
+            return
+
+        agents = storage.list_agent_summaries(session_id=session_id)
+        for agent in agents:
+            agent.pop("session_created_at", None)
+        agents.sort(
+            key=lambda a: a.get("last_modified") or 0,
+            reverse=True,
+        )
+
+        payload: Dict[str, Any] = {
+            "id": session_id,
+            "created_at": session_data.get("created_at"),
+            "last_modified": session_data["last_modified"],
+            "num_agents": len(agents),
+            "agents": agents,
+        }
+
+        self.send_response(200)
+        self.send_header("Content-type", "application/json; charset=utf-8")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode("utf-8"))
+
     def serve_agent_data(self, agent_id: str) -> None:
         """Serve agent data as JSON (uses lightweight loading for speed).
 
@@ -1600,7 +1778,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
     def serve_artifact_data(self, artifact_id: str) -> None:
         """Serve artifact data."""
         try:
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
             artifact = storage.load_artifact(artifact_id)
 
             # Use ComponentRegistry to render artifact
@@ -1618,7 +1796,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
     def serve_artifact_download(self, artifact_id: str) -> None:
         """Serve artifact for download with appropriate content type."""
         try:
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
             artifact = storage.load_artifact(artifact_id)
 
             artifact_type = artifact.__class__.__name__
@@ -1691,7 +1869,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
         load_extensions_from_storage(self.storage_path)
 
         try:
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
             artifact = storage.load_artifact(artifact_id)
 
             artifact_format = getattr(artifact, "format", "")
@@ -1819,7 +1997,7 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
         load_extensions_from_storage(self.storage_path)
 
         try:
-            storage = LocalStorage(base_path=str(self.storage_path))
+            storage = _open_storage(self.storage_path)
 
             # Load raw interaction metadata
             raw = storage.load_interaction_metadata(interaction_id)
@@ -1887,6 +2065,9 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
         self.end_headers()
         logger.info("SSE headers sent, starting stream loop")
 
+        global _stream_clients
+        with _stream_clients_lock:
+            _stream_clients += 1
         try:
             # Send initial connection message
             logger.info("Sending initial connection message")
@@ -1924,6 +2105,9 @@ class AgentMonitorHTTPRequestHandler(BaseHTTPRequestHandler):
             import traceback
 
             logger.error(traceback.format_exc())
+        finally:
+            with _stream_clients_lock:
+                _stream_clients -= 1
 
     def generate_monitor_page(self) -> str:
         """Generate the main monitoring page HTML."""
@@ -2011,6 +2195,9 @@ def run_monitor_server(
         print("\n\nShutting down server...")
         stop_event.set()  # Stop the file watcher thread
         print("Goodbye!")
+    finally:
+        httpd.server_close()
+        _close_storages()
 
 
 def main() -> int:
@@ -2022,7 +2209,10 @@ def main() -> int:
         "--storage-path",
         type=str,
         default="./storage",
-        help="Path to storage directory (default: ./storage)",
+        help=(
+            "Path to storage directory, or a .db file for SQLite storage "
+            "(default: ./storage)"
+        ),
     )
     parser.add_argument(
         "--config-path",
@@ -2062,9 +2252,9 @@ def main() -> int:
 
     setup_logging(level=getattr(logging, args.log_level))
 
-    # Ensure storage path exists
+    # Ensure storage path exists (SQLite databases are created on first use)
     storage_path = Path(args.storage_path)
-    if not storage_path.exists():
+    if not storage_path.exists() and not is_sqlite_path(storage_path):
         print(f"Warning: Storage path '{storage_path}' does not exist")
         storage_path.mkdir(parents=True, exist_ok=True)
         print(f"Created storage directory: {storage_path}")
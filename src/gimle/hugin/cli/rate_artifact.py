@@ -5,10 +5,13 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from gimle.hugin.artifacts.feedback import ArtifactFeedback
-from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.storage.factory import create_storage
+from gimle.hugin.storage.storage import Storage
 
 
-def _list_artifacts(storage: LocalStorage) -> List[Dict[str, Any]]:
+def _list_artifacts(
+    storage: Storage,
+) -> List[Dict[str, Any]]:
     """List all artifacts with type and preview."""
     artifacts: List[Dict[str, Any]] = []
     for artifact_id in storage.list_artifacts():
@@ -119,7 +122,7 @@ def rate_artifact_cli(
         print(f"Error: Storage path '{path}' does not exist.")
         return 1
 
-    storage = LocalStorage(base_path=storage_path)
+    storage = create_storage(storage_path)
 
     # Track whether we are in interactive mode
     interactive = False
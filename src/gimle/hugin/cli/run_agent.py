@@ -22,7 +22,7 @@ from gimle.hugin.cli.ui import show_header as _show_header
 
 # Import for completion summary
 from gimle.hugin.interaction.task_result import TaskResult
-from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.storage.factory import create_storage
 
 
 def print_completion_summary(session: Session, prefix: str = "    ") -> None:
@@ -418,7 +418,7 @@ def run_interactive(
 
     # Load environment to get available tasks
     storage_path = args.storage_path or "./storage"
-    storage = LocalStorage(base_path=storage_path)
+    storage = create_storage(storage_path)
 
     try:
         env = Environment.load(str(task_path), storage=storage)
@@ -596,16 +596,17 @@ def run_interactive(
         print(f"    Monitor:   http://localhost:{monitor_port}")
     print()
 
-    step_count, last_error = run_steps_with_spinner(
-        step_fn=session.step,
-        save_fn=lambda: storage.save_session(session),
-        max_steps=max_steps,
-        prefix="    ",
-        clear_width=40,
-        session=session,
-        interactive=True,
-        step_delay=getattr(args, "step_delay", 0.0),
-    )
+    with session.stepper() as step:
+        step_count, last_error = run_steps_with_spinner(
+            step_fn=step,
+            save_fn=lambda: storage.save_session(session),
+            max_steps=max_steps,
+            prefix="    ",
+            clear_width=40,
+            session=session,
+            interactive=True,
+            step_delay=getattr(args, "step_delay", 0.0),
+        )
     if last_error:
         logging.error("Error during agent step", exc_info=last_error)
 
@@ -656,6 +657,97 @@ def run_interactive(
     return 0 if not last_error else 1
 
 
+def resolve_model(
+    model_name: str, ollama_host: Optional[str] = None
+) -> Optional[str]:
+    """Resolve the registry name of a model override.
+
+    Ollama models (``ollama:MODEL``) are installed if needed, and fake
+    models (``fake:SCRIPT``) are created in the registry.
+
+    Args:
+        model_name: The model name given on the command line.
+        ollama_host: Optional remote Ollama server URL, defaults to the
+            OLLAMA_REMOTE_HOST env var.
+
+    Returns:
+        The registry name, or None if the model is not available.
+    """
+    if model_name.startswith("ollama:"):
+        ollama_model = model_name[7:]
+        host = ollama_host or os.environ.get("OLLAMA_REMOTE_HOST")
+        return _ensure_ollama_model(ollama_model, host=host)
+
+    from gimle.hugin.llm.models.model_registry import get_model_registry
+
+    registry = get_model_registry()
+    try:
+        # Creates fake models for the script in the name
+        registry.get_model(model_name)
+    except ValueError:
+        print(f"Warning: Model '{model_name}' not in registry")
+        print(f"Available: {list(registry.models.keys())}")
+        return None
+    return model_name
+
+
+def create_agents(
+    session: Session,
+    agent_specs: List[tuple],
+    parameters: Dict[str, Any],
+    model_override: Optional[str] = None,
+) -> None:
+    """Create the agents of a run in a session.
+
+    Args:
+        session: The session to create the agents in.
+        agent_specs: (task name, config name or None) pairs, one per agent.
+        parameters: The parameters of the tasks.
+        model_override: Optional registry name of the model for all agents.
+
+    Raises:
+        ValueError: If a config or task is not found, or the parameters
+            do not fit a task.
+    """
+    env = session.environment
+    configs = env.config_registry.registered()
+    if not configs:
+        raise ValueError("No configs found in task path")
+    default_config = list(configs.values())[0]
+
+    for task_name, config_name in agent_specs:
+        # Get config
+        if config_name:
+            try:
+                config = env.config_registry.get(config_name)
+            except ValueError:
+                raise ValueError(
+                    f"Config '{config_name}' not found\n"
+                    f"Available: {list(configs.keys())}"
+                )
+        else:
+            config = default_config
+
+        # Apply model override
+        if model_override:
+            config.llm_model = model_override
+
+        # Get task
+        try:
+            task_template = env.task_registry.get(task_name)
+        except ValueError:
+            raise ValueError(
+                f"Task '{task_name}' not found\n"
+                f"Available: {list(env.task_registry.registered().keys())}"
+            )
+
+        # Set parameters
+        task = task_template.set_input_parameters(parameters)
+
+        # Create agent
+        session.create_agent_from_task(config, task)
+
+
 def main() -> int:
     """Run an agent with a specified task."""
     parser = argparse.ArgumentParser(
@@ -735,11 +827,24 @@ Examples:
         help="Delay in seconds between steps (default: 0)",
     )
 
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help=(
+            "Step up to this many agents in parallel threads "
+            "(default: one after another)"
+        ),
+    )
+
     parser.add_argument(
         "--storage-path",
         type=str,
         default=None,
-        help="Path to storage directory (default: ./storage)",
+        help=(
+            "Path to storage directory, or a .db file for SQLite storage "
+            "(default: ./storage)"
+        ),
     )
 
     parser.add_argument(
@@ -768,7 +873,8 @@ Examples:
         "--model",
         type=str,
         default=None,
-        help="Override the LLM model. Use 'ollama:MODEL' to auto-install.",
+        help="Override the LLM model. Use 'ollama:MODEL' to auto-install, "
+        "'fake:SCRIPT' for a scripted model.",
     )
 
     parser.add_argument(
@@ -865,7 +971,7 @@ Examples:
 
     # Load the environment
     storage_path = args.storage_path or "./storage"
-    storage = LocalStorage(base_path=storage_path)
+    storage = create_storage(storage_path)
 
     try:
         env = Environment.load(
@@ -896,33 +1002,16 @@ Examples:
         agent_specs.append((args.task, args.config))
 
     # Validate all task and config names
-    configs = env.config_registry.registered()
-    if not configs:
+    if not env.config_registry.registered():
         print("Error: No configs found in task path")
         return 1
-    default_config = list(configs.values())[0]
 
     # Handle model override for all configs
     model_override = None
     if args.model:
-        model_name = args.model
-        if model_name.startswith("ollama:"):
-            ollama_model = model_name[7:]
-            ollama_host = args.ollama_host or os.environ.get(
-                "OLLAMA_REMOTE_HOST"
-            )
-            model_name = _ensure_ollama_model(ollama_model, host=ollama_host)
-            if model_name is None:
-                return 1
-        else:
-            from gimle.hugin.llm.models.model_registry import get_model_registry
-
-            registry = get_model_registry()
-            if model_name not in registry.models:
-                print(f"Warning: Model '{model_name}' not in registry")
-                print(f"Available: {list(registry.models.keys())}")
-                return 1
-        model_override = model_name
+        model_override = resolve_model(args.model, args.ollama_host)
+        if model_override is None:
+            return 1
 
     # Parse + validate parameters (apply defaults, enforce required)
     cli_parameters: Dict[str, Any] = {}
@@ -993,39 +1082,11 @@ Examples:
             session.state.create_namespace(ns_name)
             print(f"Created namespace: {ns_name}")
 
-    for task_name, config_name in agent_specs:
-        # Get config
-        if config_name:
-            try:
-                config = env.config_registry.get(config_name)
-            except ValueError:
-                print(f"Error: Config '{config_name}' not found")
-                print(f"Available: {list(configs.keys())}")
-                return 1
-        else:
-            config = default_config
-
-        # Apply model override
-        if model_override:
-            config.llm_model = model_override
-
-        # Get task
-        try:
-            task_template = env.task_registry.get(task_name)
-        except ValueError:
-            print(f"Error: Task '{task_name}' not found")
-            print(f"Available: {list(env.task_registry.registered().keys())}")
-            return 1
-
-        # Set parameters
-        try:
-            task = task_template.set_input_parameters(cli_parameters)
-        except ValueError as e:
-            print(f"Error: {e}")
-            return 1
-
-        # Create agent
-        session.create_agent_from_task(config, task)
+    try:
+        create_agents(session, agent_specs, cli_parameters, model_override)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
 
     # Show agent info
     if len(session.agents) == 1:
@@ -1043,16 +1104,17 @@ Examples:
         print(f"Monitor:   run `hugin monitor -s {storage_path}`")
     print()
 
-    step_count, last_error = run_steps_with_spinner(
-        step_fn=session.step,
-        save_fn=lambda: storage.save_session(session),
-        max_steps=args.max_steps,
-        prefix="",
-        clear_width=30,
-        session=session,
-        interactive=not args.non_interactive,
-        step_delay=args.step_delay,
-    )
+    with session.stepper(max_workers=args.max_workers) as step:
+        step_count, last_error = run_steps_with_spinner(
+            step_fn=step,
+            save_fn=lambda: storage.save_session(session),
+            max_steps=args.max_steps,
+            prefix="",
+            clear_width=30,
+            session=session,
+            interactive=not args.non_interactive,
+            step_delay=args.step_delay,
+        )
     if last_error:
         logging.error("Error during agent step", exc_info=last_error)
 
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""Run many independent sessions in parallel worker processes."""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.cli.run_agent import create_agents, resolve_model
+from gimle.hugin.jobs.queue import Job, JobQueue
+from gimle.hugin.jobs.worker import enqueue_session
+from gimle.hugin.storage.factory import create_storage
+from gimle.hugin.storage.sqlite import is_sqlite_path
+from gimle.hugin.storage.storage import Storage
+
+# Statuses of a batch result
+COMPLETED = "completed"
+MAX_STEPS = "max_steps"
+FAILED = "failed"
+
+
+@dataclass
+class BatchItem:
+    """A session of a batch, read from one line of the batch file.
+
+    Attributes:
+        task: The name of the task.
+        config: The name of the config, the first config if None.
+        parameters: The parameters of the task.
+        task_path: The agent directory, the one of the batch if None.
+        id: The name of the item in progress and results, the line
+            number if None.
+    """
+
+    task: str
+    config: Optional[str] = None
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    task_path: Optional[str] = None
+    id: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """The outcome of a session of a batch.
+
+    Attributes:
+        index: The index of the item in the batch file.
+        id: The id of the item.
+        status: COMPLETED, MAX_STEPS or FAILED.
+        attempts: The number of times the session was run.
+        session_id: The id of the session of the last attempt.
+        steps: The steps run.
+        seconds: The seconds the last attempt took.
+        tokens: The input and output tokens of the oracle responses.
+        worker: The process id of the worker that ran the last attempt.
+        error: The error of a failed session.
+    """
+
+    index: int
+    id: str
+    status: str
+    attempts: int = 1
+    session_id: Optional[str] = None
+    steps: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+    worker: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchOptions:
+    """The options every worker runs the sessions with.
+
+    Attributes:
+        task_path: The agent directory of items without their own.
+        storage_path: The storage path, shared by the workers.
+        per_worker_storage: Give each worker a storage of its own next to
+            ``storage_path``, so workers never write to the same storage.
+        cache_entries: The most objects the storage of a worker keeps in
+            memory, None for no limit.
+        max_steps: The maximum number of steps of a session.
+        model: Optional model override for all agents.
+        ollama_host: Optional remote Ollama server URL.
+        log_level: The logging level of the workers.
+    """
+
+    task_path: Optional[str] = None
+    storage_path: str = "./storage"
+    per_worker_storage: bool = False
+    cache_entries: Optional[int] = None
+    max_steps: int = 100
+    model: Optional[str] = None
+    ollama_host: Optional[str] = None
+    log_level: str = "WARNING"
+
+
+def load_batch(path: str) -> List[BatchItem]:
+    """Load the items of a batch file.
+
+    Each non-empty line is a JSON object with a ``task`` and optionally a
+    ``config``, ``parameters``, ``task_path`` and ``id``.
+
+    Args:
+        path: The path of the JSON lines file.
+
+    Returns:
+        The items, in order.
+
+    Raises:
+        ValueError: If a line is not a valid item.
+    """
+    items = []
+    keys = set(BatchItem.__dataclass_fields__)
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {number}: invalid JSON: {e}")
+            if not isinstance(data, dict) or "task" not in data:
+                raise ValueError(
+                    f"Line {number}: expected an object with a task"
+                )
+            unknown = set(data) - keys
+            if unknown:
+                raise ValueError(
+                    f"Line {number}: unknown keys {sorted(unknown)}"
+                )
+            item = BatchItem(**data)
+            if item.id is None:
+                item.id = str(number)
+            items.append(item)
+    return items
+
+
+def worker_storage_path(storage_path: str, worker: int) -> str:
+    """Get the storage path of a worker with a storage of its own.
+
+    Args:
+        storage_path: The storage path of the batch.
+        worker: The process id of the worker.
+
+    Returns:
+        A ``worker-<pid>`` directory inside a storage directory, or a
+        ``<name>-worker-<pid>`` database next to a SQLite database.
+    """
+    path = Path(storage_path)
+    if is_sqlite_path(path):
+        return str(path.with_name(f"{path.stem}-worker-{worker}{path.suffix}"))
+    return str(path / f"worker-{worker}")
+
+
+class _Worker:
+    """The state of a worker process, shared by the sessions it runs."""
+
+    def __init__(self, options: BatchOptions, model: Optional[str]):
+        """Initialize the worker.
+
+        Args:
+            options: The options of the batch.
+            model: The resolved registry name of the model override.
+        """
+        self.options = options
+        self.model = model
+        storage_path = options.storage_path
+        if options.per_worker_storage:
+            storage_path = worker_storage_path(storage_path, os.getpid())
+        self.storage: Storage = create_storage(
+            storage_path, cache_entries=options.cache_entries
+        )
+        # Agent directories are loaded once per worker
+        self.environments: Dict[str, Environment] = {}
+
+    def environment(self, task_path: str) -> Environment:
+        """Get the environment of an agent directory."""
+        if task_path not in self.environments:
+            self.environments[task_path] = Environment.load(
+                task_path, storage=self.storage
+            )
+        return self.environments[task_path]
+
+
+_worker: Optional[_Worker] = None
+
+
+def _init_worker(options: BatchOptions) -> None:
+    """Set up a worker process."""
+    global _worker
+    from gimle.hugin.utils.logging import setup_logging
+
+    setup_logging(level=getattr(logging, options.log_level))
+    model = None
+    if options.model:
+        model = resolve_model(options.model, options.ollama_host)
+        if model is None:
+            raise ValueError(f"Model '{options.model}' is not available")
+    _worker = _Worker(options, model)
+
+
+def run_item(index: int, item: BatchItem, attempt: int = 1) -> BatchResult:
+    """Run the session of a batch item in a worker process.
+
+    Args:
+        index: The index of the item in the batch.
+        item: The item.
+        attempt: The number of the attempt.
+
+    Returns:
+        The result, FAILED with the error if the session raised.
+    """
+    if _worker is None:
+        raise RuntimeError("run_item must run in a batch worker process")
+    options = _worker.options
+    result = BatchResult(
+        index=index,
+        id=item.id or str(index + 1),
+        status=FAILED,
+        attempts=attempt,
+        worker=os.getpid(),
+    )
+    start = time.monotonic()
+    try:
+        task_path = item.task_path or options.task_path
+        if not task_path:
+            raise ValueError("No task path for the item or the batch")
+        session = Session(environment=_worker.environment(task_path))
+        result.session_id = session.id
+        create_agents(
+            session,
+            [(item.task, item.config)],
+            item.parameters,
+            _worker.model,
+        )
+        result.steps = session.run(max_steps=options.max_steps)
+        result.tokens = sum(
+            session.scheduler.get_usage(agent.id).tokens
+            for agent in session.agents
+        )
+        if options.max_steps and result.steps >= options.max_steps:
+            result.status = MAX_STEPS
+        else:
+            result.status = COMPLETED
+    except Exception as e:
+        logging.getLogger(__name__).debug(
+            f"Batch item {result.id} failed", exc_info=e
+        )
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        _worker.storage.flush()
+        # Finished sessions are not needed by the next item
+        _worker.storage.store.clear()
+    result.seconds = time.monotonic() - start
+    return result
+
+
+def run_batch(
+    items: List[BatchItem],
+    options: BatchOptions,
+    workers: Optional[int] = None,
+    retries: int = 0,
+    output: Optional[TextIO] = sys.stdout,
+    results_file: Optional[TextIO] = None,
+) -> List[BatchResult]:
+    """Run the sessions of a batch on a pool of worker processes.
+
+    Failed sessions are run again, in a new session, up to ``retries``
+    times. Sessions that reach the maximum steps are not retried.
+
+    Args:
+        items: The items of the batch.
+        options: The options of the workers.
+        workers: The number of worker processes, one per CPU if None.
+        retries: How often a failed session is retried.
+        output: Where progress is printed as sessions finish, if anywhere.
+        results_file: Where each final result is written as a JSON line.
+
+    Returns:
+        The final result of each item, in the order of ``items``.
+    """
+    results: List[Optional[BatchResult]] = [None] * len(items)
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(options,)
+    ) as executor:
+        # The index and attempt of the item each future runs
+        pending: Dict[Future, Tuple[int, int]] = {
+            executor.submit(run_item, index, item): (index, 1)
+            for index, item in enumerate(items)
+        }
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, attempt = pending.pop(future)
+                item = items[index]
+                try:
+                    result: BatchResult = future.result()
+                    retry = result.status == FAILED and attempt <= retries
+                except Exception as e:
+                    # The worker died, which breaks the pool, so a retry
+                    # would fail too
+                    result = BatchResult(
+                        index=index,
+                        id=item.id or str(index + 1),
+                        status=FAILED,
+                        attempts=attempt,
+                        error=f"{type(e).__name__}: {e}",
+                    )
+                    retry = False
+                if retry:
+                    _print_progress(output, done, len(items), result, True)
+                    future = executor.submit(run_item, index, item, attempt + 1)
+                    pending[future] = (index, attempt + 1)
+                    continue
+                done += 1
+                results[index] = result
+                _print_progress(output, done, len(items), result, False)
+                if results_file is not None:
+                    results_file.write(json.dumps(asdict(result)) + "\n")
+                    results_file.flush()
+    return [result for result in results if result is not None]
+
+
+def enqueue_batch(
+    items: List[BatchItem],
+    options: BatchOptions,
+    queue: JobQueue,
+    model: Optional[str] = None,
+) -> List[Job]:
+    """Create the sessions of a batch and queue them for ``hugin worker``.
+
+    The sessions are saved to ``options.storage_path``, which the workers
+    of the queue must share.
+
+    Args:
+        items: The items of the batch.
+        options: The options of the batch.
+        queue: The queue of the workers.
+        model: The resolved registry name of the model override.
+
+    Returns:
+        The queued job of each item, in the order of ``items``.
+
+    Raises:
+        ValueError: If an item has no task path or its agents cannot be
+            created.
+    """
+    storage = create_storage(options.storage_path)
+    environments: Dict[str, Environment] = {}
+    jobs = []
+    for index, item in enumerate(items):
+        task_path = item.task_path or options.task_path
+        if not task_path:
+            raise ValueError(f"No task path for batch item {item.id}")
+        if task_path not in environments:
+            environments[task_path] = Environment.load(
+                task_path, storage=storage
+            )
+        session = Session(environment=environments[task_path])
+        try:
+            create_agents(
+                session, [(item.task, item.config)], item.parameters, model
+            )
+        except ValueError as e:
+            raise ValueError(f"Batch item {item.id or index + 1}: {e}")
+        storage.save_session(session)
+        jobs.append(
+            enqueue_session(
+                queue,
+                session.id,
+                task_path,
+                batch_id=item.id or str(index + 1),
+            )
+        )
+    storage.close()
+    return jobs
+
+
+def _print_progress(
+    output: Optional[TextIO],
+    done: int,
+    total: int,
+    result: BatchResult,
+    retrying: bool,
+) -> None:
+    """Print a line for a finished session."""
+    if output is None:
+        return
+    width = len(str(total))
+    line = (
+        f"[{done:>{width}}/{total}] {result.status:<9} {result.id}  "
+        f"{result.steps} steps  {result.seconds:.2f}s  {result.tokens} tokens"
+    )
+    if result.error:
+        line += f"  {result.error[:200]}"
+    if retrying:
+        line += f"  (retrying, attempt {result.attempts + 1})"
+    print(line, file=output, flush=True)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Get a percentile of values with the nearest-rank method.
+
+    Args:
+        values: The values.
+        percent: The percentile, from 0 to 100.
+
+    Returns:
+        The value of the percentile, 0 without values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(results: List[BatchResult], seconds: float) -> Dict[str, Any]:
+    """Summarize the results of a batch.
+
+    Args:
+        results: The final results.
+        seconds: The wall-clock seconds the batch took.
+
+    Returns:
+        The counts per status, retries, throughput, latency percentiles
+        of the sessions and their steps and tokens.
+    """
+    latencies = [result.seconds for result in results]
+    tokens = sum(result.tokens for result in results)
+    return {
+        "sessions": len(results),
+        COMPLETED: sum(r.status == COMPLETED for r in results),
+        MAX_STEPS: sum(r.status == MAX_STEPS for r in results),
+        FAILED: sum(r.status == FAILED for r in results),
+        "retries": sum(result.attempts - 1 for result in results),
+        "seconds": seconds,
+        "sessions_per_second": len(results) / seconds if seconds else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": max(latencies, default=0.0),
+        "steps": sum(result.steps for result in results),
+        "tokens": tokens,
+        "tokens_per_second": tokens / seconds if seconds else 0.0,
+    }
+
+
+def print_summary(summary: Dict[str, Any], output: TextIO = sys.stdout) -> None:
+    """Print the summary of a batch.
+
+    Args:
+        summary: The summary from ``summarize``.
+        output: Where to print it.
+    """
+    lines = [
+        f"Sessions:   {summary['sessions']} ({summary[COMPLETED]} completed, "
+        f"{summary[MAX_STEPS]} at max steps, {summary[FAILED]} failed)",
+        f"Retries:    {summary['retries']}",
+        f"Wall time:  {summary['seconds']:.1f}s "
+        f"({summary['sessions_per_second']:.2f} sessions/s)",
+        f"Latency:    p50 {summary['latency_p50']:.2f}s  "
+        f"p90 {summary['latency_p90']:.2f}s  "
+        f"p99 {summary['latency_p99']:.2f}s  "
+        f"max {summary['latency_max']:.2f}s",
+        f"Steps:      {summary['steps']}",
+        f"Tokens:     {summary['tokens']} "
+        f"({summary['tokens_per_second']:.0f}/s)",
+    ]
+    print("\n".join(lines), file=output)
+
+
+def main() -> int:
+    """Run the sessions of a batch file."""
+    parser = argparse.ArgumentParser(
+        description="Run many independent sessions in worker processes",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Each line of the batch file is a JSON object with a task and optionally a
+config, parameters, task_path and id:
+
+  {"task": "analyze", "parameters": {"dataset": "sales.csv"}}
+  {"task": "analyze", "config": "analyst", "id": "q3", "parameters": {}}
+
+Examples:
+  # Run on all CPUs
+  hugin batch tasks.jsonl -p apps/data_analyst
+
+  # 8 workers, each with its own storage, retrying failures twice
+  hugin batch tasks.jsonl -p apps/data_analyst --workers 8 \\
+      --per-worker-storage --retries 2 --results results.jsonl
+
+  # Load test without calling a provider
+  hugin batch tasks.jsonl -p apps/data_analyst --model fake:tools
+
+  # Queue the sessions for `hugin worker` processes instead
+  hugin batch tasks.jsonl -p apps/data_analyst --storage-path runs.db \\
+      --queue jobs.db
+        """,
+    )
+    parser.add_argument("batch_file", help="JSON lines file of sessions")
+    parser.add_argument(
+        "-p",
+        "--task-path",
+        type=str,
+        default=None,
+        help="Agent directory of lines without a task_path",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=100,
+        help="Maximum number of steps per session (default: 100)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="How often to retry a failed session (default: 0)",
+    )
+    parser.add_argument(
+        "--storage-path",
+        type=str,
+        default=None,
+        help=(
+            "Path to storage directory, or a .db file for SQLite storage "
+            "(default: ./storage)"
+        ),
+    )
+    parser.add_argument(
+        "--per-worker-storage",
+        action="store_true",
+        help="Give each worker its own storage inside the storage path",
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=None,
+        help=(
+            "Most objects the storage of a worker keeps in memory, least "
+            "recently used first out (default: no limit)"
+        ),
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        default=None,
+        help="Write the result of each session to this JSON lines file",
+    )
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=None,
+        help=(
+            "Create the sessions and add them to this SQLite job queue "
+            "for `hugin worker`, instead of running them"
+        ),
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="Override the LLM model. Use 'ollama:MODEL' to auto-install, "
+        "'fake:SCRIPT' for a scripted model.",
+    )
+    parser.add_argument(
+        "--ollama-host",
+        type=str,
+        default=None,
+        help="Remote Ollama server URL. Also reads OLLAMA_REMOTE_HOST.",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+        help="Set the logging level (default: WARNING)",
+    )
+    args = parser.parse_args()
+
+    from gimle.hugin.utils.logging import setup_logging
+
+    setup_logging(level=getattr(logging, args.log_level))
+
+    try:
+        items = load_batch(args.batch_file)
+    except (OSError, ValueError) as e:
+        print(f"Error reading {args.batch_file}: {e}")
+        return 1
+    if not items:
+        print(f"Error: No sessions in {args.batch_file}")
+        return 1
+    if args.workers is not None and args.workers < 1:
+        print("Error: --workers must be at least 1")
+        return 1
+    if args.cache_entries is not None and args.cache_entries < 1:
+        print("Error: --cache-entries must be at least 1")
+        return 1
+    if args.queue and args.per_worker_storage:
+        print("Error: --queue workers share one storage")
+        return 1
+
+    # Fail early on a model the workers could not use
+    if args.model and resolve_model(args.model, args.ollama_host) is None:
+        return 1
+
+    options = BatchOptions(
+        task_path=(
+            str(Path(args.task_path).resolve()) if args.task_path else None
+        ),
+        storage_path=args.storage_path or "./storage",
+        per_worker_storage=args.per_worker_storage,
+        cache_entries=args.cache_entries,
+        max_steps=args.max_steps,
+        model=args.model,
+        ollama_host=args.ollama_host,
+        log_level=args.log_level,
+    )
+    if args.queue:
+        return _enqueue(items, options, args.queue)
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Sessions:   {len(items)}")
+    print(f"Workers:    {workers}")
+    print(f"Storage:    {options.storage_path}")
+    print()
+
+    start = time.monotonic()
+    results_file = (
+        open(args.results, "w", encoding="utf-8") if args.results else None
+    )
+    try:
+        results = run_batch(
+            items,
+            options,
+            workers=workers,
+            retries=args.retries,
+            results_file=results_file,
+        )
+    finally:
+        if results_file is not None:
+            results_file.close()
+    summary = summarize(results, time.monotonic() - start)
+
+    print()
+    print_summary(summary)
+    return 1 if summary[FAILED] else 0
+
+
+def _enqueue(items: List[BatchItem], options: BatchOptions, path: str) -> int:
+    """Queue the sessions of a batch for ``hugin worker``."""
+    from gimle.hugin.jobs.sqlite import SqliteJobQueue
+
+    model = None
+    if options.model:
+        model = resolve_model(options.model, options.ollama_host)
+    queue = SqliteJobQueue(path)
+    try:
+        jobs = enqueue_batch(items, options, queue, model)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        queue.close()
+    print(f"Queued {len(jobs)} sessions in {path}")
+    print(f"Storage:    {options.storage_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Step the sessions of a job queue in worker processes."""
+
+import argparse
+import logging
+import multiprocessing
+import signal
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from gimle.hugin.jobs.sqlite import SqliteJobQueue
+from gimle.hugin.jobs.worker import QueueWorker
+from gimle.hugin.storage.factory import create_storage
+
+
+@dataclass
+class WorkerOptions:
+    """The options every worker process runs with.
+
+    Attributes:
+        queue_path: The SQLite job queue file.
+        storage_path: The storage of the sessions, shared by the workers.
+        task_path: The agent directory of jobs without their own.
+        slice_seconds: The seconds a session is stepped per lease.
+        slice_steps: The most steps per lease, None for no limit.
+        lease_seconds: The seconds a lease lasts without a heartbeat.
+        poll_seconds: The seconds to wait when the queue is empty.
+        wait_seconds: The seconds before a session that stopped to wait,
+            e.g. for a human, is leased again.
+        max_attempts: The failed leases after which a job is failed.
+        exit_when_empty: Exit when no job is available.
+        checkpoints: Keep checkpoint logs in a directory storage.
+        cache_entries: The most objects the storage keeps in memory, None
+            for no limit.
+        log_level: The logging level of the workers.
+    """
+
+    queue_path: str
+    storage_path: str = "./storage"
+    task_path: Optional[str] = None
+    slice_seconds: float = 30.0
+    slice_steps: Optional[int] = None
+    lease_seconds: float = 60.0
+    poll_seconds: float = 1.0
+    wait_seconds: float = 60.0
+    max_attempts: int = 3
+    exit_when_empty: bool = False
+    checkpoints: bool = False
+    cache_entries: Optional[int] = None
+    log_level: str = "WARNING"
+
+
+def run_worker(options: WorkerOptions) -> int:
+    """Run a worker until it is stopped or the queue is empty.
+
+    SIGTERM stops the worker after its current slice.
+
+    Args:
+        options: The options of the worker.
+
+    Returns:
+        The number of slices run.
+    """
+    from gimle.hugin.utils.logging import setup_logging
+
+    setup_logging(level=getattr(logging, options.log_level))
+    queue = SqliteJobQueue(
+        options.queue_path, max_attempts=options.max_attempts
+    )
+    storage = create_storage(
+        options.storage_path,
+        checkpoints=options.checkpoints,
+        cache_entries=options.cache_entries,
+    )
+    worker = QueueWorker(
+        queue,
+        storage,
+        task_path=options.task_path,
+        slice_seconds=options.slice_seconds,
+        slice_steps=options.slice_steps,
+        lease_seconds=options.lease_seconds,
+        poll_seconds=options.poll_seconds,
+        wait_seconds=options.wait_seconds,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    try:
+        return worker.run(exit_when_empty=options.exit_when_empty)
+    finally:
+        storage.close()
+        queue.close()
+
+
+def main() -> int:
+    """Step the sessions of a job queue."""
+    parser = argparse.ArgumentParser(
+        description="Lease sessions from a job queue and step them",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Workers lease a session, step it for a time slice while renewing the
+lease, save it and hand it back to the queue. Sessions of crashed workers
+are leased again once their lease runs out. All workers of a queue must
+share the storage the sessions were saved to.
+
+Examples:
+  # Queue a batch, then step it on 4 worker processes
+  hugin batch tasks.jsonl -p apps/data_analyst --storage-path runs.db \\
+      --queue jobs.db
+  hugin worker jobs.db --storage-path runs.db --processes 4
+
+  # Short slices, exit once every session is done
+  hugin worker jobs.db --storage-path runs.db --slice-seconds 5 \\
+      --exit-when-empty
+        """,
+    )
+    parser.add_argument("queue_path", help="SQLite job queue file")
+    parser.add_argument(
+        "-p",
+        "--task-path",
+        type=str,
+        default=None,
+        help="Agent directory of jobs without a task_path",
+    )
+    parser.add_argument(
+        "--storage-path",
+        type=str,
+        default=None,
+        help=(
+            "Path to storage directory, or a .db file for SQLite storage "
+            "(default: ./storage)"
+        ),
+    )
+    parser.add_argument(
+        "-n",
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--slice-seconds",
+        type=float,
+        default=30.0,
+        help="Seconds a session is stepped per lease (default: 30)",
+    )
+    parser.add_argument(
+        "--slice-steps",
+        type=int,
+        default=None,
+        help="Maximum steps of a session per lease (default: no limit)",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=60.0,
+        help="Seconds a lease lasts without a heartbeat (default: 60)",
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=1.0,
+        help="Seconds to wait when the queue is empty (default: 1)",
+    )
+    parser.add_argument(
+        "--wait-seconds",
+        type=float,
+        default=60.0,
+        help=(
+            "Seconds before a session that waits for a human, an event or "
+            "more budget is leased again (default: 60)"
+        ),
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Failed leases before a job is failed (default: 3)",
+    )
+    parser.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="Exit when no job is available instead of waiting for one",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        action="store_true",
+        help=(
+            "Keep a checkpoint log per session in a directory storage, "
+            "so sessions resume from their last step in one read"
+        ),
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=None,
+        help=(
+            "Most objects the storage keeps in memory, least recently "
+            "used first out (default: no limit)"
+        ),
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+        help="Set the logging level (default: WARNING)",
+    )
+    args = parser.parse_args()
+
+    if args.processes < 1:
+        print("Error: --processes must be at least 1")
+        return 1
+    if args.max_attempts < 1:
+        print("Error: --max-attempts must be at least 1")
+        return 1
+    if args.lease_seconds <= 0:
+        print("Error: --lease-seconds must be greater than 0")
+        return 1
+    if args.cache_entries is not None and args.cache_entries < 1:
+        print("Error: --cache-entries must be at least 1")
+        return 1
+
+    options = WorkerOptions(
+        queue_path=args.queue_path,
+        storage_path=args.storage_path or "./storage",
+        task_path=(
+            str(Path(args.task_path).resolve()) if args.task_path else None
+        ),
+        slice_seconds=args.slice_seconds,
+        slice_steps=args.slice_steps,
+        lease_seconds=args.lease_seconds,
+        poll_seconds=args.poll_seconds,
+        wait_seconds=args.wait_seconds,
+        max_attempts=args.max_attempts,
+        exit_when_empty=args.exit_when_empty,
+        checkpoints=args.checkpoints,
+        cache_entries=args.cache_entries,
+        log_level=args.log_level,
+    )
+    print(f"Queue:      {options.queue_path}")
+    print(f"Storage:    {options.storage_path}")
+    print(f"Processes:  {args.processes}")
+    print()
+
+    try:
+        if args.processes == 1:
+            run_worker(options)
+        else:
+            processes = [
+                multiprocessing.Process(
+                    target=run_worker, args=(options,), daemon=False
+                )
+                for _ in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+
+    queue = SqliteJobQueue(options.queue_path)
+    counts = queue.counts()
+    queue.close()
+    print(
+        "Jobs:       "
+        + ", ".join(f"{count} {status}" for status, count in counts.items())
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,9 @@ from typing import Optional
 from gimle.hugin.interaction.ask_oracle import AskOracle
 from gimle.hugin.interaction.interaction import Interaction
 from gimle.hugin.interaction.task_result import TaskResult
+from gimle.hugin.interaction.tool_result import ToolResult
 from gimle.hugin.llm.prompt.prompt import Prompt
+from gimle.hugin.tools.tool import ToolResponse
 from gimle.hugin.utils.uuid import with_uuid
 
 logger = logging.getLogger(__name__)
@@ -51,6 +53,20 @@ class AgentResult(Interaction):
         if tool_call_interaction is None:
             raise ValueError("ToolCall interaction not found")
 
+        if tool_call_interaction.pending_tool_calls:
+            # Make the next tool calls of the oracle before returning to it,
+            # with the result of the agent as the result of its call
+            self.stack.add_interaction(
+                ToolResult.create_from_tool_response(
+                    tool_call_interaction,
+                    ToolResponse(
+                        is_error=False,
+                        content=task_result_interaction.result or {},
+                    ),
+                )
+            )
+            return True
+
         prompt = Prompt(
             type="tool_result",
             tool_name=tool_call_interaction.tool,
@@ -63,6 +79,9 @@ class AgentResult(Interaction):
                 branch=self.branch,
                 prompt=prompt,
                 template_inputs=task_result_interaction.result or {},
+                tool_results=AskOracle.get_tool_results(
+                    self.stack, self.branch, prompt.tool_use_id
+                ),
             )
         )
 
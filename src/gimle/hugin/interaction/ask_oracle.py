@@ -2,7 +2,7 @@
 
 import logging
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from gimle.hugin.interaction.ask_human import AskHuman
 from gimle.hugin.interaction.interaction import Interaction
@@ -32,11 +32,72 @@ class AskOracle(Interaction):
         prompt: The prompt to send to the oracle.
         template_inputs: Template variables for rendering.
         include_in_context: Whether to include in LLM context rendering.
+        tool_results: When the oracle called several tools at once, the
+            results of all of them, in order, each with ``tool_use_id``,
+            ``tool_name`` and ``template_inputs``. The result of the
+            prompt's tool call is rendered from ``template_inputs`` of the
+            interaction instead.
     """
 
     prompt: Optional[Prompt] = None
     template_inputs: Optional[Dict[str, Any]] = None
     include_in_context: bool = True
+    tool_results: Optional[List[Dict[str, Any]]] = None
+
+    @staticmethod
+    def get_tool_results(
+        stack: "Stack", branch: Optional[str], tool_use_id: Optional[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get the results to return with a result of several tool calls.
+
+        Every tool call of the oracle needs a result in the next message,
+        calls that were not made get an error.
+
+        Args:
+            stack: The stack of the oracle.
+            branch: The branch of the oracle.
+            tool_use_id: The id of the tool call the result is for.
+
+        Returns:
+            The results of the tool calls of the last OracleResponse, see
+            ``tool_results``, or None if it made a single tool call.
+        """
+        from gimle.hugin.interaction.tool_call import ToolCall
+
+        oracle_response, results = stack.get_last_tool_call_batch(branch)
+        if oracle_response is None:
+            return None
+        tool_calls = oracle_response.tool_calls
+        if len(tool_calls) < 2:
+            return None
+        # Chained tool calls keep the id, so the last result is returned
+        latest = {result.tool_call_id: result for result in results}
+        tool_results = []
+        for tool_call in tool_calls:
+            call_id = ToolCall.get_tool_call_id(stack, tool_call)
+            if call_id is None:
+                continue
+            template_inputs = None
+            if call_id != tool_use_id:
+                result = latest.get(call_id)
+                if result is None:
+                    template_inputs = {
+                        "error": "The tool call was not made",
+                        "is_error": True,
+                    }
+                else:
+                    template_inputs = {
+                        **(result.result or {}),
+                        **{"is_error": result.is_error},
+                    }
+            tool_results.append(
+                {
+                    "tool_use_id": call_id,
+                    "tool_name": tool_call["tool_call"],
+                    "template_inputs": template_inputs,
+                }
+            )
+        return tool_results
 
     @staticmethod
     def create_from_external_input(
@@ -92,14 +153,7 @@ class AskOracle(Interaction):
                 branch_interactions[-3], ToolResult
             ):
                 tool_name = branch_interactions[-3].tool_name
-                tool = next(
-                    (
-                        tool
-                        for tool in human_response.stack.get_tools()
-                        if tool.name == tool_name
-                    ),
-                    None,
-                )
+                tool = human_response.stack.get_tool(tool_name)
                 if tool:
                     respond_with_text = tool.options.respond_with_text
                     tool_call_id = branch_interactions[-3].tool_call_id
@@ -129,6 +183,15 @@ class AskOracle(Interaction):
             branch=human_response.branch,
             prompt=prompt,
             template_inputs=template_inputs,
+            tool_results=(
+                AskOracle.get_tool_results(
+                    human_response.stack,
+                    human_response.branch,
+                    prompt.tool_use_id,
+                )
+                if prompt.type == "tool_result"
+                else None
+            ),
         )
 
     @staticmethod
@@ -143,6 +206,7 @@ class AskOracle(Interaction):
         Returns:
             The created ask oracle interaction.
         """
+        tool_results = None
         if tool_result.tool_call_id is None:
             prompt = Prompt(type="text")
         else:
@@ -151,6 +215,9 @@ class AskOracle(Interaction):
                 tool_use_id=tool_result.tool_call_id,
                 tool_name=tool_result.tool_name,
             )
+            tool_results = AskOracle.get_tool_results(
+                tool_result.stack, tool_result.branch, tool_result.tool_call_id
+            )
         template_inputs = {
             **(tool_result.result or {}),
             **{"is_error": tool_result.is_error},
@@ -164,6 +231,7 @@ class AskOracle(Interaction):
             prompt=prompt,
             template_inputs=template_inputs,
             include_in_context=tool_result.include_in_context,
+            tool_results=tool_results,
         )
 
     @staticmethod
@@ -224,6 +292,7 @@ class AskOracle(Interaction):
             "prompt": prompt,
             "template_inputs": data.get("template_inputs", {}),
             "include_in_context": data.get("include_in_context", True),
+            "tool_results": data.get("tool_results"),
         }
         if uuid_value is not None:
             kwargs["uuid"] = uuid_value
@@ -241,9 +310,35 @@ class AskOracle(Interaction):
         Returns:
             True if the ask oracle interaction was successful, False otherwise.
         """
-        from gimle.hugin.interaction.oracle_response import OracleResponse
         from gimle.hugin.llm.completion import chat_completion
 
+        request, captured = self._prepare_completion()
+        assistant_response = chat_completion(**request)
+        self._add_response(assistant_response, captured)
+        return True
+
+    async def astep(self) -> bool:
+        """Step the ask oracle interaction, awaiting the oracle.
+
+        Returns:
+            True if the ask oracle interaction was successful, False otherwise.
+        """
+        from gimle.hugin.llm.completion import achat_completion
+
+        request, captured = self._prepare_completion()
+        assistant_response = await achat_completion(**request)
+        self._add_response(assistant_response, captured)
+        return True
+
+    def _prepare_completion(
+        self,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Render the completion request.
+
+        Returns:
+            The chat completion arguments and the rendered prompts to
+            capture in the OracleResponse.
+        """
         if self.prompt is None:
             raise ValueError("AskOracle prompt is None")
         if self.template_inputs is None:
@@ -262,28 +357,47 @@ class AskOracle(Interaction):
         system_prompt = renderer.render_system_prompt(self.template_inputs)
         llm_model = self.stack.agent.config.llm_model
 
-        rendered_system_prompt = None
-        rendered_user_message = None
+        captured: Dict[str, Any] = {
+            "rendered_system_prompt": None,
+            "rendered_user_message": None,
+        }
         if self.stack.agent.environment.capture_rendered_prompts:
             from gimle.hugin.llm.prompt.message import render_user_message
 
-            rendered_system_prompt = system_prompt
-            rendered_user_message = render_user_message(self, reduced=False)
+            captured["rendered_system_prompt"] = system_prompt
+            captured["rendered_user_message"] = render_user_message(
+                self, reduced=False
+            )
+
+        request: Dict[str, Any] = {
+            "system_prompt": system_prompt,
+            "messages": interaction_messages,
+            "tools": tools,
+            "llm_model": llm_model,
+        }
+        environment = self.stack.agent.environment
+        if environment.completion_cache is not None:
+            request["cache"] = environment.completion_cache
+        stream_callback = environment.stream_callback
+        if stream_callback is not None:
+            agent_id = self.stack.agent.id
+            request["on_delta"] = lambda delta: stream_callback(agent_id, delta)
+        return request, captured
+
+    def _add_response(
+        self,
+        assistant_response: Dict[str, Any],
+        captured: Dict[str, Any],
+    ) -> None:
+        """Add the OracleResponse of the completion to the stack."""
+        from gimle.hugin.interaction.oracle_response import OracleResponse
 
-        assistant_response = chat_completion(
-            system_prompt=system_prompt,
-            messages=interaction_messages,
-            tools=tools,
-            llm_model=llm_model,
-        )
         logger.debug(f"Assistant response: {assistant_response}")
         self.stack.add_interaction(
             OracleResponse(
                 stack=self.stack,
                 branch=self.branch,
                 response=assistant_response,
-                rendered_system_prompt=rendered_system_prompt,
-                rendered_user_message=rendered_user_message,
+                **captured,
             )
         )
-        return True
@@ -14,6 +14,7 @@ from typing import (
     cast,
 )
 
+from gimle.hugin.agent.wakeups import Wakeup, stack_event, state_event
 from gimle.hugin.utils.registry import Registry
 
 logger = logging.getLogger(__name__)
@@ -33,13 +34,20 @@ class Condition:
     than once (e.g. for logging or debugging) will advance their
     internal counters incorrectly.
 
+    Evaluators can be registered with a ``wakeup`` function, called with
+    the same arguments, that tells when the result can change. The session
+    then skips the waiting agent until its deadline or event instead of
+    evaluating the condition on every step.
+
     Attributes:
         registry: The registry of conditions.
+        wakeups: The wakeup functions of conditions, by evaluator name.
         evaluator: The evaluator function to use.
         parameters: The parameters to pass to the evaluator.
     """
 
     registry: ClassVar[Registry["Callable"]] = Registry()
+    wakeups: ClassVar[Registry["Callable"]] = Registry()
 
     evaluator: str
     parameters: Optional[Dict[str, Any]] = None
@@ -47,13 +55,15 @@ class Condition:
     @classmethod
     def register(
         cls,
+        wakeup: Optional[Callable[..., Optional[Wakeup]]] = None,
     ) -> Callable[[Callable], Callable]:
         """Register a function as a condition with metadata (decorator style).
 
         This is the original decorator-based registration method, kept for backward compatibility.
 
         Args:
-            func: The function to register as a condition.
+            wakeup: Optional function telling when the condition can change,
+                returning None if it must be evaluated on every step.
 
         Returns:
             The registered function.
@@ -61,6 +71,8 @@ class Condition:
 
         def decorator(func: Callable) -> Callable:
             cls.registry.register(func, name=func.__name__)
+            if wakeup is not None:
+                cls.wakeups.register(wakeup, name=func.__name__)
             return func
 
         return decorator
@@ -107,8 +119,55 @@ class Condition:
             bool, evaluator(stack=stack, branch=branch, **self.parameters)
         )
 
+    def wakeup(self, stack: "Stack", branch: Optional[str]) -> Optional[Wakeup]:
+        """Get when the condition can stop waiting.
 
-@Condition.register()
+        Args:
+            stack: The stack the condition is evaluated on.
+            branch: The branch the condition is evaluated on.
+
+        Returns:
+            The wakeup, or None if the condition is evaluated every step.
+        """
+        if self.evaluator not in self.wakeups.registered():
+            return None
+        wakeup = self.wakeups.get(self.evaluator)
+        if self.parameters is None:
+            return cast(Optional[Wakeup], wakeup(stack, branch))
+        return cast(
+            Optional[Wakeup],
+            wakeup(stack=stack, branch=branch, **self.parameters),
+        )
+
+
+def _stack_changed(
+    stack: "Stack", branch: Optional[str], **parameters: Any
+) -> Wakeup:
+    """Wake when an interaction is added to the stack."""
+    return Wakeup(events=frozenset([stack_event(stack.agent.id)]))
+
+
+def _wait_for_seconds_deadline(
+    stack: "Stack", branch: Optional[str], seconds: float
+) -> Optional[Wakeup]:
+    """Wake when the seconds of wait_for_seconds have passed."""
+    last = stack.get_last_interaction_for_branch(branch)
+    if last is None:
+        return None
+    start_time = stack.get_shared_state(f"_wait_seconds_{last.uuid}")
+    if start_time is None:
+        return None
+    return Wakeup(deadline=start_time + seconds)
+
+
+def _shared_state_changed(
+    stack: "Stack", branch: Optional[str], key: str, namespace: str = "common"
+) -> Wakeup:
+    """Wake when the shared state key changes."""
+    return Wakeup(events=frozenset([state_event(namespace, key)]))
+
+
+@Condition.register(wakeup=_stack_changed)
 def all_branches_complete(
     branches: List[str], stack: "Stack", branch: Optional[str]
 ) -> bool:
@@ -184,7 +243,7 @@ def wait_for_ticks(stack: "Stack", branch: Optional[str], ticks: int) -> bool:
     return True  # Keep waiting
 
 
-@Condition.register()
+@Condition.register(wakeup=_wait_for_seconds_deadline)
 def wait_for_seconds(
     stack: "Stack", branch: Optional[str], seconds: float
 ) -> bool:
@@ -236,3 +295,22 @@ def wait_for_seconds(
             )
         return False  # Done waiting
     return True  # Keep waiting
+
+
+@Condition.register(wakeup=_shared_state_changed)
+def wait_for_shared_state(
+    stack: "Stack", branch: Optional[str], key: str, namespace: str = "common"
+) -> bool:
+    """Wait until a shared state key is set.
+
+    Args:
+        stack: The stack to evaluate the condition on.
+        branch: The branch to evaluate the condition on.
+        key: The shared state key to wait for.
+        namespace: The namespace of the key (default: "common").
+
+    Returns:
+        True if still waiting (the key is not set).
+        False if done waiting (the key is set to a value other than None).
+    """
+    return stack.get_shared_state(key, namespace=namespace) is None
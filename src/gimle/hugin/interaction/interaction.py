@@ -8,6 +8,7 @@ from typing import (
     Callable,
     ClassVar,
     Dict,
+    FrozenSet,
     List,
     Optional,
     Type,
@@ -15,9 +16,11 @@ from typing import (
 )
 
 from gimle.hugin.artifacts.artifact import Artifact
+from gimle.hugin.utils.dirty import DirtyTracked
 from gimle.hugin.utils.uuid import with_uuid
 
 if TYPE_CHECKING:
+    from gimle.hugin.agent.wakeups import Wakeup
     from gimle.hugin.interaction.stack import Stack
 
 T = TypeVar("T", bound="Interaction")
@@ -25,7 +28,7 @@ T = TypeVar("T", bound="Interaction")
 
 @dataclass
 @with_uuid
-class Interaction:
+class Interaction(DirtyTracked):
     """Base class for all interactions.
 
     Attributes:
@@ -38,6 +41,7 @@ class Interaction:
     _registry: ClassVar[Dict[str, Type["Interaction"]]] = (
         {}
     )  # Class variable, not a field
+    _untracked_attributes: ClassVar[FrozenSet[str]] = frozenset({"stack"})
 
     stack: "Stack" = field(repr=False, compare=False)
     branch: Optional[str] = field(default=None, repr=False)
@@ -79,6 +83,28 @@ class Interaction:
         """
         pass
 
+    async def astep(self) -> bool:
+        """Execute the interaction logic inside an event loop.
+
+        Interactions that wait on I/O, like the oracle, override this to
+        await it; by default the interaction is stepped synchronously.
+
+        Returns:
+            True if the interaction was successful, False otherwise.
+        """
+        return self.step()
+
+    def wakeup(self) -> Optional["Wakeup"]:
+        """Get when the interaction can make progress, if it is blocked.
+
+        Interactions that only wait, like Waiting, override this, so the
+        session can skip their agent until the deadline or an event.
+
+        Returns:
+            The wakeup, or None if the interaction is stepped every step.
+        """
+        return None
+
     def add_artifact(self, artifact: Artifact) -> None:
         """Add an artifact to the interaction.
 
@@ -86,6 +112,11 @@ class Interaction:
             artifact: The artifact to add.
         """
         self.artifacts.append(artifact)
+        self.mark_dirty()
+        # The stack serializes the artifact ids of all its interactions
+        mark_stack_dirty = getattr(self.stack, "mark_dirty", None)
+        if mark_stack_dirty is not None:
+            mark_stack_dirty()
 
     def to_dict(self) -> Dict[str, Any]:
         """Serialize to dictionary.
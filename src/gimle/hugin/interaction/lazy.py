@@ -0,0 +1,227 @@
+"""Lazily loaded interaction list module."""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Type,
+    Union,
+    cast,
+    overload,
+)
+
+from gimle.hugin.interaction.interaction import Interaction
+
+if TYPE_CHECKING:
+    from gimle.hugin.interaction.stack import Stack
+    from gimle.hugin.storage.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InteractionStub:
+    """What the stack knows about an interaction that is not loaded yet.
+
+    Attributes:
+        uuid: The uuid of the interaction.
+        type: The registered name of the interaction class.
+        branch: The branch of the interaction.
+        artifacts: The uuids of the artifacts of the interaction.
+    """
+
+    uuid: str
+    type: str
+    branch: Optional[str] = None
+    artifacts: List[str] = field(default_factory=list)
+
+    @property
+    def id(self) -> str:
+        """Get the uuid of the interaction."""
+        return self.uuid
+
+    @property
+    def interaction_class(self) -> Type[Interaction]:
+        """The class of the interaction."""
+        return Interaction.get_interaction(self.type)
+
+
+# An interaction, or the stub of one that is not loaded yet
+InteractionEntry = Union[Interaction, InteractionStub]
+
+
+def interaction_class(entry: InteractionEntry) -> Type[Interaction]:
+    """Get the class of an interaction without loading it.
+
+    Args:
+        entry: An interaction or the stub of one.
+
+    Returns:
+        The interaction class.
+    """
+    if isinstance(entry, InteractionStub):
+        return entry.interaction_class
+    return type(entry)
+
+
+class LazyInteractionList(MutableSequence[Interaction]):
+    """Interaction list of a stack that loads interactions on first access.
+
+    Holds stubs for interactions that were not accessed yet, and replaces
+    each stub with the interaction (and its artifacts) loaded from storage
+    the first time it is read. Interactions that fail to load are dropped
+    from the list with a warning, as when a stack is loaded eagerly.
+
+    ``entries`` gives the interactions and stubs without loading anything,
+    for lookups that only need the uuid, type or branch.
+    """
+
+    def __init__(
+        self,
+        stack: "Stack",
+        storage: "Storage",
+        stubs: Iterable[InteractionStub],
+    ) -> None:
+        """Initialize the list.
+
+        Args:
+            stack: The stack the interactions belong to.
+            storage: The storage to load interactions from.
+            stubs: The stubs of the interactions, in stack order.
+        """
+        self._stack = stack
+        self._storage = storage
+        self._items: List[InteractionEntry] = list(stubs)
+
+    def load(self, index: int) -> Optional[Interaction]:
+        """Load the interaction at an index.
+
+        Unlike indexing, a corrupted interaction is not replaced by the
+        next one, so the indices below it stay valid.
+
+        Returns:
+            The interaction, or None if it was corrupted and dropped.
+        """
+        item = self._items[index]
+        if not isinstance(item, InteractionStub):
+            return item
+        try:
+            interaction = self._storage.load_interaction(item.uuid, self._stack)
+        except (ValueError, FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping corrupted interaction {item.uuid}: {e}")
+            del self._items[index]
+            return None
+        self._items[index] = interaction
+        return interaction
+
+    def entries(self) -> List[InteractionEntry]:
+        """Get the interactions, with stubs for those not loaded yet."""
+        return list(self._items)
+
+    def loaded(self) -> List[Interaction]:
+        """Get the interactions that are loaded."""
+        return [
+            item
+            for item in self._items
+            if not isinstance(item, InteractionStub)
+        ]
+
+    @overload
+    def __getitem__(self, index: int) -> Interaction:
+        """Get an interaction, loading it if needed."""
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Interaction]:
+        """Get a slice of interactions, loading them if needed."""
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Interaction, List[Interaction]]:
+        """Get interactions, loading them if needed."""
+        if isinstance(index, slice):
+            while True:
+                stubs = [
+                    i
+                    for i in range(len(self._items))[index]
+                    if isinstance(self._items[i], InteractionStub)
+                ]
+                if not stubs:
+                    return cast(List[Interaction], self._items[index])
+                # From the top, so dropped interactions do not shift the rest
+                for i in reversed(stubs):
+                    self.load(i)
+        while True:
+            position = index + len(self._items) if index < 0 else index
+            if not 0 <= position < len(self._items):
+                raise IndexError("interaction index out of range")
+            interaction = self.load(position)
+            if interaction is not None:
+                return interaction
+
+    @overload
+    def __setitem__(self, index: int, value: Interaction) -> None:
+        """Replace an interaction."""
+
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[Interaction]) -> None:
+        """Replace a slice of interactions."""
+
+    def __setitem__(
+        self,
+        index: Union[int, slice],
+        value: Union[Interaction, Iterable[Interaction]],
+    ) -> None:
+        """Replace interactions."""
+        if isinstance(index, slice):
+            self._items[index] = list(cast(Iterable[Interaction], value))
+        else:
+            self._items[index] = cast(Interaction, value)
+        self._stack.mark_dirty()
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        """Remove interactions without loading them."""
+        del self._items[index]
+        self._stack.mark_dirty()
+
+    def __len__(self) -> int:
+        """Count the interactions, loaded or not."""
+        return len(self._items)
+
+    def insert(self, index: int, value: Interaction) -> None:
+        """Insert an interaction."""
+        self._items.insert(index, value)
+        self._stack.mark_dirty()
+
+    def __iter__(self) -> Iterator[Interaction]:
+        """Iterate over the interactions, loading each one when reached."""
+        index = 0
+        while index < len(self._items):
+            interaction = self.load(index)
+            if interaction is None:
+                continue
+            yield interaction
+            index += 1
+
+    def __reversed__(self) -> Iterator[Interaction]:
+        """Iterate from the top of the stack, loading only what is reached."""
+        index = len(self._items) - 1
+        while index >= 0:
+            if index < len(self._items):
+                interaction = self.load(index)
+                if interaction is not None:
+                    yield interaction
+            index -= 1
+
+    def __repr__(self) -> str:
+        """Represent the list without loading it."""
+        loaded = len(self.loaded())
+        return (
+            f"LazyInteractionList({len(self._items)} interactions, "
+            f"{loaded} loaded)"
+        )
@@ -38,14 +38,29 @@ class OracleResponse(Interaction):
         """
         if self.response is None:
             raise ValueError("OracleResponse response is None")
-        tool_name = self.response["tool_call"]
-        tool = next(
-            (tool for tool in self.stack.get_tools() if tool.name == tool_name),
-            None,
-        )
-        if tool and tool.options.respond_with_text:
-            return None
-        return self.response.get("tool_call_id")
+        return ToolCall.get_tool_call_id(self.stack, self.response)
+
+    @property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        """Get the tool calls of the oracle response, in order.
+
+        Returns:
+            The tool calls, each with ``tool_call``, ``tool_call_id`` and
+            ``content``, empty if the oracle responded with text.
+        """
+        if self.response is None:
+            raise ValueError("OracleResponse response is None")
+        if self.response.get("tool_calls"):
+            return list(self.response["tool_calls"])
+        if self.response.get("tool_call") is None:
+            return []
+        return [
+            {
+                "tool_call": self.response["tool_call"],
+                "tool_call_id": self.response.get("tool_call_id"),
+                "content": self.response["content"],
+            }
+        ]
 
     def step(self) -> bool:
         """Step the oracle response interaction.
@@ -55,21 +70,9 @@ class OracleResponse(Interaction):
         """
         if self.response is None:
             raise ValueError("OracleResponse response is None")
-        if self.response.get("tool_call") is not None:
-            # Extract reason from args if present
-            args = self.response["content"]
-            reason = args.get("reason") if isinstance(args, dict) else None
-
-            self.stack.add_interaction(
-                ToolCall(
-                    stack=self.stack,
-                    branch=self.branch,
-                    tool=self.response["tool_call"],
-                    args=args,
-                    tool_call_id=self.tool_call_id,
-                    reason=reason,
-                )
-            )
+        tool_calls = self.tool_calls
+        if tool_calls:
+            ToolCall.add_tool_calls(self.stack, self.branch, tool_calls)
         else:
             self.stack.add_interaction(
                 TaskResult(
@@ -1,14 +1,36 @@
 """Gimle Stack."""
 
+import copy
 import json
 import logging
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 from gimle.hugin.agent.task import Task
+from gimle.hugin.agent.wakeups import Wakeup, Wakeups, stack_event
 from gimle.hugin.artifacts.artifact import Artifact
 from gimle.hugin.interaction.ask_oracle import AskOracle
 from gimle.hugin.interaction.external_input import ExternalInput
 from gimle.hugin.interaction.interaction import Interaction
+from gimle.hugin.interaction.lazy import (
+    InteractionEntry,
+    InteractionStub,
+    LazyInteractionList,
+    interaction_class,
+)
 from gimle.hugin.interaction.oracle_response import OracleResponse
 from gimle.hugin.interaction.task_result import TaskResult
 from gimle.hugin.interaction.waiting import Waiting
@@ -17,6 +39,7 @@ from gimle.hugin.llm.prompt.message import (
     render_user_message,
 )
 from gimle.hugin.tools.tool import Tool
+from gimle.hugin.utils.dirty import DirtyTracked
 
 if TYPE_CHECKING:
     from gimle.hugin.agent.agent import Agent
@@ -30,27 +53,106 @@ logger = logging.getLogger(__name__)
 # TODO the stack manages branches
 
 
-class Stack:
+class Stack(DirtyTracked):
     """A stack is a collection of interactions.
 
     Attributes:
-        interactions: The interactions on the stack.
+        interactions: The interactions on the stack. For stacks loaded
+            lazily this is a ``LazyInteractionList``.
         agent: The agent that owns the stack.
         branches: The branches on the stack.
         queued_interactions: The interactions that are queued to be added to the stack.
     """
 
+    # Only the interaction list is serialized with the stack
+    _untracked_attributes: ClassVar[FrozenSet[str]] = frozenset(
+        {
+            "agent",
+            "branches",
+            "queued_interactions",
+            "_step_lock",
+            "_render_cache",
+            "_task_definitions",
+            "_task_definitions_seen",
+            "_toolsets",
+        }
+    )
+
     def __init__(
         self, agent: "Agent", interactions: Optional[List[Interaction]] = None
     ):
         """Initialize a stack."""
-        self.interactions: List[Interaction] = (
+        self.interactions: MutableSequence[Interaction] = (
             interactions if interactions else []
         )
         self.agent: Agent = agent
         self.branches: Dict[str, List[Interaction]] = {}
         self.queued_interactions: List[Interaction] = []
         self._step_lock: bool = False
+        # (interaction uuid, reduced) -> rendered message content
+        self._render_cache: Dict[Tuple[str, bool], List[Dict[str, Any]]] = {}
+        # branch -> last TaskDefinition, for lookups from the top of the stack
+        self._task_definitions: Dict[
+            Optional[str], Optional["TaskDefinition"]
+        ] = {}
+        # (interaction list, length) the TaskDefinition lookups are valid for
+        self._task_definitions_seen: Tuple[Any, int] = (None, 0)
+        # (branch, TaskDefinition uuid, config id, tool registry version)
+        # -> (config, tools by name)
+        self._toolsets: Dict[
+            Tuple[Optional[str], Optional[str], int, int],
+            Tuple[Any, Dict[str, Tool]],
+        ] = {}
+
+    def mark_dirty(self) -> None:
+        """Mark the stack, and the agent that serializes it, as changed."""
+        super().mark_dirty()
+        agent = self.__dict__.get("agent")
+        mark_agent_dirty = getattr(agent, "mark_dirty", None)
+        if mark_agent_dirty is not None:
+            mark_agent_dirty()
+
+    def _entries(self) -> Sequence[InteractionEntry]:
+        """Get the interactions, with stubs for those not loaded yet."""
+        if isinstance(self.interactions, LazyInteractionList):
+            return self.interactions.entries()
+        return self.interactions
+
+    def _interaction_at(self, index: int) -> Optional[Interaction]:
+        """Get the interaction at an index of ``_entries``, loading it.
+
+        Returns:
+            The interaction, or None if it failed to load and was dropped,
+            which shifts the indices above it.
+        """
+        if isinstance(self.interactions, LazyInteractionList):
+            return self.interactions.load(index)
+        return self.interactions[index]
+
+    def loaded_interactions(self) -> List[Interaction]:
+        """Get the interactions that are in memory.
+
+        Returns:
+            All interactions, except those of a lazily loaded stack that
+            were not accessed yet.
+        """
+        if isinstance(self.interactions, LazyInteractionList):
+            return self.interactions.loaded()
+        return list(self.interactions)
+
+    def get_interaction(self, uuid: str) -> Optional[Interaction]:
+        """Get an interaction on the stack by uuid.
+
+        Args:
+            uuid: The uuid of the interaction.
+
+        Returns:
+            The interaction, or None if it is not on the stack.
+        """
+        for index, entry in enumerate(self._entries()):
+            if entry.uuid == uuid:
+                return self._interaction_at(index)
+        return None
 
     @property
     def artifacts(self) -> List[Artifact]:
@@ -102,8 +204,8 @@ class Stack:
         """
         seen: set[Optional[str]] = set()
         branches: List[Optional[str]] = []
-        for interaction in self.interactions:
-            branch = interaction.branch
+        for entry in self._entries():
+            branch = entry.branch
             if branch not in seen:
                 seen.add(branch)
                 branches.append(branch)
@@ -125,8 +227,8 @@ class Stack:
         Raises:
             ValueError: If the branch doesn't exist
         """
-        for i, interaction in enumerate(self.interactions):
-            if interaction.branch == branch:
+        for i, entry in enumerate(self._entries()):
+            if entry.branch == branch:
                 return i
         raise ValueError(f"Branch {branch} not found in stack")
 
@@ -145,9 +247,20 @@ class Stack:
         Returns:
             List of interactions visible to this branch
         """
+        interactions = []
+        # From the top, so dropped interactions do not shift the rest
+        for index in reversed(self._branch_indices(branch)):
+            interaction = self._interaction_at(index)
+            if interaction is not None:
+                interactions.append(interaction)
+        return interactions[::-1]
+
+    def _branch_indices(self, branch: Optional[str] = None) -> List[int]:
+        """Get the stack indices of the interactions visible to a branch."""
+        entries = self._entries()
         if branch is None:
             # Main branch sees only main branch interactions
-            return [i for i in self.interactions if i.branch is None]
+            return [i for i, e in enumerate(entries) if e.branch is None]
 
         # Find the fork point for this branch
         try:
@@ -157,15 +270,15 @@ class Stack:
             return []
 
         result = []
-        for i, interaction in enumerate(self.interactions):
+        for i, entry in enumerate(entries):
             if i < fork_index:
                 # Before fork: include only main branch interactions
-                if interaction.branch is None:
-                    result.append(interaction)
+                if entry.branch is None:
+                    result.append(i)
             else:
                 # At or after fork: include only this branch's interactions
-                if interaction.branch == branch:
-                    result.append(interaction)
+                if entry.branch == branch:
+                    result.append(i)
         return result
 
     def get_last_interaction_for_branch(
@@ -179,9 +292,12 @@ class Stack:
         Returns:
             The last interaction on this branch, or None if no interactions
         """
-        for interaction in reversed(self.interactions):
-            if interaction.branch == branch:
-                return interaction
+        entries = self._entries()
+        for i in reversed(range(len(entries))):
+            if entries[i].branch == branch:
+                interaction = self._interaction_at(i)
+                if interaction is not None:
+                    return interaction
         return None
 
     def is_branch_complete(self, branch: Optional[str] = None) -> bool:
@@ -214,8 +330,10 @@ class Stack:
             Each dictionary contains the role and content of the interaction.
             The list is reversed, so the last interaction is first.
         """
-        # Get interactions for this branch
-        interactions_to_render = self.get_branch_interactions(branch)
+        # Get interactions for this branch. Only AskOracle and OracleResponse
+        # interactions are rendered, the others are not loaded.
+        entries = self._entries()
+        indices_to_render = self._branch_indices(branch)
         interactions_messages = []
         append_to_context = True
         reduced = False
@@ -224,11 +342,18 @@ class Stack:
         finished = False
         # Track the last AskOracle's include_in_context for its OracleResponse
         last_ask_oracle_include = True
+        toolset: Optional[Dict[str, Tool]] = None
         logger.debug(f"Rendering stack context for branch: {branch}")
-        for interaction in reversed(interactions_to_render):
-            if isinstance(interaction, TaskResult):
+        for index in reversed(indices_to_render):
+            entry_class = interaction_class(entries[index])
+            if issubclass(entry_class, TaskResult):
                 finished = True
                 continue
+            if not issubclass(entry_class, (AskOracle, OracleResponse)):
+                continue
+            interaction = self._interaction_at(index)
+            if interaction is None:
+                continue
             if isinstance(interaction, AskOracle):
                 if interaction.prompt is None:
                     raise ValueError("AskOracle prompt is None")
@@ -247,11 +372,12 @@ class Stack:
                             message_groups[tool_call] = 0
                         message_groups[tool_call] += 1
                         total_message_groups += 1
-                        if tool_call in self.get_tools():
-                            tool = Tool.get_tool(tool_call)
+                        if toolset is None:
+                            toolset = self.get_toolset()
+                        tool = toolset.get(tool_call)
+                        if tool is not None:
                             if (
-                                tool
-                                and tool.options.include_only_in_context_window
+                                tool.options.include_only_in_context_window
                                 and (
                                     tool.options.context_window
                                     < message_groups[tool_call]
@@ -260,8 +386,7 @@ class Stack:
                             ):
                                 append_to_context = False
                             elif (
-                                tool
-                                and tool.options.reduced_context_window_enabled
+                                tool.options.reduced_context_window_enabled
                                 and tool.options.reduced_context_window
                                 < total_message_groups
                             ):
@@ -281,26 +406,64 @@ class Stack:
                 isinstance(interaction, (AskOracle, OracleResponse))
                 and append_to_context
             ):
-                if isinstance(interaction, AskOracle):
-                    interactions_messages.append(
-                        {
-                            "role": "user",
-                            "content": render_user_message(
-                                interaction, reduced
-                            ),
-                        }
-                    )
-                else:
-                    interactions_messages.append(
-                        {
-                            "role": "assistant",
-                            "content": render_assistant_message(
-                                interaction, reduced
-                            ),
-                        }
-                    )
+                is_user = isinstance(interaction, AskOracle)
+                role = "user" if is_user else "assistant"
+                interactions_messages.append(
+                    {
+                        "role": role,
+                        "content": self._render_message(interaction, reduced),
+                    }
+                )
         return [i for i in reversed(interactions_messages)]
 
+    def _render_message(
+        self, interaction: Interaction, reduced: bool
+    ) -> List[Dict[str, Any]]:
+        """Render the message content of an AskOracle or OracleResponse.
+
+        Renders are cached by (uuid, reduced), so each interaction is
+        rendered once per reduced state over the life of the stack. The
+        cache returns copies, callers may modify the content.
+
+        Args:
+            interaction: The AskOracle or OracleResponse to render.
+            reduced: Whether to render the reduced form.
+
+        Returns:
+            The message content blocks.
+        """
+        key = (interaction.id, reduced)
+        content = self._render_cache.get(key)
+        if content is None:
+            if isinstance(interaction, AskOracle):
+                content = render_user_message(interaction, reduced)
+            elif isinstance(interaction, OracleResponse):
+                content = render_assistant_message(interaction, reduced)
+            else:
+                raise ValueError(
+                    f"Cannot render {interaction.__class__.__name__}"
+                )
+            self._render_cache[key] = content
+        return copy.deepcopy(content)
+
+    def invalidate_render_cache(
+        self, interactions: Optional[Iterable[Interaction]] = None
+    ) -> None:
+        """Drop cached message renders.
+
+        Call this after changing an interaction that was already rendered.
+
+        Args:
+            interactions: The interactions to drop renders of, or None to
+                drop all of them.
+        """
+        if interactions is None:
+            self._render_cache.clear()
+            return
+        uuids = {interaction.id for interaction in interactions}
+        for key in [key for key in self._render_cache if key[0] in uuids]:
+            del self._render_cache[key]
+
     def add_interaction(
         self, interaction: Interaction, branch: Optional[str] = None
     ) -> None:
@@ -310,9 +473,15 @@ class Stack:
             interaction: The interaction to add.
             branch: The branch to add the interaction to.
         """
+        from gimle.hugin.interaction.task_definition import TaskDefinition
+
         if branch:
             interaction.branch = branch
         self.interactions.append(interaction)
+        self.mark_dirty()
+        if isinstance(interaction, TaskDefinition):
+            self.invalidate_tool_cache()
+        self._notify_wakeups()
 
         # Log interaction creation
         interaction_type = interaction.__class__.__name__
@@ -351,39 +520,59 @@ class Stack:
             True if any branch was stepped, False if all branches
             are complete or the stack is empty.
         """
+        any_stepped = False
+        for branch in self._begin_step():
+            interaction = self._interaction_to_step(branch)
+            if interaction is not None and interaction.step():
+                any_stepped = True
+        self._step_lock = False
+        return any_stepped
+
+    async def astep(self) -> bool:
+        """Step all active branches in the stack inside an event loop.
+
+        Like ``step``, but awaits interactions that wait on I/O, so other
+        agents can step meanwhile. The branches of the stack are stepped
+        one after another, in the same order as ``step``.
+
+        Returns:
+            True if any branch was stepped, False if all branches
+            are complete or the stack is empty.
+        """
+        any_stepped = False
+        for branch in self._begin_step():
+            interaction = self._interaction_to_step(branch)
+            if interaction is not None and await interaction.astep():
+                any_stepped = True
+        self._step_lock = False
+        return any_stepped
+
+    def _begin_step(self) -> List[Optional[str]]:
+        """Take the step lock and get the branches to step.
+
+        Returns:
+            The active branches, none if the stack is empty.
+        """
         if self._step_lock:
             raise ValueError("Step lock is active")
         self._step_lock = True
         logger.debug(f"Stepping stack {self.agent.id}")
 
         if not self.interactions:
-            self._step_lock = False
-            return False
-
-        # Get all active branches
-        branches = self.get_active_branches()
-
-        # Step each branch that isn't complete
-        any_stepped = False
-        for branch in branches:
-            # if self.is_branch_complete(branch):
-            #     logger.debug(f"Branch {branch} is complete, skipping")
-            #     continue
-
-            last_interaction = self.get_last_interaction_for_branch(branch)
-            if last_interaction is None:
-                continue
+            return []
+        return self.get_active_branches()
 
+    def _interaction_to_step(
+        self, branch: Optional[str]
+    ) -> Optional[Interaction]:
+        """Get the last interaction of a branch, which is stepped next."""
+        last_interaction = self.get_last_interaction_for_branch(branch)
+        if last_interaction is not None:
             logger.debug(
                 f"Stepping branch {branch}: "
                 f"{last_interaction.__class__.__name__}"
             )
-            step_result = last_interaction.step()
-            if step_result:
-                any_stepped = True
-
-        self._step_lock = False
-        return any_stepped
+        return last_interaction
 
     def insert_external_input(self, input: str) -> None:
         """Insert a human interaction into the stack.
@@ -396,6 +585,31 @@ class Stack:
         """
         external_input = ExternalInput(stack=self, input=input)
         self.queued_interactions.append(external_input)
+        self._notify_wakeups()
+
+    def _notify_wakeups(self) -> None:
+        """Wake the agent if the session skips it while it waits."""
+        wakeups = getattr(getattr(self.agent, "session", None), "wakeups", None)
+        if isinstance(wakeups, Wakeups):
+            wakeups.notify(stack_event(self.agent.id))
+
+    def get_wakeup(self) -> Optional[Wakeup]:
+        """Get when the stack can make progress, if all its branches wait.
+
+        Returns:
+            The combined wakeup of the last interactions of the branches,
+            or None if any branch can step now.
+        """
+        if not self.interactions or self.queued_interactions:
+            return None
+        wakeups = []
+        for branch in self.get_active_branches():
+            last = self.get_last_interaction_for_branch(branch)
+            wakeup = last.wakeup() if last is not None else None
+            if not isinstance(wakeup, Wakeup):
+                return None
+            wakeups.append(wakeup)
+        return Wakeup.merge(wakeups)
 
     def _get_last_interaction_of_type(
         self,
@@ -420,27 +634,36 @@ class Stack:
         Returns:
             The last interaction of the given type, or None if not found.
         """
-        if not self.interactions:
+        entries = self._entries()
+        if not entries:
             return None
         within_window = end_interaction_uuid is None
-        for interaction in reversed(self.interactions):
+        for index in reversed(range(len(entries))):
+            entry = entries[index]
             if (
                 start_interaction_uuid is not None
-                and interaction.uuid == start_interaction_uuid
+                and entry.uuid == start_interaction_uuid
             ):
                 within_window = False
             if (
                 end_interaction_uuid is not None
-                and interaction.uuid == end_interaction_uuid
+                and entry.uuid == end_interaction_uuid
             ):
                 within_window = True
             if not within_window:
                 continue
-            if isinstance(interaction, interaction_type):
-                # Filter by attribute if requested
-                if attr_name is not None and (
+            if issubclass(interaction_class(entry), interaction_type):
+                # Filter by attribute if requested, stubs know the branch
+                filter_attr = attr_name is not None and (
                     attr_value is not None or filter_by_attr
-                ):
+                )
+                if filter_attr and attr_name == "branch":
+                    if entry.branch != attr_value:
+                        continue
+                interaction = self._interaction_at(index)
+                if interaction is None:
+                    continue
+                if filter_attr and attr_name is not None:
                     if getattr(interaction, attr_name) != attr_value:
                         continue
                 return interaction
@@ -463,6 +686,46 @@ class Stack:
         Returns:
             The TaskDefinition interaction, or None if not found.
         """
+        if current_interaction_uuid is not None:
+            return self._find_task_definition_interaction(
+                current_interaction_uuid, branch
+            )
+        # Lookups from the top of the stack only change with new
+        # TaskDefinitions, so they are cached per branch
+        self._check_task_definitions()
+        if branch not in self._task_definitions:
+            self._task_definitions[branch] = (
+                self._find_task_definition_interaction(None, branch)
+            )
+        return self._task_definitions[branch]
+
+    def _check_task_definitions(self) -> None:
+        """Drop cached TaskDefinition lookups if the stack got a new one.
+
+        Covers interactions added without ``add_interaction``, by checking
+        the interactions added since the last lookup.
+        """
+        from gimle.hugin.interaction.task_definition import TaskDefinition
+
+        entries = self._entries()
+        seen, length = self._task_definitions_seen
+        if (
+            seen is not self.interactions
+            or length > len(entries)
+            or any(
+                issubclass(interaction_class(entry), TaskDefinition)
+                for entry in entries[length:]
+            )
+        ):
+            self.invalidate_tool_cache()
+        self._task_definitions_seen = (self.interactions, len(entries))
+
+    def _find_task_definition_interaction(
+        self,
+        current_interaction_uuid: Optional[str],
+        branch: Optional[str],
+    ) -> Optional["TaskDefinition"]:
+        """Search the stack for the TaskDefinition of a branch."""
         from gimle.hugin.interaction.task_definition import TaskDefinition
 
         # Look for TaskDefinition on the specified branch (including None for main)
@@ -531,6 +794,35 @@ class Stack:
             raise ValueError("Last interaction is not a ToolResult")
         return interaction
 
+    def get_last_tool_call_batch(
+        self, branch: Optional[str] = None
+    ) -> Tuple[Optional[OracleResponse], List["ToolResult"]]:
+        """Get the last OracleResponse of a branch and the results after it.
+
+        Only these interactions are loaded.
+
+        Args:
+            branch: The branch name, or None for main branch.
+
+        Returns:
+            The last OracleResponse, None if there is none, and the
+            ToolResult interactions after it, in order.
+        """
+        from gimle.hugin.interaction.tool_result import ToolResult
+
+        entries = self._entries()
+        tool_results: List[ToolResult] = []
+        for index in reversed(self._branch_indices(branch)):
+            entry_class = interaction_class(entries[index])
+            if not issubclass(entry_class, (OracleResponse, ToolResult)):
+                continue
+            interaction = self._interaction_at(index)
+            if isinstance(interaction, OracleResponse):
+                return interaction, tool_results[::-1]
+            if isinstance(interaction, ToolResult):
+                tool_results.append(interaction)
+        return None, tool_results[::-1]
+
     def get_task_definition(
         self,
         current_interaction_uuid: Optional[str] = None,
@@ -577,30 +869,99 @@ class Stack:
         Returns:
             A list of tools.
         """
-        task_definition = self.get_task_definition(
+        return list(
+            self.get_toolset(
+                current_interaction_uuid=current_interaction_uuid,
+                branch=branch,
+            ).values()
+        )
+
+    def get_tool(
+        self,
+        name: Optional[str],
+        current_interaction_uuid: Optional[str] = None,
+        branch: Optional[str] = None,
+    ) -> Optional[Tool]:
+        """Get a tool available on the stack by name.
+
+        Args:
+            name: The name of the tool.
+            current_interaction_uuid: The UUID of the current interaction.
+            branch: The branch to look for the TaskDefinition on.
+
+        Returns:
+            The tool, or None if it is not available.
+        """
+        if name is None:
+            return None
+        return self.get_toolset(
+            current_interaction_uuid=current_interaction_uuid,
+            branch=branch,
+        ).get(name)
+
+    def get_toolset(
+        self,
+        current_interaction_uuid: Optional[str] = None,
+        branch: Optional[str] = None,
+    ) -> Dict[str, Tool]:
+        """Get the tools for the stack by name.
+
+        Resolved toolsets are cached by branch, TaskDefinition, config and
+        tool registry state, and dropped when a TaskDefinition is added or
+        the stack is rewound. The returned dict is shared, do not modify it.
+
+        Args:
+            current_interaction_uuid: The UUID of the current interaction.
+            branch: The branch to look for the TaskDefinition on.
+
+        Returns:
+            The tools by name.
+        """
+        task_definition = self.get_task_definition_interaction(
             current_interaction_uuid=current_interaction_uuid,
             branch=branch,
         )
-        tool_names = []
-        if task_definition and task_definition.tools:
+        if task_definition is None and self.interactions:
+            raise ValueError("No task definition found on the stack")
+        config = self.agent.config
+        key = (
+            branch,
+            task_definition.uuid if task_definition else None,
+            id(config),
+            Tool.registry.version,
+        )
+        cached = self._toolsets.get(key)
+        if cached is not None and cached[0] is config:
+            return cached[1]
+
+        task = task_definition.task if task_definition else None
+        tool_names: List[str] = []
+        if task and task.tools:
             # Task has tools defined - use ONLY those (replace config tools)
-            tool_names = list(task_definition.tools)
-        elif self.agent.config.tools:
+            tool_names = list(task.tools)
+        elif config.tools:
             # No task tools - fall back to config tools
-            tool_names = list(self.agent.config.tools)
+            tool_names = list(config.tools)
 
         if not tool_names:
             logger.warning("No tools found on the stack")
-        tools = [
-            Tool.get_tool(tool_name, throw_error=False)
-            for tool_name in set(tool_names)
-        ]
-        return [
-            tool
-            for tool in tools
-            if tool
-            and (self.agent.config.interactive or not tool.is_interactive)
-        ]
+        toolset: Dict[str, Tool] = {}
+        for tool_name in dict.fromkeys(tool_names):
+            tool = Tool.get_tool(tool_name, throw_error=False)
+            if tool and (config.interactive or not tool.is_interactive):
+                toolset[tool.name] = tool
+        # Keep the config referenced, so its id is not reused
+        self._toolsets[key] = (config, toolset)
+        return toolset
+
+    def invalidate_tool_cache(self) -> None:
+        """Drop cached TaskDefinition lookups and resolved toolsets.
+
+        Call this after changing the tools of a task or config in place.
+        """
+        self._task_definitions.clear()
+        self._task_definitions_seen = (None, 0)
+        self._toolsets.clear()
 
     def get_system_template(
         self,
@@ -635,11 +996,25 @@ class Stack:
         Returns:
             A dictionary representation of the stack.
         """
+        entries = self._entries()
+        interaction_artifacts = {
+            entry.id: _artifact_ids(entry)
+            for entry in entries
+            if entry.artifacts
+        }
         return {
-            "interactions": [
-                interaction.id for interaction in self.interactions
+            "interactions": [entry.id for entry in entries],
+            "artifacts": [
+                artifact_id
+                for artifact_ids in interaction_artifacts.values()
+                for artifact_id in artifact_ids
+            ],
+            # Stubs for loading the stack lazily
+            "interaction_types": [
+                interaction_class(entry).__name__ for entry in entries
             ],
-            "artifacts": [artifact.id for artifact in self.artifacts],
+            "interaction_branches": [entry.branch for entry in entries],
+            "interaction_artifacts": interaction_artifacts,
         }
 
     @classmethod
@@ -648,6 +1023,7 @@ class Stack:
         data: Dict[str, Any],
         agent: "Agent",
         storage: Optional["Storage"] = None,
+        lazy: bool = False,
     ) -> "Stack":
         """Deserialize the stack from a dictionary.
 
@@ -655,14 +1031,24 @@ class Stack:
             data: The dictionary to deserialize the stack from.
             agent: The agent to use for the stack.
             storage: The storage to use for the stack.
+            lazy: Load each interaction, with its artifacts, on first
+                access instead of up front. Needs the interaction stubs
+                written by ``to_dict``, older stacks load eagerly.
 
         Returns:
             The deserialized stack.
+
+        Raises:
+            ValueError: If an interaction of the stack is missing or
+                corrupted.
         """
         # Create stack first (with empty interactions)
         stack = cls(agent=agent, interactions=[])
 
-        if storage:
+        stubs = _stubs_from_dict(data) if storage and lazy else None
+        if storage and stubs is not None:
+            stack.interactions = LazyInteractionList(stack, storage, stubs)
+        elif storage:
             # Deserialize interactions (they need stack reference)
             interactions_data = data.get("interactions", [])
             for interaction_uuid in interactions_data:
@@ -670,26 +1056,22 @@ class Stack:
                     interaction = storage.load_interaction(
                         interaction_uuid, stack
                     )
-                    stack.interactions.append(interaction)
-                    # Rebuild branches dict if interaction has a branch
-                    if interaction.branch:
-                        if interaction.branch not in stack.branches:
-                            stack.branches[interaction.branch] = []
-                        stack.branches[interaction.branch].append(interaction)
                 except (
                     ValueError,
                     FileNotFoundError,
                     json.JSONDecodeError,
                 ) as e:
-                    # Log warning but continue loading - corrupted interaction is skipped
-                    logger.warning(
-                        f"Skipping corrupted interaction {interaction_uuid}: {e}"
-                    )
-                except Exception as e:
-                    # Log other errors but also continue
-                    logger.warning(
-                        f"Error loading interaction {interaction_uuid}: {e}"
-                    )
+                    # A stack with a hole would replay a different context
+                    raise ValueError(
+                        f"Error loading interaction {interaction_uuid} "
+                        f"of agent {agent.id}: {e}"
+                    ) from e
+                stack.interactions.append(interaction)
+                # Rebuild branches dict if interaction has a branch
+                if interaction.branch:
+                    if interaction.branch not in stack.branches:
+                        stack.branches[interaction.branch] = []
+                    stack.branches[interaction.branch].append(interaction)
         else:
             stack.interactions = data.get("interactions", [])
 
@@ -723,7 +1105,7 @@ class Stack:
             )
 
         # Get interactions to remove (everything after index)
-        removed_interactions = self.interactions[index + 1 :]
+        removed_interactions = list(self.interactions[index + 1 :])
 
         if not removed_interactions:
             return []
@@ -736,20 +1118,23 @@ class Stack:
 
         # Delete from storage first (before modifying in-memory state)
         if storage:
-            for interaction in removed_interactions:
-                try:
-                    storage.delete_interaction(interaction)
-                    logger.debug(
-                        f"Deleted interaction {interaction.uuid} from storage"
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to delete interaction {interaction.uuid} "
-                        f"from storage: {e}"
-                    )
-
-        # Truncate the interactions list
-        self.interactions = self.interactions[: index + 1]
+            try:
+                storage.delete_interactions(removed_interactions)
+                logger.debug(
+                    f"Deleted {len(removed_interactions)} interactions "
+                    f"from storage"
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to delete interactions from storage: {e}"
+                )
+
+        # Truncate the interactions list, without loading a lazy stack
+        del self.interactions[index + 1 :]
+        self.mark_dirty()
+
+        self.invalidate_render_cache(removed_interactions)
+        self.invalidate_tool_cache()
 
         # Clean up branches dictionary - remove references to deleted interactions
         removed_uuids = {i.uuid for i in removed_interactions}
@@ -830,6 +1215,36 @@ class Stack:
             agent_id=self.agent.id,
         )
 
+    def update_shared_state(
+        self,
+        key: str,
+        func: Callable[[Any], Any],
+        namespace: str = "common",
+        default: Any = None,
+    ) -> Any:
+        """Atomically update a value in session shared state.
+
+        Args:
+            key: Key to update
+            func: Called with the current value, returns the new value
+            namespace: Namespace to write to (default: "common")
+            default: Value passed to func if the key doesn't exist
+
+        Returns:
+            The new value
+
+        Raises:
+            PermissionError: If agent doesn't have access to namespace
+            ValueError: If namespace doesn't exist
+        """
+        return self.agent.session.state.update(
+            namespace=namespace,
+            key=key,
+            func=func,
+            agent_id=self.agent.id,
+            default=default,
+        )
+
     def delete_shared_state(self, key: str, namespace: str = "common") -> None:
         """Delete a key from session shared state.
 
@@ -845,3 +1260,44 @@ class Stack:
         self.agent.session.state.delete(
             namespace=namespace, key=key, agent_id=self.agent.id
         )
+
+
+def _artifact_ids(entry: InteractionEntry) -> List[str]:
+    """Get the artifact uuids of an interaction without loading it."""
+    if isinstance(entry, InteractionStub):
+        return entry.artifacts
+    return [artifact.id for artifact in entry.artifacts]
+
+
+def _stubs_from_dict(data: Dict[str, Any]) -> Optional[List[InteractionStub]]:
+    """Build interaction stubs from a serialized stack.
+
+    Returns:
+        The stubs, or None if the stack was saved without them.
+    """
+    uuids = data.get("interactions", [])
+    types = data.get("interaction_types")
+    branches = data.get("interaction_branches")
+    if types is None or branches is None:
+        return None
+    if not len(uuids) == len(types) == len(branches):
+        logger.warning("Stack stubs do not match its interactions")
+        return None
+    artifacts = data.get("interaction_artifacts", {})
+    known_types = set(Interaction.list_interactions())
+    stubs = []
+    for uuid, type_name, branch in zip(uuids, types, branches):
+        if type_name not in known_types:
+            logger.warning(
+                f"Skipping interaction {uuid} of unknown type {type_name}"
+            )
+            continue
+        stubs.append(
+            InteractionStub(
+                uuid=uuid,
+                type=type_name,
+                branch=branch,
+                artifacts=list(artifacts.get(uuid, [])),
+            )
+        )
+    return stubs
@@ -1,8 +1,9 @@
 """Tool call interaction."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from gimle.hugin.interaction.agent_call import AgentCall
 from gimle.hugin.interaction.interaction import Interaction
@@ -10,6 +11,9 @@ from gimle.hugin.interaction.tool_result import ToolResult
 from gimle.hugin.tools.tool import Tool, ToolResponse
 from gimle.hugin.utils.uuid import with_uuid
 
+if TYPE_CHECKING:
+    from gimle.hugin.interaction.stack import Stack
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,44 +28,244 @@ class ToolCall(Interaction):
         args: The arguments to pass to the tool.
         tool_call_id: The ID of the tool call.
         reason: The reason for the tool call.
+        pending_tool_calls: The tool calls the oracle made after this one
+            in the same response, still to be made.
     """
 
     tool: Optional[str] = None
     args: Optional[Dict[str, Any]] = None
     tool_call_id: Optional[str] = None
     reason: Optional[str] = None
+    pending_tool_calls: Optional[List[Dict[str, Any]]] = None
 
-    def step(self) -> bool:
-        """Step the tool call interaction.
+    @staticmethod
+    def get_tool_call_id(
+        stack: "Stack", tool_call: Dict[str, Any]
+    ) -> Optional[str]:
+        """Get the id to return the result of an oracle's tool call with.
+
+        Args:
+            stack: The stack of the oracle.
+            tool_call: The tool call, with ``tool_call`` and ``tool_call_id``.
 
         Returns:
-            True if the tool call interaction was successful, False otherwise.
+            The tool call id, None for tools that respond with text.
         """
-        try:
-            tools = self.stack.get_tools(branch=self.branch)
-            tool = next(
-                (tool for tool in tools if tool.name == self.tool), None
+        tool = stack.get_tool(tool_call["tool_call"])
+        if tool and tool.options.respond_with_text:
+            return None
+        return tool_call.get("tool_call_id")
+
+    @staticmethod
+    def create_from_oracle(
+        stack: "Stack",
+        branch: Optional[str],
+        tool_call: Dict[str, Any],
+        pending_tool_calls: Optional[List[Dict[str, Any]]] = None,
+    ) -> "ToolCall":
+        """Create a tool call interaction from a tool call of the oracle.
+
+        Args:
+            stack: The stack of the oracle.
+            branch: The branch of the oracle.
+            tool_call: The tool call, with ``tool_call``, ``tool_call_id``
+                and ``content``.
+            pending_tool_calls: The tool calls to make after this one.
+
+        Returns:
+            The created tool call interaction.
+        """
+        # Extract reason from args if present
+        args = tool_call["content"]
+        reason = args.get("reason") if isinstance(args, dict) else None
+        return ToolCall(
+            stack=stack,
+            branch=branch,
+            tool=tool_call["tool_call"],
+            args=args,
+            tool_call_id=ToolCall.get_tool_call_id(stack, tool_call),
+            reason=reason,
+            pending_tool_calls=pending_tool_calls or None,
+        )
+
+    @staticmethod
+    def add_tool_calls(
+        stack: "Stack",
+        branch: Optional[str],
+        tool_calls: List[Dict[str, Any]],
+    ) -> None:
+        """Add the tool calls of the oracle to the stack, in order.
+
+        A ToolCall for the first tool call is added, and the rest are
+        pending on it until its result returns to the oracle. When the
+        first tool calls are to tools without side effects, they are made
+        concurrently instead, and added to the stack with their results.
+        Calls made concurrently after a result that does not return to the
+        oracle, like an AgentCall, stay pending with their result, see
+        ``made_tool_call``, and are added without being made again.
+
+        Args:
+            stack: The stack of the oracle.
+            branch: The branch of the oracle.
+            tool_calls: The tool calls, each with ``tool_call``,
+                ``tool_call_id`` and ``content``, and ``result`` if made.
+        """
+        if "result" in tool_calls[0]:
+            call = ToolCall.create_from_oracle(
+                stack, branch, tool_calls[0], tool_calls[1:]
+            )
+            stack.add_interaction(call)
+            call.add_result(call.restore_result(tool_calls[0]["result"]))
+            return
+
+        concurrent = []
+        for tool_call in tool_calls:
+            tool = stack.get_tool(tool_call["tool_call"], branch=branch)
+            if (
+                "result" in tool_call
+                or tool is None
+                or not tool.options.side_effect_free
+            ):
+                break
+            concurrent.append(tool_call)
+
+        if len(concurrent) < 2:
+            stack.add_interaction(
+                ToolCall.create_from_oracle(
+                    stack, branch, tool_calls[0], tool_calls[1:]
+                )
             )
+            return
+
+        calls = [
+            ToolCall.create_from_oracle(stack, branch, tool_call)
+            for tool_call in concurrent
+        ]
+        logger.debug(f"Calling {len(calls)} tools concurrently")
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            results = list(executor.map(ToolCall.execute, calls))
+        for index, (call, result) in enumerate(zip(calls, results)):
+            # Interactions added after a result that does not return to the
+            # oracle would be stepped in its place, the calls made after it
+            # are added once it returns
+            stepped = index == len(calls) - 1 or not ToolCall._returns(result)
+            if stepped:
+                call.pending_tool_calls = [
+                    ToolCall.made_tool_call(tool_call, made)
+                    for tool_call, made in zip(
+                        concurrent[index + 1 :], results[index + 1 :]
+                    )
+                ] + tool_calls[len(calls) :] or None
+            stack.add_interaction(call)
+            call.add_result(result)
+            if stepped:
+                break
+
+    @staticmethod
+    def _returns(result: Union[ToolResponse, Interaction]) -> bool:
+        """Check if a result of a tool is returned to the oracle next."""
+        return (
+            isinstance(result, ToolResponse)
+            and not result.next_tool
+            and result.response_interaction in (None, "AskOracle")
+        )
+
+    @staticmethod
+    def made_tool_call(
+        tool_call: Dict[str, Any], result: Union[ToolResponse, Interaction]
+    ) -> Dict[str, Any]:
+        """Record a tool call that was made, with its result.
+
+        Args:
+            tool_call: The tool call.
+            result: The result of the tool.
+
+        Returns:
+            The tool call with its serialized result in ``result``.
+        """
+        if isinstance(result, AgentCall):
+            return {
+                **tool_call,
+                "result": {"type": "AgentCall", "data": result.to_dict()},
+            }
+        if not isinstance(result, ToolResponse):
+            raise ValueError(
+                f"Tool {tool_call['tool_call']} returned unexpected result: "
+                f"{result}"
+            )
+        data: Dict[str, Any] = {
+            "is_error": result.is_error,
+            "content": result.content,
+            "reason": result.reason,
+            "next_tool": result.next_tool,
+            "next_tool_args": result.next_tool_args,
+            "include_in_context": result.include_in_context,
+        }
+        if isinstance(result.response_interaction, str):
+            data["response_interaction"] = result.response_interaction
+        return {**tool_call, "result": {"type": "ToolResponse", "data": data}}
+
+    def restore_result(
+        self, data: Dict[str, Any]
+    ) -> Union[ToolResponse, Interaction]:
+        """Restore a result recorded by ``made_tool_call``.
+
+        Args:
+            data: The serialized result.
+
+        Returns:
+            The result of the tool.
+        """
+        if data["type"] == "AgentCall":
+            return AgentCall._from_dict(dict(data["data"]), self.stack, [])
+        return ToolResponse(**data["data"])
+
+    def execute(self) -> Union[ToolResponse, Interaction]:
+        """Execute the tool.
+
+        Returns:
+            The result of the tool, a ToolResponse or an Interaction.
+        """
+        try:
+            tool = self.stack.get_tool(self.tool, branch=self.branch)
             if tool is None:
                 raise ValueError(f"Tool {self.tool} not found")
-            result = Tool.execute_tool(
+            return Tool.execute_tool(
                 tool, stack=self.stack, branch=self.branch, **(self.args or {})
             )
         except TypeError as e:
             logger.error(f"Error executing tool: {e}")
-            result = ToolResponse(is_error=True, content={"error": str(e)})
+            return ToolResponse(is_error=True, content={"error": str(e)})
+
+    def add_result(
+        self, result: Union[ToolResponse, Interaction]
+    ) -> Interaction:
+        """Add the interaction for the result of the tool to the stack.
+
+        Args:
+            result: The result of the tool.
 
+        Returns:
+            The added interaction.
+        """
         if isinstance(result, AgentCall):
             self.stack.add_interaction(result, branch=self.branch)
-        else:
-            if not isinstance(result, ToolResponse):
-                raise ValueError(
-                    f"Tool {self.tool} returned unexpected result: {result}"
-                )
-            if not self.tool:
-                raise ValueError("Tool is required")
-            self.stack.add_interaction(
-                ToolResult.create_from_tool_response(self, result)
+            return result
+        if not isinstance(result, ToolResponse):
+            raise ValueError(
+                f"Tool {self.tool} returned unexpected result: {result}"
             )
+        if not self.tool:
+            raise ValueError("Tool is required")
+        tool_result = ToolResult.create_from_tool_response(self, result)
+        self.stack.add_interaction(tool_result)
+        return tool_result
 
+    def step(self) -> bool:
+        """Step the tool call interaction.
+
+        Returns:
+            True if the tool call interaction was successful, False otherwise.
+        """
+        self.add_result(self.execute())
         return True
@@ -2,7 +2,7 @@
 
 import logging
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from gimle.hugin.interaction.interaction import Interaction
 from gimle.hugin.utils.uuid import with_uuid
@@ -30,6 +30,8 @@ class ToolResult(Interaction):
         next_tool: Name of tool to call next (deterministic chaining).
         next_tool_args: Arguments for the next tool call.
         include_in_context: Whether this result appears in LLM context.
+        pending_tool_calls: The tool calls the oracle made after this one
+            in the same response, still to be made.
     """
 
     result: Optional[Dict[str, Any]] = None
@@ -41,6 +43,15 @@ class ToolResult(Interaction):
     next_tool: Optional[str] = None
     next_tool_args: Optional[Dict[str, Any]] = None
     include_in_context: bool = True
+    pending_tool_calls: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def returns_to_oracle(self) -> bool:
+        """Whether the result is returned to the oracle next."""
+        return not self.next_tool and self.response_interaction in (
+            None,
+            "AskOracle",
+        )
 
     @staticmethod
     def create_from_tool_response(
@@ -67,6 +78,7 @@ class ToolResult(Interaction):
             next_tool=tool_response.next_tool,
             next_tool_args=tool_response.next_tool_args,
             include_in_context=tool_response.include_in_context,
+            pending_tool_calls=caller.pending_tool_calls,
         )
 
     def step(self) -> bool:
@@ -96,10 +108,20 @@ class ToolResult(Interaction):
                     args=self.next_tool_args or {},
                     # tool_call_id=None,
                     tool_call_id=self.tool_call_id,
+                    pending_tool_calls=self.pending_tool_calls,
                 )
             )
             return True
 
+        # Make the next tool calls of the oracle before returning to it
+        if self.pending_tool_calls and self.returns_to_oracle:
+            from gimle.hugin.interaction.tool_call import ToolCall
+
+            ToolCall.add_tool_calls(
+                self.stack, self.branch, self.pending_tool_calls
+            )
+            return True
+
         # Normal flow: return to oracle or custom interaction
         response_interaction = self.response_interaction
 
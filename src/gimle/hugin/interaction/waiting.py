@@ -4,6 +4,7 @@ import logging
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
+from gimle.hugin.agent.wakeups import Wakeup, stack_event
 from gimle.hugin.interaction.conditions import Condition
 from gimle.hugin.interaction.interaction import Interaction
 from gimle.hugin.utils.uuid import with_uuid
@@ -33,6 +34,10 @@ class Waiting(Interaction):
     - Evaluate the condition
     - If condition returns True: continue waiting (return True to keep stepping)
     - If condition returns False: chain to next_tool (return True)
+
+    While waiting, the session skips the agent until the wakeup of the
+    condition. Without a condition, it waits for an interaction to be
+    added to the stack, like the AgentResult of the child agent.
     """
 
     condition: Optional[Condition] = None
@@ -96,6 +101,17 @@ class Waiting(Interaction):
         # No next tool - just done waiting
         return False
 
+    def wakeup(self) -> Optional[Wakeup]:
+        """Get when the waiting can end.
+
+        Returns:
+            The wakeup of the condition, None if it is evaluated every
+            step. Without a condition, the next interaction on the stack.
+        """
+        if self.condition:
+            return self.condition.wakeup(self.stack, self.branch)
+        return Wakeup(events=frozenset([stack_event(self.stack.agent.id)]))
+
     @classmethod
     def _from_dict(
         cls, data: Dict[str, Any], stack: "Stack", artifacts: List["Artifact"]
@@ -0,0 +1 @@
+"""Gimle Jobs."""
@@ -0,0 +1,191 @@
+"""Job queue interface module."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Statuses of a job
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A session to step, as handed out by a job queue.
+
+    Attributes:
+        id: The id of the job.
+        session_id: The id of the session in the storage of the workers.
+        payload: What a worker needs to resume the session, e.g. the
+            ``task_path`` of its agent directory.
+        status: QUEUED, LEASED, DONE or FAILED.
+        attempts: The leases since the job was last released without an
+            error, so crashed and failed slices count, finished ones do not.
+        owner: The worker holding the lease.
+        lease_token: The token of the current lease. Workers prove with it
+            that they still hold the job.
+        error: The last error of the job.
+    """
+
+    id: str
+    session_id: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    attempts: int = 0
+    owner: Optional[str] = None
+    lease_token: Optional[str] = None
+    error: Optional[str] = None
+
+
+class JobQueue(ABC):
+    """Abstract queue of sessions for workers to step.
+
+    A worker leases a job for some seconds, during which no other worker
+    gets it. It extends the lease with heartbeats while it steps the
+    session, and then releases the job to be leased again, completes it or
+    fails it. A job whose lease runs out, because its worker crashed or
+    hung, is handed out again. Jobs are failed once they were leased
+    ``max_attempts`` times without being released without an error.
+
+    Changes made with a lost lease, to a job since handed to another
+    worker, are refused: the method returns False.
+    """
+
+    def __init__(self, max_attempts: int = 3) -> None:
+        """Initialize the queue.
+
+        Args:
+            max_attempts: The leases without a clean release after which
+                a job is failed.
+        """
+        if max_attempts < 1:
+            raise ValueError(
+                f"max_attempts must be at least 1, got {max_attempts}"
+            )
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def put(
+        self,
+        session_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        delay: float = 0.0,
+    ) -> Job:
+        """Add a session to the queue.
+
+        Args:
+            session_id: The id of the session.
+            payload: What a worker needs to resume the session.
+            delay: The seconds before the job can be leased.
+
+        Returns:
+            The queued job.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def lease(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        """Lease the next job that is queued or whose lease ran out.
+
+        Args:
+            owner: The id of the worker.
+            lease_seconds: The seconds until the lease runs out.
+
+        Returns:
+            The leased job, or None if no job is available.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        """Extend the lease of a job.
+
+        Args:
+            job: The leased job.
+            lease_seconds: The seconds from now until the lease runs out.
+
+        Returns:
+            False if the lease was lost.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def release(
+        self, job: Job, delay: float = 0.0, error: Optional[str] = None
+    ) -> bool:
+        """Give a leased job back to the queue, to be leased again.
+
+        Args:
+            job: The leased job.
+            delay: The seconds before the job can be leased again.
+            error: The error of the slice, which counts it as an attempt.
+
+        Returns:
+            False if the lease was lost.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def complete(self, job: Job) -> bool:
+        """Mark a leased job as done.
+
+        Args:
+            job: The leased job.
+
+        Returns:
+            False if the lease was lost.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def fail(self, job: Job, error: str) -> bool:
+        """Mark a leased job as failed, so it is not leased again.
+
+        Args:
+            job: The leased job.
+            error: The error.
+
+        Returns:
+            False if the lease was lost.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id.
+
+        Args:
+            job_id: The id of the job.
+
+        Returns:
+            The job, or None if it is not in the queue.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def list_jobs(self, status: Optional[str] = None) -> List[Job]:
+        """List the jobs, oldest first.
+
+        Args:
+            status: Only list jobs with this status.
+
+        Returns:
+            The jobs.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def counts(self) -> Dict[str, int]:
+        """Count the jobs per status.
+
+        Returns:
+            The number of jobs of each status.
+        """
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for job in self.list_jobs():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def close(self) -> None:
+        """Close the queue."""
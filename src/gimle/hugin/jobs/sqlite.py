@@ -0,0 +1,269 @@
+"""SQLite job queue implementation module."""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from gimle.hugin.jobs.queue import DONE, FAILED, LEASED, QUEUED, Job, JobQueue
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_token TEXT,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_available_at
+    ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_lease_expires_at
+    ON jobs (status, lease_expires_at);
+"""
+
+_COLUMNS = (
+    "id, session_id, payload, status, attempts, owner, lease_token, error"
+)
+
+
+def _job(row: Tuple[Any, ...]) -> Job:
+    """Create a job from a row of ``_COLUMNS``."""
+    return Job(
+        id=row[0],
+        session_id=row[1],
+        payload=json.loads(row[2]),
+        status=row[3],
+        attempts=row[4],
+        owner=row[5],
+        lease_token=row[6],
+        error=row[7],
+    )
+
+
+class SqliteJobQueue(JobQueue):
+    """A job queue in a SQLite database file.
+
+    Any number of worker processes on the machine can share the database:
+    leases are taken in ``BEGIN IMMEDIATE`` transactions, so two workers
+    never lease the same job, and every change to a leased job checks the
+    lease token. The database runs in WAL mode, as ``SqliteStorage`` does,
+    so listing jobs does not block the workers. The database should not
+    be on a network file system, where SQLite locking is unreliable.
+
+    The queue can be shared between threads, e.g. a worker and its
+    heartbeat thread; access to the connection is serialized with a lock.
+    """
+
+    def __init__(
+        self, db_path: Union[str, Path], max_attempts: int = 3
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            db_path: Path to the database file, created if missing.
+            max_attempts: The leases without a clean release after which
+                a job is failed.
+        """
+        super().__init__(max_attempts=max_attempts)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        # Transactions are managed explicitly, see _transaction()
+        self._conn = sqlite3.connect(
+            str(self.db_path), isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _update(self, job: Job, sql: str, params: Tuple[Any, ...]) -> bool:
+        """Update a leased job if its lease is still held.
+
+        Args:
+            job: The leased job.
+            sql: The SET clause.
+            params: The parameters of the SET clause.
+
+        Returns:
+            False if the lease was lost.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {sql}, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_token = ?",
+                params + (time.time(), job.id, LEASED, job.lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def put(
+        self,
+        session_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        delay: float = 0.0,
+    ) -> Job:
+        """Add a session to the queue."""
+        job = Job(id=str(uuid.uuid4()), session_id=session_id)
+        job.payload = dict(payload or {})
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, session_id, payload, status, "
+                "available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    session_id,
+                    json.dumps(job.payload),
+                    QUEUED,
+                    now + delay,
+                    now,
+                    now,
+                ),
+            )
+        return job
+
+    def lease(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        """Lease the next job that is queued or whose lease ran out."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._lease(owner, lease_seconds)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return job
+
+    def _lease(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        """Lease a job inside the lease transaction."""
+        while True:
+            now = time.time()
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_expires_at <= ?) "
+                "ORDER BY available_at, created_at LIMIT 1",
+                (QUEUED, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job = _job(row)
+            if job.attempts >= self.max_attempts:
+                error = job.error or "Lease ran out, the worker died"
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_token = NULL,"
+                    " updated_at = ? WHERE id = ?",
+                    (FAILED, error, now, job.id),
+                )
+                continue
+            job.status = LEASED
+            job.attempts += 1
+            job.owner = owner
+            job.lease_token = str(uuid.uuid4())
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, owner = ?, "
+                "lease_token = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (
+                    LEASED,
+                    job.attempts,
+                    owner,
+                    job.lease_token,
+                    now + lease_seconds,
+                    now,
+                    job.id,
+                ),
+            )
+            return job
+
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        """Extend the lease of a job."""
+        return self._update(
+            job, "lease_expires_at = ?", (time.time() + lease_seconds,)
+        )
+
+    def release(
+        self, job: Job, delay: float = 0.0, error: Optional[str] = None
+    ) -> bool:
+        """Give a leased job back to the queue, to be leased again."""
+        attempts = job.attempts if error is not None else 0
+        released = self._update(
+            job,
+            "status = ?, attempts = ?, available_at = ?, error = ?, "
+            "lease_token = NULL, lease_expires_at = NULL",
+            (QUEUED, attempts, time.time() + delay, error),
+        )
+        if released:
+            job.status, job.attempts, job.error = QUEUED, attempts, error
+            job.lease_token = None
+        return released
+
+    def complete(self, job: Job) -> bool:
+        """Mark a leased job as done."""
+        completed = self._update(
+            job,
+            "status = ?, lease_token = NULL, lease_expires_at = NULL",
+            (DONE,),
+        )
+        if completed:
+            job.status, job.lease_token = DONE, None
+        return completed
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Mark a leased job as failed, so it is not leased again."""
+        failed = self._update(
+            job,
+            "status = ?, error = ?, lease_token = NULL, "
+            "lease_expires_at = NULL",
+            (FAILED, error),
+        )
+        if failed:
+            job.status, job.error, job.lease_token = FAILED, error, None
+        return failed
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return _job(row) if row is not None else None
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Job]:
+        """List the jobs, oldest first."""
+        sql = f"SELECT {_COLUMNS} FROM jobs"
+        params: Tuple[Any, ...] = ()
+        if status is not None:
+            sql += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(
+                sql + " ORDER BY created_at", params
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Count the jobs per status."""
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts.update({status: count for status, count in rows})
+        return counts
@@ -0,0 +1,260 @@
+"""Worker that steps the sessions of a job queue."""
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.interaction.ask_human import AskHuman
+from gimle.hugin.jobs.queue import Job, JobQueue
+from gimle.hugin.storage.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """The lease of a job ran out while its session was stepped."""
+
+
+class QueueWorker:
+    """Leases jobs from a queue and steps their sessions for a time slice.
+
+    For each job, the worker resumes the session from storage (see
+    ``Session.resume``), steps it for up to ``slice_seconds`` (and
+    ``slice_steps``) while a heartbeat thread extends the lease, and saves
+    it. Sessions that are still running are released to be leased again,
+    by this or any other worker, finished ones are completed. Sessions
+    that stopped to wait, for a human, an event or the budget of a parked
+    agent, are released to be leased again after ``wait_seconds``. Since
+    the session is saved after every step, a worker that crashes loses at
+    most the step it was in; the job is leased again once its lease runs
+    out. The lease is checked before each step is saved, so a worker that
+    lost it stops without saving.
+
+    The storage must be shared by all workers of the queue. The worker
+    clears the storage cache after each slice, since another worker may
+    step the session next.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        storage: Storage,
+        task_path: Optional[str] = None,
+        slice_seconds: float = 30.0,
+        slice_steps: Optional[int] = None,
+        lease_seconds: float = 60.0,
+        poll_seconds: float = 1.0,
+        wait_seconds: float = 60.0,
+        max_workers: Optional[int] = None,
+        worker_id: Optional[str] = None,
+    ):
+        """Initialize the worker.
+
+        Args:
+            queue: The queue to lease jobs from.
+            storage: The storage of the sessions.
+            task_path: The agent directory of jobs without a ``task_path``
+                in their payload.
+            slice_seconds: The seconds a session is stepped per lease.
+            slice_steps: The most steps per lease, None for no limit.
+            lease_seconds: The seconds a lease lasts without a heartbeat.
+                Heartbeats are sent every third of it.
+            poll_seconds: The seconds to wait when the queue is empty.
+            wait_seconds: The seconds before a session that stopped to
+                wait is leased again.
+            max_workers: Step the agents of a session on this many
+                threads, see ``Session.run``.
+            worker_id: The id of the worker, host and process id if None.
+        """
+        if lease_seconds <= 0:
+            raise ValueError(f"lease_seconds must be > 0, got {lease_seconds}")
+        self.queue = queue
+        self.storage = storage
+        self.task_path = task_path
+        self.slice_seconds = slice_seconds
+        self.slice_steps = slice_steps
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.wait_seconds = wait_seconds
+        self.max_workers = max_workers
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # Agent directories are loaded once per worker
+        self._environments: Dict[str, Environment] = {}
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop the worker after the current slice."""
+        self._stop.set()
+
+    def run(
+        self, max_jobs: Optional[int] = None, exit_when_empty: bool = False
+    ) -> int:
+        """Lease and step jobs until stopped.
+
+        Args:
+            max_jobs: Stop after this many slices, None for no limit.
+            exit_when_empty: Stop when no job is available instead of
+                waiting for one.
+
+        Returns:
+            The number of slices run.
+        """
+        slices = 0
+        while not self._stop.is_set():
+            if max_jobs is not None and slices >= max_jobs:
+                break
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                if exit_when_empty:
+                    break
+                self._stop.wait(self.poll_seconds)
+                continue
+            self.process(job)
+            slices += 1
+        return slices
+
+    def process(self, job: Job) -> None:
+        """Step the session of a leased job for a slice and release it.
+
+        Errors of the session release the job with the error, so it is
+        retried until the queue fails it after ``max_attempts``.
+
+        Args:
+            job: The leased job.
+        """
+        lost = threading.Event()
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(job, lost, done),
+            name=f"hugin-heartbeat-{job.id}",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            delay = self._step(job, lost)
+        except LeaseLost:
+            logger.warning(f"Lost the lease of job {job.id}, stopping it")
+            return
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Job {job.id} failed: {error}")
+            # Interrupted workers hand the job back without an attempt
+            if isinstance(e, Exception):
+                self.queue.release(job, error=error)
+            else:
+                self.queue.release(job)
+                raise
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+            self.storage.flush()
+            # Another worker may step the session next
+            self.storage.store.clear()
+        if lost.is_set():
+            logger.warning(f"Lost the lease of job {job.id}")
+        elif delay is None:
+            self.queue.complete(job)
+        else:
+            self.queue.release(job, delay=delay)
+
+    def _step(self, job: Job, lost: threading.Event) -> Optional[float]:
+        """Step the session of a job for a slice.
+
+        Returns:
+            None if the session finished within the slice, otherwise the
+            seconds before it is leased again.
+        """
+        task_path = job.payload.get("task_path") or self.task_path
+        if not task_path:
+            raise ValueError(f"No task path for job {job.id}")
+        session = Session.resume(job.session_id, self._environment(task_path))
+
+        def check_lease(step: int, agent: Agent) -> None:
+            if lost.is_set():
+                raise LeaseLost(job.id)
+
+        start = time.monotonic()
+        steps = session.run(
+            max_steps=self.slice_steps,
+            step_callback=check_lease,
+            max_workers=self.max_workers,
+            max_seconds=self.slice_seconds,
+        )
+        logger.info(f"Stepped job {job.id} for {steps} steps")
+        if (
+            self.slice_steps is not None and steps >= self.slice_steps
+        ) or time.monotonic() - start >= self.slice_seconds:
+            return 0.0
+        if self._waits(session):
+            return self.wait_seconds
+        return None
+
+    @staticmethod
+    def _waits(session: Session) -> bool:
+        """Check if a session stopped before its agents finished.
+
+        Returns:
+            True if an agent is parked by the scheduler, blocked on a
+            Waiting or asks a human.
+        """
+        for agent in session.agents:
+            parked = session.scheduler.is_parked(agent)
+            if parked or session.wakeups.is_blocked(agent.id):
+                return True
+            for branch in agent.stack.get_active_branches():
+                last = agent.stack.get_last_interaction_for_branch(branch)
+                if isinstance(last, AskHuman):
+                    return True
+        return False
+
+    def _heartbeat(
+        self, job: Job, lost: threading.Event, done: threading.Event
+    ) -> None:
+        """Extend the lease of a job until its slice is done."""
+        while not done.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job, self.lease_seconds):
+                lost.set()
+                return
+
+    def _environment(self, task_path: str) -> Environment:
+        """Get the environment of an agent directory."""
+        if task_path not in self._environments:
+            self._environments[task_path] = Environment.load(
+                task_path, storage=self.storage
+            )
+        return self._environments[task_path]
+
+    def __repr__(self) -> str:
+        """Represent the worker by its id."""
+        return f"QueueWorker({self.worker_id!r})"
+
+
+def enqueue_session(
+    queue: JobQueue,
+    session_id: str,
+    task_path: Optional[str] = None,
+    **payload: Any,
+) -> Job:
+    """Queue a saved session for the workers of a queue.
+
+    Args:
+        queue: The queue.
+        session_id: The id of the session, saved in the workers' storage.
+        task_path: The agent directory of the session, if the workers do
+            not share one.
+        **payload: More of what the workers need to resume the session.
+
+    Returns:
+        The queued job.
+    """
+    if task_path is not None:
+        payload["task_path"] = task_path
+    return queue.put(session_id, payload)
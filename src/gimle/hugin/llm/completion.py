@@ -1,57 +1,215 @@
 """Chat completion."""
 
 import logging
-from typing import Any, Dict, List
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from ..tools.tool import Tool
+from .completion_cache import CompletionCache, completion_cache_key
+from .models.model import Model, ModelResponse, StreamDelta
 from .models.model_registry import get_model_registry
 from .models.provider_utils import ensure_credentials_loaded
+from .models.rate_limit import RateLimiter, estimate_input_tokens
 
 
-def make_completion_cache_key(prefix: str, params: Dict[str, Any]) -> str:
-    """Make a completion cache key."""
-    nearest_context_window = 5
-    if "messages" in params:
-        shortened_messages = params["messages"][:2]
-        if len(params["messages"]) > 2:
-            start_index = -(
-                min(nearest_context_window, len(params["messages"]) - 2)
-            )
-            shortened_messages += params["messages"][start_index:]
-        params["messages"] = shortened_messages
-    return f"{prefix}{'_'.join([f'{k}={v}' for k, v in params.items()])}"
+def chat_completion(
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Tool],
+    llm_model: str,
+    cache: Optional[CompletionCache] = None,
+    on_delta: Optional[Callable[[StreamDelta], None]] = None,
+) -> dict:
+    """Chat completion.
 
+    Args:
+        system_prompt: The system prompt.
+        messages: The messages.
+        tools: The tools.
+        llm_model: The model name.
+        cache: Optional cache to answer, record or replay the completion
+            from, see CompletionCache.
+        on_delta: If set, the response is streamed and this is called
+            with each delta as it arrives. Responses from the cache are
+            not streamed.
 
-# TODO would be good to cache this at some point
-# would also allow for local playback
-# use make_completion_cache_key with messages, llm_model and system_prompt as params
-def chat_completion(
+    Returns:
+        The response dictionary.
+    """
+    if cache is None:
+        return _chat_completion(
+            system_prompt, messages, tools, llm_model, on_delta
+        )
+    # The key is computed first, models may modify the messages
+    key = completion_cache_key(llm_model, system_prompt, messages, tools)
+    return cache.complete(
+        key,
+        llm_model,
+        lambda: _chat_completion(
+            system_prompt, messages, tools, llm_model, on_delta
+        ),
+    )
+
+
+async def achat_completion(
     system_prompt: str,
     messages: List[Dict[str, Any]],
     tools: List[Tool],
     llm_model: str,
+    cache: Optional[CompletionCache] = None,
+    on_delta: Optional[Callable[[StreamDelta], None]] = None,
 ) -> dict:
-    """Chat completion."""
-    logging.debug(f"Chat completion using {llm_model} model")
+    """Chat completion without blocking the event loop.
+
+    Args:
+        system_prompt: The system prompt.
+        messages: The messages.
+        tools: The tools.
+        llm_model: The model name.
+        cache: Optional cache to answer, record or replay the completion
+            from, see CompletionCache.
+        on_delta: If set, the response is streamed and this is called
+            with each delta as it arrives. Responses from the cache are
+            not streamed.
 
-    # Temporarily suppress noisy third-party library logging during LLM call
-    third_party_loggers = ["httpcore", "httpx", "anthropic"]
-    original_levels = {}
-    for logger_name in third_party_loggers:
-        lib_logger = logging.getLogger(logger_name)
-        # Store current effective level (handles NOTSET/inherited levels)
-        original_levels[logger_name] = lib_logger.getEffectiveLevel()
-        lib_logger.setLevel(logging.WARNING)
+    Returns:
+        The response dictionary.
+    """
+    if cache is None:
+        return await _achat_completion(
+            system_prompt, messages, tools, llm_model, on_delta
+        )
+    # The key is computed first, models may modify the messages
+    key = completion_cache_key(llm_model, system_prompt, messages, tools)
+    return await cache.acomplete(
+        key,
+        llm_model,
+        lambda: _achat_completion(
+            system_prompt, messages, tools, llm_model, on_delta
+        ),
+    )
 
+
+# Noisy third-party loggers, suppressed while completions are running
+_THIRD_PARTY_LOGGERS = ["httpcore", "httpx", "anthropic"]
+_quiet_lock = threading.Lock()
+_quiet_count = 0
+_original_levels: Dict[str, int] = {}
+
+
+@contextmanager
+def _quiet_third_party_logging() -> Iterator[None]:
+    """Temporarily suppress noisy third-party library logging.
+
+    Concurrent completions share the suppression, the original levels are
+    restored when the last one finishes.
+    """
+    global _quiet_count
+    with _quiet_lock:
+        if _quiet_count == 0:
+            for logger_name in _THIRD_PARTY_LOGGERS:
+                lib_logger = logging.getLogger(logger_name)
+                # Store current effective level (handles NOTSET/inherited levels)
+                _original_levels[logger_name] = lib_logger.getEffectiveLevel()
+                lib_logger.setLevel(logging.WARNING)
+        _quiet_count += 1
     try:
-        model_registry = get_model_registry()
-        model = model_registry.get_model(llm_model)
-        provider = model_registry.get_provider(llm_model)
-        if provider:
-            ensure_credentials_loaded(provider)
-        return model.chat_completion(system_prompt, messages, tools).to_dict()
+        yield
     finally:
-        # Restore original log levels
-        for logger_name, original_level in original_levels.items():
-            lib_logger = logging.getLogger(logger_name)
-            lib_logger.setLevel(original_level)
+        with _quiet_lock:
+            _quiet_count -= 1
+            if _quiet_count == 0:
+                # Restore original log levels
+                for logger_name, original_level in _original_levels.items():
+                    lib_logger = logging.getLogger(logger_name)
+                    lib_logger.setLevel(original_level)
+
+
+def _get_model(llm_model: str) -> Tuple[Model, Optional[RateLimiter]]:
+    """Get a model and its rate limiter, loading its provider credentials."""
+    model_registry = get_model_registry()
+    model = model_registry.get_model(llm_model)
+    provider = model_registry.get_provider(llm_model)
+    if provider:
+        ensure_credentials_loaded(provider)
+    return model, model_registry.get_rate_limiter(llm_model)
+
+
+def _call_model(
+    model: Model,
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Tool],
+    on_delta: Optional[Callable[[StreamDelta], None]],
+) -> ModelResponse:
+    """Call the model, streaming the response if on_delta is set."""
+    if on_delta is None:
+        return model.chat_completion(system_prompt, messages, tools)
+    return model.stream_chat_completion(
+        system_prompt, messages, tools, on_delta
+    )
+
+
+async def _acall_model(
+    model: Model,
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Tool],
+    on_delta: Optional[Callable[[StreamDelta], None]],
+) -> ModelResponse:
+    """Call the model asynchronously, streaming if on_delta is set."""
+    if on_delta is None:
+        return await model.achat_completion(system_prompt, messages, tools)
+    return await model.astream_chat_completion(
+        system_prompt, messages, tools, on_delta
+    )
+
+
+def _chat_completion(
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Tool],
+    llm_model: str,
+    on_delta: Optional[Callable[[StreamDelta], None]] = None,
+) -> dict:
+    """Call the model."""
+    logging.debug(f"Chat completion using {llm_model} model")
+    with _quiet_third_party_logging():
+        model, limiter = _get_model(llm_model)
+        if limiter is None:
+            return _call_model(
+                model, system_prompt, messages, tools, on_delta
+            ).to_dict()
+        input_tokens = estimate_input_tokens(system_prompt, messages)
+        with limiter.limit(input_tokens) as call:
+            response = _call_model(
+                model, system_prompt, messages, tools, on_delta
+            )
+            call.record(response)
+        return response.to_dict()
+
+
+async def _achat_completion(
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Tool],
+    llm_model: str,
+    on_delta: Optional[Callable[[StreamDelta], None]] = None,
+) -> dict:
+    """Call the model asynchronously."""
+    logging.debug(f"Async chat completion using {llm_model} model")
+    with _quiet_third_party_logging():
+        model, limiter = _get_model(llm_model)
+        if limiter is None:
+            response = await _acall_model(
+                model, system_prompt, messages, tools, on_delta
+            )
+            return response.to_dict()
+        input_tokens = estimate_input_tokens(system_prompt, messages)
+        async with limiter.alimit(input_tokens) as call:
+            response = await _acall_model(
+                model, system_prompt, messages, tools, on_delta
+            )
+            call.record(response)
+        return response.to_dict()
@@ -0,0 +1,281 @@
+"""Completion cache module."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from gimle.hugin.tools.tool import Tool
+
+# read-through: answer from the cache, call the model and record on a miss
+# record: always call the model and record the response
+# replay: only answer from the cache, raise CompletionCacheMiss on a miss
+COMPLETION_CACHE_MODES = ("read-through", "record", "replay")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_accessed_at
+    ON completions (accessed_at);
+"""
+
+
+class CompletionCacheMiss(LookupError):
+    """Raised in replay mode for a completion that was not recorded."""
+
+
+def completion_cache_key(
+    llm_model: str,
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Tool],
+) -> str:
+    """Hash the content of a chat completion request.
+
+    Args:
+        llm_model: The model name.
+        system_prompt: The system prompt.
+        messages: The messages.
+        tools: The tools, of which the name, description and parameters
+            are hashed.
+
+    Returns:
+        The sha256 hex digest of the request.
+    """
+    payload = {
+        "model": llm_model,
+        "system": system_prompt,
+        "messages": messages,
+        "tools": [
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.parameters,
+            }
+            for tool in tools
+        ],
+    }
+    data = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CompletionCache:
+    """Disk-backed cache of chat completion responses.
+
+    Responses are stored in a SQLite database, keyed by the hash of the
+    request (see ``completion_cache_key``). With ``max_entries`` or
+    ``max_bytes`` set, the least recently used responses are evicted.
+
+    In ``record`` mode every request calls the model and its response is
+    stored, in ``replay`` mode requests are only answered from the cache,
+    so a recorded session can be run again offline, and ``read-through``
+    mode answers from the cache and calls the model on a miss.
+
+    The cache can be shared between threads.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        mode: str = "read-through",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            path: Path to the database file, created if missing.
+            mode: One of ``read-through``, ``record`` or ``replay``.
+            max_entries: Maximum number of stored responses.
+            max_bytes: Maximum total size of the stored responses.
+        """
+        if mode not in COMPLETION_CACHE_MODES:
+            raise ValueError(
+                f"Unknown completion cache mode {mode!r}, "
+                f"expected one of {COMPLETION_CACHE_MODES}"
+            )
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["CompletionCache"]:
+        """Create the cache configured by environment variables.
+
+        ``HUGIN_COMPLETION_CACHE`` is the database path and
+        ``HUGIN_COMPLETION_CACHE_MODE`` the mode, ``read-through`` by
+        default.
+
+        Returns:
+            The cache, or None if no path is set.
+        """
+        path = os.getenv("HUGIN_COMPLETION_CACHE", "").strip()
+        if not path:
+            return None
+        mode = os.getenv("HUGIN_COMPLETION_CACHE_MODE", "").strip()
+        return cls(path, mode=mode or "read-through")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a stored response.
+
+        Args:
+            key: The request key.
+
+        Returns:
+            A copy of the response, or None if it is not stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE completions SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        response: Dict[str, Any] = json.loads(row[0])
+        return response
+
+    def put(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        """Store a response, evicting old responses if over the limits.
+
+        Args:
+            key: The request key.
+            model: The model that produced the response.
+            response: The response dictionary.
+        """
+        data = json.dumps(response, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, model, size, created_at, accessed_at, response) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, len(data), now, now, data),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete the least recently used responses over the limits."""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        evict: List[str] = []
+        rows = self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY accessed_at"
+        )
+        # The most recent response is always kept
+        while count > 1 and (
+            (self.max_entries is not None and count > self.max_entries)
+            or (self.max_bytes is not None and total > self.max_bytes)
+        ):
+            key, size = rows.fetchone()
+            evict.append(key)
+            count -= 1
+            total -= size
+        rows.close()
+        if evict:
+            self._conn.executemany(
+                "DELETE FROM completions WHERE key = ?",
+                [(key,) for key in evict],
+            )
+
+    def complete(
+        self,
+        key: str,
+        model: str,
+        call: Callable[[], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Answer a request according to the mode of the cache.
+
+        Args:
+            key: The request key.
+            model: The model name.
+            call: Calls the model and returns its response.
+
+        Returns:
+            The response.
+
+        Raises:
+            CompletionCacheMiss: In replay mode, if the response was not
+                recorded.
+        """
+        response = self._lookup(key, model)
+        if response is None:
+            response = call()
+            self.put(key, model, response)
+        return response
+
+    async def acomplete(
+        self,
+        key: str,
+        model: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Answer a request according to the mode of the cache.
+
+        Like ``complete``, for a call that is awaited.
+        """
+        response = self._lookup(key, model)
+        if response is None:
+            response = await call()
+            self.put(key, model, response)
+        return response
+
+    def _lookup(self, key: str, model: str) -> Optional[Dict[str, Any]]:
+        """Look up a response, unless recording."""
+        if self.mode == "record":
+            return None
+        response = self.get(key)
+        if response is None and self.mode == "replay":
+            raise CompletionCacheMiss(
+                f"No recorded completion of {model} for request {key}"
+            )
+        return response
+
+    def __len__(self) -> int:
+        """Count the stored responses."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM completions"
+            ).fetchone()
+        return int(row[0])
+
+    def clear(self) -> None:
+        """Delete all stored responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -1,13 +1,42 @@
 """Anthropic model implementation module."""
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import anthropic
 
 from gimle.hugin.tools.tool import Tool
 
-from .model import Model, ModelResponse
+from .clients import (
+    HttpClientConfig,
+    get_shared_async_client,
+    get_shared_client,
+)
+from .model import Model, ModelResponse, StreamDelta
+from .streaming import DeltaReporter
+
+# Anthropic allows four cache breakpoints per request: the tools, the
+# system prompt and the last two user messages of the history
+CACHE_CONTROL: Dict[str, Any] = {"type": "ephemeral"}
+HISTORY_BREAKPOINTS = 2
+
+
+def _with_cache_control(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a message with a cache breakpoint on its last content block."""
+    content = message["content"]
+    if isinstance(content, str):
+        if not content:
+            return message
+        content = [{"type": "text", "text": content}]
+    if not content:
+        return message
+    return {
+        **message,
+        "content": [
+            *content[:-1],
+            {**content[-1], "cache_control": CACHE_CONTROL},
+        ],
+    }
 
 
 class AnthropicModel(Model):
@@ -18,59 +47,189 @@ class AnthropicModel(Model):
         model_name: str,
         temperature: float = 0,
         max_tokens: int = 5000,
-        tool_choice: Dict[str, Any] = {
-            "type": "any",
-            "disable_parallel_tool_use": True,
-        },
+        tool_choice: Dict[str, Any] = {"type": "any"},
+        prompt_caching: bool = True,
+        client: Optional[anthropic.Anthropic] = None,
+        async_client: Optional[anthropic.AsyncAnthropic] = None,
+        http_client_config: Optional[HttpClientConfig] = None,
     ):
-        """Initialize the Anthropic model."""
+        """Initialize the Anthropic model.
+
+        Args:
+            model_name: The Anthropic model id.
+            temperature: The sampling temperature.
+            max_tokens: The maximum number of output tokens.
+            tool_choice: How the model should use the tools. The model
+                may call several tools at once, unless
+                ``disable_parallel_tool_use`` is set.
+            prompt_caching: Whether to add cache breakpoints to requests.
+            client: The client to send requests with. By default the
+                client shared by Anthropic models is used.
+            async_client: The client to send async requests with. By
+                default the async client shared by Anthropic models in the
+                running event loop is used.
+            http_client_config: Connection pool and timeout settings of
+                the shared clients, the default settings if None.
+        """
         super().__init__(
             config={
                 "model": model_name,
                 "temperature": temperature,
                 "max_tokens": max_tokens,
                 "tool_choice": tool_choice,
+                "prompt_caching": prompt_caching,
             }
         )
+        self.prompt_caching = prompt_caching
+        self.http_client_config = http_client_config
+        self._client = client
+        self._async_client = async_client
 
-    def chat_completion(
+    @property
+    def client(self) -> anthropic.Anthropic:
+        """The client requests are sent with.
+
+        Created on first use, after credentials were loaded, and shared by
+        the Anthropic models with the same client settings.
+        """
+        if self._client is not None:
+            return self._client
+        return get_shared_client(
+            "anthropic",
+            lambda config: anthropic.Anthropic(
+                http_client=config.create_http_client(
+                    anthropic.DefaultHttpxClient
+                ),
+                max_retries=5,
+            ),
+            self.http_client_config,
+        )
+
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        """The client async requests are sent with.
+
+        Shared by the Anthropic models with the same client settings in the
+        running event loop.
+        """
+        if self._async_client is not None:
+            return self._async_client
+        return get_shared_async_client(
+            "anthropic",
+            lambda config: anthropic.AsyncAnthropic(
+                http_client=config.create_http_client(
+                    anthropic.DefaultAsyncHttpxClient
+                ),
+                max_retries=5,
+            ),
+            self.http_client_config,
+        )
+
+    def build_request(
         self,
         system_prompt: str,
         messages: List[Dict[str, Any]],
-        tools: Optional[List[Tool]] = None,
-    ) -> ModelResponse:
-        """Generate a chat completion using Anthropic API."""
-        if tools is None:
-            tools = []
+        tools: List[Tool],
+    ) -> Dict[str, Any]:
+        """Build the arguments of a messages.create request.
+
+        With prompt caching, cache breakpoints are placed on the last tool
+        definition, the system prompt and the last two user messages. The
+        tools, system prompt and history up to the previous user message
+        are then read from the cache on the next step of the agent, and the
+        history up to the last user message is written for the step after.
+
+        Args:
+            system_prompt: The system prompt.
+            messages: The message history, which is not modified.
+            tools: The tools the model can call.
+
+        Returns:
+            The keyword arguments for ``messages.create``.
+        """
+        tools_to_use = [
+            tool.get_schema("anthropic", self.tool_schema) for tool in tools
+        ]
+
+        system: Any = system_prompt
+        if self.prompt_caching:
+            if tools_to_use:
+                # The schemas are shared, add the breakpoint to a copy
+                tools_to_use[-1] = {
+                    **tools_to_use[-1],
+                    "cache_control": CACHE_CONTROL,
+                }
+            if system_prompt:
+                system = [
+                    {
+                        "type": "text",
+                        "text": system_prompt,
+                        "cache_control": CACHE_CONTROL,
+                    }
+                ]
+            messages = list(messages)
+            user_indices = [
+                index
+                for index, message in enumerate(messages)
+                if message["role"] == "user"
+            ]
+            for index in user_indices[-HISTORY_BREAKPOINTS:]:
+                messages[index] = _with_cache_control(messages[index])
+
+        request: Dict[str, Any] = {
+            "messages": messages,
+            "temperature": (
+                self.temperature if self.temperature is not None else 0
+            ),
+            "max_tokens": self.max_tokens,
+            "model": self.model_name,
+            "system": system,
+        }
+        if tools_to_use:
+            request["tools"] = tools_to_use
+            request["tool_choice"] = self.tool_choice
+        return request
+
+    @staticmethod
+    def tool_schema(tool: Tool) -> Dict[str, Any]:
+        """Build the Anthropic definition of a tool.
+
+        Args:
+            tool: The tool.
+
+        Returns:
+            The tool definition for the ``tools`` of a request.
+        """
+        return {
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    name: {
+                        "type": params["type"],
+                        "description": params["description"],
+                    }
+                    for name, params in tool.parameters.items()
+                },
+                "required": [
+                    name
+                    for name, params in tool.parameters.items()
+                    if params.get("required")
+                ],
+            },
+        }
+
+    def _prepare_request(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: List[Tool],
+    ) -> Dict[str, Any]:
+        """Prepare the messages and build the request."""
         logging.debug(
             f"Using Anthropic with {self.config=} tools={[t.name for t in tools]}"
         )
-        client = anthropic.Anthropic()
-
-        tools_to_use = []
-        for tool in tools:
-            tools_to_use.append(
-                {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            name: {
-                                "type": params["type"],
-                                "description": params["description"],
-                            }
-                            for name, params in tool.parameters.items()
-                        },
-                        "required": [
-                            name
-                            for name, params in tool.parameters.items()
-                            if params.get("required")
-                        ],
-                    },
-                }
-            )
-
         for message in messages:
             if isinstance(message["content"], list):
                 for part in message["content"]:
@@ -78,32 +237,18 @@ class AnthropicModel(Model):
                         del part["name"]
 
         Model.log_messages(messages)
-        try:
-            if tools_to_use:
-                response = client.with_options(max_retries=5).messages.create(
-                    messages=messages,  # type: ignore[arg-type]
-                    temperature=(
-                        self.temperature if self.temperature is not None else 0
-                    ),
-                    max_tokens=self.max_tokens,
-                    model=self.model_name,
-                    system=system_prompt,
-                    tools=tools_to_use,  # type: ignore[arg-type]
-                    tool_choice=self.tool_choice,
-                )
-            else:
-                response = client.with_options(max_retries=5).messages.create(
-                    messages=messages,  # type: ignore[arg-type]
-                    temperature=(
-                        self.temperature if self.temperature is not None else 0
-                    ),
-                    max_tokens=self.max_tokens,
-                    model=self.model_name,
-                    system=system_prompt,
-                )
-        except anthropic.APIError as error:
-            logging.error(
-                f"""Anthropic Error: {error}\n
+        return self.build_request(system_prompt, messages, tools)
+
+    def _log_error(
+        self,
+        error: anthropic.APIError,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: List[Tool],
+    ) -> None:
+        """Log a failed request."""
+        logging.error(
+            f"""Anthropic Error: {error}\n
 MESSAGES:\n{"\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages])}
 TOOLS:\n{"\n".join([f"{t.name}: {t.description}" for t in tools])}
 TOOL CHOICE:\n{self.tool_choice}
@@ -111,33 +256,143 @@ SYSTEM PROMPT:\n{system_prompt}
 MODEL:\n{self.model_name}
 TEMPERATURE:\n{self.temperature}
 MAX TOKENS:\n{self.max_tokens}"""
-            )
+        )
+
+    def chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]] = None,
+    ) -> ModelResponse:
+        """Generate a chat completion using Anthropic API."""
+        if tools is None:
+            tools = []
+        request = self._prepare_request(system_prompt, messages, tools)
+        try:
+            response = self.client.messages.create(**request)
+        except anthropic.APIError as error:
+            self._log_error(error, system_prompt, messages, tools)
+            raise error
+        return self.parse_response(response)
+
+    async def achat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]] = None,
+    ) -> ModelResponse:
+        """Generate a chat completion using the async Anthropic API."""
+        if tools is None:
+            tools = []
+        request = self._prepare_request(system_prompt, messages, tools)
+        try:
+            response = await self.async_client.messages.create(**request)
+        except anthropic.APIError as error:
+            self._log_error(error, system_prompt, messages, tools)
             raise error
+        return self.parse_response(response)
+
+    def stream_chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+        on_delta: Callable[[StreamDelta], None],
+    ) -> ModelResponse:
+        """Stream a chat completion using the Anthropic API."""
+        if tools is None:
+            tools = []
+        request = self._prepare_request(system_prompt, messages, tools)
+        reporter = DeltaReporter(on_delta)
+        try:
+            with self.client.messages.stream(**request) as stream:
+                for event in stream:
+                    self._report_event(event, reporter)
+                response = stream.get_final_message()
+        except anthropic.APIError as error:
+            self._log_error(error, system_prompt, messages, tools)
+            raise error
+        return self.parse_response(response)
+
+    async def astream_chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+        on_delta: Callable[[StreamDelta], None],
+    ) -> ModelResponse:
+        """Stream a chat completion using the async Anthropic API."""
+        if tools is None:
+            tools = []
+        request = self._prepare_request(system_prompt, messages, tools)
+        reporter = DeltaReporter(on_delta)
+        try:
+            async with self.async_client.messages.stream(**request) as stream:
+                async for event in stream:
+                    self._report_event(event, reporter)
+                response = await stream.get_final_message()
+        except anthropic.APIError as error:
+            self._log_error(error, system_prompt, messages, tools)
+            raise error
+        return self.parse_response(response)
+
+    @staticmethod
+    def _report_event(event: Any, reporter: DeltaReporter) -> None:
+        """Report the text and tool call arguments of a stream event."""
+        if event.type == "text":
+            reporter.text(event.text)
+        elif (
+            event.type == "content_block_start"
+            and event.content_block.type == "tool_use"
+        ):
+            reporter.tool_call(event.content_block.name)
+        elif event.type == "input_json":
+            reporter.arguments(event.partial_json)
+
+    def parse_response(self, response: Any) -> ModelResponse:
+        """Convert a messages.create response to a model response.
+
+        Args:
+            response: The Anthropic message.
+
+        Returns:
+            The model response.
+        """
         logging.debug(f"Received response {response.content[0]}")
         input_tokens = response.usage.input_tokens
         output_tokens = response.usage.output_tokens
+        cache_read_tokens = getattr(
+            response.usage, "cache_read_input_tokens", None
+        )
+        cache_write_tokens = getattr(
+            response.usage, "cache_creation_input_tokens", None
+        )
         logging.debug(
-            f"Token usage {input_tokens=} {output_tokens=} for {response.id=}"
+            f"Token usage {input_tokens=} {output_tokens=} "
+            f"{cache_read_tokens=} {cache_write_tokens=} for {response.id=}"
         )
-        # TODO support multiple tool calls in a single response
-
-        tool_use_content = None
+        tool_calls = []
         extra_content = []
         for content in response.content:
             if content.type == "tool_use":
-                tool_use_content = content
+                tool_calls.append(
+                    {
+                        "tool_call": content.name,
+                        "tool_call_id": content.id,
+                        "content": content.input,
+                    }
+                )
             elif hasattr(content, "text"):
                 extra_content.append(content.text)
 
-        if tool_use_content:
-            return ModelResponse(
-                role="assistant",
-                content=tool_use_content.input,
-                tool_call=tool_use_content.name,
-                tool_call_id=tool_use_content.id,
+        if tool_calls:
+            return ModelResponse.from_tool_calls(
+                tool_calls,
                 extra_content=extra_content,
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
+                cache_read_tokens=cache_read_tokens,
+                cache_write_tokens=cache_write_tokens,
             )
         first_content = response.content[0]
         text_content = getattr(first_content, "text", "") or ""
@@ -146,4 +401,6 @@ MAX TOKENS:\n{self.max_tokens}"""
             content=text_content.replace("\n", " "),
             input_tokens=input_tokens,
             output_tokens=output_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_write_tokens=cache_write_tokens,
         )
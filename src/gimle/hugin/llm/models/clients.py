@@ -0,0 +1,208 @@
+"""Shared HTTP clients of the model providers."""
+
+import asyncio
+import atexit
+import logging
+import sys
+import threading
+import weakref
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HttpClientConfig:
+    """Connection pool and timeout settings of a provider client.
+
+    Attributes:
+        max_connections: Maximum number of open connections.
+        max_keepalive_connections: Maximum number of idle connections kept
+            open for reuse.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        timeout: Seconds to wait for a response.
+        connect_timeout: Seconds to wait for a connection.
+        http2: Whether to use HTTP/2, requires the ``h2`` package.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 600.0
+    connect_timeout: float = 10.0
+    http2: bool = False
+
+    def create_http_client(self, client_class: Type[T]) -> T:
+        """Create an HTTP client with these settings.
+
+        Args:
+            client_class: The ``DefaultHttpxClient`` or
+                ``DefaultAsyncHttpxClient`` of the provider SDK.
+
+        Returns:
+            The HTTP client.
+        """
+        httpx = _httpx_package(client_class)
+        return client_class(  # type: ignore[call-arg]
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            http2=self.http2,
+        )
+
+
+def _httpx_package(client_class: type) -> ModuleType:
+    """Get the httpx package an HTTP client class is built on.
+
+    Recent provider SDKs are built on httpx2, older releases on httpx, and
+    the limits and timeout must come from the same package as the client.
+
+    Args:
+        client_class: A subclass of ``Client`` or ``AsyncClient``.
+
+    Returns:
+        The package of the client.
+
+    Raises:
+        TypeError: If the class is not an httpx client.
+    """
+    for base in client_class.__mro__:
+        if base.__name__ not in ("Client", "AsyncClient"):
+            continue
+        package = sys.modules.get(base.__module__.split(".")[0])
+        if package is None or not hasattr(package, "Limits"):
+            continue
+        if getattr(package, base.__name__) is base:
+            return package
+    raise TypeError(f"{client_class.__name__} is not an httpx client")
+
+
+_default_config = HttpClientConfig()
+
+# (provider, config) -> provider client
+_ClientsByKey = Dict[Tuple[str, HttpClientConfig], Any]
+_clients: _ClientsByKey = {}
+_clients_lock = threading.Lock()
+# Async connection pools are bound to the event loop that created them
+_async_clients: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ClientsByKey]"
+) = weakref.WeakKeyDictionary()
+
+
+def get_default_http_client_config() -> HttpClientConfig:
+    """Get the settings of models without their own client settings."""
+    return _default_config
+
+
+def set_default_http_client_config(config: HttpClientConfig) -> None:
+    """Set the settings of models without their own client settings.
+
+    Applies to clients created afterwards. Call ``close_shared_clients``
+    first to replace clients that were already created.
+
+    Args:
+        config: The new default settings.
+    """
+    global _default_config
+    _default_config = config
+
+
+def get_shared_client(
+    provider: str,
+    factory: Callable[[HttpClientConfig], T],
+    config: Optional[HttpClientConfig] = None,
+) -> T:
+    """Get the client of a provider, creating it on first use.
+
+    Models of the same provider with the same settings share one client and
+    its connection pool, across agents and threads.
+
+    Args:
+        provider: The provider name, e.g. "anthropic".
+        factory: Creates the provider client with the given settings.
+        config: The client settings, the default settings if None.
+
+    Returns:
+        The provider client.
+    """
+    key = (provider, config or _default_config)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory(key[1])
+            _clients[key] = client
+        return client
+
+
+def get_shared_async_client(
+    provider: str,
+    factory: Callable[[HttpClientConfig], T],
+    config: Optional[HttpClientConfig] = None,
+) -> T:
+    """Get the async client of a provider for the running event loop.
+
+    Like ``get_shared_client``, but clients are shared per event loop,
+    since their connections can only be used from the loop they were
+    opened in.
+
+    Args:
+        provider: The provider name, e.g. "anthropic".
+        factory: Creates the async provider client with the given settings.
+        config: The client settings, the default settings if None.
+
+    Returns:
+        The async provider client.
+    """
+    loop = asyncio.get_running_loop()
+    key = (provider, config or _default_config)
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = factory(key[1])
+            clients[key] = client
+        return client
+
+
+async def aclose_shared_async_clients() -> None:
+    """Close the async clients of the running event loop.
+
+    Call before the event loop is closed, e.g. at the end of the coroutine
+    passed to ``asyncio.run``.
+    """
+    with _clients_lock:
+        clients = list(
+            _async_clients.pop(asyncio.get_running_loop(), {}).values()
+        )
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close client {client}: {e}")
+
+
+def close_shared_clients() -> None:
+    """Close all shared clients and their connections.
+
+    Clients are created again on the next request. Called at exit. Async
+    clients are only forgotten, see ``aclose_shared_async_clients``.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close client {client}: {e}")
+
+
+atexit.register(close_shared_clients)
@@ -0,0 +1,281 @@
+"""Scripted model for load testing without calling a provider."""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+from gimle.hugin.tools.tool import Tool
+
+from .model import Model, ModelResponse
+from .rate_limit import estimate_input_tokens
+
+# Registry names of fake models start with this prefix
+FAKE_MODEL_PREFIX = "fake:"
+
+# finish: call the finish tool right away
+# tools: call the available tools in turn for ``steps`` steps, then finish
+# text: respond with text, which ends the task
+FAKE_MODEL_SCRIPTS = ("finish", "tools", "text")
+
+
+class FakeModel(Model):
+    """A model that answers from a script instead of calling a provider.
+
+    The response is chosen from the number of assistant messages in the
+    request, so each agent follows the script from the start, however many
+    agents share the model and in whatever order they are stepped. A
+    script is one of FAKE_MODEL_SCRIPTS or the path of a recorded trace: a
+    JSON list, or JSON lines, of model responses as returned by
+    ``ModelResponse.to_dict``. When the trace runs out, the finish tool is
+    called.
+
+    Latency and output tokens are drawn from normal distributions, cut off
+    at zero, with a random generator seeded from ``seed``, the step and the
+    first message, so runs are repeatable. Input tokens are estimated from
+    the size of the request.
+    """
+
+    def __init__(
+        self,
+        script: str = "finish",
+        steps: int = 3,
+        latency: float = 0.0,
+        latency_stddev: float = 0.0,
+        output_tokens: int = 50,
+        output_tokens_stddev: float = 0.0,
+        seed: int = 0,
+    ):
+        """Initialize the fake model.
+
+        Args:
+            script: A script of FAKE_MODEL_SCRIPTS or the path of a trace.
+            steps: The number of tool calls of the ``tools`` script before
+                finishing.
+            latency: The mean seconds a response takes.
+            latency_stddev: The standard deviation of the latency.
+            output_tokens: The mean number of output tokens reported.
+            output_tokens_stddev: The standard deviation of the output
+                tokens.
+            seed: The seed of the random latency and output tokens.
+        """
+        self.script = script
+        self.steps = steps
+        self.latency = latency
+        self.latency_stddev = latency_stddev
+        self.output_tokens = output_tokens
+        self.output_tokens_stddev = output_tokens_stddev
+        self.seed = seed
+        self.trace: Optional[List[Dict[str, Any]]] = None
+        if script not in FAKE_MODEL_SCRIPTS:
+            self.trace = self.load_trace(script)
+        super().__init__(
+            config={
+                "model": f"{FAKE_MODEL_PREFIX}{script}",
+                "temperature": 0,
+                "max_tokens": 0,
+                "tool_choice": None,
+            }
+        )
+
+    @classmethod
+    def from_name(cls, name: str) -> "FakeModel":
+        """Create a fake model from a registry name.
+
+        The name is ``fake:<script>``, optionally followed by the keyword
+        arguments of the model as a query string, e.g.
+        ``fake:tools?steps=5&latency=0.2&output_tokens=300``.
+
+        Args:
+            name: The registry name.
+
+        Returns:
+            The fake model.
+        """
+        if not name.startswith(FAKE_MODEL_PREFIX):
+            raise ValueError(f"Fake model names start with {FAKE_MODEL_PREFIX}")
+        script, _, query = name[len(FAKE_MODEL_PREFIX) :].partition("?")
+        kwargs: Dict[str, Any] = {}
+        for key, value in parse_qsl(query, strict_parsing=bool(query)):
+            if key in ("steps", "output_tokens", "seed"):
+                kwargs[key] = int(value)
+            elif key in ("latency", "latency_stddev", "output_tokens_stddev"):
+                kwargs[key] = float(value)
+            else:
+                raise ValueError(f"Unknown fake model option: {key}")
+        return cls(script=script or "finish", **kwargs)
+
+    @staticmethod
+    def load_trace(path: str) -> List[Dict[str, Any]]:
+        """Load the responses of a recorded trace.
+
+        Args:
+            path: The path of a JSON list or JSON lines file.
+
+        Returns:
+            The responses, in order.
+        """
+        trace_path = Path(path)
+        if not trace_path.is_file():
+            raise ValueError(
+                f"Fake model script {path} is not one of "
+                f"{', '.join(FAKE_MODEL_SCRIPTS)} or a trace file"
+            )
+        text = trace_path.read_text()
+        if text.lstrip().startswith("["):
+            responses = json.loads(text)
+        else:
+            responses = [json.loads(line) for line in text.splitlines() if line]
+        return [dict(response) for response in responses]
+
+    def chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]] = None,
+    ) -> ModelResponse:
+        """Answer from the script after the latency."""
+        rng = self._random(messages)
+        latency = self._draw(rng, self.latency, self.latency_stddev)
+        if latency:
+            time.sleep(latency)
+        return self._respond(rng, system_prompt, messages, tools or [])
+
+    async def achat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]] = None,
+    ) -> ModelResponse:
+        """Answer from the script, sleeping in the event loop."""
+        rng = self._random(messages)
+        latency = self._draw(rng, self.latency, self.latency_stddev)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._respond(rng, system_prompt, messages, tools or [])
+
+    def _random(self, messages: List[Dict[str, Any]]) -> random.Random:
+        """Get the random generator of a request."""
+        first = json.dumps(messages[:1], sort_keys=True, default=str)
+        digest = hashlib.sha256(first.encode()).hexdigest()[:16]
+        return random.Random(f"{self.seed}:{_step(messages)}:{digest}")
+
+    @staticmethod
+    def _draw(rng: random.Random, mean: float, stddev: float) -> float:
+        """Draw a value from a normal distribution, cut off at zero."""
+        if not stddev:
+            return max(mean, 0.0)
+        return max(rng.gauss(mean, stddev), 0.0)
+
+    def _respond(
+        self,
+        rng: random.Random,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: List[Tool],
+    ) -> ModelResponse:
+        """Build the response of the script for a request."""
+        step = _step(messages)
+        input_tokens = estimate_input_tokens(system_prompt, messages)
+        output_tokens = round(
+            self._draw(rng, self.output_tokens, self.output_tokens_stddev)
+        )
+        if self.trace is not None and step < len(self.trace):
+            names = {field.name for field in fields(ModelResponse)}
+            recorded = {
+                key: value
+                for key, value in self.trace[step].items()
+                if key in names
+            }
+            return ModelResponse(
+                **{
+                    "role": "assistant",
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    **recorded,
+                }
+            )
+
+        if self.script == "tools" and step < self.steps:
+            callable_tools = [
+                tool for tool in tools if not _is_finish_tool(tool)
+            ]
+            if callable_tools:
+                tool = callable_tools[step % len(callable_tools)]
+                return self._call(
+                    tool,
+                    _fake_arguments(tool),
+                    step,
+                    input_tokens,
+                    output_tokens,
+                )
+
+        finish_tool = next(
+            (tool for tool in tools if _is_finish_tool(tool)), None
+        )
+        if self.script == "text" or finish_tool is None:
+            return ModelResponse(
+                role="assistant",
+                content="Done.",
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+            )
+        return self._call(
+            finish_tool,
+            {"finish_type": "success", "result": "Done."},
+            step,
+            input_tokens,
+            output_tokens,
+        )
+
+    @staticmethod
+    def _call(
+        tool: Tool,
+        arguments: Dict[str, Any],
+        step: int,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> ModelResponse:
+        """Build a response calling a tool."""
+        if tool.options.include_reason:
+            arguments["reason"] = "Scripted"
+        return ModelResponse(
+            role="assistant",
+            content=arguments,
+            tool_call=tool.name,
+            tool_call_id=f"fake_{step}",
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+        )
+
+
+def _step(messages: List[Dict[str, Any]]) -> int:
+    """Count the responses of the model so far."""
+    return sum(1 for message in messages if message["role"] == "assistant")
+
+
+def _is_finish_tool(tool: Tool) -> bool:
+    """Whether the tool finishes the task."""
+    return tool.name == "finish" or tool.name.endswith(".finish")
+
+
+def _fake_arguments(tool: Tool) -> Dict[str, Any]:
+    """Make up values for the required parameters of a tool."""
+    values = {
+        "string": "fake",
+        "integer": 1,
+        "number": 1.0,
+        "boolean": False,
+        "array": [],
+        "object": {},
+    }
+    return {
+        name: params.get("default", values.get(params["type"], "fake"))
+        for name, params in tool.parameters.items()
+        if params.get("required") and name != "reason"
+    }
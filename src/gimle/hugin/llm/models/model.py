@@ -1,8 +1,9 @@
 """The base interface of an LLM model."""
 
+import asyncio
 import logging
 from dataclasses import dataclass
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional
 
 from gimle.hugin.tools.tool import Tool
 
@@ -11,7 +12,17 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class ModelResponse:
-    """A model response."""
+    """A model response.
+
+    ``input_tokens`` counts uncached input tokens. Providers with prompt
+    caching report the input tokens read from and written to the cache in
+    ``cache_read_tokens`` and ``cache_write_tokens``.
+
+    When the model makes more than one tool call, ``tool_calls`` lists them
+    in order, each as a dict with ``tool_call``, ``tool_call_id`` and
+    ``content``. The first call is also in ``tool_call``, ``tool_call_id``
+    and ``content``.
+    """
 
     role: Literal["user", "assistant", "system"]
     content: Any
@@ -20,6 +31,33 @@ class ModelResponse:
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
     extra_content: Optional[List[str]] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    tool_calls: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def from_tool_calls(
+        cls, tool_calls: List[Dict[str, Any]], **kwargs: Any
+    ) -> "ModelResponse":
+        """Create an assistant response with one or more tool calls.
+
+        Args:
+            tool_calls: The tool calls, in order, each as a dict with
+                ``tool_call``, ``tool_call_id`` and ``content``.
+            **kwargs: The other fields of the response.
+
+        Returns:
+            The model response.
+        """
+        first = tool_calls[0]
+        return cls(
+            role="assistant",
+            content=first["content"],
+            tool_call=first["tool_call"],
+            tool_call_id=first["tool_call_id"],
+            tool_calls=tool_calls if len(tool_calls) > 1 else None,
+            **kwargs,
+        )
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert the model response to a dictionary."""
@@ -31,6 +69,36 @@ class ModelResponse:
             "input_tokens": self.input_tokens,
             "output_tokens": self.output_tokens,
             "extra_content": self.extra_content,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "tool_calls": self.tool_calls,
+        }
+
+
+@dataclass
+class StreamDelta:
+    """A piece of a model response, reported while it is generated.
+
+    Attributes:
+        text: Text added to the response.
+        tool_call: The tool being called, once the model named it.
+        arguments_delta: JSON text added to the arguments of the tool call.
+        arguments: The arguments of the tool call parsed so far, where the
+            value being generated is cut off at the end of the text.
+    """
+
+    text: str = ""
+    tool_call: Optional[str] = None
+    arguments_delta: str = ""
+    arguments: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the delta to a dictionary."""
+        return {
+            "text": self.text,
+            "tool_call": self.tool_call,
+            "arguments_delta": self.arguments_delta,
+            "arguments": self.arguments,
         }
 
 
@@ -57,6 +125,72 @@ class Model:
         """Generate a chat completion."""
         raise NotImplementedError("chat_completion not implemented")
 
+    async def achat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]] = None,
+    ) -> ModelResponse:
+        """Generate a chat completion without blocking the event loop.
+
+        Models with an async client override this, by default
+        ``chat_completion`` runs in a worker thread.
+        """
+        return await asyncio.to_thread(
+            self.chat_completion, system_prompt, messages, tools
+        )
+
+    def stream_chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+        on_delta: Callable[[StreamDelta], None],
+    ) -> ModelResponse:
+        """Generate a chat completion, reporting it as it is generated.
+
+        Models that stream override this to call ``on_delta`` with each
+        piece of text and tool call arguments as it arrives. By default the
+        complete response is reported as a single delta.
+
+        Returns:
+            The same response ``chat_completion`` returns.
+        """
+        response = self.chat_completion(system_prompt, messages, tools)
+        if response.tool_call:
+            for tool_call in response.tool_calls or [
+                {"tool_call": response.tool_call, "content": response.content}
+            ]:
+                on_delta(
+                    StreamDelta(
+                        tool_call=tool_call["tool_call"],
+                        arguments=tool_call["content"],
+                    )
+                )
+        else:
+            on_delta(StreamDelta(text=str(response.content)))
+        return response
+
+    async def astream_chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+        on_delta: Callable[[StreamDelta], None],
+    ) -> ModelResponse:
+        """Stream a chat completion without blocking the event loop.
+
+        By default ``stream_chat_completion`` runs in a worker thread, and
+        ``on_delta`` is called from that thread.
+        """
+        return await asyncio.to_thread(
+            self.stream_chat_completion,
+            system_prompt,
+            messages,
+            tools,
+            on_delta,
+        )
+
     @property
     def model_name(self) -> str:
         """Get the model name."""
@@ -1,10 +1,13 @@
 """Model registry module."""
 
 import logging
+import threading
 from functools import lru_cache
 from typing import Dict, List, Optional
 
+from .fake import FAKE_MODEL_PREFIX, FakeModel
 from .model import Model
+from .rate_limit import RateLimiter, RateLimits
 
 # Model metadata for provider grouping
 MODEL_PROVIDERS: Dict[str, str] = {
@@ -46,11 +49,22 @@ def _normalize_model_name(name: str) -> str:
 
 
 class ModelRegistry:
-    """Registry for LLM models."""
+    """Registry for LLM models.
+
+    Rate limits are configured per provider or per model name, a model's
+    own limits take precedence over those of its provider. Models without
+    limits are called without waiting.
+
+    Names starting with ``fake:`` get a FakeModel for the script in the
+    name, created on first use.
+    """
 
     def __init__(self) -> None:
         """Initialize the model registry."""
         self.models: Dict[str, Model] = {}
+        self.rate_limits: Dict[str, RateLimits] = {}
+        self._rate_limiters: Dict[str, RateLimiter] = {}
+        self._rate_limiters_lock = threading.Lock()
 
     def register_model(self, model_name: str, model: Model) -> None:
         """Register a model with the given name."""
@@ -59,6 +73,10 @@ class ModelRegistry:
     def get_model(self, model_name: str) -> Model:
         """Get a model by name."""
         model_name = _normalize_model_name(model_name)
+        if model_name not in self.models and model_name.startswith(
+            FAKE_MODEL_PREFIX
+        ):
+            self.models.setdefault(model_name, FakeModel.from_name(model_name))
         if model_name not in self.models:
             raise ValueError(f"Model {model_name} not found")
         return self.models[model_name]
@@ -66,14 +84,60 @@ class ModelRegistry:
     def get_models_by_provider(self, provider: str) -> List[str]:
         """Get all registered model names for a given provider."""
         return [
-            name
-            for name, prov in MODEL_PROVIDERS.items()
-            if prov == provider and name in self.models
+            name for name in self.models if self.get_provider(name) == provider
         ]
 
     def get_provider(self, model_name: str) -> Optional[str]:
         """Get the provider for a model name."""
-        return MODEL_PROVIDERS.get(_normalize_model_name(model_name))
+        model_name = _normalize_model_name(model_name)
+        if model_name.startswith(FAKE_MODEL_PREFIX):
+            return "fake"
+        return MODEL_PROVIDERS.get(model_name)
+
+    def set_rate_limits(self, name: str, limits: RateLimits) -> None:
+        """Set the rate limits of a provider or model.
+
+        Args:
+            name: A provider, e.g. ``anthropic``, or a model name.
+            limits: The limits, shared by all calls to the provider or
+                model across sessions.
+        """
+        with self._rate_limiters_lock:
+            self.rate_limits[name] = limits
+            self._rate_limiters.pop(name, None)
+
+    def get_rate_limiter(self, model_name: str) -> Optional[RateLimiter]:
+        """Get the rate limiter for calls to a model.
+
+        Args:
+            model_name: The model name.
+
+        Returns:
+            The limiter of the model or its provider, or None if neither
+            has rate limits.
+        """
+        model_name = _normalize_model_name(model_name)
+        with self._rate_limiters_lock:
+            for name in (model_name, self.get_provider(model_name)):
+                if name is None or name not in self.rate_limits:
+                    continue
+                if name not in self._rate_limiters:
+                    self._rate_limiters[name] = RateLimiter(
+                        self.rate_limits[name]
+                    )
+                return self._rate_limiters[name]
+        return None
+
+    def rate_limiter_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Get the metrics of the rate limiters in use.
+
+        Returns:
+            The metrics of each limiter by provider or model name, see
+            RateLimiter.metrics.
+        """
+        with self._rate_limiters_lock:
+            limiters = dict(self._rate_limiters)
+        return {name: limiter.metrics() for name, limiter in limiters.items()}
 
 
 @lru_cache(maxsize=1)
@@ -212,6 +276,9 @@ def get_model_registry() -> ModelRegistry:
             timeout_seconds=300,
         ),
     )
+    # Scripted model for load tests, see FakeModel for other scripts
+    model_registry.register_model("fake:finish", FakeModel(script="finish"))
+
     # Auto-register remote Ollama models if configured
     from .provider_utils import _load_ollama_api_key, get_ollama_remote_host
 
@@ -1,12 +1,14 @@
 """Ollama model implementation module."""
 
 import logging
+import os
 import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
-from ollama import Client
+import httpx
+from ollama import ChatResponse, Client
 
 from gimle.hugin.tools.tool import Tool
 
@@ -30,20 +32,55 @@ class ToolCallExpectedException(Exception):
         )
 
 
-# Per-host locks to prevent concurrent Ollama calls to the same
-# server (which can cause hanging), while allowing calls to
-# different hosts (local vs remote) to run concurrently.
-_ollama_host_locks: Dict[str, threading.Lock] = {}
-_ollama_host_locks_guard = threading.Lock()
+# Per-host semaphores bound the concurrent calls to each Ollama server,
+# which answers up to OLLAMA_NUM_PARALLEL requests at once and queues the
+# rest. Calls to different hosts (local vs remote) run independently.
+# host -> (calls at once, semaphore)
+_ollama_host_semaphores: Dict[str, Tuple[int, threading.BoundedSemaphore]] = {}
+# (host, calls at once) of models whose limit was ignored, warned once
+_ollama_host_mismatches: Set[Tuple[str, int]] = set()
+_ollama_host_semaphores_guard = threading.Lock()
 
 
-def _get_host_lock(host: Optional[str]) -> threading.Lock:
-    """Get or create a lock for a specific Ollama host."""
+def default_max_parallel_requests() -> int:
+    """Get the default number of concurrent calls to an Ollama host.
+
+    Follows OLLAMA_NUM_PARALLEL when it is set for the server, otherwise
+    calls run one at a time.
+    """
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "1")))
+    except ValueError:
+        return 1
+
+
+def _get_host_semaphore(
+    host: Optional[str], max_parallel_requests: int
+) -> threading.BoundedSemaphore:
+    """Get or create the semaphore for a specific Ollama host.
+
+    The first model to call a host sets how many calls run at once. Models
+    that ask for a different number later are warned about once, since
+    their setting has no effect.
+    """
     key = host or "localhost"
-    with _ollama_host_locks_guard:
-        if key not in _ollama_host_locks:
-            _ollama_host_locks[key] = threading.Lock()
-        return _ollama_host_locks[key]
+    with _ollama_host_semaphores_guard:
+        if key not in _ollama_host_semaphores:
+            _ollama_host_semaphores[key] = (
+                max_parallel_requests,
+                threading.BoundedSemaphore(max_parallel_requests),
+            )
+        limit, semaphore = _ollama_host_semaphores[key]
+        if (
+            limit != max_parallel_requests
+            and (key, max_parallel_requests) not in _ollama_host_mismatches
+        ):
+            _ollama_host_mismatches.add((key, max_parallel_requests))
+            logging.warning(
+                f"Ollama host {key} already runs {limit} calls at once, "
+                f"ignoring max_parallel_requests={max_parallel_requests}"
+            )
+        return semaphore
 
 
 class OllamaModel(Model):
@@ -58,8 +95,25 @@ class OllamaModel(Model):
         timeout_seconds: int = 60,
         tool_call_retries: int = 3,
         host: Optional[str] = None,
+        max_parallel_requests: Optional[int] = None,
+        keep_alive: Optional[Union[float, str]] = "30m",
     ):
-        """Initialize the Ollama model."""
+        """Initialize the Ollama model.
+
+        Args:
+            model_name: The Ollama model name.
+            temperature: The sampling temperature.
+            tool_choice: The tool choice.
+            strict_tool_calling: Whether to retry until the model calls a
+                tool.
+            timeout_seconds: The HTTP timeout of each call.
+            tool_call_retries: The attempts to get a tool call.
+            host: The Ollama server, local by default.
+            max_parallel_requests: How many calls to the host run at once,
+                defaults to OLLAMA_NUM_PARALLEL or 1.
+            keep_alive: How long the server keeps the model loaded after a
+                call, None for the server default.
+        """
         super().__init__(
             config={
                 "model": model_name,
@@ -69,24 +123,54 @@ class OllamaModel(Model):
                 "timeout_seconds": timeout_seconds,
                 "tool_call_retries": tool_call_retries,
                 "host": host,
+                "keep_alive": keep_alive,
             }
         )
         self.strict_tool_calling = strict_tool_calling
         self.timeout_seconds = timeout_seconds
         self.tool_call_retries = tool_call_retries
         self.host = host
+        self.max_parallel_requests = (
+            max_parallel_requests or default_max_parallel_requests()
+        )
+        self.keep_alive = keep_alive
         self._client: Optional[Client] = None
 
     @property
     def client(self) -> Client:
         """Lazy-initialized Ollama client."""
         if self._client is None:
+            # HTTP timeouts work in any thread, unlike signal based ones
             if self.host:
-                self._client = Client(host=self.host)
+                self._client = Client(
+                    host=self.host, timeout=self.timeout_seconds
+                )
             else:
-                self._client = Client()
+                self._client = Client(timeout=self.timeout_seconds)
         return self._client
 
+    def _chat(
+        self,
+        messages: List[Dict[str, Any]],
+        options: Dict[str, Any],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        think: Optional[bool] = None,
+    ) -> ChatResponse:
+        """Call the chat API, keeping the model loaded between calls."""
+        try:
+            return self.client.chat(
+                model=self.model_name,
+                messages=messages,
+                options=options,
+                tools=tools,
+                think=think,
+                keep_alive=self.keep_alive,
+            )
+        except httpx.TimeoutException as error:
+            raise TimeoutError(
+                f"Ollama API call timed out after {self.timeout_seconds} seconds"
+            ) from error
+
     @property
     def host_display(self) -> str:
         """Display-friendly host string."""
@@ -227,6 +311,39 @@ class OllamaModel(Model):
 
         return None
 
+    @staticmethod
+    def tool_schema(tool: Tool) -> Dict[str, Any]:
+        """Build the Ollama function definition of a tool.
+
+        Args:
+            tool: The tool.
+
+        Returns:
+            The function definition for the ``tools`` of a request.
+        """
+        return {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        name: {
+                            "type": params["type"],
+                            "description": params["description"],
+                        }
+                        for name, params in tool.parameters.items()
+                    },
+                    "required": [
+                        name
+                        for name, params in tool.parameters.items()
+                        if params.get("required")
+                    ],
+                },
+            },
+        }
+
     def chat_completion(
         self,
         system_prompt: str,
@@ -240,33 +357,11 @@ class OllamaModel(Model):
             f"Using Ollama with {self.config=} tools={[t.name for t in tools]}"
         )
 
-        tools_to_use = []
-        for tool in tools:
-            tools_to_use.append(
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                name: {
-                                    "type": params["type"],
-                                    "description": params["description"],
-                                }
-                                for name, params in tool.parameters.items()
-                            },
-                            "required": [
-                                name
-                                for name, params in tool.parameters.items()
-                                if params.get("required")
-                            ],
-                        },
-                    },
-                }
-            )
+        tools_to_use = [
+            tool.get_schema("ollama", self.tool_schema) for tool in tools
+        ]
 
+        converted_messages = []
         for message in messages:
             # Convert structured content to string format for Ollama
             if "content" not in message:
@@ -274,31 +369,49 @@ class OllamaModel(Model):
             if isinstance(message["content"], list):
                 # Handle structured content blocks
                 content_text = ""
-
-                for content_block in message["content"]:
-                    if content_block["type"] == "text":
-                        content_text += content_block["text"]
-                    elif content_block["type"] == "tool_result":
-                        # Convert tool result to tool message format
-                        message["role"] = "tool"
-                        message["tool_name"] = content_block["name"]
-                        content_text = str(content_block["content"])
-                        break
-                    elif content_block["type"] == "tool_use":
-                        # Handle tool_use in list format
-                        message["tool_calls"] = [
+                tool_results = [
+                    block
+                    for block in message["content"]
+                    if block["type"] == "tool_result"
+                ]
+                tool_uses = [
+                    block
+                    for block in message["content"]
+                    if block["type"] == "tool_use"
+                ]
+
+                if tool_results:
+                    # Convert tool results to tool messages, one per result
+                    for content_block in tool_results:
+                        converted_messages.append(
                             {
-                                "function": {
-                                    "name": content_block["name"],
-                                    "arguments": content_block["input"],
-                                }
+                                "role": "tool",
+                                "tool_name": content_block["name"],
+                                "content": str(content_block["content"]),
                             }
-                        ]
-                        tool_name = content_block["name"]
-                        content_text = (
-                            f"I'll use the {tool_name} tool to help you."
                         )
-                        break
+                    continue
+                if tool_uses:
+                    # Handle tool_use in list format
+                    message["tool_calls"] = [
+                        {
+                            "function": {
+                                "name": content_block["name"],
+                                "arguments": content_block["input"],
+                            }
+                        }
+                        for content_block in tool_uses
+                    ]
+                    called_tools = " and ".join(
+                        content_block["name"] for content_block in tool_uses
+                    )
+                    content_text = (
+                        f"I'll use the {called_tools} tool to help you."
+                    )
+                else:
+                    for content_block in message["content"]:
+                        if content_block["type"] == "text":
+                            content_text += content_block["text"]
 
                 message["content"] = content_text
             elif isinstance(message["content"], dict):
@@ -352,6 +465,8 @@ class OllamaModel(Model):
             elif not isinstance(message["content"], str):
                 # Handle any other non-string content
                 message["content"] = str(message["content"])
+            converted_messages.append(message)
+        messages = converted_messages
 
         # Augment system prompt for Qwen3 to force tool usage
         enhanced_system_prompt = system_prompt
@@ -469,9 +584,9 @@ CRITICAL INSTRUCTIONS FOR TOOL USAGE:
                     f"About to call Ollama chat with model {self.model_name}"
                 )
 
-                # Use global lock to prevent concurrent Ollama calls that might hang
-                with _get_host_lock(self.host):
-                    logging.debug("Acquired Ollama lock")
+                # Wait for a free slot on the host
+                with _get_host_semaphore(self.host, self.max_parallel_requests):
+                    logging.debug("Acquired Ollama slot")
                     if tools_to_use:
                         try:
                             logging.debug(
@@ -497,36 +612,12 @@ CRITICAL INSTRUCTIONS FOR TOOL USAGE:
                             )
                             logging.debug("Starting Ollama API call...")
 
-                            # Add timeout to prevent infinite hanging (only works in main thread)
-                            use_signal_timeout = (
-                                threading.current_thread()
-                                is threading.main_thread()
+                            response = self._chat(
+                                messages=retry_messages,
+                                options=retry_options,
+                                tools=tools_to_use,
+                                think=retry_think,
                             )
-
-                            if use_signal_timeout:
-                                import signal
-
-                                def timeout_handler(
-                                    signum: int, frame: Any
-                                ) -> None:
-                                    raise TimeoutError(
-                                        f"Ollama API call timed out after {self.timeout_seconds} seconds"
-                                    )
-
-                                signal.signal(signal.SIGALRM, timeout_handler)
-                                signal.alarm(self.timeout_seconds)
-
-                            try:
-                                response = self.client.chat(
-                                    model=self.model_name,
-                                    messages=retry_messages,
-                                    options=retry_options,
-                                    tools=tools_to_use,
-                                    think=retry_think,
-                                )
-                            finally:
-                                if use_signal_timeout:
-                                    signal.alarm(0)  # Cancel the alarm
                             logging.debug(
                                 "Ollama chat with tools completed successfully"
                             )
@@ -891,8 +982,7 @@ CRITICAL INSTRUCTIONS FOR TOOL USAGE:
                                     if "qwen3" in self.model_name.lower()
                                     else None
                                 )
-                                response = self.client.chat(
-                                    model=self.model_name,
+                                response = self._chat(
                                     messages=simplified_messages,
                                     options=options,
                                     think=think_param,
@@ -919,69 +1009,16 @@ CRITICAL INSTRUCTIONS FOR TOOL USAGE:
 
                         logging.debug("Starting Ollama API call (no tools)...")
 
-                        # Add timeout to prevent infinite hanging (only works in main thread)
-                        use_signal_timeout = (
-                            threading.current_thread()
-                            is threading.main_thread()
+                        response = self._chat(
+                            messages=retry_messages,
+                            options=retry_options,
+                            think=retry_think,
                         )
-
-                        if use_signal_timeout:
-                            import signal
-
-                            def timeout_handler(
-                                signum: int, frame: Any
-                            ) -> None:
-                                raise TimeoutError(
-                                    f"Ollama API call timed out after {self.timeout_seconds} seconds"
-                                )
-
-                            signal.signal(signal.SIGALRM, timeout_handler)
-                            signal.alarm(self.timeout_seconds)
-
-                        try:
-                            response = self.client.chat(
-                                model=self.model_name,
-                                messages=retry_messages,
-                                options=retry_options,
-                                think=retry_think,
-                            )
-                        finally:
-                            if use_signal_timeout:
-                                signal.alarm(0)  # Cancel the alarm
                         logging.debug(
                             "Ollama chat without tools completed successfully"
                         )
 
-                    # Longer delay for local small models to prevent
-                    # resource conflicts. Skip for remote/cloud models.
-                    if self.host:
-                        logging.debug("Skipping delay for remote model")
-                    elif any(
-                        model in self.model_name.lower()
-                        for model in [
-                            "qwen",
-                            "gemma",
-                            "phi",
-                            "llama",
-                            "mistral",
-                        ]
-                    ):
-                        logging.debug(
-                            "Applying 1.0s delay for resource-constrained model"
-                        )
-                        time.sleep(
-                            1.0
-                        )  # Longer delay for resource-constrained models
-                        logging.debug(
-                            "Delay completed for resource-constrained model"
-                        )
-                    else:
-                        logging.debug("Applying 0.1s standard delay")
-                        time.sleep(0.1)  # Standard delay for other models
-                        logging.debug("Standard delay completed")
-                    logging.debug("About to release Ollama lock")
-
-                logging.debug("Released Ollama lock")
+                logging.debug("Released Ollama slot")
 
                 # If we get here without exception, break out of retry loop
                 break
@@ -1018,33 +1055,38 @@ TEMPERATURE:\n{self.temperature}"""
         logging.debug(f"Token usage {input_tokens=} {output_tokens=}")
 
         if response.message.tool_calls:
-            tool_call = response.message.tool_calls[0]
-
-            # Handle both dictionary format (from our parsing) and object format (from Ollama)
-            if isinstance(tool_call, dict):  # type: ignore[unreachable]
-                tool_name = tool_call["function"]["name"]  # type: ignore[unreachable]
-                tool_args_str = tool_call["function"]["arguments"]
-            else:
-                tool_name = tool_call.function.name
-                tool_args_str = tool_call.function.arguments
-
-            # Parse arguments string to dictionary
             import json
 
-            try:
-                tool_args_dict = (
-                    json.loads(tool_args_str)
-                    if isinstance(tool_args_str, str)  # type: ignore[unreachable]
-                    else tool_args_str
+            tool_calls = []
+            for tool_call in response.message.tool_calls:
+                # Handle both dictionary format (from our parsing) and object format (from Ollama)
+                if isinstance(tool_call, dict):  # type: ignore[unreachable]
+                    tool_name = tool_call["function"]["name"]  # type: ignore[unreachable]
+                    tool_args_str = tool_call["function"]["arguments"]
+                else:
+                    tool_name = tool_call.function.name
+                    tool_args_str = tool_call.function.arguments
+
+                # Parse arguments string to dictionary
+                try:
+                    tool_args_dict = (
+                        json.loads(tool_args_str)
+                        if isinstance(tool_args_str, str)  # type: ignore[unreachable]
+                        else tool_args_str
+                    )
+                except json.JSONDecodeError:
+                    tool_args_dict = {}
+                tool_calls.append(
+                    {
+                        "tool_call": tool_name,
+                        "tool_call_id": str(uuid.uuid4()),
+                        # Now a dictionary, not a string
+                        "content": tool_args_dict,
+                    }
                 )
-            except json.JSONDecodeError:
-                tool_args_dict = {}
-
-            return ModelResponse(
-                role="assistant",
-                content=tool_args_dict,  # Now a dictionary, not a string
-                tool_call=tool_name,
-                tool_call_id=str(uuid.uuid4()),
+
+            return ModelResponse.from_tool_calls(
+                tool_calls,
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
             )
@@ -1,11 +1,17 @@
 """OpenAI model implementation module."""
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from gimle.hugin.tools.tool import ParameterSchema, Tool
 
-from .model import Model, ModelResponse
+from .clients import (
+    HttpClientConfig,
+    get_shared_async_client,
+    get_shared_client,
+)
+from .model import Model, ModelResponse, StreamDelta
+from .streaming import DeltaReporter
 
 
 class OpenAIModel(Model):
@@ -17,6 +23,9 @@ class OpenAIModel(Model):
         temperature: Optional[float] = 0,
         max_tokens: int = 4096,
         tool_choice: str = "required",
+        client: Optional[Any] = None,
+        async_client: Optional[Any] = None,
+        http_client_config: Optional[HttpClientConfig] = None,
     ):
         """Initialize the OpenAI model.
 
@@ -29,6 +38,13 @@ class OpenAIModel(Model):
             tool_choice: Tool choice mode. "required" forces the model
                 to call a tool, "auto" lets it decide. Defaults to
                 "required" to match Anthropic's "any" behavior.
+            client: The ``openai.OpenAI`` client to send requests with. By
+                default the client shared by OpenAI models is used.
+            async_client: The ``openai.AsyncOpenAI`` client to send async
+                requests with. By default the async client shared by OpenAI
+                models in the running event loop is used.
+            http_client_config: Connection pool and timeout settings of
+                the shared clients, the default settings if None.
         """
         super().__init__(
             config={
@@ -38,6 +54,49 @@ class OpenAIModel(Model):
                 "tool_choice": tool_choice,
             }
         )
+        self.http_client_config = http_client_config
+        self._client = client
+        self._async_client = async_client
+
+    @property
+    def client(self) -> Any:
+        """The ``openai.OpenAI`` client requests are sent with.
+
+        Created on first use, after credentials were loaded, and shared by
+        the OpenAI models with the same client settings.
+        """
+        if self._client is not None:
+            return self._client
+        import openai
+
+        return get_shared_client(
+            "openai",
+            lambda config: openai.OpenAI(
+                http_client=config.create_http_client(openai.DefaultHttpxClient)
+            ),
+            self.http_client_config,
+        )
+
+    @property
+    def async_client(self) -> Any:
+        """The ``openai.AsyncOpenAI`` client async requests are sent with.
+
+        Shared by the OpenAI models with the same client settings in the
+        running event loop.
+        """
+        if self._async_client is not None:
+            return self._async_client
+        import openai
+
+        return get_shared_async_client(
+            "openai",
+            lambda config: openai.AsyncOpenAI(
+                http_client=config.create_http_client(
+                    openai.DefaultAsyncHttpxClient
+                )
+            ),
+            self.http_client_config,
+        )
 
     def chat_completion(
         self,
@@ -46,76 +105,190 @@ class OpenAIModel(Model):
         tools: Optional[List[Tool]] = None,
     ) -> ModelResponse:
         """Generate a chat completion using OpenAI API."""
+        openai = self._import_openai()
+        request = self.build_request(system_prompt, messages, tools or [])
+        try:
+            response = self.client.chat.completions.create(**request)
+        except openai.APIError as error:
+            self._log_error(error, messages)
+            raise error
+        return self.parse_response(response)
+
+    async def achat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]] = None,
+    ) -> ModelResponse:
+        """Generate a chat completion using the async OpenAI API."""
+        openai = self._import_openai()
+        request = self.build_request(system_prompt, messages, tools or [])
+        try:
+            response = await self.async_client.chat.completions.create(
+                **request
+            )
+        except openai.APIError as error:
+            self._log_error(error, messages)
+            raise error
+        return self.parse_response(response)
+
+    def stream_chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+        on_delta: Callable[[StreamDelta], None],
+    ) -> ModelResponse:
+        """Stream a chat completion using the OpenAI API."""
+        openai = self._import_openai()
+        request = self.build_stream_request(system_prompt, messages, tools)
+        reporter = DeltaReporter(on_delta)
+        tool_call_index = None
+        try:
+            with self.client.chat.completions.stream(**request) as stream:
+                for event in stream:
+                    tool_call_index = self._report_event(
+                        event, reporter, tool_call_index
+                    )
+                response = stream.get_final_completion()
+        except openai.APIError as error:
+            self._log_error(error, messages)
+            raise error
+        return self.parse_response(response)
+
+    async def astream_chat_completion(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+        on_delta: Callable[[StreamDelta], None],
+    ) -> ModelResponse:
+        """Stream a chat completion using the async OpenAI API."""
+        openai = self._import_openai()
+        request = self.build_stream_request(system_prompt, messages, tools)
+        reporter = DeltaReporter(on_delta)
+        tool_call_index = None
+        try:
+            async with self.async_client.chat.completions.stream(
+                **request
+            ) as stream:
+                async for event in stream:
+                    tool_call_index = self._report_event(
+                        event, reporter, tool_call_index
+                    )
+                response = await stream.get_final_completion()
+        except openai.APIError as error:
+            self._log_error(error, messages)
+            raise error
+        return self.parse_response(response)
+
+    def build_stream_request(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Tool]],
+    ) -> Dict[str, Any]:
+        """Build the arguments of a chat.completions.stream request.
+
+        The request of ``build_request``, asking for the token usage in the
+        last chunk of the stream.
+        """
+        request = self.build_request(system_prompt, messages, tools or [])
+        request["stream_options"] = {"include_usage": True}
+        return request
+
+    @staticmethod
+    def _report_event(
+        event: Any, reporter: DeltaReporter, tool_call_index: Optional[int]
+    ) -> Optional[int]:
+        """Report the text and tool call arguments of a stream event.
+
+        Returns:
+            The index of the tool call being streamed.
+        """
+        if event.type == "content.delta":
+            reporter.text(event.delta)
+        elif event.type == "tool_calls.function.arguments.delta":
+            if event.index != tool_call_index:
+                reporter.tool_call(event.name)
+            reporter.arguments(event.arguments_delta)
+            return int(event.index)
+        return tool_call_index
+
+    @staticmethod
+    def _import_openai() -> Any:
+        """Import the openai package."""
         try:
             import openai
         except ImportError:
             raise ImportError(
                 "openai package not installed. Install with: pip install openai"
             )
+        return openai
+
+    def _log_error(
+        self, error: Exception, messages: List[Dict[str, Any]]
+    ) -> None:
+        """Log a failed request."""
+        logging.error(
+            f"OpenAI Error: {error}\n"
+            f"MODEL: {self.model_name}\n"
+            f"MESSAGES: {len(messages)} messages\n"
+        )
 
-        if tools is None:
-            tools = []
+    def build_request(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        tools: List[Tool],
+    ) -> Dict[str, Any]:
+        """Build the arguments of a chat.completions.create request.
+
+        Args:
+            system_prompt: The system prompt.
+            messages: The message history.
+            tools: The tools the model can call.
 
+        Returns:
+            The keyword arguments for ``chat.completions.create``.
+        """
         logging.debug(
             f"Using OpenAI with {self.config=} tools={[t.name for t in tools]}"
         )
 
-        client = openai.OpenAI()
-
         # Build tools in OpenAI format
-        tools_to_use = []
-        for tool in tools:
-            tools_to_use.append(
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                name: self._build_param_schema(params)
-                                for name, params in tool.parameters.items()
-                            },
-                            "required": [
-                                name
-                                for name, params in tool.parameters.items()
-                                if params.get("required")
-                            ],
-                        },
-                    },
-                }
-            )
+        tools_to_use = [
+            tool.get_schema("openai", self.tool_schema) for tool in tools
+        ]
 
         # Convert messages to OpenAI format
         openai_messages = self._convert_messages(system_prompt, messages)
 
         Model.log_messages(messages)
 
-        try:
-            kwargs: Dict[str, Any] = {
-                "model": self.model_name,
-                "messages": openai_messages,
-                "max_completion_tokens": self.max_tokens,
-            }
+        kwargs: Dict[str, Any] = {
+            "model": self.model_name,
+            "messages": openai_messages,
+            "max_completion_tokens": self.max_tokens,
+        }
 
-            if self.temperature is not None:
-                kwargs["temperature"] = self.temperature
+        if self.temperature is not None:
+            kwargs["temperature"] = self.temperature
 
-            if tools_to_use:
-                kwargs["tools"] = tools_to_use
-                kwargs["tool_choice"] = self.tool_choice
+        if tools_to_use:
+            kwargs["tools"] = tools_to_use
+            kwargs["tool_choice"] = self.tool_choice
+        return kwargs
 
-            response = client.chat.completions.create(**kwargs)
+    def parse_response(self, response: Any) -> ModelResponse:
+        """Convert a chat.completions.create response to a model response.
 
-        except openai.APIError as error:
-            logging.error(
-                f"OpenAI Error: {error}\n"
-                f"MODEL: {self.model_name}\n"
-                f"MESSAGES: {len(messages)} messages\n"
-            )
-            raise error
+        Args:
+            response: The OpenAI chat completion.
 
+        Returns:
+            The model response.
+        """
         choice = response.choices[0]
         message = choice.message
 
@@ -130,19 +303,24 @@ class OpenAIModel(Model):
 
         # Check for tool calls
         if message.tool_calls:
-            tool_call = message.tool_calls[0]  # Handle first tool call
             import json
 
-            try:
-                tool_args = json.loads(tool_call.function.arguments)
-            except json.JSONDecodeError:
-                tool_args = {}
+            tool_calls = []
+            for tool_call in message.tool_calls:
+                try:
+                    tool_args = json.loads(tool_call.function.arguments)
+                except json.JSONDecodeError:
+                    tool_args = {}
+                tool_calls.append(
+                    {
+                        "tool_call": tool_call.function.name,
+                        "tool_call_id": tool_call.id,
+                        "content": tool_args,
+                    }
+                )
 
-            return ModelResponse(
-                role="assistant",
-                content=tool_args,
-                tool_call=tool_call.function.name,
-                tool_call_id=tool_call.id,
+            return ModelResponse.from_tool_calls(
+                tool_calls,
                 extra_content=[message.content] if message.content else [],
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
@@ -157,6 +335,35 @@ class OpenAIModel(Model):
             output_tokens=output_tokens,
         )
 
+    def tool_schema(self, tool: Tool) -> Dict[str, Any]:
+        """Build the OpenAI function definition of a tool.
+
+        Args:
+            tool: The tool.
+
+        Returns:
+            The function definition for the ``tools`` of a request.
+        """
+        return {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        name: self._build_param_schema(params)
+                        for name, params in tool.parameters.items()
+                    },
+                    "required": [
+                        name
+                        for name, params in tool.parameters.items()
+                        if params.get("required")
+                    ],
+                },
+            },
+        }
+
     def _build_param_schema(self, params: ParameterSchema) -> Dict[str, Any]:
         """Build a JSON Schema property from tool parameter definition."""
         p = dict(params)
@@ -207,24 +414,25 @@ class OpenAIModel(Model):
                 # Assistant made a tool call
                 import json
 
-                result.append(
-                    {
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [
-                            {
-                                "id": item.get("id", ""),
-                                "type": "function",
-                                "function": {
-                                    "name": item.get("name", ""),
-                                    "arguments": json.dumps(
-                                        item.get("input", {})
-                                    ),
-                                },
-                            }
-                        ],
-                    }
-                )
+                tool_call = {
+                    "id": item.get("id", ""),
+                    "type": "function",
+                    "function": {
+                        "name": item.get("name", ""),
+                        "arguments": json.dumps(item.get("input", {})),
+                    },
+                }
+                # Tool calls made together go in one assistant message
+                if result and result[-1].get("tool_calls"):
+                    result[-1]["tool_calls"].append(tool_call)
+                else:
+                    result.append(
+                        {
+                            "role": "assistant",
+                            "content": None,
+                            "tool_calls": [tool_call],
+                        }
+                    )
 
             elif item_type == "tool_result":
                 # Result from a tool call
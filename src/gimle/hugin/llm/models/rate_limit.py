@@ -0,0 +1,371 @@
+"""Rate limiting of the calls to model providers."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .model import ModelResponse
+
+logger = logging.getLogger(__name__)
+
+# Rough number of characters per token, to estimate the input of a request
+CHARS_PER_TOKEN = 4
+# Pause after a rate limit error without a retry-after header
+DEFAULT_BACKOFF = 10.0
+# Rate limit errors halve the allowed rates, each successful call
+# restores this fraction of the full rates
+RATE_RECOVERY = 0.05
+MIN_RATE_SCALE = 0.1
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Limits of the calls to a provider or model.
+
+    Attributes:
+        requests_per_minute: Maximum number of requests per minute.
+        input_tokens_per_minute: Maximum number of input tokens per minute.
+        output_tokens_per_minute: Maximum number of output tokens per
+            minute.
+        max_concurrency: Maximum number of requests in flight.
+    """
+
+    requests_per_minute: Optional[float] = None
+    input_tokens_per_minute: Optional[float] = None
+    output_tokens_per_minute: Optional[float] = None
+    max_concurrency: Optional[int] = None
+
+
+def estimate_input_tokens(
+    system_prompt: str, messages: List[Dict[str, Any]]
+) -> int:
+    """Estimate the input tokens of a request from its size.
+
+    Args:
+        system_prompt: The system prompt.
+        messages: The messages.
+
+    Returns:
+        The estimated number of input tokens.
+    """
+    size = len(system_prompt) + len(json.dumps(messages, default=str))
+    return size // CHARS_PER_TOKEN + 1
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Get how long to wait after a rate limit error.
+
+    Recognizes the errors of the provider SDKs by their HTTP status.
+
+    Args:
+        error: The error raised by a model call.
+
+    Returns:
+        The seconds to wait, DEFAULT_BACKOFF if the provider did not say,
+        or None if the error is not a rate limit error.
+    """
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, TypeError, ValueError):
+        return DEFAULT_BACKOFF
+
+
+class TokenBucket:
+    """Allows a number of units per minute, refilled continuously.
+
+    Reservations that exceed the available units are granted on credit and
+    return how long the caller has to wait for the credit to be repaid, so
+    callers are served in order and large requests are not starved.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            per_minute: The units allowed per minute, also the burst size.
+        """
+        self.per_minute = per_minute
+        self.available = per_minute
+        self._updated = time.monotonic()
+
+    def refill(self, now: float, scale: float = 1.0) -> None:
+        """Add the units accumulated since the last refill.
+
+        Args:
+            now: The current monotonic time.
+            scale: Fraction of the full rate to refill at.
+        """
+        elapsed = now - self._updated
+        self._updated = now
+        self.available = min(
+            self.per_minute,
+            self.available + elapsed * self.per_minute * scale / 60,
+        )
+
+    def take(self, units: float, scale: float = 1.0) -> float:
+        """Take units, on credit if needed.
+
+        Args:
+            units: The units to take, negative to give units back.
+            scale: Fraction of the full rate the credit is repaid at.
+
+        Returns:
+            The seconds until the bucket is no longer in debt.
+        """
+        self.available -= units
+        if self.available >= 0:
+            return 0.0
+        return -self.available * 60 / (self.per_minute * scale)
+
+
+class RateLimiter:
+    """Rate limits and concurrency limit of a provider or model.
+
+    Calls run inside ``limit`` (or ``alimit`` in async code), which waits
+    until the request and its estimated input tokens fit the limits and a
+    concurrency slot is free. The actual token usage of the response is
+    recorded afterwards, so later calls wait for output tokens and for
+    input tokens that were underestimated.
+
+    A rate limit error from the provider pauses all calls for its
+    retry-after time and halves the allowed rates, which recover again
+    with each successful call.
+
+    Limiters are shared between threads and event loops.
+    """
+
+    def __init__(self, limits: RateLimits) -> None:
+        """Initialize the limiter.
+
+        Args:
+            limits: The limits to enforce.
+        """
+        self.limits = limits
+        self._buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(per_minute)
+            for name, per_minute in (
+                ("requests", limits.requests_per_minute),
+                ("input_tokens", limits.input_tokens_per_minute),
+                ("output_tokens", limits.output_tokens_per_minute),
+            )
+            if per_minute
+        }
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._queued = 0
+        self._paused_until = 0.0
+        self.rate_scale = 1.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+
+    def _reserve(self, input_tokens: int) -> float:
+        """Reserve a request and its input tokens.
+
+        Returns:
+            The seconds to wait before sending the request.
+        """
+        now = time.monotonic()
+        wait = max(0.0, self._paused_until - now)
+        for name, units in (("requests", 1), ("input_tokens", input_tokens)):
+            bucket = self._buckets.get(name)
+            if bucket is not None:
+                bucket.refill(now, self.rate_scale)
+                wait = max(wait, bucket.take(units, self.rate_scale))
+        # Output tokens used by earlier calls delay the next calls
+        bucket = self._buckets.get("output_tokens")
+        if bucket is not None:
+            bucket.refill(now, self.rate_scale)
+            wait = max(wait, bucket.take(0, self.rate_scale))
+        return wait
+
+    def _try_acquire_slot(self) -> bool:
+        """Take a concurrency slot if one is free, with the lock held."""
+        if self._paused_until > time.monotonic():
+            return False
+        max_concurrency = self.limits.max_concurrency
+        if max_concurrency is not None and self._in_flight >= max_concurrency:
+            return False
+        self._in_flight += 1
+        return True
+
+    def _pause_remaining(self) -> float:
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def _acquire(self, input_tokens: int) -> float:
+        """Wait until a request can be sent, blocking the thread.
+
+        Returns:
+            The seconds waited.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._queued += 1
+            wait = self._reserve(input_tokens)
+        try:
+            if wait > 0:
+                time.sleep(wait)
+            with self._lock:
+                while not self._try_acquire_slot():
+                    self._slot_freed.wait(self._pause_remaining() or None)
+        finally:
+            with self._lock:
+                self._queued -= 1
+        return time.monotonic() - start
+
+    async def _aacquire(self, input_tokens: int) -> float:
+        """Wait until a request can be sent, without blocking the loop.
+
+        Returns:
+            The seconds waited.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._queued += 1
+            wait = self._reserve(input_tokens)
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while True:
+                with self._lock:
+                    if self._try_acquire_slot():
+                        break
+                    delay = self._pause_remaining() or 0.01
+                await asyncio.sleep(delay)
+        finally:
+            with self._lock:
+                self._queued -= 1
+        return time.monotonic() - start
+
+    def _release(
+        self,
+        waited: float,
+        input_tokens: int,
+        response: Optional[ModelResponse],
+        error: Optional[BaseException],
+    ) -> None:
+        """Free the slot and account for the result of the call."""
+        with self._lock:
+            self._in_flight -= 1
+            self.requests += 1
+            self.wait_seconds += waited
+            now = time.monotonic()
+            if response is not None:
+                self._record_usage(now, input_tokens, response)
+                self.rate_scale = min(1.0, self.rate_scale + RATE_RECOVERY)
+            pause = retry_after(error) if error is not None else None
+            if pause is not None:
+                self.rate_limited += 1
+                self.rate_scale = max(MIN_RATE_SCALE, self.rate_scale / 2)
+                self._paused_until = max(self._paused_until, now + pause)
+                logger.warning(
+                    f"Rate limited, pausing calls for {pause:.1f}s at "
+                    f"{self.rate_scale:.0%} of the configured rates"
+                )
+            self._slot_freed.notify_all()
+
+    def _record_usage(
+        self, now: float, input_tokens: int, response: ModelResponse
+    ) -> None:
+        """Correct the input estimate and take the output tokens."""
+        used_input = sum(
+            tokens or 0
+            for tokens in (
+                response.input_tokens,
+                response.cache_read_tokens,
+                response.cache_write_tokens,
+            )
+        )
+        bucket = self._buckets.get("input_tokens")
+        if bucket is not None and response.input_tokens is not None:
+            bucket.refill(now, self.rate_scale)
+            bucket.take(used_input - input_tokens, self.rate_scale)
+        bucket = self._buckets.get("output_tokens")
+        if bucket is not None and response.output_tokens:
+            bucket.refill(now, self.rate_scale)
+            bucket.take(response.output_tokens, self.rate_scale)
+
+    @contextmanager
+    def limit(self, input_tokens: int) -> Iterator["LimitedCall"]:
+        """Wait for the limits, then run a call inside the context.
+
+        Args:
+            input_tokens: The estimated input tokens of the request.
+
+        Yields:
+            The call, to record the response on.
+        """
+        call = LimitedCall(waited=self._acquire(input_tokens))
+        try:
+            yield call
+        except BaseException as error:
+            self._release(call.waited, input_tokens, None, error)
+            raise
+        self._release(call.waited, input_tokens, call.response, None)
+
+    @asynccontextmanager
+    async def alimit(self, input_tokens: int) -> AsyncIterator["LimitedCall"]:
+        """Wait for the limits in async code, see ``limit``.
+
+        Args:
+            input_tokens: The estimated input tokens of the request.
+
+        Yields:
+            The call, to record the response on.
+        """
+        call = LimitedCall(waited=await self._aacquire(input_tokens))
+        try:
+            yield call
+        except BaseException as error:
+            self._release(call.waited, input_tokens, None, error)
+            raise
+        self._release(call.waited, input_tokens, call.response, None)
+
+    def metrics(self) -> Dict[str, float]:
+        """Get the current state and counters of the limiter.
+
+        Returns:
+            Dict with the calls waiting (queue_depth), the calls in flight,
+            the finished requests, the rate limit errors, the total and
+            average seconds waited, and the fraction of the configured
+            rates currently allowed.
+        """
+        with self._lock:
+            return {
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "wait_seconds": self.wait_seconds,
+                "average_wait_seconds": (
+                    self.wait_seconds / self.requests if self.requests else 0.0
+                ),
+                "rate_scale": self.rate_scale,
+            }
+
+
+class LimitedCall:
+    """A call running inside a rate limiter."""
+
+    def __init__(self, waited: float) -> None:
+        """Initialize the call.
+
+        Args:
+            waited: The seconds the call waited for the limits.
+        """
+        self.waited = waited
+        self.response: Optional[ModelResponse] = None
+
+    def record(self, response: ModelResponse) -> None:
+        """Record the response, whose token usage counts for the limits."""
+        self.response = response
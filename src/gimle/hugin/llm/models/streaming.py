@@ -0,0 +1,293 @@
+"""Helpers to stream model responses."""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .model import StreamDelta
+
+# Characters of the JSON escape sequences, e.g. "n" for "\\n"
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+# Runs of string characters that need no decoding
+_STRING_RUN = re.compile(r'[^"\\]+')
+# Characters that start and continue numbers and true, false and null
+_TOKEN_STARTS = frozenset("-0123456789tfn")
+_TOKEN_CHARS = frozenset("0123456789+-.eEtrufalsn")
+_MISSING = object()
+
+
+class _Frame:
+    """An object or array that is still open."""
+
+    def __init__(self, container: Union[Dict[str, Any], List[Any]]) -> None:
+        self.container = container
+        # The key the next value of an object goes to
+        self.key: Optional[str] = None
+
+
+class PartialJSONParser:
+    """Parses JSON text that is still being generated.
+
+    Text is fed in as it arrives and parsed once: completed values are
+    kept, while the open strings, objects and arrays are tracked on a
+    stack. The value so far is the completed values with the open ones
+    closed: an open string is closed where the text ends, a value that is
+    cut off (a number, literal or key) is dropped, and the open objects and
+    arrays are closed. Only the open objects and arrays are copied for
+    each value, so parsing a long stream stays linear in its length.
+
+    Text that is not valid JSON stops the parser, its value is None from
+    then on.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty parser."""
+        self._stack: List[_Frame] = []
+        self._root: Any = _MISSING
+        # What comes next: "value", "key", "colon" or "comma"
+        self._expect = "value"
+        # The open string, decoded, and whether it is a key
+        self._chunks: List[str] = []
+        self._in_string = False
+        self._in_key = False
+        # The escape sequence being read, e.g. "\\u00"
+        self._escape = ""
+        # The number or literal being read
+        self._token = ""
+        self._failed = False
+
+    def feed(self, fragment: str) -> Any:
+        """Add text and parse the text so far.
+
+        Args:
+            fragment: The text that arrived.
+
+        Returns:
+            The value parsed so far, or None if nothing could be parsed.
+        """
+        index = 0
+        while index < len(fragment) and not self._failed:
+            if self._in_string:
+                index = self._read_string(fragment, index)
+                continue
+            char = fragment[index]
+            index += 1
+            if self._token:
+                if char in _TOKEN_CHARS:
+                    self._token += char
+                    continue
+                self._end_token()
+            if not char.isspace() and not self._failed:
+                self._read_char(char)
+        return self.value()
+
+    def value(self) -> Any:
+        """Get the value of the text so far.
+
+        Returns:
+            The value parsed so far, or None if nothing could be parsed.
+        """
+        if self._failed:
+            return None
+        value = self._partial()
+        for frame in reversed(self._stack):
+            container = frame.container
+            if isinstance(container, list):
+                container = list(container)
+                if value is not _MISSING:
+                    container.append(value)
+            else:
+                container = dict(container)
+                if value is not _MISSING and frame.key is not None:
+                    container[frame.key] = value
+            value = container
+        if not self._stack and self._root is not _MISSING:
+            value = self._root
+        return None if value is _MISSING else value
+
+    def _partial(self) -> Any:
+        """Get the value that is cut off at the end of the text."""
+        if self._in_string and not self._in_key:
+            text = "".join(self._chunks)
+            self._chunks = [text]
+            return text
+        if self._token:
+            try:
+                return json.loads(self._token)
+            except ValueError:
+                return _MISSING
+        return _MISSING
+
+    def _read_string(self, fragment: str, index: int) -> int:
+        """Read string characters, returning the index after them."""
+        if self._escape:
+            self._escape += fragment[index]
+            index += 1
+            self._decode_escape()
+            return index
+        run = _STRING_RUN.match(fragment, index)
+        if run is not None:
+            self._chunks.append(run.group())
+            return run.end()
+        if fragment[index] == "\\":
+            self._escape = "\\"
+        else:
+            self._end_string()
+        return index + 1
+
+    def _decode_escape(self) -> None:
+        """Decode the escape sequence once it is complete."""
+        escape = self._escape
+        if escape[1] != "u":
+            self._escape = ""
+            if escape[1] not in _ESCAPES:
+                self._failed = True
+                return
+            self._chunks.append(_ESCAPES[escape[1]])
+        elif len(escape) == 6:
+            self._escape = ""
+            try:
+                self._chunks.append(chr(int(escape[2:], 16)))
+            except ValueError:
+                self._failed = True
+
+    def _end_string(self) -> None:
+        """Complete the open string as a key or a value."""
+        text = "".join(self._chunks)
+        if any("\ud800" <= char <= "\udfff" for char in text):
+            # Join surrogate pairs, as json.loads does
+            text = json.loads(json.dumps(text))
+        self._chunks = []
+        self._in_string = False
+        if self._in_key:
+            self._stack[-1].key = text
+            self._expect = "colon"
+        else:
+            self._add(text)
+
+    def _end_token(self) -> None:
+        """Complete the number or literal being read."""
+        token, self._token = self._token, ""
+        try:
+            self._add(json.loads(token))
+        except ValueError:
+            self._failed = True
+
+    def _read_char(self, char: str) -> None:
+        """Read a character outside of strings, numbers and literals."""
+        frame = self._stack[-1] if self._stack else None
+        expect = self._expect
+        if expect == "value" and char == '"':
+            self._in_string, self._in_key = True, False
+        elif expect == "value" and char in "{[":
+            self._stack.append(_Frame({} if char == "{" else []))
+            self._expect = "key" if char == "{" else "value"
+        elif expect == "value" and char in _TOKEN_STARTS:
+            self._token = char
+        elif expect == "key" and char == '"':
+            self._in_string, self._in_key = True, True
+        elif expect == "colon" and char == ":":
+            self._expect = "value"
+        elif expect == "comma" and char == "," and frame is not None:
+            self._expect = (
+                "key" if isinstance(frame.container, dict) else "value"
+            )
+        elif char in "}]" and frame is not None and self._closes(char, frame):
+            self._stack.pop()
+            self._add(frame.container)
+        else:
+            self._failed = True
+
+    def _closes(self, char: str, frame: _Frame) -> bool:
+        """Check whether a closing bracket closes the open frame."""
+        if isinstance(frame.container, dict):
+            if char != "}":
+                return False
+            # After a value, or right after the opening brace
+            return self._expect == "comma" or (
+                self._expect == "key" and not frame.container
+            )
+        if char != "]":
+            return False
+        return self._expect == "comma" or (
+            self._expect == "value" and not frame.container
+        )
+
+    def _add(self, value: Any) -> None:
+        """Add a completed value to the open object or array."""
+        self._expect = "comma"
+        if not self._stack:
+            if self._root is not _MISSING:
+                self._failed = True
+            self._root = value
+            return
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+        elif frame.key is not None:
+            frame.container[frame.key] = value
+            frame.key = None
+
+
+def parse_partial_json(text: str) -> Any:
+    """Parse JSON text that may be cut off, see PartialJSONParser.
+
+    Args:
+        text: The JSON text.
+
+    Returns:
+        The value parsed, or None if nothing could be parsed.
+    """
+    return PartialJSONParser().feed(text)
+
+
+class DeltaReporter:
+    """Reports the events of a provider stream as StreamDeltas.
+
+    Providers call ``text`` with generated text, ``tool_call`` when the
+    model starts a tool call and ``arguments`` with each piece of its
+    arguments, which are parsed as they arrive.
+    """
+
+    def __init__(self, on_delta: Callable[[StreamDelta], None]) -> None:
+        """Initialize the reporter.
+
+        Args:
+            on_delta: Called with each delta.
+        """
+        self.on_delta = on_delta
+        self._tool_call: Optional[str] = None
+        self._parser = PartialJSONParser()
+
+    def text(self, text: str) -> None:
+        """Report generated text."""
+        if text:
+            self.on_delta(StreamDelta(text=text))
+
+    def tool_call(self, name: str) -> None:
+        """Report the start of a tool call."""
+        self._tool_call = name
+        self._parser = PartialJSONParser()
+        self.on_delta(StreamDelta(tool_call=name))
+
+    def arguments(self, fragment: str) -> None:
+        """Report a piece of the arguments of the current tool call."""
+        if not fragment:
+            return
+        arguments = self._parser.feed(fragment)
+        self.on_delta(
+            StreamDelta(
+                tool_call=self._tool_call,
+                arguments_delta=fragment,
+                arguments=(arguments if isinstance(arguments, dict) else None),
+            )
+        )
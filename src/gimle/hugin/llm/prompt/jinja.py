@@ -1,36 +1,93 @@
 """Jinja template rendering module."""
 
+import hashlib
+import logging
 import re
-from typing import Any, Dict
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping
 
 from jinja2 import Environment
+from jinja2 import Template as JinjaTemplate
+
+logger = logging.getLogger(__name__)
+
+# Shared by all renders, templates are compiled against it once
+_environment = Environment()
+
+# Maximum number of compiled templates kept by compile_jinja
+TEMPLATE_CACHE_SIZE = 512
+
+# Maximum number of passes of render_jinja_recursive
+MAX_RENDER_DEPTH = 10
+
+_JINJA_PATTERN = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}")
+
+# sha256 of the template source -> compiled template, least recent first
+_compiled: "OrderedDict[str, JinjaTemplate]" = OrderedDict()
+_compiled_lock = threading.Lock()
 
 
 def contains_jinja(txt: str) -> bool:
     """Check if text contains Jinja template syntax."""
-    jinja_patterns = [
-        r"\{\{.*?\}\}",
-        r"\{%.*?%\}",
-        r"\{#.*?#\}",
-    ]
+    return _JINJA_PATTERN.search(txt) is not None
 
-    for pattern in jinja_patterns:
-        if re.search(pattern, txt):
-            return True
 
-    return False
+def compile_jinja(template: str) -> JinjaTemplate:
+    """Compile a Jinja template, reusing earlier compilations.
 
+    Compiled templates are kept in an LRU cache keyed by the hash of their
+    source, holding up to ``TEMPLATE_CACHE_SIZE`` templates.
 
-def render_jinja(template: str, inputs: Dict[str, Any]) -> str:
+    Args:
+        template: The template source.
+
+    Returns:
+        The compiled template.
+    """
+    key = hashlib.sha256(template.encode()).hexdigest()
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            return compiled
+    compiled = _environment.from_string(template)
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > TEMPLATE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def clear_jinja_cache() -> None:
+    """Drop all compiled templates."""
+    with _compiled_lock:
+        _compiled.clear()
+
+
+def render_jinja(template: str, inputs: Mapping[str, Any]) -> str:
     """Render a Jinja template with the given inputs."""
-    env = Environment()
-    for k, v in inputs.items():
-        env.globals[k] = v
-    return str(env.from_string(template).render().strip())
+    return str(compile_jinja(template).render(inputs).strip())
+
 
+def render_jinja_recursive(
+    template: str, inputs: Dict[str, Any], max_depth: int = MAX_RENDER_DEPTH
+) -> str:
+    """Recursively render a Jinja template until no more Jinja syntax remains.
 
-def render_jinja_recursive(template: str, inputs: Dict[str, Any]) -> str:
-    """Recursively render a Jinja template until no more Jinja syntax remains."""
-    if not contains_jinja(template):
-        return template
-    return render_jinja_recursive(render_jinja(template, inputs), inputs)
+    Rendering stops early once a pass leaves the text unchanged, and after
+    ``max_depth`` passes for inputs that keep producing Jinja syntax.
+    """
+    for _ in range(max_depth):
+        if not contains_jinja(template):
+            return template
+        rendered = render_jinja(template, inputs)
+        if rendered == template:
+            return rendered
+        template = rendered
+    if contains_jinja(template):
+        logger.warning(
+            f"Jinja syntax left after {max_depth} render passes, "
+            "returning the partially rendered text"
+        )
+    return template
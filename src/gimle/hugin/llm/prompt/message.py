@@ -1,10 +1,11 @@
 """Message rendering module."""
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from gimle.hugin.interaction.ask_oracle import AskOracle
 from gimle.hugin.interaction.oracle_response import OracleResponse
+from gimle.hugin.interaction.tool_call import ToolCall
 from gimle.hugin.llm.prompt.renderer import PromptRenderer
 from gimle.hugin.tools.tool import Tool
 
@@ -62,29 +63,31 @@ def render_user_message(
             raise ValueError("AskOracle tool name is None")
         if interaction.template_inputs is None:
             raise ValueError("AskOracle template inputs is None")
-        return_prompt = [
-            {
-                "type": "tool_result",
-                "name": interaction.prompt.tool_name,
-                "is_error": interaction.template_inputs.get("is_error", False),
-                "tool_use_id": interaction.prompt.tool_use_id,
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"{k}: {v}",
-                    }
-                    for k, v in PromptRenderer.render_template_inputs(
-                        interaction.template_inputs, reduced
-                    ).items()
-                ],
-                # + [
-                #     {
-                #         "type": "text",
-                #         "text": "tool_use_id: " + interaction.prompt.tool_use_id,
-                #     }
-                # ],
-            }
-        ]
+        tool_result = _render_tool_result(
+            interaction.prompt.tool_name,
+            interaction.prompt.tool_use_id,
+            interaction.template_inputs,
+            reduced,
+        )
+        if interaction.tool_results:
+            # The results of all tool calls of the oracle, in order
+            return_prompt = [
+                (
+                    tool_result
+                    if result["tool_use_id"] == interaction.prompt.tool_use_id
+                    else _render_tool_result(
+                        result["tool_name"],
+                        result["tool_use_id"],
+                        result["template_inputs"],
+                        reduced,
+                    )
+                )
+                for result in interaction.tool_results
+            ]
+            if tool_result not in return_prompt:
+                return_prompt.append(tool_result)
+        else:
+            return_prompt = [tool_result]
     elif interaction.prompt.type == "text":
         logger.debug(
             f"Rendering user interaction for agent: {interaction.stack.agent.id} as text"
@@ -123,6 +126,36 @@ def render_user_message(
     return return_prompt
 
 
+def _render_tool_result(
+    tool_name: str,
+    tool_use_id: Optional[str],
+    template_inputs: Dict[str, Any],
+    reduced: bool,
+) -> Dict[str, Any]:
+    """Render the tool_result block of a tool call."""
+    return {
+        "type": "tool_result",
+        "name": tool_name,
+        "is_error": template_inputs.get("is_error", False),
+        "tool_use_id": tool_use_id,
+        "content": [
+            {
+                "type": "text",
+                "text": f"{k}: {v}",
+            }
+            for k, v in PromptRenderer.render_template_inputs(
+                template_inputs, reduced
+            ).items()
+        ],
+        # + [
+        #     {
+        #         "type": "text",
+        #         "text": "tool_use_id: " + tool_use_id,
+        #     }
+        # ],
+    }
+
+
 def render_assistant_message(
     interaction: OracleResponse, reduced: bool = False
 ) -> List[Dict[str, Any]]:
@@ -132,9 +165,35 @@ def render_assistant_message(
     )
     if interaction.response is None:
         raise ValueError("OracleResponse response is None")
-    content = interaction.response["content"]
+    if interaction.response.get("tool_calls"):
+        return [
+            _render_tool_call(
+                tool_call["tool_call"],
+                ToolCall.get_tool_call_id(interaction.stack, tool_call),
+                tool_call["content"],
+                reduced,
+            )
+            for tool_call in interaction.response["tool_calls"]
+        ]
+    return [
+        _render_tool_call(
+            interaction.response["tool_call"],
+            interaction.tool_call_id,
+            interaction.response["content"],
+            reduced,
+        )
+    ]
+
+
+def _render_tool_call(
+    tool_name: Optional[str],
+    tool_call_id: Optional[str],
+    content: Any,
+    reduced: bool,
+) -> Dict[str, Any]:
+    """Render a tool call, or a text response without a tool call id."""
     if reduced and isinstance(content, dict):
-        tool = Tool.get_tool(interaction.response["tool_call"])
+        tool = Tool.get_tool(tool_name) if tool_name else None
         if tool:
             ignore_list = tool.options.reduced_context_window_ignore_list
         else:
@@ -145,19 +204,14 @@ def render_assistant_message(
         content = {
             k: f"<{k}>" if k in ignore_list else v for k, v in content.items()
         }
-    if interaction.tool_call_id is None:
-        return [
-            {
-                "type": "text",
-                "text": str(content),
-            }
-        ]
-    else:
-        return [
-            {
-                "type": "tool_use",
-                "id": interaction.tool_call_id,
-                "name": interaction.response["tool_call"],
-                "input": content,
-            }
-        ]
+    if tool_call_id is None:
+        return {
+            "type": "text",
+            "text": str(content),
+        }
+    return {
+        "type": "tool_use",
+        "id": tool_call_id,
+        "name": tool_name,
+        "input": content,
+    }
@@ -129,19 +129,15 @@ class PromptRenderer:
                 f"Expanding bare template reference '{prompt_text}' to its body"
             )
             prompt_text = registered_templates[prompt_text].template
-        template_inputs = {
-            **template_inputs,
+        # Rendered inputs hold every input, so they replace the raw inputs
+        context = {
             **registered_templates,
             **PromptRenderer.render_template_inputs(template_inputs, reduced),
-            **{
-                "agent": self,
-                "format_df_to_string": format_df_to_string,
-            },
+            "agent": self,
+            "format_df_to_string": format_df_to_string,
         }
-        template_inputs = {
-            k: v for k, v in template_inputs.items() if v is not None
-        }
-        return render_jinja_recursive(prompt_text, template_inputs)
+        context = {k: v for k, v in context.items() if v is not None}
+        return render_jinja_recursive(prompt_text, context)
 
     def render_task_prompt(
         self, template_inputs: Dict[str, Any], reduced: Optional[bool] = False
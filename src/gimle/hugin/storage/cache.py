@@ -0,0 +1,241 @@
+"""Storage cache module."""
+
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+
+def approximate_size(obj: Any) -> int:
+    """Approximate the memory held by a cached object.
+
+    Counts the object, its attributes and one level of the containers held
+    in its attributes (e.g. the content of an artifact, the tool calls of
+    an interaction). Objects shared with other cached objects, such as the
+    stack of an interaction, are counted by the object that owns them.
+
+    Args:
+        obj: The cached object.
+
+    Returns:
+        The approximate size in bytes.
+    """
+    size = sys.getsizeof(obj)
+    attributes = getattr(obj, "__dict__", None)
+    if not attributes:
+        return size
+    for value in attributes.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(
+                sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items()
+            )
+        elif isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class StorageCache(MutableMapping[str, Any]):
+    """LRU cache of the objects loaded and saved by a storage.
+
+    Keys are ``"<kind>:<uuid>"`` strings, as used by ``Storage.store``.
+    When ``max_entries`` or ``max_bytes`` is exceeded, the least recently
+    used entries are evicted. Without limits the cache grows like a dict.
+
+    Evicted objects that are still referenced elsewhere, e.g. by the stack
+    of a live agent, stay reachable through a weak reference and return to
+    the cache on their next lookup, so loading them keeps returning the
+    same instance. Keys can also be pinned explicitly, pinned entries are
+    never evicted.
+
+    Lookups through ``get`` are counted as hits or misses, for the load
+    paths of the storage. See ``stats`` for the counters.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached entries.
+            max_bytes: Maximum approximate size of the cached entries.
+            sizeof: Approximates the size of an object in bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        # key -> (object, approximate size), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._pinned: Set[str] = set()
+        self._evicted: "weakref.WeakValueDictionary[str, Any]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    @property
+    def bytes(self) -> int:
+        """The approximate size of the cached entries."""
+        return self._bytes
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        """Find an entry, reviving it if it was evicted but is still alive."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return True, entry[0]
+        value = self._evicted.pop(key, None)
+        if value is None:
+            return False, None
+        self[key] = value
+        return True, value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up an entry, counting the lookup as a hit or a miss."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if not found:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def __getitem__(self, key: str) -> Any:
+        """Look up an entry."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if not found:
+                raise KeyError(key)
+            return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Cache an entry and evict the least recently used if over limits."""
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def __delitem__(self, key: str) -> None:
+        """Remove an entry."""
+        with self._lock:
+            if key not in self._entries and key not in self._evicted:
+                raise KeyError(key)
+            self._discard(key)
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether an entry is cached, without counting a lookup."""
+        with self._lock:
+            return key in self._entries or key in self._evicted
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the cached keys, least recently used first.
+
+        Evicted entries that are only weakly held are left out, as they
+        may be collected at any time.
+        """
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        """Count the cached entries, without the evicted ones."""
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all entries, keeping pins and counters."""
+        with self._lock:
+            self._entries.clear()
+            self._evicted.clear()
+            self._bytes = 0
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+        self._evicted.pop(key, None)
+
+    def _over_limits(self) -> bool:
+        if self.max_entries is not None:
+            if len(self._entries) > self.max_entries:
+                return True
+        if self.max_bytes is not None:
+            if self._bytes > self.max_bytes:
+                return True
+        return False
+
+    def _evict(self) -> None:
+        """Evict unpinned entries, least recently used first.
+
+        The most recently used entry is never evicted, so a value is always
+        cached right after it was set.
+        """
+        while self._over_limits():
+            newest = next(reversed(self._entries))
+            key = next(
+                (key for key in self._entries if key not in self._pinned),
+                newest,
+            )
+            if key == newest:
+                return
+            value, size = self._entries.pop(key)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                self._evicted[key] = value
+            except TypeError:
+                # Objects without weak reference support are dropped
+                pass
+
+    def pin(self, key: str) -> None:
+        """Keep an entry from being evicted.
+
+        Args:
+            key: The cache key, which does not need to be cached yet.
+        """
+        with self._lock:
+            self._pinned.add(key)
+
+    def unpin(self, key: str) -> None:
+        """Allow an entry to be evicted again.
+
+        Args:
+            key: The cache key.
+        """
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache counters.
+
+        Returns:
+            Dict with the hits, misses, evictions, entries and approximate
+            bytes of the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,216 @@
+"""Session checkpoint log module."""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from gimle.hugin.storage.interaction_log import encode_record, iter_records
+
+# Key of the record that ends a checkpoint
+COMMIT = "commit"
+
+# Logs are compacted once they are this large and mostly superseded records
+_COMPACT_MIN_BYTES = 1 << 20
+_COMPACT_RATIO = 4
+
+
+def fsync_dir(path: Path) -> None:
+    """Make the entries of a directory durable, e.g. after a rename.
+
+    Args:
+        path: The directory.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replay(
+    data: bytes,
+) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """Replay the records of a log up to its last commit.
+
+    Returns:
+        The (payload offset, payload length) of the latest committed
+        record of each key, and the end of the last commit.
+    """
+    committed: Dict[str, Tuple[int, int]] = {}
+    pending: Dict[str, Tuple[int, int]] = {}
+    end = 0
+    for record_end, key, start, length in iter_records(data):
+        if key != COMMIT:
+            pending[key] = (start, length)
+            continue
+        for pending_key, entry in pending.items():
+            if entry[1]:
+                committed[pending_key] = entry
+            else:
+                committed.pop(pending_key, None)
+        pending = {}
+        end = record_end
+    return committed, end
+
+
+class CheckpointLog:
+    """Append-only log of the checkpoints of one session.
+
+    Each checkpoint is the records of the objects written by one save of
+    the session, keyed ``<kind>:<uuid>`` and in the record format of
+    ``InteractionLog``, followed by a commit record. It is appended with a
+    single write and fsync. Reading replays the records up to the last
+    commit, so the records of a save that was interrupted (e.g. because
+    the process died) are ignored, and the whole session is read at once.
+
+    A commit first drops anything after the last commit. Once superseded
+    records make up most of a large log, it is compacted into a new file
+    that atomically replaces it. One process at a time may commit to the
+    log of a session.
+    """
+
+    def __init__(self, path: Path, fsync: bool = True) -> None:
+        """Initialize the log.
+
+        Args:
+            path: Path to the log file, created on the first commit.
+            fsync: Fsync each commit, so it survives a power loss.
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        # (inode, size) of the file the state below was read from
+        self._stat: Optional[Tuple[int, int]] = None
+        # End of the last commit
+        self._end = 0
+        # Key -> size of its latest committed record
+        self._live: Dict[str, int] = {}
+
+    def _reset(self) -> None:
+        self._stat = None
+        self._end = 0
+        self._live = {}
+
+    def _load(self, data: bytes) -> Dict[str, Tuple[int, int]]:
+        """Take over the state of the log contents ``data``."""
+        committed, self._end = _replay(data)
+        self._live = {
+            key: len(encode_record(key, b"")) + length
+            for key, (_, length) in committed.items()
+        }
+        return committed
+
+    def _read_file(self) -> Optional[bytes]:
+        """Read the log, recording the file it was read from."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+                stat = os.fstat(f.fileno())
+        except FileNotFoundError:
+            self._reset()
+            return None
+        self._stat = (stat.st_ino, stat.st_size)
+        return data
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Read the last checkpoint with a single sequential read.
+
+        Returns:
+            The latest committed record of each key, or None if nothing
+            was committed yet.
+        """
+        with self._lock:
+            data = self._read_file()
+            if data is None:
+                return None
+            committed = self._load(data)
+            if self._end == 0:
+                return None
+            return {
+                key: json.loads(data[start : start + length])
+                for key, (start, length) in committed.items()
+            }
+
+    def _refresh(self) -> None:
+        """Re-read the log if someone else changed it since."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if self._stat == (stat.st_ino, stat.st_size):
+            return
+        data = self._read_file()
+        if data is not None:
+            self._load(data)
+
+    def commit(self, records: Sequence[Tuple[str, bytes]]) -> None:
+        """Append a checkpoint.
+
+        Args:
+            records: (key, payload) pairs of the objects written, an empty
+                payload marks a deletion.
+        """
+        commit = json.dumps({"time": time.time()}).encode("utf-8")
+        buffer = b"".join(
+            encode_record(key, payload)
+            for key, payload in [*records, (COMMIT, commit)]
+        )
+        with self._lock:
+            self._refresh()
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.pwrite(fd, buffer, self._end)
+                # Drops the records of an interrupted commit
+                os.ftruncate(fd, self._end + len(buffer))
+                if self.fsync:
+                    os.fsync(fd)
+                inode = os.fstat(fd).st_ino
+            finally:
+                os.close(fd)
+            self._end += len(buffer)
+            self._stat = (inode, self._end)
+            for key, payload in records:
+                if payload:
+                    self._live[key] = len(encode_record(key, payload))
+                else:
+                    self._live.pop(key, None)
+            live = sum(self._live.values())
+            if (
+                self._end >= _COMPACT_MIN_BYTES
+                and self._end >= _COMPACT_RATIO * live
+            ):
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log with only the latest committed records."""
+        data = self._read_file()
+        if data is None:
+            return
+        committed = self._load(data)
+        commit = json.dumps({"time": time.time()}).encode("utf-8")
+        buffer = b"".join(
+            encode_record(key, data[start : start + length])
+            for key, (start, length) in committed.items()
+        ) + encode_record(COMMIT, commit)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(buffer)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+            inode = os.fstat(f.fileno()).st_ino
+        os.replace(tmp, self.path)
+        if self.fsync:
+            fsync_dir(self.path.parent)
+        self._load(buffer)
+        self._stat = (inode, len(buffer))
+
+    def delete(self) -> None:
+        """Delete the log file."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._reset()
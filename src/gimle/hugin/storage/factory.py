@@ -0,0 +1,72 @@
+"""Storage factory module."""
+
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from gimle.hugin.storage.cache import StorageCache
+from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.storage.sqlite import SqliteStorage, is_sqlite_path
+from gimle.hugin.storage.storage import Storage
+from gimle.hugin.storage.write_behind import WriteBehindStorage
+
+
+def create_storage(
+    path: Union[str, Path],
+    callback: Optional[Callable[[str, str], None]] = None,
+    write_behind: bool = False,
+    cache: Optional[StorageCache] = None,
+    checkpoints: bool = False,
+    lazy_stacks: bool = False,
+    cache_entries: Optional[int] = None,
+) -> Storage:
+    """Create the storage for a storage path.
+
+    Paths with a SQLite suffix (``.db``, ``.sqlite``, ``.sqlite3``) are
+    opened as a ``SqliteStorage`` database, anything else as a
+    ``LocalStorage`` directory.
+
+    Args:
+        path: The storage path.
+        callback: Called with (kind, uuid) after each saved object.
+        write_behind: Wrap the storage in a ``WriteBehindStorage`` that
+            writes from a background thread.
+        cache: Cache of loaded and saved objects, unbounded by default.
+        checkpoints: Keep a checkpoint log per session in a
+            ``LocalStorage``, see ``Session.resume``. ``SqliteStorage``
+            writes each save in one transaction and needs none.
+        lazy_stacks: Load the interactions of an agent on first access
+            instead of when the agent is loaded.
+        cache_entries: Bound the cache to this many entries, if no
+            ``cache`` is given.
+
+    Returns:
+        The storage.
+
+    Raises:
+        ValueError: If checkpoints are combined with write-behind, whose
+            background writes do not line up with saves of the session.
+    """
+    if write_behind and checkpoints:
+        raise ValueError("Checkpoints cannot be used with write-behind")
+    if cache is None and cache_entries is not None:
+        cache = StorageCache(max_entries=cache_entries)
+    if write_behind:
+        return WriteBehindStorage(
+            create_storage(path, lazy_stacks=lazy_stacks),
+            callback=callback,
+            cache=cache,
+        )
+    if is_sqlite_path(path):
+        return SqliteStorage(
+            db_path=path,
+            callback=callback,
+            cache=cache,
+            lazy_stacks=lazy_stacks,
+        )
+    return LocalStorage(
+        base_path=str(path),
+        callback=callback,
+        cache=cache,
+        checkpoints=checkpoints,
+        lazy_stacks=lazy_stacks,
+    )
@@ -0,0 +1,252 @@
+"""Append-only interaction log module."""
+
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Record header: payload length, uuid length
+_HEADER = struct.Struct(">IH")
+
+
+def encode_record(uuid: str, payload: bytes) -> bytes:
+    """Encode a log record.
+
+    Args:
+        uuid: The interaction UUID.
+        payload: The serialized interaction, or empty bytes for a deletion.
+
+    Returns:
+        The length-prefixed record.
+    """
+    uuid_bytes = uuid.encode("utf-8")
+    return _HEADER.pack(len(payload), len(uuid_bytes)) + uuid_bytes + payload
+
+
+def iter_records(data: bytes) -> Iterator[Tuple[int, str, int, int]]:
+    """Iterate over the complete records of a log.
+
+    A truncated record at the end is ignored.
+
+    Args:
+        data: The contents of the log.
+
+    Yields:
+        (end offset of the record, uuid, payload offset, payload length)
+        of each record, in order.
+    """
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, uuid_length = _HEADER.unpack_from(data, offset)
+        payload_offset = offset + _HEADER.size + uuid_length
+        if payload_offset + length > len(data):
+            return
+        uuid = data[offset + _HEADER.size : payload_offset].decode("utf-8")
+        offset = payload_offset + length
+        yield offset, uuid, payload_offset, length
+
+
+class InteractionLog:
+    """Append-only log of the interactions of one agent.
+
+    Each record is a header with the payload and uuid lengths, followed by
+    the uuid and the JSON payload. Saving an interaction again appends a
+    record that supersedes the previous one, and a record with an empty
+    payload marks the interaction as deleted. A truncated record at the end
+    of the file (e.g. after a crash) is ignored and overwritten by the next
+    append.
+
+    The offset index maps every live uuid to its latest record. It is kept
+    in memory and rebuilt by scanning the record headers, so appending
+    never needs a second write.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the log.
+
+        Args:
+            path: Path to the log file, created on first append.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # End of the last complete record that has been indexed
+        self._end = 0
+        # uuid -> (payload offset, payload length) of the latest record
+        self._index: Dict[str, Tuple[int, int]] = {}
+        # uuid -> offset of the first record written for it
+        self._first_offset: Dict[str, int] = {}
+
+    def _reset(self) -> None:
+        self._end = 0
+        self._index = {}
+        self._first_offset = {}
+
+    def _add_to_index(
+        self, uuid: str, record_offset: int, payload_offset: int, length: int
+    ) -> None:
+        if length == 0:
+            self._index.pop(uuid, None)
+            self._first_offset.pop(uuid, None)
+            return
+        self._index[uuid] = (payload_offset, length)
+        self._first_offset.setdefault(uuid, record_offset)
+
+    def _refresh(self) -> None:
+        """Index records appended since the last scan, reading only headers."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            self._reset()
+            return
+        if size < self._end:
+            # The log was truncated by someone else, start over
+            self._reset()
+        if size == self._end:
+            return
+        with open(self.path, "rb") as f:
+            offset = self._end
+            f.seek(offset)
+            while offset + _HEADER.size <= size:
+                length, uuid_length = _HEADER.unpack(f.read(_HEADER.size))
+                payload_offset = offset + _HEADER.size + uuid_length
+                if payload_offset + length > size:
+                    break
+                uuid = f.read(uuid_length).decode("utf-8")
+                self._add_to_index(uuid, offset, payload_offset, length)
+                offset = payload_offset + length
+                f.seek(offset)
+        self._end = offset
+
+    def read_all(self) -> Dict[str, Dict[str, Any]]:
+        """Read every live interaction with a single sequential read.
+
+        Returns:
+            Dict mapping uuid to the latest serialized interaction.
+        """
+        with self._lock:
+            self._reset()
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return {}
+
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, uuid_length = _HEADER.unpack_from(data, offset)
+                payload_offset = offset + _HEADER.size + uuid_length
+                if payload_offset + length > len(data):
+                    break
+                uuid = data[offset + _HEADER.size : payload_offset].decode(
+                    "utf-8"
+                )
+                self._add_to_index(uuid, offset, payload_offset, length)
+                offset = payload_offset + length
+            self._end = offset
+
+            return {
+                uuid: json.loads(data[start : start + length])
+                for uuid, (start, length) in self._index.items()
+            }
+
+    def get(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """Read the latest record of an interaction.
+
+        Args:
+            uuid: The interaction UUID.
+
+        Returns:
+            The serialized interaction, or None if it is not in the log.
+        """
+        with self._lock:
+            self._refresh()
+            if uuid not in self._index:
+                return None
+            offset, length = self._index[uuid]
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                data: Dict[str, Any] = json.loads(f.read(length))
+                return data
+
+    def uuids(self) -> List[str]:
+        """List the live interactions in the log."""
+        with self._lock:
+            self._refresh()
+            return list(self._index)
+
+    def __contains__(self, uuid: object) -> bool:
+        """Check whether an interaction is in the log."""
+        with self._lock:
+            self._refresh()
+            return uuid in self._index
+
+    def append(self, records: Sequence[Tuple[str, bytes]]) -> None:
+        """Append records with a single write followed by an fsync.
+
+        Args:
+            records: (uuid, payload) pairs, an empty payload marks a deletion.
+        """
+        if not records:
+            return
+        with self._lock:
+            self._refresh()
+            self._write_at(self._end, records)
+
+    def _write_at(
+        self, offset: int, records: Sequence[Tuple[str, bytes]]
+    ) -> None:
+        """Write records at an offset and drop everything after them."""
+        buffer = b"".join(encode_record(u, p) for u, p in records)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, buffer, offset)
+            # Drops a partial record left behind by an interrupted write
+            os.ftruncate(fd, offset + len(buffer))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        for uuid, payload in records:
+            uuid_length = len(uuid.encode("utf-8"))
+            payload_offset = offset + _HEADER.size + uuid_length
+            self._add_to_index(uuid, offset, payload_offset, len(payload))
+            offset = payload_offset + len(payload)
+        self._end = offset
+
+    def remove(self, uuids: Sequence[str]) -> None:
+        """Remove interactions from the log.
+
+        If nothing else was written since the first record of the removed
+        interactions (the usual case after a rewind), the log is truncated.
+        Otherwise deletion records are appended.
+
+        Args:
+            uuids: The interaction UUIDs to remove.
+        """
+        with self._lock:
+            self._refresh()
+            removed = {uuid for uuid in uuids if uuid in self._index}
+            if not removed:
+                return
+            cut = min(self._first_offset[uuid] for uuid in removed)
+            survivors_after_cut = any(
+                offset >= cut and uuid not in removed
+                for uuid, (offset, _) in self._index.items()
+            )
+            if survivors_after_cut:
+                self._write_at(self._end, [(uuid, b"") for uuid in removed])
+                return
+            with open(self.path, "r+b") as f:
+                f.truncate(cut)
+                os.fsync(f.fileno())
+            for uuid in removed:
+                self._index.pop(uuid)
+                self._first_offset.pop(uuid)
+            self._end = cut
+
+    def delete(self) -> None:
+        """Delete the log file."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._reset()
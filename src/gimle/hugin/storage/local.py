@@ -3,14 +3,35 @@
 import datetime
 import json
 import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from gimle.hugin.agent.agent import Agent
 from gimle.hugin.agent.session import Session
 from gimle.hugin.artifacts.artifact import Artifact
 from gimle.hugin.artifacts.feedback import ArtifactFeedback
 from gimle.hugin.interaction.interaction import Interaction
+from gimle.hugin.storage.cache import StorageCache
+from gimle.hugin.storage.checkpoint import CheckpointLog, fsync_dir
+from gimle.hugin.storage.interaction_log import InteractionLog
+from gimle.hugin.storage.stack_journal import (
+    StackJournal,
+    stack_entries,
+    stack_from_entries,
+)
 from gimle.hugin.storage.storage import Storage
 
 if TYPE_CHECKING:
@@ -45,26 +66,288 @@ def _sanitize_for_json(obj: Any) -> Any:
 
 logger = logging.getLogger(__name__)
 
+# Temporary files older than this were left behind by a crashed process
+_STALE_TMP_SECONDS = 3600
+
+
+def _stack_agent_id(stack: Optional["Stack"]) -> Optional[str]:
+    """Get the id of the agent a stack belongs to, if known."""
+    agent_id = getattr(getattr(stack, "agent", None), "uuid", None)
+    return agent_id if isinstance(agent_id, str) else None
+
+
+def _agent_session_id(agent: Optional[Agent]) -> Optional[str]:
+    """Get the id of the session an agent belongs to, if known."""
+    session_id = getattr(getattr(agent, "session", None), "uuid", None)
+    return session_id if isinstance(session_id, str) else None
+
+
+def artifact_metadata_from_dict(
+    uuid: str, raw: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Build lightweight artifact metadata from serialized artifact data.
+
+    Args:
+        uuid: The artifact UUID
+        raw: The serialized artifact, as returned by ``Artifact.to_dict``
+
+    Returns:
+        Dictionary with id, type, format, preview and created_at
+    """
+    # Artifact JSON is wrapped: {"type": "...", "data": {...}}
+    artifact_type = raw.get("type", "Unknown")
+    artifact_data = raw.get("data", {})
+
+    # Generate preview based on artifact type
+    preview = ""
+
+    # For File and Image artifacts, use name instead of loading content
+    if artifact_type in ("File", "Image"):
+        name = artifact_data.get("name", "")
+        description = artifact_data.get("description", "")
+        if name:
+            preview = name
+        elif description:
+            preview = (
+                description[:200] + "..."
+                if len(description) > 200
+                else description
+            )
+        else:
+            preview = f"[{artifact_type}]"
+    else:
+        # For other artifacts, use content
+        content = artifact_data.get("content")
+        if content:
+            if isinstance(content, str):
+                preview = (
+                    content[:200] + "..." if len(content) > 200 else content
+                )
+            elif isinstance(content, dict):
+                # For structured content, show a summary
+                preview = f"[{len(content)} fields]"
+
+    return {
+        "id": uuid,
+        "type": artifact_type,
+        "format": artifact_data.get("format"),
+        "preview": preview,
+        "created_at": artifact_data.get("created_at"),
+    }
+
 
 class LocalStorage(Storage):
-    """A local storage implementation that stores data in the local filesystem."""
+    """A local storage implementation that stores data in the local filesystem.
+
+    By default every object is stored in its own JSON file. With
+    ``interaction_log=True``, interactions are instead appended to one log
+    per agent (``logs/<agent_id>.log``, see ``InteractionLog``): saving a
+    step is a single write and fsync per agent, reloading an agent is a
+    single sequential read, and rewinding truncates the log. Interactions
+    are read from both layouts regardless of the mode.
+
+    The stack of an agent is kept in an append-only journal
+    (``stacks/<agent_id>``, see ``StackJournal``) that the agent file
+    refers to, so saving a step does not rewrite every interaction id on
+    the stack. Use ``load_agent_metadata`` to read an agent file with its
+    stack.
+
+    Files are written to ``tmp/`` and renamed into place, so a process
+    that dies mid-write never leaves a half-written file behind. With
+    ``fsync=True`` they are also fsynced, and the directories they were
+    renamed into are fsynced once per save. With ``checkpoints=True``,
+    each ``save_session`` also appends what it wrote to the session's
+    checkpoint log (``checkpoints/<session_id>.log``, see
+    ``CheckpointLog``), so ``Session.resume`` can load the session as of
+    its last completed save with one read.
+    """
 
     def __init__(
         self,
         base_path: Optional[str] = None,
         callback: Optional[Callable[[str, str], None]] = None,
+        interaction_log: bool = False,
+        cache: Optional[StorageCache] = None,
+        checkpoints: bool = False,
+        fsync: bool = False,
+        lazy_stacks: bool = False,
     ) -> None:
-        """Initialize the local storage."""
-        super().__init__(callback=callback)
+        """Initialize the local storage.
+
+        Args:
+            base_path: The storage directory.
+            callback: Called with (kind, uuid) after each saved object.
+            interaction_log: Append interactions to per-agent logs instead
+                of writing one file per interaction.
+            cache: Cache of loaded and saved objects, unbounded by default.
+            checkpoints: Keep a checkpoint log per session.
+            fsync: Fsync written files, so they survive a power loss and
+                not only a crash of the process. Checkpoints are always
+                fsynced.
+            lazy_stacks: Load the interactions of an agent on first access
+                instead of when the agent is loaded.
+        """
+        super().__init__(
+            callback=callback, cache=cache, lazy_stacks=lazy_stacks
+        )
         self.base_path = Path(base_path) if base_path else None
+        self.interaction_log = interaction_log
+        self.checkpoints = checkpoints
+        self.fsync = fsync
+        self._checkpoint_logs: Dict[str, CheckpointLog] = {}
+        # Records written since the last checkpoint, by session
+        self._checkpoint_records: Dict[str, List[Tuple[str, bytes]]] = {}
+        # Directories renamed into during the current batch
+        self._renamed_dirs: set[Path] = set()
+        # Package paths already recorded in .hugin_metadata.json
+        self._known_package_paths: set[str] = set()
+        self._logs: Dict[str, InteractionLog] = {}
+        self._stack_journals: Dict[str, StackJournal] = {}
+        # Log records buffered while a session or agent is being saved
+        self._log_batch_depth = 0
+        self._pending_log_records: Dict[str, List[Tuple[str, bytes]]] = {}
+        # Guards the batch depth, the buffered records and renamed
+        # directories, since agents are saved from several threads
+        self._batch_lock = threading.Lock()
+        # Log contents read up front while an agent is being loaded
+        self._preloaded_logs: Dict[str, Dict[str, Dict[str, Any]]] = {}
         if self.base_path:
             self.base_path.mkdir(parents=True, exist_ok=True)
             (self.base_path / "artifacts").mkdir(parents=True, exist_ok=True)
             (self.base_path / "sessions").mkdir(parents=True, exist_ok=True)
             (self.base_path / "agents").mkdir(parents=True, exist_ok=True)
+            (self.base_path / "stacks").mkdir(parents=True, exist_ok=True)
             (self.base_path / "interactions").mkdir(parents=True, exist_ok=True)
             (self.base_path / "files").mkdir(parents=True, exist_ok=True)
             (self.base_path / "feedback").mkdir(parents=True, exist_ok=True)
+            (self.base_path / "tmp").mkdir(parents=True, exist_ok=True)
+            if interaction_log:
+                (self.base_path / "logs").mkdir(parents=True, exist_ok=True)
+            if checkpoints:
+                (self.base_path / "checkpoints").mkdir(
+                    parents=True, exist_ok=True
+                )
+            self._remove_stale_tmp_files()
+
+    def _remove_stale_tmp_files(self) -> None:
+        """Remove temporary files left behind by crashed processes."""
+        assert self.base_path is not None
+        cutoff = time.time() - _STALE_TMP_SECONDS
+        for path in (self.base_path / "tmp").iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _write_file(self, path: Path, data: bytes) -> None:
+        """Write a file atomically, by renaming a complete temporary file.
+
+        Args:
+            path: The path of the file.
+            data: The contents of the file.
+        """
+        assert self.base_path is not None
+        tmp = (
+            self.base_path
+            / "tmp"
+            / f"{path.name}.{os.getpid()}.{threading.get_ident()}"
+        )
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            with self._batch_lock:
+                self._renamed_dirs.add(path.parent)
+                if self._log_batch_depth == 0:
+                    self._sync_dirs()
+
+    def _sync_dirs(self) -> None:
+        """Fsync the directories files were renamed into.
+
+        Must be called with the batch lock held.
+        """
+        renamed, self._renamed_dirs = self._renamed_dirs, set()
+        for path in renamed:
+            fsync_dir(path)
+
+    def _write_json(self, path: Path, data: Any) -> bytes:
+        """Write an object as a JSON file atomically.
+
+        Returns:
+            The JSON written.
+        """
+        content = json.dumps(data).encode("utf-8")
+        self._write_file(path, content)
+        return content
+
+    def _add_checkpoint_record(
+        self, session_id: Optional[str], key: str, payload: bytes
+    ) -> None:
+        """Add a written object to the next checkpoint of its session."""
+        if self.checkpoints and session_id is not None:
+            self._checkpoint_records.setdefault(session_id, []).append(
+                (key, payload)
+            )
+
+    def _checkpoint_log(self, session_id: str) -> CheckpointLog:
+        """Get the checkpoint log of a session."""
+        if session_id not in self._checkpoint_logs:
+            assert self.base_path is not None
+            path = self.base_path / "checkpoints" / f"{session_id}.log"
+            self._checkpoint_logs[session_id] = CheckpointLog(path)
+        return self._checkpoint_logs[session_id]
+
+    def _save_checkpoint(self, session: Session) -> None:
+        """Commit what this save of the session wrote as a checkpoint."""
+        if not self.checkpoints or not self.base_path:
+            return
+        records = self._checkpoint_records.pop(session.id, [])
+        log = self._checkpoint_log(session.id)
+        if not log.path.exists():
+            # The first checkpoint holds the whole session, so resuming
+            # does not depend on files written before it
+            records = self._snapshot_records(session)
+        log.commit(records)
+
+    def _snapshot_records(self, session: Session) -> List[Tuple[str, bytes]]:
+        """Serialize a session with its agents and loaded interactions."""
+        records = [
+            (
+                f"session:{session.id}",
+                json.dumps(session.to_dict()).encode("utf-8"),
+            )
+        ]
+        for agent in session.agents:
+            records.append(
+                (
+                    f"agent:{agent.id}",
+                    json.dumps(agent.to_dict()).encode("utf-8"),
+                )
+            )
+            for interaction in agent.stack.loaded_interactions():
+                data = _sanitize_for_json(interaction.to_dict())
+                records.append(
+                    (
+                        f"interaction:{interaction.id}",
+                        json.dumps(data, cls=SafeJSONEncoder).encode("utf-8"),
+                    )
+                )
+        return records
+
+    def _load_checkpoint(
+        self, uuid: str
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Read the last checkpoint of a session."""
+        if not self.base_path:
+            return None
+        log = self._checkpoint_log(uuid)
+        if not log.path.exists():
+            return None
+        return log.read()
 
     def _list_uuids(self, dir: Path) -> List[str]:
         """List all uuids in a directory."""
@@ -92,7 +375,82 @@ class LocalStorage(Storage):
         """List all interactions in the local filesystem."""
         if not self.base_path:
             raise ValueError("Interactions not found in local memory storage")
-        return self._list_uuids(self.base_path / "interactions")
+        uuids = self._list_uuids(self.base_path / "interactions")
+        for log in self._all_logs():
+            uuids.extend(log.uuids())
+        return list(dict.fromkeys(uuids))
+
+    # -- interaction logs --
+
+    def _log(self, agent_id: str) -> InteractionLog:
+        """Get the interaction log of an agent."""
+        if agent_id not in self._logs:
+            assert self.base_path is not None
+            path = self.base_path / "logs" / f"{agent_id}.log"
+            # Threads must share one log, with one lock and index
+            self._logs.setdefault(agent_id, InteractionLog(path))
+        return self._logs[agent_id]
+
+    def _all_logs(self) -> List[InteractionLog]:
+        """Get the interaction logs of all agents."""
+        if not self.base_path or not (self.base_path / "logs").exists():
+            return []
+        return [
+            self._log(path.stem)
+            for path in (self.base_path / "logs").glob("*.log")
+        ]
+
+    def _find_logged_interaction(
+        self, uuid: str, agent_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Look up an interaction in the agent's log, or in all logs."""
+        if agent_id is not None:
+            preloaded = self._preloaded_logs.get(agent_id)
+            if preloaded is not None and uuid in preloaded:
+                return preloaded[uuid]
+            if self._log(agent_id).path.exists():
+                return self._log(agent_id).get(uuid)
+            return None
+        for log in self._all_logs():
+            data = log.get(uuid)
+            if data is not None:
+                return data
+        return None
+
+    # -- stack journals --
+
+    def _stack_journal(self, agent_id: str) -> StackJournal:
+        """Get the stack journal of an agent."""
+        if agent_id not in self._stack_journals:
+            assert self.base_path is not None
+            self._stack_journals[agent_id] = StackJournal(
+                self.base_path / "stacks" / agent_id,
+                write_file=self._write_file,
+                fsync=self.fsync,
+            )
+        return self._stack_journals[agent_id]
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer log appends and directory fsyncs until the batch ends.
+
+        Batches of different threads overlap, and the buffered records are
+        written when the last of them ends.
+        """
+        with self._batch_lock:
+            self._log_batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._batch_lock:
+                self._log_batch_depth -= 1
+                if self._log_batch_depth == 0:
+                    pending = self._pending_log_records
+                    self._pending_log_records = {}
+                    for agent_id, records in pending.items():
+                        self._log(agent_id).append(records)
+                    if self._renamed_dirs:
+                        self._sync_dirs()
 
     def _load_artifact(
         self,
@@ -115,8 +473,10 @@ class LocalStorage(Storage):
     def _save_artifact(self, artifact: Artifact) -> None:
         """Save an artifact to the local filesystem."""
         if self.base_path:
-            with open(self.base_path / "artifacts" / artifact.uuid, "w") as f:
-                json.dump(artifact.to_dict(), f)
+            self._write_json(
+                self.base_path / "artifacts" / artifact.uuid,
+                artifact.to_dict(),
+            )
 
     def _delete_artifact(self, artifact: Artifact) -> None:
         """Delete an artifact from the local filesystem."""
@@ -135,12 +495,21 @@ class LocalStorage(Storage):
     def _save_session(self, session: Session) -> None:
         """Save a session to the local filesystem."""
         if self.base_path:
-            with open(self.base_path / "sessions" / session.uuid, "w") as f:
-                json.dump(session.to_dict(), f)
+            content = self._write_json(
+                self.base_path / "sessions" / session.uuid, session.to_dict()
+            )
+            self._add_checkpoint_record(
+                session.uuid, f"session:{session.uuid}", content
+            )
 
             # Write metadata file for monitor to discover extensions
             # Supports multiple package paths from different agents
-            if session.environment and session.environment.package_path:
+            if (
+                session.environment
+                and session.environment.package_path
+                and session.environment.package_path
+                not in self._known_package_paths
+            ):
                 metadata_path = self.base_path / ".hugin_metadata.json"
                 new_path = session.environment.package_path
 
@@ -158,31 +527,91 @@ class LocalStorage(Storage):
                 if new_path not in existing_paths:
                     existing_paths.append(new_path)
 
-                with open(metadata_path, "w") as f:
-                    json.dump({"package_paths": existing_paths}, f)
+                self._write_json(
+                    metadata_path, {"package_paths": existing_paths}
+                )
+                self._known_package_paths.add(new_path)
 
     def _delete_session(self, session: Session) -> None:
         """Delete a session from the local filesystem."""
         if self.base_path:
             (self.base_path / "sessions" / session.uuid).unlink(missing_ok=True)
+            self._checkpoint_log(session.uuid).delete()
+            self._checkpoint_logs.pop(session.uuid, None)
+            self._checkpoint_records.pop(session.uuid, None)
 
     def _load_agent(self, uuid: str, session: "Session") -> Agent:
         """Load an agent from the local filesystem."""
+        data = self.load_agent_metadata(uuid)
+        log = self._log(uuid)
+        if not log.path.exists():
+            return Agent.from_dict(data, storage=self, session=session)
+        # Read the whole log once instead of seeking per interaction
+        self._preloaded_logs[uuid] = log.read_all()
+        try:
+            return Agent.from_dict(data, storage=self, session=session)
+        finally:
+            self._preloaded_logs.pop(uuid, None)
+
+    def load_agent_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load raw agent JSON, with its stack, without deserializing it.
+
+        Args:
+            uuid: The agent UUID to load
+
+        Returns:
+            Raw dictionary data of the agent
+        """
         if not self.base_path:
             raise ValueError("Agents not found in local memory storage")
         with open(self.base_path / "agents" / uuid, "r") as f:
-            return Agent.from_dict(json.load(f), storage=self, session=session)
+            data: Dict[str, Any] = json.load(f)
+        reference = data.get("stack", {}).get("journal")
+        if reference is not None:
+            entries = self._stack_journal(uuid).read(reference)
+            data["stack"] = stack_from_entries(entries)
+        return data
 
     def _save_agent(self, agent: Agent) -> None:
-        """Save an agent to the local filesystem."""
+        """Save an agent to the local filesystem.
+
+        Only what changed on the stack since the last save is appended to
+        its journal. The first save of an agent in a process, and saves
+        that would grow the journal too far, write the stack inline
+        instead and then rewrite the journal, so the agent file never
+        refers to a journal that is being replaced.
+        """
         if self.base_path:
-            with open(self.base_path / "agents" / agent.uuid, "w") as f:
-                json.dump(agent.to_dict(), f)
+            data = agent.to_dict()
+            path = self.base_path / "agents" / agent.uuid
+            journal = self._stack_journal(agent.uuid)
+            entries = stack_entries(data["stack"])
+            reference = journal.append(entries)
+            if reference is None:
+                content = self._write_json(path, data)
+                journal.rewrite(entries)
+            else:
+                self._write_json(
+                    path, {**data, "stack": {"journal": reference}}
+                )
+                # Checkpoints are read without the journal
+                content = (
+                    json.dumps(data).encode("utf-8")
+                    if self.checkpoints
+                    else b""
+                )
+            self._add_checkpoint_record(
+                _agent_session_id(agent), f"agent:{agent.uuid}", content
+            )
 
     def _delete_agent(self, agent: Agent) -> None:
         """Delete an agent from the local filesystem."""
         if self.base_path:
             (self.base_path / "agents" / agent.uuid).unlink(missing_ok=True)
+            self._stack_journal(agent.uuid).delete()
+            self._stack_journals.pop(agent.uuid, None)
+            self._log(agent.uuid).delete()
+            self._logs.pop(agent.uuid, None)
 
     def _load_interaction(self, uuid: str, stack: "Stack") -> Interaction:
         """Load an interaction from the local filesystem."""
@@ -190,6 +619,9 @@ class LocalStorage(Storage):
             raise ValueError(
                 f"Interaction {uuid} not found in local memory storage"
             )
+        logged = self._find_logged_interaction(uuid, _stack_agent_id(stack))
+        if logged is not None:
+            return Interaction.from_dict(logged, stack=stack)
         interaction_path = self.base_path / "interactions" / uuid
         if not interaction_path.exists():
             raise FileNotFoundError(f"Interaction file {uuid} not found")
@@ -225,6 +657,9 @@ class LocalStorage(Storage):
             raise ValueError("Interactions not found in local memory storage")
         interaction_path = self.base_path / "interactions" / uuid
         if not interaction_path.exists():
+            logged = self._find_logged_interaction(uuid)
+            if logged is not None:
+                return logged
             raise FileNotFoundError(f"Interaction file {uuid} not found")
 
         with open(interaction_path, "r") as f:
@@ -256,46 +691,7 @@ class LocalStorage(Storage):
         with open(artifact_path, "r") as f:
             raw: Dict[str, Any] = json.load(f)
 
-        # Artifact JSON is wrapped: {"type": "...", "data": {...}}
-        artifact_type = raw.get("type", "Unknown")
-        artifact_data = raw.get("data", {})
-
-        # Generate preview based on artifact type
-        preview = ""
-
-        # For File and Image artifacts, use name instead of loading content
-        if artifact_type in ("File", "Image"):
-            name = artifact_data.get("name", "")
-            description = artifact_data.get("description", "")
-            if name:
-                preview = name
-            elif description:
-                preview = (
-                    description[:200] + "..."
-                    if len(description) > 200
-                    else description
-                )
-            else:
-                preview = f"[{artifact_type}]"
-        else:
-            # For other artifacts, use content
-            content = artifact_data.get("content")
-            if content:
-                if isinstance(content, str):
-                    preview = (
-                        content[:200] + "..." if len(content) > 200 else content
-                    )
-                elif isinstance(content, dict):
-                    # For structured content, show a summary
-                    preview = f"[{len(content)} fields]"
-
-        return {
-            "id": uuid,
-            "type": artifact_type,
-            "format": artifact_data.get("format"),
-            "preview": preview,
-            "created_at": artifact_data.get("created_at"),
-        }
+        return artifact_metadata_from_dict(uuid, raw)
 
     def _save_interaction(self, interaction: Interaction) -> None:
         """Save an interaction to the local filesystem."""
@@ -303,18 +699,56 @@ class LocalStorage(Storage):
             logger.debug(
                 f"Saving interaction {interaction.uuid} of type {interaction.__class__.__name__}"
             )
-            with open(
-                self.base_path / "interactions" / interaction.uuid, "w"
-            ) as f:
-                data = _sanitize_for_json(interaction.to_dict())
-                json.dump(data, f, cls=SafeJSONEncoder)
+            data = _sanitize_for_json(interaction.to_dict())
+            content = json.dumps(data, cls=SafeJSONEncoder).encode("utf-8")
+            self._add_checkpoint_record(
+                _agent_session_id(getattr(interaction.stack, "agent", None)),
+                f"interaction:{interaction.uuid}",
+                content,
+            )
+            agent_id = _stack_agent_id(interaction.stack)
+            if self.interaction_log and agent_id is not None:
+                record = (interaction.uuid, content)
+                with self._batch_lock:
+                    if self._log_batch_depth > 0:
+                        self._pending_log_records.setdefault(
+                            agent_id, []
+                        ).append(record)
+                        return
+                self._log(agent_id).append([record])
+                return
+            self._write_file(
+                self.base_path / "interactions" / interaction.uuid, content
+            )
 
     def _delete_interaction(self, interaction: Interaction) -> None:
         """Delete an interaction from the local filesystem."""
-        if self.base_path:
+        self._delete_interactions([interaction])
+
+    def _delete_interactions(self, interactions: List[Interaction]) -> None:
+        """Delete interactions, truncating agent logs where possible."""
+        if not self.base_path:
+            return
+        logged: Dict[str, List[str]] = {}
+        for interaction in interactions:
             (self.base_path / "interactions" / interaction.uuid).unlink(
                 missing_ok=True
             )
+            agent_id = _stack_agent_id(interaction.stack)
+            if agent_id is not None:
+                logged.setdefault(agent_id, []).append(interaction.uuid)
+        with self._batch_lock:
+            for agent_id, uuids in logged.items():
+                # Records still buffered would bring them back at batch end
+                removed = set(uuids)
+                pending = self._pending_log_records.get(agent_id)
+                if pending:
+                    self._pending_log_records[agent_id] = [
+                        record for record in pending if record[0] not in removed
+                    ]
+                log = self._log(agent_id)
+                if log.path.exists():
+                    log.remove(uuids)
 
     def _feedback_filename(self, feedback: ArtifactFeedback) -> str:
         """Build feedback filename: {artifact_id}_{feedback_uuid}."""
@@ -324,9 +758,9 @@ class LocalStorage(Storage):
         """Save feedback to the local filesystem."""
         if self.base_path:
             name = self._feedback_filename(feedback)
-            path = self.base_path / "feedback" / name
-            with open(path, "w") as f:
-                json.dump(feedback.to_dict(), f)
+            self._write_json(
+                self.base_path / "feedback" / name, feedback.to_dict()
+            )
 
     def _load_feedback(self, uuid: str) -> ArtifactFeedback:
         """Load feedback from the local filesystem."""
@@ -395,9 +829,7 @@ class LocalStorage(Storage):
         if extension:
             filename = f"{artifact_uuid}.{extension}"
 
-        file_path = self.base_path / "files" / filename
-        with open(file_path, "wb") as f:
-            f.write(content)
+        self._write_file(self.base_path / "files" / filename, content)
 
         return f"files/{filename}"
 
@@ -0,0 +1,703 @@
+"""SQLite storage implementation module."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.session import Session
+from gimle.hugin.artifacts.artifact import Artifact
+from gimle.hugin.artifacts.feedback import ArtifactFeedback
+from gimle.hugin.interaction.interaction import Interaction
+from gimle.hugin.storage.cache import StorageCache
+from gimle.hugin.storage.local import (
+    SafeJSONEncoder,
+    _sanitize_for_json,
+    artifact_metadata_from_dict,
+)
+from gimle.hugin.storage.storage import Storage
+
+if TYPE_CHECKING:
+    from gimle.hugin.agent.environment import Environment
+    from gimle.hugin.interaction.stack import Stack
+
+logger = logging.getLogger(__name__)
+
+# File suffixes treated as SQLite databases by the CLI and monitor
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    uuid TEXT PRIMARY KEY,
+    created_at TEXT,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_created_at
+    ON sessions (created_at);
+
+CREATE TABLE IF NOT EXISTS agents (
+    uuid TEXT PRIMARY KEY,
+    session_id TEXT,
+    created_at TEXT,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agents_session_id ON agents (session_id);
+CREATE INDEX IF NOT EXISTS idx_agents_created_at ON agents (created_at);
+
+CREATE TABLE IF NOT EXISTS interactions (
+    uuid TEXT PRIMARY KEY,
+    agent_id TEXT,
+    type TEXT,
+    created_at TEXT,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_agent_id
+    ON interactions (agent_id);
+CREATE INDEX IF NOT EXISTS idx_interactions_created_at
+    ON interactions (created_at);
+CREATE INDEX IF NOT EXISTS idx_interactions_updated_at
+    ON interactions (updated_at);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    uuid TEXT PRIMARY KEY,
+    interaction_id TEXT,
+    agent_id TEXT,
+    type TEXT,
+    created_at TEXT,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_agent_id ON artifacts (agent_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_type_created_at
+    ON artifacts (type, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_created_at
+    ON artifacts (created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_updated_at
+    ON artifacts (updated_at);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    uuid TEXT PRIMARY KEY,
+    artifact_id TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_artifact_id
+    ON feedback (artifact_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_created_at
+    ON feedback (created_at);
+
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    content BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS package_paths (
+    path TEXT PRIMARY KEY
+);
+"""
+
+# Tables polled by list_changes, keyed by the object kind they store
+_CHANGE_TABLES = {
+    "session": "sessions",
+    "agent": "agents",
+    "interaction": "interactions",
+    "artifact": "artifacts",
+}
+
+
+def is_sqlite_path(path: Union[str, Path]) -> bool:
+    """Check whether a storage path refers to a SQLite database file.
+
+    Args:
+        path: The storage path.
+
+    Returns:
+        True if the path has a SQLite file suffix (e.g. ``storage.db``).
+    """
+    return Path(path).suffix.lower() in SQLITE_SUFFIXES
+
+
+def _agent_id_of(interaction: Optional[Interaction]) -> Optional[str]:
+    """Get the id of the agent an interaction belongs to, if known."""
+    stack = getattr(interaction, "stack", None)
+    agent = getattr(stack, "agent", None)
+    agent_id = getattr(agent, "uuid", None)
+    return agent_id if isinstance(agent_id, str) else None
+
+
+class SqliteStorage(Storage):
+    """A storage implementation backed by a single SQLite database file.
+
+    The database runs in WAL mode so that readers (e.g. the monitor) do not
+    block a running agent. Every object is stored as JSON next to indexed
+    columns (agent_id, session_id, artifact_id, created_at) used to answer
+    queries without deserializing everything. All writes made by one
+    ``save_session`` call (i.e. one step of a session) are committed in a
+    single transaction, and callbacks fire only once it is committed.
+
+    The storage can be shared between threads; access to the connection is
+    serialized with a lock.
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        callback: Optional[Callable[[str, str], None]] = None,
+        cache: Optional[StorageCache] = None,
+        lazy_stacks: bool = False,
+    ) -> None:
+        """Initialize the SQLite storage.
+
+        Args:
+            db_path: Path to the database file, created if missing.
+            callback: Called with (kind, uuid) after each saved object.
+            cache: Cache of loaded and saved objects, unbounded by default.
+            lazy_stacks: Load the interactions of an agent on first access
+                instead of when the agent is loaded.
+        """
+        super().__init__(
+            callback=callback, cache=cache, lazy_stacks=lazy_stacks
+        )
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._pending_notifications: List[Tuple[str, str]] = []
+        self._known_package_paths: set[str] = set()
+        # Transactions are managed explicitly, see transaction()
+        self._conn = sqlite3.connect(
+            str(self.db_path), isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group writes into a single transaction.
+
+        Transactions nest: only the outermost one commits (or rolls back on
+        error). Callbacks for objects saved inside a transaction are
+        delivered after it commits.
+
+        Yields:
+            The database connection.
+        """
+        with self._lock:
+            if self._transaction_depth == 0:
+                self._conn.execute("BEGIN")
+            self._transaction_depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self._conn.execute("ROLLBACK")
+                    self._pending_notifications.clear()
+                raise
+            self._transaction_depth -= 1
+            if self._transaction_depth > 0:
+                return
+            self._conn.execute("COMMIT")
+            pending = self._pending_notifications
+            self._pending_notifications = []
+        for kind, uuid in pending:
+            super()._notify(kind, uuid)
+
+    def _notify(self, kind: str, uuid: str) -> None:
+        """Report a saved object, deferring until the transaction commits."""
+        with self._lock:
+            if self._transaction_depth > 0:
+                self._pending_notifications.append((kind, uuid))
+                return
+        super()._notify(kind, uuid)
+
+    def _execute(self, sql: str, params: Tuple[Any, ...] = ()) -> None:
+        """Execute a write statement inside a transaction."""
+        with self.transaction() as conn:
+            conn.execute(sql, params)
+
+    def _fetchone(
+        self, sql: str, params: Tuple[Any, ...] = ()
+    ) -> Optional[Tuple[Any, ...]]:
+        """Run a query and return the first row."""
+        with self._lock:
+            row: Optional[Tuple[Any, ...]] = self._conn.execute(
+                sql, params
+            ).fetchone()
+            return row
+
+    def _fetchall(
+        self, sql: str, params: Tuple[Any, ...] = ()
+    ) -> List[Tuple[Any, ...]]:
+        """Run a query and return all rows."""
+        with self._lock:
+            return list(self._conn.execute(sql, params).fetchall())
+
+    def _load_data(self, table: str, uuid: str, kind: str) -> Dict[str, Any]:
+        """Load the JSON data of a row by UUID."""
+        row = self._fetchone(
+            f"SELECT data FROM {table} WHERE uuid = ?", (uuid,)
+        )
+        if row is None:
+            raise ValueError(f"{kind} {uuid} not found in storage")
+        data: Dict[str, Any] = json.loads(row[0])
+        return data
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Run a save or delete call and its cascade in one transaction."""
+        with self.transaction():
+            yield
+
+    # -- list --
+
+    def list_sessions(self) -> List[str]:
+        """List all sessions in the database."""
+        return [row[0] for row in self._fetchall("SELECT uuid FROM sessions")]
+
+    def list_agents(self) -> List[str]:
+        """List all agents in the database."""
+        return [row[0] for row in self._fetchall("SELECT uuid FROM agents")]
+
+    def list_interactions(self) -> List[str]:
+        """List all interactions in the database."""
+        return [
+            row[0] for row in self._fetchall("SELECT uuid FROM interactions")
+        ]
+
+    def list_artifacts(self) -> List[str]:
+        """List all artifacts in the database."""
+        return [row[0] for row in self._fetchall("SELECT uuid FROM artifacts")]
+
+    def query_artifacts(
+        self,
+        artifact_type: Optional[str] = None,
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """List artifact UUIDs using the type and created_at indexes.
+
+        Args:
+            artifact_type: Only include artifacts of this class name.
+            newest_first: Sort by creation time, most recent first.
+            limit: Maximum number of UUIDs to return.
+
+        Returns:
+            The matching artifact UUIDs.
+        """
+        sql = "SELECT uuid FROM artifacts"
+        params: List[Any] = []
+        if artifact_type is not None:
+            sql += " WHERE type = ?"
+            params.append(artifact_type)
+        if newest_first:
+            sql += " ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self._fetchall(sql, tuple(params))]
+
+    def list_agent_artifacts(self, agent_id: str) -> List[str]:
+        """List the artifacts produced by an agent, oldest first.
+
+        Args:
+            agent_id: The agent UUID.
+
+        Returns:
+            The artifact UUIDs.
+        """
+        rows = self._fetchall(
+            "SELECT uuid FROM artifacts WHERE agent_id = ? "
+            "ORDER BY created_at",
+            (agent_id,),
+        )
+        return [row[0] for row in rows]
+
+    def list_changes(self, since: float) -> List[Tuple[str, str, float]]:
+        """List objects written after a point in time.
+
+        Used by the monitor to detect updates from other processes.
+
+        Args:
+            since: A ``time.time()`` timestamp.
+
+        Returns:
+            (kind, uuid, updated_at) tuples, oldest change first.
+        """
+        changes: List[Tuple[str, str, float]] = []
+        for kind, table in _CHANGE_TABLES.items():
+            rows = self._fetchall(
+                f"SELECT uuid, updated_at FROM {table} WHERE updated_at > ?",
+                (since,),
+            )
+            changes.extend((kind, uuid, updated) for uuid, updated in rows)
+        changes.sort(key=lambda change: change[2])
+        return changes
+
+    # -- artifact --
+
+    def _load_artifact(
+        self,
+        uuid: str,
+        stack: Optional["Stack"] = None,
+        load_interaction: bool = True,
+    ) -> Artifact:
+        """Load an artifact from the database."""
+        return Artifact.from_dict(
+            self._load_data("artifacts", uuid, "Artifact"),
+            storage=self,
+            stack=stack,
+            load_interaction=load_interaction,
+        )
+
+    def _save_artifact(self, artifact: Artifact) -> None:
+        """Save an artifact to the database."""
+        data = artifact.to_dict()
+        self._execute(
+            "INSERT OR REPLACE INTO artifacts (uuid, interaction_id, "
+            "agent_id, type, created_at, updated_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                artifact.uuid,
+                data["data"].get("interaction"),
+                _agent_id_of(artifact.interaction),
+                data["type"],
+                data["data"].get("created_at"),
+                time.time(),
+                json.dumps(data),
+            ),
+        )
+
+    def _delete_artifact(self, artifact: Artifact) -> None:
+        """Delete an artifact from the database."""
+        self._execute("DELETE FROM artifacts WHERE uuid = ?", (artifact.uuid,))
+
+    def load_artifact_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load artifact metadata without full content rendering.
+
+        See ``LocalStorage.load_artifact_metadata``.
+
+        Args:
+            uuid: The artifact UUID to load
+
+        Returns:
+            Dictionary with artifact metadata
+        """
+        return artifact_metadata_from_dict(
+            uuid, self._load_data("artifacts", uuid, "Artifact")
+        )
+
+    # -- session --
+
+    def _load_session(self, uuid: str, environment: "Environment") -> Session:
+        """Load a session from the database."""
+        return Session.from_dict(
+            self._load_data("sessions", uuid, "Session"),
+            environment=environment,
+        )
+
+    def _save_session(self, session: Session) -> None:
+        """Save a session to the database."""
+        data = session.to_dict()
+        self._execute(
+            "INSERT OR REPLACE INTO sessions "
+            "(uuid, created_at, updated_at, data) VALUES (?, ?, ?, ?)",
+            (
+                session.uuid,
+                data.get("created_at"),
+                time.time(),
+                json.dumps(data),
+            ),
+        )
+        # Record package paths for the monitor to discover extensions
+        package_path = (
+            session.environment.package_path if session.environment else None
+        )
+        if package_path and package_path not in self._known_package_paths:
+            self._execute(
+                "INSERT OR IGNORE INTO package_paths (path) VALUES (?)",
+                (package_path,),
+            )
+            self._known_package_paths.add(package_path)
+
+    def _delete_session(self, session: Session) -> None:
+        """Delete a session from the database."""
+        self._execute("DELETE FROM sessions WHERE uuid = ?", (session.uuid,))
+
+    def list_package_paths(self) -> List[str]:
+        """List the package paths of all sessions saved to the database."""
+        return [
+            row[0] for row in self._fetchall("SELECT path FROM package_paths")
+        ]
+
+    def load_session_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load raw session JSON along with its last modification time.
+
+        Args:
+            uuid: The session UUID to load
+
+        Returns:
+            The raw session dictionary, with an added ``last_modified`` key
+        """
+        row = self._fetchone(
+            "SELECT data, updated_at FROM sessions WHERE uuid = ?", (uuid,)
+        )
+        if row is None:
+            raise ValueError(f"Session {uuid} not found in storage")
+        data: Dict[str, Any] = json.loads(row[0])
+        data["last_modified"] = row[1]
+        return data
+
+    # -- agent --
+
+    def _load_agent(self, uuid: str, session: "Session") -> Agent:
+        """Load an agent from the database."""
+        return Agent.from_dict(
+            self._load_data("agents", uuid, "Agent"),
+            storage=self,
+            session=session,
+        )
+
+    def _save_agent(self, agent: Agent) -> None:
+        """Save an agent to the database."""
+        data = agent.to_dict()
+        session_id = getattr(agent.session, "uuid", None)
+        self._execute(
+            "INSERT OR REPLACE INTO agents "
+            "(uuid, session_id, created_at, updated_at, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                agent.uuid,
+                session_id if isinstance(session_id, str) else None,
+                data.get("created_at"),
+                time.time(),
+                json.dumps(data),
+            ),
+        )
+
+    def _delete_agent(self, agent: Agent) -> None:
+        """Delete an agent from the database."""
+        self._execute("DELETE FROM agents WHERE uuid = ?", (agent.uuid,))
+
+    def load_agent_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load raw agent JSON without deserializing its stack.
+
+        Args:
+            uuid: The agent UUID to load
+
+        Returns:
+            Raw dictionary data of the agent
+        """
+        return self._load_data("agents", uuid, "Agent")
+
+    def list_agent_summaries(
+        self, session_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Summarize agents for the monitor, newest first.
+
+        Args:
+            session_id: Only include agents of this session.
+
+        Returns:
+            One dictionary per agent with id, session_id, config_name,
+            num_interactions, num_artifacts, last_modified, created_at and
+            session_created_at.
+        """
+        sql = (
+            "SELECT a.uuid, a.session_id, a.created_at, a.updated_at, "
+            "a.data, s.created_at, s.updated_at "
+            "FROM agents a JOIN sessions s ON s.uuid = a.session_id"
+        )
+        params: Tuple[Any, ...] = ()
+        if session_id is not None:
+            sql += " WHERE a.session_id = ?"
+            params = (session_id,)
+        sql += " ORDER BY a.created_at DESC"
+
+        summaries: List[Dict[str, Any]] = []
+        for row in self._fetchall(sql, params):
+            uuid, sid, created_at, updated_at, data, s_created, s_updated = row
+            agent_data = json.loads(data)
+            stack_data = agent_data.get("stack", {})
+            summaries.append(
+                {
+                    "id": uuid,
+                    "session_id": sid,
+                    "config_name": agent_data.get("config", {}).get(
+                        "name", "Unknown"
+                    ),
+                    "num_interactions": len(stack_data.get("interactions", [])),
+                    "num_artifacts": len(stack_data.get("artifacts", [])),
+                    "last_modified": max(updated_at, s_updated),
+                    "created_at": created_at,
+                    "session_created_at": s_created,
+                }
+            )
+        return summaries
+
+    # -- interaction --
+
+    def _load_interaction(self, uuid: str, stack: "Stack") -> Interaction:
+        """Load an interaction from the database."""
+        return Interaction.from_dict(
+            self._load_data("interactions", uuid, "Interaction"), stack=stack
+        )
+
+    def _save_interaction(self, interaction: Interaction) -> None:
+        """Save an interaction to the database."""
+        data = _sanitize_for_json(interaction.to_dict())
+        self._execute(
+            "INSERT OR REPLACE INTO interactions "
+            "(uuid, agent_id, type, created_at, updated_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                interaction.uuid,
+                _agent_id_of(interaction),
+                data["type"],
+                data["data"].get("created_at"),
+                time.time(),
+                json.dumps(data, cls=SafeJSONEncoder),
+            ),
+        )
+
+    def _delete_interaction(self, interaction: Interaction) -> None:
+        """Delete an interaction from the database."""
+        self._execute(
+            "DELETE FROM interactions WHERE uuid = ?", (interaction.uuid,)
+        )
+
+    def load_interaction_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load raw interaction JSON without deserializing artifacts.
+
+        Args:
+            uuid: The interaction UUID to load
+
+        Returns:
+            Raw dictionary data of the interaction
+        """
+        return self._load_data("interactions", uuid, "Interaction")
+
+    # -- feedback --
+
+    def _save_feedback(self, feedback: ArtifactFeedback) -> None:
+        """Save feedback to the database."""
+        data = feedback.to_dict()
+        self._execute(
+            "INSERT OR REPLACE INTO feedback "
+            "(uuid, artifact_id, rating, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                feedback.id,
+                feedback.artifact_id,
+                feedback.rating,
+                data.get("created_at"),
+                json.dumps(data),
+            ),
+        )
+
+    def _load_feedback(self, uuid: str) -> ArtifactFeedback:
+        """Load feedback from the database."""
+        return ArtifactFeedback.from_dict(
+            self._load_data("feedback", uuid, "Feedback")
+        )
+
+    def _delete_feedback(self, feedback: ArtifactFeedback) -> None:
+        """Delete feedback from the database."""
+        self._execute("DELETE FROM feedback WHERE uuid = ?", (feedback.id,))
+
+    def _delete_feedback_for_artifact(self, artifact_id: str) -> None:
+        """Delete all feedback for an artifact."""
+        self._execute(
+            "DELETE FROM feedback WHERE artifact_id = ?", (artifact_id,)
+        )
+
+    def _list_feedback(self, artifact_id: Optional[str] = None) -> List[str]:
+        """List feedback UUIDs, optionally filtered by artifact."""
+        if artifact_id is None:
+            rows = self._fetchall("SELECT uuid FROM feedback")
+        else:
+            rows = self._fetchall(
+                "SELECT uuid FROM feedback WHERE artifact_id = ?",
+                (artifact_id,),
+            )
+        return [row[0] for row in rows]
+
+    def load_feedback_ratings(self) -> Dict[str, List[int]]:
+        """Load all feedback ratings grouped by artifact in one query.
+
+        Returns:
+            Dict mapping artifact_id to list of ratings.
+        """
+        ratings: Dict[str, List[int]] = {}
+        for artifact_id, rating in self._fetchall(
+            "SELECT artifact_id, rating FROM feedback"
+        ):
+            ratings.setdefault(artifact_id, []).append(rating)
+        return ratings
+
+    # -- file --
+
+    def save_file(
+        self, artifact_uuid: str, content: bytes, extension: str
+    ) -> str:
+        """Save file content to the database.
+
+        Args:
+            artifact_uuid: UUID of the artifact this file belongs to
+            content: Raw bytes to store
+            extension: File extension (without dot)
+
+        Returns:
+            Relative path of the stored file (e.g., "files/uuid.ext")
+        """
+        filename = artifact_uuid
+        if extension:
+            filename = f"{artifact_uuid}.{extension}"
+        file_path = f"files/{filename}"
+        self._execute(
+            "INSERT OR REPLACE INTO files (path, content) VALUES (?, ?)",
+            (file_path, sqlite3.Binary(content)),
+        )
+        return file_path
+
+    def load_file(self, file_path: str) -> bytes:
+        """Load file content from the database.
+
+        Args:
+            file_path: Relative path to the file (as returned by save_file)
+
+        Returns:
+            Raw bytes of the file content
+        """
+        row = self._fetchone(
+            "SELECT content FROM files WHERE path = ?", (file_path,)
+        )
+        if row is None:
+            raise FileNotFoundError(f"File not found: {file_path}")
+        return bytes(row[0])
@@ -0,0 +1,204 @@
+"""Append-only journal of the stack of an agent."""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# An interaction on the stack: [uuid, type, branch, artifact uuids]
+StackEntry = List[Any]
+
+# Journals are rewritten once they hold this many times more entries than
+# the stack, plus a constant for short stacks
+_COMPACT_RATIO = 2
+_COMPACT_MIN_ENTRIES = 100
+
+
+def stack_entries(stack: Dict[str, Any]) -> List[StackEntry]:
+    """Get the entries of a serialized stack, see ``Stack.to_dict``.
+
+    Args:
+        stack: The serialized stack.
+
+    Returns:
+        One entry per interaction, in stack order.
+    """
+    artifacts = stack["interaction_artifacts"]
+    return [
+        [uuid, type, branch, artifacts.get(uuid, [])]
+        for uuid, type, branch in zip(
+            stack["interactions"],
+            stack["interaction_types"],
+            stack["interaction_branches"],
+        )
+    ]
+
+
+def stack_from_entries(entries: List[StackEntry]) -> Dict[str, Any]:
+    """Serialize a stack from its entries, as ``Stack.to_dict`` does.
+
+    Args:
+        entries: The entries of the stack, see ``stack_entries``.
+
+    Returns:
+        The serialized stack.
+    """
+    return {
+        "interactions": [entry[0] for entry in entries],
+        "artifacts": [
+            artifact_id for entry in entries for artifact_id in entry[3]
+        ],
+        "interaction_types": [entry[1] for entry in entries],
+        "interaction_branches": [entry[2] for entry in entries],
+        "interaction_artifacts": {
+            entry[0]: entry[3] for entry in entries if entry[3]
+        },
+    }
+
+
+class StackJournal:
+    """Append-only journal of the interactions on the stack of one agent.
+
+    Each line is a JSON list ``[index, entries]`` that replaces the stack
+    entries from ``index`` on, so a step that adds interactions, adds
+    artifacts to the last ones or rewinds the stack appends one short line
+    instead of rewriting every interaction id. The agent file refers to the
+    journal by its size and the length of the stack, see ``reference``;
+    lines after that size, left by a save that was interrupted before the
+    agent file was written, are ignored and overwritten by the next append.
+
+    The journal only appends to what this process wrote or read itself.
+    Otherwise ``append`` returns None, and the caller writes the stack
+    inline with the agent and then ``rewrite``s the journal.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        write_file: Callable[[Path, bytes], None],
+        fsync: bool = False,
+    ) -> None:
+        """Initialize the journal.
+
+        Args:
+            path: Path to the journal file.
+            write_file: Writes a file atomically, used to rewrite it.
+            fsync: Fsync appended lines.
+        """
+        self.path = path
+        self._write_file = write_file
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        # The entries up to the end of the journal, None if unknown
+        self._entries: Optional[List[StackEntry]] = None
+        self._end = 0
+        # Entries written since the journal was last rewritten
+        self._written = 0
+
+    @property
+    def reference(self) -> Dict[str, int]:
+        """What the agent file stores instead of the stack entries."""
+        assert self._entries is not None
+        return {"end": self._end, "length": len(self._entries)}
+
+    def append(self, entries: List[StackEntry]) -> Optional[Dict[str, int]]:
+        """Append what changed since the last append or rewrite.
+
+        Args:
+            entries: The entries of the stack.
+
+        Returns:
+            The reference to store in the agent file, or None if the
+            journal has to be rewritten.
+        """
+        with self._lock:
+            if self._entries is None:
+                return None
+            start = 0
+            for old, new in zip(self._entries, entries):
+                if old != new:
+                    break
+                start += 1
+            if start == len(self._entries) == len(entries):
+                return self.reference
+            changed = len(entries) - start
+            limit = _COMPACT_RATIO * len(entries) + _COMPACT_MIN_ENTRIES
+            if self._written + changed > limit:
+                return None
+            line = json.dumps([start, entries[start:]]).encode("utf-8")
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.pwrite(fd, line + b"\n", self._end)
+                # Drops lines left behind by an interrupted save
+                os.ftruncate(fd, self._end + len(line) + 1)
+                if self._fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._entries = self._entries[:start] + entries[start:]
+            self._end += len(line) + 1
+            self._written += changed
+            return self.reference
+
+    def rewrite(self, entries: List[StackEntry]) -> None:
+        """Replace the journal with one line holding all entries.
+
+        Args:
+            entries: The entries of the stack.
+        """
+        with self._lock:
+            line = json.dumps([0, entries]).encode("utf-8") + b"\n"
+            self._write_file(self.path, line)
+            self._entries = list(entries)
+            self._end = len(line)
+            self._written = 0
+
+    def read(self, reference: Dict[str, int]) -> List[StackEntry]:
+        """Read the entries of the stack an agent file refers to.
+
+        Args:
+            reference: The reference stored in the agent file.
+
+        Returns:
+            The entries of the stack.
+
+        Raises:
+            ValueError: If the journal does not match the reference.
+        """
+        end, length = reference["end"], reference["length"]
+        with self._lock:
+            with open(self.path, "rb") as f:
+                data = f.read(end)
+            entries, written = self._replay(data)
+            if len(data) != end or len(entries) != length:
+                raise ValueError(
+                    f"Stack journal {self.path} does not match its agent"
+                )
+            self._entries = entries
+            self._end = end
+            self._written = written
+            return list(entries)
+
+    @staticmethod
+    def _replay(data: bytes) -> Tuple[List[StackEntry], int]:
+        """Apply the lines of a journal.
+
+        Returns:
+            The entries, and the number of entries the lines held.
+        """
+        entries: List[StackEntry] = []
+        written = 0
+        for line in data.splitlines():
+            start, changed = json.loads(line)
+            entries[start:] = changed
+            written += len(changed)
+        return entries, written
+
+    def delete(self) -> None:
+        """Delete the journal file."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._entries = None
+            self._end = 0
+            self._written = 0
@@ -1,14 +1,27 @@
 """Storage interface module."""
 
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, cast
+from contextlib import nullcontext
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    cast,
+)
 
 from gimle.hugin.agent.agent import Agent
 from gimle.hugin.agent.session import Session
 from gimle.hugin.artifacts.artifact import Artifact
 from gimle.hugin.artifacts.feedback import ArtifactFeedback
 from gimle.hugin.interaction.interaction import Interaction
+from gimle.hugin.storage.cache import StorageCache
+from gimle.hugin.utils.dirty import is_dirty, mark_clean
 
 if TYPE_CHECKING:
     from gimle.hugin.agent.environment import Environment
@@ -19,14 +32,78 @@ logger = logging.getLogger(__name__)
 
 
 class Storage(ABC):
-    """Abstract storage interface."""
+    """Abstract storage interface.
+
+    Saving is incremental: ``save_session`` always writes the session itself,
+    but only writes agents, interactions and artifacts that changed since
+    they were last saved or loaded (see ``gimle.hugin.utils.dirty``).
+    Explicit ``save_agent``/``save_interaction``/``save_artifact`` calls
+    always write the object passed in, and cascade only to dirty children.
+
+    With ``lazy_stacks``, the interactions of an agent are loaded on first
+    access instead of when the agent is loaded (see ``Stack.from_dict``).
+
+    Storages that keep checkpoints record each ``save_session`` as one
+    consistent checkpoint, which ``load_checkpoint`` (and
+    ``Session.resume``) read back in one go.
+    """
 
     def __init__(
-        self, callback: Optional[Callable[[str, str], None]] = None
+        self,
+        callback: Optional[Callable[[str, str], None]] = None,
+        cache: Optional[StorageCache] = None,
+        lazy_stacks: bool = False,
     ) -> None:
-        """Initialize the storage."""
-        self.store: Dict[str, Any] = {}
+        """Initialize the storage.
+
+        Args:
+            callback: Called with (kind, uuid) after each saved object.
+            cache: Cache of loaded and saved objects, unbounded by default.
+            lazy_stacks: Load the interactions of an agent on first access
+                instead of when the agent is loaded.
+        """
+        self.store: StorageCache = (
+            cache if cache is not None else StorageCache()
+        )
         self.callback = callback
+        self.lazy_stacks = lazy_stacks
+        # Loads check the cache and fill it as one step, so agents stepped
+        # in parallel threads load the same instance of an object
+        self._load_lock = threading.RLock()
+        # Records of the checkpoint being loaded, see load_checkpoint()
+        self._checkpoint: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _notify(self, kind: str, uuid: str) -> None:
+        """Report a saved object to the callback, if one is set.
+
+        Args:
+            kind: The kind of object saved (e.g. "agent", "artifact").
+            uuid: The UUID of the saved object.
+        """
+        if self.callback:
+            self.callback(kind, uuid)
+
+    def batch(self) -> ContextManager[None]:
+        """Group the writes made by one save or delete call.
+
+        The public ``save_*`` and ``delete_*`` methods run inside a batch,
+        and nested batches join the outermost one. The default writes
+        immediately; storages override it to commit a whole batch at once.
+
+        Returns:
+            A context manager delimiting the batch.
+        """
+        return nullcontext()
+
+    def flush(self) -> None:
+        """Wait until all saves have been written.
+
+        Storages that write synchronously have nothing to do.
+        """
+
+    def close(self) -> None:
+        """Flush pending writes and release resources held by the storage."""
+        self.flush()
 
     @abstractmethod
     def list_sessions(self) -> List[str]:
@@ -57,6 +134,50 @@ class Storage(ABC):
     ) -> Artifact:
         raise NotImplementedError("Subclasses must implement this method")
 
+    def query_artifacts(
+        self,
+        artifact_type: Optional[str] = None,
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """List artifact UUIDs, optionally filtered by type and sorted by age.
+
+        The default implementation loads every artifact to inspect its type
+        and creation time. Storages with an index should override it.
+
+        Args:
+            artifact_type: Only include artifacts of this class name.
+            newest_first: Sort by creation time, most recent first.
+            limit: Maximum number of UUIDs to return.
+
+        Returns:
+            The matching artifact UUIDs.
+        """
+        artifact_ids = self.list_artifacts()
+        if artifact_type is not None or newest_first:
+            artifacts = []
+            for artifact_id in artifact_ids:
+                try:
+                    artifact = self.load_artifact(artifact_id)
+                except Exception as e:
+                    logger.error(f"Failed to load artifact {artifact_id}: {e}")
+                    continue
+                if (
+                    artifact_type
+                    and artifact.__class__.__name__ != artifact_type
+                ):
+                    continue
+                artifacts.append(artifact)
+            if newest_first:
+                artifacts.sort(
+                    key=lambda a: getattr(a, "created_at", None) or "",
+                    reverse=True,
+                )
+            artifact_ids = [artifact.id for artifact in artifacts]
+        if limit is not None:
+            artifact_ids = artifact_ids[:limit]
+        return artifact_ids
+
     def load_artifact(
         self,
         uuid: str,
@@ -65,11 +186,26 @@ class Storage(ABC):
     ) -> Artifact:
         """Load an artifact by UUID."""
         cache_key = f"artifact:{uuid}"
-        if cache_key not in self.store:
-            self.store[cache_key] = self._load_artifact(
-                uuid, stack, load_interaction
-            )
-        return cast(Artifact, self.store[cache_key])
+        with self._load_lock:
+            artifact = self.store.get(cache_key)
+            if artifact is None:
+                artifact = self._load_artifact(uuid, stack, load_interaction)
+                mark_clean(artifact)
+                self.store[cache_key] = artifact
+        return cast(Artifact, artifact)
+
+    def load_artifact_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load the metadata of an artifact without loading its content.
+
+        Args:
+            uuid: The artifact UUID.
+
+        Returns:
+            The type, format, preview, creation time and id of the artifact.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support artifact metadata"
+        )
 
     @abstractmethod
     def _save_artifact(self, artifact: Artifact) -> None:
@@ -80,9 +216,9 @@ class Storage(ABC):
         if not getattr(artifact, "uuid", None):
             raise ValueError("Artifact must have a uuid")
         self._save_artifact(artifact)
+        mark_clean(artifact)
         self.store[f"artifact:{artifact.id}"] = artifact
-        if self.callback:
-            self.callback("artifact", artifact.id)
+        self._notify("artifact", artifact.id)
 
     @abstractmethod
     def _delete_artifact(self, artifact: Artifact) -> None:
@@ -90,12 +226,13 @@ class Storage(ABC):
 
     def delete_artifact(self, artifact: Artifact) -> None:
         """Delete an artifact and its associated feedback."""
-        # Cascade delete feedback — clear cache, then bulk-delete
-        for feedback_uuid in self.list_feedback(artifact.id):
-            self.store.pop(f"feedback:{feedback_uuid}", None)
-        self._delete_feedback_for_artifact(artifact.id)
-        self._delete_artifact(artifact)
-        self.store.pop(f"artifact:{artifact.id}", None)
+        with self.batch():
+            # Cascade delete feedback — clear cache, then bulk-delete
+            for feedback_uuid in self.list_feedback(artifact.id):
+                self.store.pop(f"feedback:{feedback_uuid}", None)
+            self._delete_feedback_for_artifact(artifact.id)
+            self._delete_artifact(artifact)
+            self.store.pop(f"artifact:{artifact.id}", None)
 
     @abstractmethod
     def _load_session(self, uuid: str, environment: "Environment") -> Session:
@@ -105,9 +242,12 @@ class Storage(ABC):
         """Load a session by UUID."""
         cache_key = f"session:{uuid}"
         environment.storage = self
-        if cache_key not in self.store:
-            self.store[cache_key] = self._load_session(uuid, environment)
-        return cast(Session, self.store[cache_key])
+        with self._load_lock:
+            session = self.store.get(cache_key)
+            if session is None:
+                session = self._load_session(uuid, environment)
+                self.store[cache_key] = session
+        return cast(Session, session)
 
     @abstractmethod
     def _save_session(self, session: Session) -> None:
@@ -115,15 +255,74 @@ class Storage(ABC):
 
     def save_session(self, session: Session) -> None:
         """Save a session."""
-        logger.info(f"Saving session {session.id}")
-        if not getattr(session, "uuid", None):
-            raise ValueError("Session must have a uuid")
-        self._save_session(session)
-        for agent in session.agents:
-            self.save_agent(agent)
-        self.store[f"session:{session.id}"] = session
-        if self.callback:
-            self.callback("session", session.id)
+        with self.batch():
+            logger.info(f"Saving session {session.id}")
+            if not getattr(session, "uuid", None):
+                raise ValueError("Session must have a uuid")
+            self._save_session(session)
+            for agent in session.agents:
+                if is_dirty(agent):
+                    self.save_agent(agent)
+                else:
+                    self._save_dirty_interactions(agent)
+            self._save_checkpoint(session)
+            self.store[f"session:{session.id}"] = session
+            self._notify("session", session.id)
+
+    def _save_checkpoint(self, session: Session) -> None:
+        """Record what the current save of a session wrote as a checkpoint.
+
+        Called at the end of ``save_session``. Storages without
+        checkpoints have nothing to do.
+        """
+
+    def _load_checkpoint(
+        self, uuid: str
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Read the last checkpoint of a session.
+
+        Returns:
+            The serialized objects of the checkpoint keyed
+            ``<kind>:<uuid>``, or None if the session has none.
+        """
+        return None
+
+    def load_checkpoint(
+        self, uuid: str, environment: "Environment"
+    ) -> Optional[Session]:
+        """Load a session from its last checkpoint.
+
+        Agents and interactions are built from the checkpoint, and only
+        objects it does not contain (e.g. artifacts) are loaded from the
+        storage. Stacks are loaded eagerly, since the checkpoint is read
+        anyway.
+
+        Args:
+            uuid: The UUID of the session.
+            environment: The environment of the session.
+
+        Returns:
+            The session, or None if the storage has no checkpoint of it.
+        """
+        cache_key = f"session:{uuid}"
+        with self._load_lock:
+            session = self.store.get(cache_key)
+            if session is not None:
+                return cast(Session, session)
+            checkpoint = self._load_checkpoint(uuid)
+            if checkpoint is None or cache_key not in checkpoint:
+                return None
+            environment.storage = self
+            lazy_stacks = self.lazy_stacks
+            self._checkpoint, self.lazy_stacks = checkpoint, False
+            try:
+                session = Session.from_dict(
+                    checkpoint[cache_key], environment=environment
+                )
+            finally:
+                self._checkpoint, self.lazy_stacks = None, lazy_stacks
+            self.store[cache_key] = session
+        return session
 
     @abstractmethod
     def _delete_session(self, session: Session) -> None:
@@ -131,10 +330,11 @@ class Storage(ABC):
 
     def delete_session(self, session: Session) -> None:
         """Delete a session."""
-        for agent in session.agents:
-            self.delete_agent(agent)
-        self._delete_session(session)
-        self.store.pop(f"session:{session.id}", None)
+        with self.batch():
+            for agent in session.agents:
+                self.delete_agent(agent)
+            self._delete_session(session)
+            self.store.pop(f"session:{session.id}", None)
 
     @abstractmethod
     def _load_agent(self, uuid: str, session: "Session") -> Agent:
@@ -143,9 +343,31 @@ class Storage(ABC):
     def load_agent(self, uuid: str, session: "Session") -> Agent:
         """Load an agent by UUID."""
         cache_key = f"agent:{uuid}"
-        if cache_key not in self.store:
-            self.store[cache_key] = self._load_agent(uuid, session)
-        return cast(Agent, self.store[cache_key])
+        with self._load_lock:
+            agent = self.store.get(cache_key)
+            if agent is None:
+                data = (self._checkpoint or {}).get(cache_key)
+                if data:
+                    agent = Agent.from_dict(data, storage=self, session=session)
+                else:
+                    agent = self._load_agent(uuid, session)
+                mark_clean(agent)
+                mark_clean(agent.stack)
+                self.store[cache_key] = agent
+        return cast(Agent, agent)
+
+    def load_agent_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load the raw data of an agent without deserializing it.
+
+        Args:
+            uuid: The agent UUID.
+
+        Returns:
+            The stored dictionary of the agent, with its stack.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support agent metadata"
+        )
 
     @abstractmethod
     def _save_agent(self, agent: Agent) -> None:
@@ -153,14 +375,30 @@ class Storage(ABC):
 
     def save_agent(self, agent: Agent) -> None:
         """Save an agent."""
-        if not getattr(agent, "uuid", None):
-            raise ValueError("Agent must have a uuid")
-        self._save_agent(agent)
-        self.store[f"agent:{agent.id}"] = agent
-        for interaction in agent.stack.interactions:
-            self.save_interaction(interaction)
-        if self.callback:
-            self.callback("agent", agent.id)
+        with self.batch():
+            if not getattr(agent, "uuid", None):
+                raise ValueError("Agent must have a uuid")
+            self._save_agent(agent)
+            mark_clean(agent)
+            mark_clean(agent.stack)
+            self.store[f"agent:{agent.id}"] = agent
+            self._save_dirty_interactions(agent)
+            self._notify("agent", agent.id)
+
+    def _save_dirty_interactions(self, agent: Agent) -> None:
+        """Save the interactions and artifacts of an agent that changed."""
+        # Interactions of a lazy stack that were never loaded are unchanged
+        for interaction in agent.stack.loaded_interactions():
+            if is_dirty(interaction):
+                self.save_interaction(interaction)
+            else:
+                self._save_dirty_artifacts(interaction)
+
+    def _save_dirty_artifacts(self, interaction: Interaction) -> None:
+        """Save the artifacts of an interaction that changed."""
+        for artifact in interaction.artifacts:
+            if is_dirty(artifact):
+                self.save_artifact(artifact)
 
     @abstractmethod
     def _delete_agent(self, agent: Agent) -> None:
@@ -168,10 +406,10 @@ class Storage(ABC):
 
     def delete_agent(self, agent: Agent) -> None:
         """Delete an agent."""
-        for interaction in agent.stack.interactions:
-            self.delete_interaction(interaction)
-        self._delete_agent(agent)
-        self.store.pop(f"agent:{agent.id}", None)
+        with self.batch():
+            self.delete_interactions(list(agent.stack.interactions))
+            self._delete_agent(agent)
+            self.store.pop(f"agent:{agent.id}", None)
 
     @abstractmethod
     def _load_interaction(self, uuid: str, stack: "Stack") -> Interaction:
@@ -180,9 +418,34 @@ class Storage(ABC):
     def load_interaction(self, uuid: str, stack: "Stack") -> Interaction:
         """Load an interaction by UUID."""
         cache_key = f"interaction:{uuid}"
-        if cache_key not in self.store:
-            self.store[cache_key] = self._load_interaction(uuid, stack)
-        return cast(Interaction, self.store[cache_key])
+        with self._load_lock:
+            interaction = self.store.get(cache_key)
+            if interaction is None:
+                data = (self._checkpoint or {}).get(cache_key)
+                if data:
+                    interaction = Interaction.from_dict(data, stack=stack)
+                else:
+                    interaction = self._load_interaction(uuid, stack)
+                # Loading re-links artifacts to the interaction, which is
+                # not a change that needs to be written back
+                mark_clean(interaction)
+                for artifact in interaction.artifacts:
+                    mark_clean(artifact)
+                self.store[cache_key] = interaction
+        return cast(Interaction, interaction)
+
+    def load_interaction_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load the raw data of an interaction without deserializing it.
+
+        Args:
+            uuid: The interaction UUID.
+
+        Returns:
+            The stored dictionary of the interaction.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support interaction metadata"
+        )
 
     @abstractmethod
     def _save_interaction(self, interaction: Interaction) -> None:
@@ -190,14 +453,14 @@ class Storage(ABC):
 
     def save_interaction(self, interaction: Interaction) -> None:
         """Save an interaction."""
-        if not getattr(interaction, "uuid", None):
-            raise ValueError("Interaction must have a uuid")
-        self._save_interaction(interaction)
-        self.store[f"interaction:{interaction.id}"] = interaction
-        for artifact in interaction.artifacts:
-            self.save_artifact(artifact)
-        if self.callback:
-            self.callback("interaction", interaction.id)
+        with self.batch():
+            if not getattr(interaction, "uuid", None):
+                raise ValueError("Interaction must have a uuid")
+            self._save_interaction(interaction)
+            mark_clean(interaction)
+            self.store[f"interaction:{interaction.id}"] = interaction
+            self._save_dirty_artifacts(interaction)
+            self._notify("interaction", interaction.id)
 
     @abstractmethod
     def _delete_interaction(self, interaction: Interaction) -> None:
@@ -205,10 +468,29 @@ class Storage(ABC):
 
     def delete_interaction(self, interaction: Interaction) -> None:
         """Delete an interaction."""
-        for artifact in interaction.artifacts:
-            self.delete_artifact(artifact)
-        self._delete_interaction(interaction)
-        self.store.pop(f"interaction:{interaction.id}", None)
+        with self.batch():
+            for artifact in interaction.artifacts:
+                self.delete_artifact(artifact)
+            self._delete_interaction(interaction)
+            self.store.pop(f"interaction:{interaction.id}", None)
+
+    def _delete_interactions(self, interactions: List[Interaction]) -> None:
+        for interaction in interactions:
+            self._delete_interaction(interaction)
+
+    def delete_interactions(self, interactions: List[Interaction]) -> None:
+        """Delete several interactions, e.g. everything after a rewind point.
+
+        Storages that can remove a batch more cheaply than one interaction at
+        a time (e.g. by truncating a log) override ``_delete_interactions``.
+        """
+        with self.batch():
+            for interaction in interactions:
+                for artifact in interaction.artifacts:
+                    self.delete_artifact(artifact)
+            self._delete_interactions(interactions)
+            for interaction in interactions:
+                self.store.pop(f"interaction:{interaction.id}", None)
 
     # -- feedback --
 
@@ -220,8 +502,7 @@ class Storage(ABC):
         """Save feedback."""
         self._save_feedback(feedback)
         self.store[f"feedback:{feedback.id}"] = feedback
-        if self.callback:
-            self.callback("feedback", feedback.id)
+        self._notify("feedback", feedback.id)
 
     @abstractmethod
     def _load_feedback(self, uuid: str) -> ArtifactFeedback:
@@ -230,9 +511,12 @@ class Storage(ABC):
     def load_feedback(self, uuid: str) -> ArtifactFeedback:
         """Load feedback by UUID."""
         cache_key = f"feedback:{uuid}"
-        if cache_key not in self.store:
-            self.store[cache_key] = self._load_feedback(uuid)
-        return cast(ArtifactFeedback, self.store[cache_key])
+        with self._load_lock:
+            feedback = self.store.get(cache_key)
+            if feedback is None:
+                feedback = self._load_feedback(uuid)
+                self.store[cache_key] = feedback
+        return cast(ArtifactFeedback, feedback)
 
     @abstractmethod
     def _delete_feedback(self, feedback: ArtifactFeedback) -> None:
@@ -255,6 +539,22 @@ class Storage(ABC):
         """List feedback UUIDs, optionally filtered by artifact."""
         return self._list_feedback(artifact_id)
 
+    def load_feedback_ratings(self) -> Dict[str, List[int]]:
+        """Load all feedback ratings grouped by artifact.
+
+        Returns:
+            Dict mapping artifact_id to list of ratings.
+        """
+        ratings: Dict[str, List[int]] = {}
+        for feedback_uuid in self.list_feedback():
+            try:
+                feedback = self.load_feedback(feedback_uuid)
+            except (ValueError, OSError) as e:
+                logger.warning("Skipping feedback %s: %s", feedback_uuid, e)
+                continue
+            ratings.setdefault(feedback.artifact_id, []).append(feedback.rating)
+        return ratings
+
     # -- file --
 
     @abstractmethod
@@ -0,0 +1,454 @@
+"""Write-behind storage module."""
+
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.session import Session
+from gimle.hugin.artifacts.artifact import Artifact
+from gimle.hugin.artifacts.feedback import ArtifactFeedback
+from gimle.hugin.interaction.interaction import Interaction
+from gimle.hugin.storage.cache import StorageCache
+from gimle.hugin.storage.storage import Storage
+
+if TYPE_CHECKING:
+    from gimle.hugin.agent.environment import Environment
+    from gimle.hugin.interaction.stack import Stack
+
+logger = logging.getLogger(__name__)
+
+# (kind, uuid) of a queued write
+_Key = Tuple[str, str]
+
+
+class _Snapshot:
+    """An object as it was when it was saved.
+
+    ``to_dict`` returns the state of the object at the time of the save.
+    Everything else, such as its id and the objects it belongs to, is read
+    from the object itself.
+    """
+
+    def __init__(self, obj: Any) -> None:
+        self._obj = obj
+        self._data: Dict[str, Any] = copy.deepcopy(obj.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the state of the object when it was saved."""
+        return self._data
+
+    def __getattr__(self, name: str) -> Any:
+        """Read other attributes from the object."""
+        return getattr(self._obj, name)
+
+
+class WriteBehindStorage(Storage):
+    """Storage wrapper that writes to another storage in the background.
+
+    Saves of sessions, agents, interactions and artifacts are queued and
+    return immediately. Saving the same object again before it was written
+    replaces the queued write, so an agent saved on every step is written
+    once per flush. A flusher thread writes the queue in batches, each
+    inside one ``inner.batch()`` (a single transaction for
+    ``SqliteStorage``), and reports saved objects to the callback, in the
+    order they were saved, once they are written.
+
+    Loads, lists and deletes wait for queued writes first, so readers of
+    this storage always see their own writes. Feedback and files are
+    written synchronously. Call ``flush()`` to wait for queued writes and
+    ``close()`` before exiting, queued writes are lost otherwise.
+
+    Objects are serialized when they are saved, so changes made after a
+    save do not leak into its queued write. A write that fails is retried,
+    and ``flush()`` raises the error if it keeps failing. Saving after the
+    flusher thread died raises instead of queueing writes that are never
+    written.
+    """
+
+    def __init__(
+        self,
+        inner: Storage,
+        callback: Optional[Callable[[str, str], None]] = None,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        retry_delay: float = 0.05,
+        cache: Optional[StorageCache] = None,
+    ) -> None:
+        """Initialize the storage and start the flusher thread.
+
+        Args:
+            inner: The storage to write to.
+            callback: Called with (kind, uuid) after each written object.
+            max_pending: Maximum number of queued writes. Saving a new
+                object blocks while the queue is full.
+            max_retries: Attempts at a failing write before it is dropped.
+            retry_delay: Seconds to wait before retrying failed writes.
+            cache: Cache of loaded and saved objects, unbounded by default.
+                Replaces the cache of the inner storage.
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        if getattr(inner, "checkpoints", False):
+            # Batches of queued writes do not line up with session saves
+            raise ValueError("Checkpoints cannot be used with write-behind")
+        self.inner = inner
+        super().__init__(
+            callback=callback, cache=cache, lazy_stacks=inner.lazy_stacks
+        )
+        # One cache for both, objects loaded by the inner storage included
+        inner.store = self.store
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._condition = threading.Condition()
+        self._pending: "OrderedDict[_Key, Any]" = OrderedDict()
+        self._in_flight: Set[_Key] = set()
+        # Saved objects waiting to be reported, in the order they were saved
+        self._unannounced: Dict[_Key, None] = {}
+        self._attempts: Dict[_Key, int] = {}
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._died = False
+        self._thread = threading.Thread(
+            target=self._run, name="hugin-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def lazy_stacks(self) -> bool:
+        """Whether the inner storage, which loads the agents, is lazy."""
+        return self.inner.lazy_stacks
+
+    @lazy_stacks.setter
+    def lazy_stacks(self, value: bool) -> None:
+        self.inner.lazy_stacks = value
+
+    # -- queue --
+
+    def _enqueue(self, kind: str, uuid: str, obj: Any) -> None:
+        """Queue a write, replacing a queued write of the same object."""
+        key = (kind, uuid)
+        snapshot = _Snapshot(obj)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Storage is closed")
+            # Callbacks run on the flusher thread and must not wait on it
+            on_flusher = threading.current_thread() is self._thread
+            while (
+                key not in self._pending
+                and len(self._pending) >= self.max_pending
+                and not on_flusher
+                and not self._died
+            ):
+                self._condition.wait()
+            if self._died:
+                raise RuntimeError("The write-behind flusher thread died")
+            self._pending[key] = snapshot
+            self._condition.notify_all()
+
+    def _notify(self, kind: str, uuid: str) -> None:
+        """Report a saved object from the flusher once it has been written."""
+        if not self.callback:
+            return
+        with self._condition:
+            self._unannounced[(kind, uuid)] = None
+            self._condition.notify_all()
+
+    def _ready_announcements(self) -> List[_Key]:
+        """Take the saved objects that can be reported, in save order."""
+        ready: List[_Key] = []
+        for key in self._unannounced:
+            if key in self._pending or key in self._in_flight:
+                break
+            ready.append(key)
+        for key in ready:
+            del self._unannounced[key]
+        return ready
+
+    def _has_work(self) -> bool:
+        """Check for queued writes or saved objects to report."""
+        return bool(self._pending or self._unannounced)
+
+    def _run(self) -> None:
+        """Write queued batches until the storage is closed."""
+        try:
+            self._write_queue()
+        except BaseException as e:
+            logger.exception("The write-behind flusher thread died")
+            with self._condition:
+                self._died = True
+                self._error = e
+                self._condition.notify_all()
+            raise
+
+    def _write_queue(self) -> None:
+        """Write queued batches until the storage is closed."""
+        while True:
+            with self._condition:
+                while not self._has_work() and not self._closed:
+                    self._condition.wait()
+                if not self._has_work():
+                    return
+                batch = list(self._pending.items())
+                self._pending.clear()
+                self._in_flight.update(key for key, _ in batch)
+
+            failed = self._write_batch(batch) if batch else []
+
+            with self._condition:
+                for key, obj, error in failed:
+                    if key in self._pending:
+                        # Superseded by a newer save, which is retried
+                        continue
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts >= self.max_retries:
+                        logger.error(f"Dropping write of {key[0]} {key[1]}")
+                        self._attempts.pop(key, None)
+                        self._unannounced.pop(key, None)
+                        self._error = error
+                        continue
+                    self._attempts[key] = attempts
+                    self._pending[key] = obj
+                for key, _ in batch:
+                    if key not in self._pending:
+                        self._attempts.pop(key, None)
+                self._in_flight.clear()
+                announce = self._ready_announcements()
+                # Keep flush() waiting until the callbacks have run
+                self._in_flight.update(announce)
+
+            for kind, uuid in announce:
+                try:
+                    super()._notify(kind, uuid)
+                except Exception:
+                    logger.exception(f"Callback failed for {kind} {uuid}")
+
+            with self._condition:
+                self._in_flight.clear()
+                self._condition.notify_all()
+                if failed and not self._closed:
+                    self._condition.wait(self.retry_delay)
+
+    def _write_batch(
+        self, batch: List[Tuple[_Key, Any]]
+    ) -> List[Tuple[_Key, Any, BaseException]]:
+        """Write a batch to the inner storage.
+
+        Returns:
+            The (key, object, error) of each write that failed.
+        """
+        failed: List[Tuple[_Key, Any, BaseException]] = []
+        try:
+            with self.inner.batch():
+                for key, obj in batch:
+                    kind, uuid = key
+                    try:
+                        getattr(self.inner, f"_save_{kind}")(obj)
+                    except Exception as e:
+                        logger.warning(f"Failed to write {kind} {uuid}: {e}")
+                        failed.append((key, obj, e))
+                        continue
+        except Exception as e:
+            # The whole batch was rolled back
+            logger.warning(f"Failed to write batch: {e}")
+            return [(key, obj, e) for key, obj in batch]
+        return failed
+
+    def _drain(self) -> None:
+        """Wait until queued writes are written, if there are any."""
+        with self._condition:
+            if not self._pending and not self._in_flight:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Wait until all queued writes have been written and reported.
+
+        Callbacks run on the flusher thread and do not wait for it.
+
+        Raises:
+            The error of a write that was dropped after failing repeatedly,
+            or of the flusher thread if it died.
+            RuntimeError: If the flusher thread died with writes queued.
+        """
+        if threading.current_thread() is self._thread:
+            return
+        with self._condition:
+            while (
+                self._pending or self._in_flight or self._unannounced
+            ) and not self._died:
+                self._condition.wait()
+            error, self._error = self._error, None
+            lost = self._died and bool(self._pending)
+        if error is not None:
+            raise error
+        if lost:
+            raise RuntimeError("The write-behind flusher thread died")
+
+    def close(self) -> None:
+        """Write queued writes, stop the flusher and close the inner storage."""
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            self._thread.join()
+            self.inner.close()
+
+    # -- list --
+
+    def list_sessions(self) -> List[str]:
+        """List all sessions in the storage."""
+        self._drain()
+        return self.inner.list_sessions()
+
+    def list_agents(self) -> List[str]:
+        """List all agents in the storage."""
+        self._drain()
+        return self.inner.list_agents()
+
+    def list_interactions(self) -> List[str]:
+        """List all interactions in the storage."""
+        self._drain()
+        return self.inner.list_interactions()
+
+    def list_artifacts(self) -> List[str]:
+        """List all artifacts in the storage."""
+        self._drain()
+        return self.inner.list_artifacts()
+
+    def query_artifacts(
+        self,
+        artifact_type: Optional[str] = None,
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """List artifact UUIDs using the queries of the inner storage."""
+        self._drain()
+        return self.inner.query_artifacts(
+            artifact_type=artifact_type, newest_first=newest_first, limit=limit
+        )
+
+    # -- artifact --
+
+    def _load_artifact(
+        self,
+        uuid: str,
+        stack: Optional["Stack"] = None,
+        load_interaction: bool = True,
+    ) -> Artifact:
+        self._drain()
+        return self.inner._load_artifact(
+            uuid, stack=stack, load_interaction=load_interaction
+        )
+
+    def load_artifact_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load the metadata of an artifact from the inner storage."""
+        self._drain()
+        return self.inner.load_artifact_metadata(uuid)
+
+    def _save_artifact(self, artifact: Artifact) -> None:
+        self._enqueue("artifact", artifact.id, artifact)
+
+    def _delete_artifact(self, artifact: Artifact) -> None:
+        self._drain()
+        self.inner._delete_artifact(artifact)
+
+    # -- session --
+
+    def _load_session(self, uuid: str, environment: "Environment") -> Session:
+        self._drain()
+        return self.inner._load_session(uuid, environment)
+
+    def _save_session(self, session: Session) -> None:
+        self._enqueue("session", session.id, session)
+
+    def _delete_session(self, session: Session) -> None:
+        self._drain()
+        self.inner._delete_session(session)
+
+    # -- agent --
+
+    def _load_agent(self, uuid: str, session: "Session") -> Agent:
+        self._drain()
+        return self.inner._load_agent(uuid, session)
+
+    def load_agent_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load the raw data of an agent from the inner storage."""
+        self._drain()
+        return self.inner.load_agent_metadata(uuid)
+
+    def _save_agent(self, agent: Agent) -> None:
+        self._enqueue("agent", agent.id, agent)
+
+    def _delete_agent(self, agent: Agent) -> None:
+        self._drain()
+        self.inner._delete_agent(agent)
+
+    # -- interaction --
+
+    def _load_interaction(self, uuid: str, stack: "Stack") -> Interaction:
+        self._drain()
+        return self.inner._load_interaction(uuid, stack)
+
+    def load_interaction_metadata(self, uuid: str) -> Dict[str, Any]:
+        """Load the raw data of an interaction from the inner storage."""
+        self._drain()
+        return self.inner.load_interaction_metadata(uuid)
+
+    def _save_interaction(self, interaction: Interaction) -> None:
+        self._enqueue("interaction", interaction.id, interaction)
+
+    def _delete_interaction(self, interaction: Interaction) -> None:
+        self._delete_interactions([interaction])
+
+    def _delete_interactions(self, interactions: List[Interaction]) -> None:
+        self._drain()
+        self.inner._delete_interactions(interactions)
+
+    # -- feedback --
+
+    def _save_feedback(self, feedback: ArtifactFeedback) -> None:
+        self.inner._save_feedback(feedback)
+
+    def _load_feedback(self, uuid: str) -> ArtifactFeedback:
+        return self.inner._load_feedback(uuid)
+
+    def _delete_feedback(self, feedback: ArtifactFeedback) -> None:
+        self.inner._delete_feedback(feedback)
+
+    def _delete_feedback_for_artifact(self, artifact_id: str) -> None:
+        self.inner._delete_feedback_for_artifact(artifact_id)
+
+    def _list_feedback(self, artifact_id: Optional[str] = None) -> List[str]:
+        return self.inner._list_feedback(artifact_id)
+
+    def load_feedback_ratings(self) -> Dict[str, List[int]]:
+        """Load all feedback ratings using the inner storage."""
+        return self.inner.load_feedback_ratings()
+
+    # -- file --
+
+    def save_file(
+        self, artifact_uuid: str, content: bytes, extension: str
+    ) -> str:
+        """Save file content through the inner storage."""
+        return self.inner.save_file(artifact_uuid, content, extension)
+
+    def load_file(self, file_path: str) -> bytes:
+        """Load file content through the inner storage."""
+        return self.inner.load_file(file_path)
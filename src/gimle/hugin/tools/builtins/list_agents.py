@@ -14,6 +14,7 @@ if TYPE_CHECKING:
     description="List all available agents that can be launched, including builtin agents like agent_builder. Returns agent names, descriptions, and available tools.",
     parameters={},
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def list_agents(stack: "Stack") -> ToolResponse:
     """
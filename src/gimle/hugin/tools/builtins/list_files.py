@@ -43,6 +43,7 @@ Returns a list of file paths matching the criteria.
         },
     },
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def list_files(
     path: str,
@@ -14,6 +14,7 @@ if TYPE_CHECKING:
     description="List all agents currently running in this session, including the current agent and any sub-agents. Returns agent IDs, configs, tasks, and status.",
     parameters={},
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def list_running_agents(
     stack: "Stack",
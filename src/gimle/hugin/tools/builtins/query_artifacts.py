@@ -29,6 +29,7 @@ if TYPE_CHECKING:
         },
     },
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def query_artifacts(
     stack: "Stack",
@@ -126,6 +127,7 @@ def query_artifacts(
         },
     },
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def get_artifact_content(
     artifact_id: str,
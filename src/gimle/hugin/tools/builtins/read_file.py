@@ -37,6 +37,7 @@ Returns the file contents as text. Binary files are not supported.
         },
     },
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def read_file(
     path: str,
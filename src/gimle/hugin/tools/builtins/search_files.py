@@ -56,6 +56,7 @@ Supports searching a single file or recursively through a directory.
         },
     },
     is_interactive=False,
+    options={"side_effect_free": True},
 )
 def search_files(
     pattern: str,
@@ -54,6 +54,9 @@ class ToolConfig:
     reduced_context_window_ignore_list: List[str] = field(default_factory=list)
     include_reason: bool = False
     respond_with_text: bool = False
+    # Tools without side effects can run concurrently when the model calls
+    # several tools in one response
+    side_effect_free: bool = False
 
 
 @dataclass
@@ -91,6 +94,9 @@ class Tool:
         parameters: The parameters of the tool.
         is_interactive: Whether the tool is interactive.
         options: The options of the tool.
+
+    The schemas of the tool in the format of each model provider are built
+    once and kept with the tool, see ``get_schema``.
     """
 
     registry: ClassVar[Registry["Tool"]] = (
@@ -106,6 +112,9 @@ class Tool:
     implementation_path: Optional[str] = (
         None  # e.g., "mypackage.mymodule.myfunction" or "mypackage.mymodule:function_name"
     )
+    _schemas: Dict[str, Dict[str, Any]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def to_dict(self) -> Dict[str, Any]:
         """Serialize the tool to a dictionary.
@@ -120,6 +129,32 @@ class Tool:
             "options": self.options,
         }
 
+    def get_schema(
+        self, provider: str, build: Callable[["Tool"], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Get the schema of the tool in the format of a model provider.
+
+        The schema is built on first use and shared by all requests to the
+        provider, so the tool definitions sent are identical on every step.
+        Do not modify the returned schema.
+
+        Args:
+            provider: The name of the provider format.
+            build: Builds the schema of a tool in the provider format.
+
+        Returns:
+            The schema of the tool.
+        """
+        schema = self._schemas.get(provider)
+        if schema is None:
+            schema = build(self)
+            self._schemas[provider] = schema
+        return schema
+
+    def clear_schemas(self) -> None:
+        """Drop the built schemas, after changing the tool in place."""
+        self._schemas = {}
+
     @staticmethod
     def _load_implementation(implementation_path: str) -> Any:
         """Load a function from an implementation path.
@@ -200,7 +235,9 @@ class Tool:
             # Both provided - this might be intentional (pre-loaded), so we allow it
             pass
 
-        # Register the tool
+        # Register the tool, the tool may have changed since it was last
+        # registered
+        tool.clear_schemas()
         cls.registry.register(tool)
         return tool
 
@@ -312,6 +349,7 @@ class Tool:
         if ":" in name:
             tool = copy.deepcopy(tool)
             tool.name = name.split(":")[1]
+            tool.clear_schemas()
         return tool
 
     @classmethod
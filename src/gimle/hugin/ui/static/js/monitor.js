@@ -609,6 +609,8 @@ function setupLiveUpdates() {
             if (data.type === 'update') {
                 console.log(`Storage update: ${data.object_type} ${data.object_id}`);
                 handleStorageUpdate(data.object_type, data.object_id);
+            } else if (data.type === 'stream') {
+                handleStreamDelta(data);
             }
         } catch (error) {
             console.error('Error parsing SSE data:', error);
@@ -670,6 +672,26 @@ function updateAgentStatusIndicator(agentData) {
     }
 }
 
+// Characters streamed so far for the response each agent is generating
+const streamedChars = {};
+
+function handleStreamDelta(delta) {
+    // A new tool call starts a new response
+    if (delta.tool_call && !delta.arguments_delta) {
+        streamedChars[delta.agent_id] = 0;
+    }
+    streamedChars[delta.agent_id] =
+        (streamedChars[delta.agent_id] || 0) + delta.text.length + delta.arguments_delta.length;
+    if (delta.agent_id !== currentAgentId) return;
+
+    const indicator = document.getElementById('live-indicator');
+    const label = indicator ? indicator.querySelector('span:last-child') : null;
+    if (label) {
+        const target = delta.tool_call ? `Calling ${delta.tool_call}` : 'Responding';
+        label.textContent = `${target} (${streamedChars[delta.agent_id]} chars)`;
+    }
+}
+
 // Debounce mechanism for refresh operations
 let refreshTimeout = null;
 let isRefreshing = false;
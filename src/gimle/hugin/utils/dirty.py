@@ -0,0 +1,76 @@
+"""Dirty tracking utilities module."""
+
+from collections.abc import MutableMapping, MutableSequence
+from typing import Any, ClassVar, FrozenSet, Tuple
+
+
+class DirtyTracked:
+    """Mixin that tracks whether an object changed since it was last saved.
+
+    Objects start out dirty, since they have never been persisted. Assigning
+    any attribute not listed in ``_untracked_attributes`` marks the object
+    dirty again, and so does adding items to or removing items from a list
+    or dict attribute in place. Other in-place mutations (e.g. replacing an
+    item of a list, or changing a nested object) are not detected and must
+    call :meth:`mark_dirty` explicitly.
+
+    Storage implementations call :meth:`mark_clean` after writing an object
+    and use :attr:`is_dirty` to skip objects that have not changed.
+    """
+
+    _untracked_attributes: ClassVar[FrozenSet[str]] = frozenset()
+
+    @property
+    def is_dirty(self) -> bool:
+        """Whether the object changed since it was last saved or loaded."""
+        if self.__dict__.get("_dirty", True):
+            return True
+        return bool(self.__dict__.get("_clean_sizes") != self._sizes())
+
+    def mark_dirty(self) -> None:
+        """Mark the object as changed."""
+        self.__dict__["_dirty"] = True
+
+    def mark_clean(self) -> None:
+        """Mark the object as in sync with storage."""
+        self.__dict__["_dirty"] = False
+        self.__dict__["_clean_sizes"] = self._sizes()
+
+    def _sizes(self) -> Tuple[Tuple[str, int], ...]:
+        """Get the sizes of the tracked list and dict attributes."""
+        return tuple(
+            (name, len(value))
+            for name, value in self.__dict__.items()
+            if isinstance(value, (MutableSequence, MutableMapping))
+            and name not in self._untracked_attributes
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute and mark the object dirty if it is tracked."""
+        super().__setattr__(name, value)
+        if name not in self._untracked_attributes:
+            self.mark_dirty()
+
+
+def is_dirty(obj: Any) -> bool:
+    """Check whether an object needs to be saved.
+
+    Objects that do not support dirty tracking are always considered dirty.
+
+    Args:
+        obj: The object to check.
+
+    Returns:
+        True if the object should be written to storage.
+    """
+    return bool(getattr(obj, "is_dirty", True))
+
+
+def mark_clean(obj: Any) -> None:
+    """Mark an object as saved, if it supports dirty tracking.
+
+    Args:
+        obj: The object to mark clean.
+    """
+    if isinstance(obj, DirtyTracked):
+        obj.mark_clean()
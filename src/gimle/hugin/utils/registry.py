@@ -1,41 +1,57 @@
 """Registry class for maintaining a registry of instances."""
 
+import threading
 from typing import Dict, Generic, Optional, TypeVar
 
 T = TypeVar("T")
 
 
 class Registry(Generic[T]):
-    """A registry that maintains a dictionary of instances by name."""
+    """A registry that maintains a dictionary of instances by name.
+
+    ``version`` is incremented on every change, so lookups derived from the
+    registry can be cached until it changes. Registries can be shared
+    between threads.
+    """
 
     def __init__(self) -> None:
         """Initialize an empty registry."""
         self._items: Dict[str, T] = {}
+        self.version = 0
+        self._lock = threading.RLock()
 
     def register(self, instance: T, name: Optional[str] = None) -> T:
         """Register an instance in the registry."""
         # Get the name attribute - assumes all registered classes have a 'name' attribute
         if name is None:
             name = getattr(instance, "name")
-        self._items[name] = instance
+        with self._lock:
+            self._items[name] = instance
+            self.version += 1
         return instance
 
     def get(self, name: str) -> T:
         """Get an instance from the registry by name."""
-        if name not in self._items:
-            raise ValueError(f"Item {name} not found in registry")
-        return self._items[name]
+        with self._lock:
+            if name not in self._items:
+                raise ValueError(f"Item {name} not found in registry")
+            return self._items[name]
 
     def registered(self) -> Dict[str, T]:
         """Get all registered instances."""
-        return self._items.copy()
+        with self._lock:
+            return self._items.copy()
 
     def clear(self) -> None:
         """Clear all registered instances."""
-        self._items.clear()
+        with self._lock:
+            self._items.clear()
+            self.version += 1
 
     def remove(self, name: str) -> None:
         """Remove an instance from the registry by name."""
-        if name not in self._items:
-            raise ValueError(f"Item {name} not found in registry")
-        del self._items[name]
+        with self._lock:
+            if name not in self._items:
+                raise ValueError(f"Item {name} not found in registry")
+            del self._items[name]
+            self.version += 1
@@ -0,0 +1,254 @@
+"""Tests for AnthropicModel request building and prompt caching."""
+
+import asyncio
+import copy
+from types import SimpleNamespace
+
+from gimle.hugin.llm.models.anthropic import CACHE_CONTROL, AnthropicModel
+from gimle.hugin.tools.tool import Tool, ToolConfig
+
+
+class FakeMessages:
+    """Records messages.create requests and returns a canned response."""
+
+    def __init__(self, response):
+        """Initialize with the response to return."""
+        self.response = response
+        self.requests = []
+
+    def create(self, **kwargs):
+        """Record the request."""
+        self.requests.append(copy.deepcopy(kwargs))
+        return self.response
+
+
+class FakeClient:
+    """Anthropic client stand-in that records requests."""
+
+    def __init__(self, response):
+        """Initialize with the response to return."""
+        self.messages = FakeMessages(response)
+
+
+class FakeAsyncMessages(FakeMessages):
+    """Records async messages.create requests."""
+
+    async def create(self, **kwargs):
+        """Record the request."""
+        return super().create(**kwargs)
+
+
+class FakeAsyncClient:
+    """Async Anthropic client stand-in that records requests."""
+
+    def __init__(self, response):
+        """Initialize with the response to return."""
+        self.messages = FakeAsyncMessages(response)
+
+
+def _response(content, cache_read=0, cache_write=0):
+    return SimpleNamespace(
+        id="msg_1",
+        content=content,
+        usage=SimpleNamespace(
+            input_tokens=10,
+            output_tokens=5,
+            cache_read_input_tokens=cache_read,
+            cache_creation_input_tokens=cache_write,
+        ),
+    )
+
+
+def _tool(name):
+    return Tool(
+        name=name,
+        description=f"The {name} tool",
+        parameters={
+            "query": {
+                "type": "string",
+                "description": "Query",
+                "required": True,
+            }
+        },
+        is_interactive=False,
+        options=ToolConfig(),
+    )
+
+
+def _history():
+    return [
+        {"role": "user", "content": [{"type": "text", "text": "Task"}]},
+        {
+            "role": "assistant",
+            "content": [
+                {"type": "tool_use", "id": "1", "name": "search", "input": {}}
+            ],
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": "1",
+                    "name": "search",
+                    "content": "a",
+                }
+            ],
+        },
+        {
+            "role": "assistant",
+            "content": [
+                {"type": "tool_use", "id": "2", "name": "search", "input": {}}
+            ],
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": "2",
+                    "name": "search",
+                    "content": "b",
+                }
+            ],
+        },
+    ]
+
+
+def _breakpoints(request):
+    """List where cache_control is set in a request."""
+    found = []
+    for tool in request.get("tools", []):
+        if "cache_control" in tool:
+            found.append(("tool", tool["name"]))
+    if isinstance(request["system"], list):
+        for block in request["system"]:
+            if "cache_control" in block:
+                found.append(("system", block["text"]))
+    for index, message in enumerate(request["messages"]):
+        if isinstance(message["content"], list):
+            for block in message["content"]:
+                if "cache_control" in block:
+                    found.append(("message", index))
+    return found
+
+
+class TestAnthropicPromptCaching:
+    """Test cache breakpoints against a recording fake client."""
+
+    def test_breakpoint_placement(self):
+        """Test breakpoints on tools, system prompt and rolling history."""
+        client = FakeClient(
+            _response([SimpleNamespace(type="text", text="Done")])
+        )
+        model = AnthropicModel(model_name="claude-test", client=client)
+        model.chat_completion(
+            "System", _history(), tools=[_tool("search"), _tool("fetch")]
+        )
+
+        (request,) = client.messages.requests
+        assert _breakpoints(request) == [
+            ("tool", "fetch"),
+            ("system", "System"),
+            ("message", 2),
+            ("message", 4),
+        ]
+        assert request["messages"][4]["content"][-1]["cache_control"] == (
+            CACHE_CONTROL
+        )
+        assert request["tool_choice"] == model.tool_choice
+
+    def test_history_is_not_modified(self):
+        """Test that breakpoints are added to copies of the messages."""
+        client = FakeClient(
+            _response([SimpleNamespace(type="text", text="Done")])
+        )
+        model = AnthropicModel(model_name="claude-test", client=client)
+        messages = [{"role": "user", "content": "Hello"}]
+        model.chat_completion("System", messages)
+
+        assert messages == [{"role": "user", "content": "Hello"}]
+        (request,) = client.messages.requests
+        assert request["messages"][0]["content"] == [
+            {"type": "text", "text": "Hello", "cache_control": CACHE_CONTROL}
+        ]
+        assert "tools" not in request
+
+    def test_tool_schemas_are_reused(self):
+        """Test that tool definitions are built once and left unmodified."""
+        client = FakeClient(
+            _response([SimpleNamespace(type="text", text="Done")])
+        )
+        model = AnthropicModel(model_name="claude-test", client=client)
+        tools = [_tool("search"), _tool("fetch")]
+        model.chat_completion("System", _history(), tools=tools)
+        model.chat_completion("System", _history(), tools=tools)
+
+        first, second = client.messages.requests
+        assert first["tools"] == second["tools"]
+        assert "cache_control" not in tools[1].get_schema(
+            "anthropic", model.tool_schema
+        )
+        assert tools[0].get_schema("anthropic", model.tool_schema) == {
+            "name": "search",
+            "description": "The search tool",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Query"}
+                },
+                "required": ["query"],
+            },
+        }
+
+    def test_caching_disabled(self):
+        """Test that requests are sent unchanged without prompt caching."""
+        client = FakeClient(
+            _response([SimpleNamespace(type="text", text="Done")])
+        )
+        model = AnthropicModel(
+            model_name="claude-test", prompt_caching=False, client=client
+        )
+        model.chat_completion("System", _history(), tools=[_tool("search")])
+
+        (request,) = client.messages.requests
+        assert request["system"] == "System"
+        assert _breakpoints(request) == []
+
+    def test_cache_tokens_are_reported(self):
+        """Test that cache reads and writes are reported in the response."""
+        tool_use = SimpleNamespace(
+            type="tool_use", id="3", name="search", input={"query": "x"}
+        )
+        client = FakeClient(_response([tool_use], cache_read=90, cache_write=7))
+        model = AnthropicModel(model_name="claude-test", client=client)
+        response = model.chat_completion(
+            "System", _history(), tools=[_tool("search")]
+        )
+
+        assert response.tool_call == "search"
+        assert response.cache_read_tokens == 90
+        assert response.cache_write_tokens == 7
+        assert response.to_dict()["cache_read_tokens"] == 90
+
+    def test_async_request_matches_sync_request(self):
+        """Test that the async client gets the same request and response."""
+        tool_use = SimpleNamespace(
+            type="tool_use", id="3", name="search", input={"query": "x"}
+        )
+        client = FakeClient(_response([tool_use], cache_read=90))
+        async_client = FakeAsyncClient(_response([tool_use], cache_read=90))
+        model = AnthropicModel(
+            model_name="claude-test", client=client, async_client=async_client
+        )
+        response = model.chat_completion(
+            "System", _history(), tools=[_tool("search")]
+        )
+        async_response = asyncio.run(
+            model.achat_completion(
+                "System", _history(), tools=[_tool("search")]
+            )
+        )
+
+        assert async_client.messages.requests == client.messages.requests
+        assert async_response == response
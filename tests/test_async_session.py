@@ -0,0 +1,164 @@
+"""Tests for async completions and the async session runner."""
+
+import asyncio
+import time
+
+import pytest
+
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import AsyncSession, Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.interaction.task_result import TaskResult
+from gimle.hugin.llm.completion import achat_completion
+from gimle.hugin.llm.models.model import Model, ModelResponse
+from gimle.hugin.llm.models.model_registry import get_model_registry
+
+from .memory_storage import MemoryStorage
+
+DELAY = 0.05
+
+
+class SlowModel(Model):
+    """Model that takes a while to call the finish tool."""
+
+    def __init__(self):
+        """Initialize the call count."""
+        super().__init__(config={"model": "slow-test"})
+        self.calls = 0
+
+    def _response(self):
+        self.calls += 1
+        return ModelResponse(
+            role="assistant",
+            content={"finish_type": "success", "result": "done"},
+            tool_call="builtins.finish",
+            tool_call_id=f"call_{self.calls}",
+        )
+
+    def chat_completion(self, system_prompt, messages, tools=None):
+        """Block for the delay."""
+        time.sleep(DELAY)
+        return self._response()
+
+    async def achat_completion(self, system_prompt, messages, tools=None):
+        """Await the delay."""
+        await asyncio.sleep(DELAY)
+        return self._response()
+
+
+class BlockingModel(SlowModel):
+    """Model without an async client."""
+
+    achat_completion = Model.achat_completion
+
+
+@pytest.fixture
+def slow_model():
+    """Register the slow model."""
+    model = SlowModel()
+    registry = get_model_registry()
+    registry.register_model("slow-test", model)
+    yield model
+    del registry.models["slow-test"]
+
+
+def _session(session_class, agents=4):
+    session = session_class(environment=Environment(storage=MemoryStorage()))
+    for index in range(agents):
+        session.create_agent_from_task(
+            Config(
+                name=f"agent-{index}",
+                description="Test agent",
+                system_template="You are a helpful assistant.",
+                tools=["builtins.finish"],
+                llm_model="slow-test",
+            ),
+            Task(
+                name="task",
+                description="Test task",
+                parameters={},
+                prompt="Finish the task.",
+                tools=["builtins.finish"],
+            ),
+        )
+    return session
+
+
+def _history(session):
+    return [
+        [type(interaction).__name__ for interaction in agent.stack.interactions]
+        for agent in session.agents
+    ]
+
+
+class TestAsyncCompletion:
+    """Test async chat completions."""
+
+    def test_achat_completion(self, slow_model):
+        """Test that the async completion awaits the model."""
+        response = asyncio.run(achat_completion("System", [], [], "slow-test"))
+        assert response["tool_call"] == "builtins.finish"
+
+    def test_blocking_model_runs_in_thread(self):
+        """Test that models without an async client still work."""
+        model = BlockingModel()
+        response = asyncio.run(model.achat_completion("System", []))
+        assert response.tool_call == "builtins.finish"
+
+
+class TestAsyncSession:
+    """Test stepping agents concurrently."""
+
+    def test_run_matches_sync_session(self, slow_model):
+        """Test that both sessions leave the agents in the same state."""
+        sync_session = _session(Session)
+        sync_steps = sync_session.run(max_steps=20)
+        async_session = _session(AsyncSession)
+        async_steps = asyncio.run(async_session.run(max_steps=20))
+
+        assert async_steps == sync_steps
+        assert _history(async_session) == _history(sync_session)
+        for agent in async_session.agents:
+            assert any(
+                isinstance(interaction, TaskResult)
+                for interaction in agent.stack.interactions
+            )
+
+    def test_llm_calls_overlap(self, slow_model):
+        """Test that a step waits for one LLM call, not one per agent."""
+        session = _session(AsyncSession, agents=8)
+        start = time.perf_counter()
+        asyncio.run(session.run(max_steps=20))
+        elapsed = time.perf_counter() - start
+
+        assert slow_model.calls == 8
+        assert elapsed < 8 * DELAY
+
+    def test_step_callback_order(self, slow_model):
+        """Test that callbacks follow the order of the agents."""
+        session = _session(AsyncSession, agents=3)
+        calls = []
+        asyncio.run(
+            session.run(
+                max_steps=1,
+                step_callback=lambda step, agent: calls.append(agent),
+            )
+        )
+        assert calls == session.agents
+
+    def test_error_is_raised_after_all_agents_step(self, slow_model):
+        """Test that a failing agent does not abandon the others."""
+        session = _session(AsyncSession, agents=3)
+        asyncio.run(session.step())
+        failing = session.agents[0]
+
+        async def fail():
+            raise RuntimeError("Agent failed")
+
+        failing.astep = fail
+        with pytest.raises(RuntimeError):
+            asyncio.run(session.step())
+        for agent in session.agents[1:]:
+            assert not agent.stack._step_lock
+            assert len(agent.stack.interactions) == 3
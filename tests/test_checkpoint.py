@@ -0,0 +1,235 @@
+"""Tests for session checkpoints and resuming sessions."""
+
+import json
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.interaction.waiting import Waiting
+from gimle.hugin.storage import checkpoint
+from gimle.hugin.storage.checkpoint import CheckpointLog
+from gimle.hugin.storage.interaction_log import encode_record
+from gimle.hugin.storage.local import LocalStorage
+
+
+def _payload(data):
+    return json.dumps(data).encode("utf-8")
+
+
+class TestCheckpointLog:
+    """Test the append-only checkpoint log."""
+
+    def test_read_last_commit(self, tmp_path):
+        """Test that later records supersede earlier ones."""
+        log = CheckpointLog(tmp_path / "s.log")
+        log.commit([("session:s", _payload({"n": 1})), ("agent:a", b"{}")])
+        log.commit([("session:s", _payload({"n": 2}))])
+
+        records = CheckpointLog(tmp_path / "s.log").read()
+
+        assert records == {"session:s": {"n": 2}, "agent:a": {}}
+
+    def test_missing_log(self, tmp_path):
+        """Test that a log without commits has no checkpoint."""
+        assert CheckpointLog(tmp_path / "s.log").read() is None
+
+    def test_interrupted_commit_is_ignored(self, tmp_path):
+        """Test that records after the last commit are dropped."""
+        path = tmp_path / "s.log"
+        CheckpointLog(path).commit([("session:s", _payload({"n": 1}))])
+        with open(path, "ab") as f:
+            f.write(encode_record("session:s", _payload({"n": 2})))
+            # A record cut off by a crash
+            f.write(encode_record("agent:a", b"{}")[:-1])
+
+        log = CheckpointLog(path)
+        assert log.read() == {"session:s": {"n": 1}}
+
+        log.commit([("agent:b", b"{}")])
+        assert CheckpointLog(path).read() == {
+            "session:s": {"n": 1},
+            "agent:b": {},
+        }
+
+    def test_deletion(self, tmp_path):
+        """Test that an empty payload removes a key."""
+        log = CheckpointLog(tmp_path / "s.log")
+        log.commit([("agent:a", b"{}"), ("agent:b", b"{}")])
+        log.commit([("agent:a", b"")])
+
+        assert log.read() == {"agent:b": {}}
+
+    def test_commit_after_other_writer(self, tmp_path):
+        """Test that a commit continues after commits of another process."""
+        path = tmp_path / "s.log"
+        first, second = CheckpointLog(path), CheckpointLog(path)
+        first.commit([("agent:a", b"{}")])
+        second.commit([("agent:b", b"{}")])
+        first.commit([("agent:c", b"{}")])
+
+        assert set(CheckpointLog(path).read()) == {
+            "agent:a",
+            "agent:b",
+            "agent:c",
+        }
+
+    def test_compaction(self, tmp_path, monkeypatch):
+        """Test that superseded records are compacted away."""
+        monkeypatch.setattr(checkpoint, "_COMPACT_MIN_BYTES", 1000)
+        path = tmp_path / "s.log"
+        log = CheckpointLog(path)
+        for n in range(100):
+            log.commit([("session:s", _payload({"n": n}))])
+
+        assert path.stat().st_size < 1000
+        assert CheckpointLog(path).read() == {"session:s": {"n": 99}}
+        assert list(tmp_path.iterdir()) == [path]
+
+
+class TestResume:
+    """Test resuming sessions from their checkpoints."""
+
+    def _make_session(self, storage):
+        environment = Environment(storage=storage)
+        session = Session(environment=environment)
+        config = Config(
+            name="test-agent",
+            description="Test",
+            system_template="test",
+            tools=[],
+        )
+        agent = Agent(session=session, config=config)
+        task = Task(
+            name="test_task",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=[],
+        )
+        agent.stack.add_interaction(
+            TaskDefinition(stack=agent.stack, task=task)
+        )
+        session.add_agent(agent)
+        return session, agent
+
+    def _add_waiting(self, agent, count):
+        for _ in range(count):
+            agent.stack.add_interaction(Waiting(stack=agent.stack))
+
+    def _resume(self, tmp_path, session):
+        storage = LocalStorage(base_path=tmp_path, checkpoints=True)
+        return Session.resume(session.uuid, Environment(storage=storage))
+
+    def test_resume_reads_checkpoint_only(self, tmp_path, monkeypatch):
+        """Test that resuming does not read agent or interaction files."""
+        storage = LocalStorage(base_path=tmp_path, checkpoints=True)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        self._add_waiting(agent, 3)
+        storage.save_session(session)
+
+        def fail(*args):
+            raise AssertionError("Read outside the checkpoint")
+
+        monkeypatch.setattr(LocalStorage, "_load_agent", fail)
+        monkeypatch.setattr(LocalStorage, "_load_interaction", fail)
+        monkeypatch.setattr(LocalStorage, "_load_session", fail)
+        resumed = self._resume(tmp_path, session)
+
+        assert resumed.uuid == session.uuid
+        assert [i.uuid for i in resumed.agents[0].stack.interactions] == [
+            i.uuid for i in agent.stack.interactions
+        ]
+
+    def test_resume_ignores_interrupted_step(self, tmp_path):
+        """Test that a step cut off mid-save is not resumed."""
+        storage = LocalStorage(base_path=tmp_path, checkpoints=True)
+        session, agent = self._make_session(storage)
+        self._add_waiting(agent, 1)
+        storage.save_session(session)
+        saved = [i.uuid for i in agent.stack.interactions]
+
+        # The process dies after writing the files of the next step
+        self._add_waiting(agent, 2)
+        storage._save_checkpoint = lambda session: None
+        storage.save_session(session)
+        last = agent.stack.interactions[-1].uuid
+        (tmp_path / "interactions" / last).write_text('{"truncated')
+
+        resumed = self._resume(tmp_path, session)
+
+        assert [i.uuid for i in resumed.agents[0].stack.interactions] == saved
+
+    def test_first_checkpoint_is_complete(self, tmp_path):
+        """Test that checkpoints of a session saved before hold it all."""
+        session, agent = self._make_session(LocalStorage(base_path=tmp_path))
+        self._add_waiting(agent, 2)
+        session.storage.save_session(session)
+
+        storage = LocalStorage(base_path=tmp_path, checkpoints=True)
+        loaded = storage.load_session(
+            session.uuid, Environment(storage=storage)
+        )
+        storage.save_session(loaded)
+
+        records = CheckpointLog(
+            tmp_path / "checkpoints" / f"{session.uuid}.log"
+        ).read()
+        assert set(records) == {
+            f"session:{session.uuid}",
+            f"agent:{agent.uuid}",
+        } | {f"interaction:{i.uuid}" for i in agent.stack.interactions}
+
+    def test_checkpoints_per_session(self, tmp_path):
+        """Test that a checkpoint holds only what its session wrote."""
+        storage = LocalStorage(base_path=tmp_path, checkpoints=True)
+        first, first_agent = self._make_session(storage)
+        second, second_agent = self._make_session(storage)
+        storage.save_session(first)
+        storage.save_session(second)
+
+        # The second session is mid-save when the first one commits
+        self._add_waiting(second_agent, 1)
+        storage.save_agent(second_agent)
+        self._add_waiting(first_agent, 1)
+        storage.save_session(first)
+
+        records = CheckpointLog(
+            tmp_path / "checkpoints" / f"{first.uuid}.log"
+        ).read()
+        assert f"agent:{second_agent.uuid}" not in records
+        assert f"agent:{first_agent.uuid}" in records
+
+    def test_resume_without_checkpoints(self, tmp_path):
+        """Test that sessions without checkpoints are loaded normally."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+
+        resumed = self._resume(tmp_path, session)
+
+        assert resumed.agents[0].uuid == agent.uuid
+
+    def test_resume_needs_storage(self):
+        """Test that resuming without storage raises."""
+        with pytest.raises(ValueError, match="without storage"):
+            Session.resume("missing", Environment())
+
+
+class TestAtomicWrites:
+    """Test that LocalStorage never leaves half-written files."""
+
+    def test_no_temporary_files_left(self, tmp_path):
+        """Test that files are renamed into place."""
+        storage = LocalStorage(base_path=tmp_path, fsync=True)
+        session, agent = TestResume()._make_session(storage)
+        storage.save_session(session)
+
+        assert list((tmp_path / "tmp").iterdir()) == []
+        data = json.loads((tmp_path / "agents" / agent.uuid).read_text())
+        assert data["uuid"] == agent.uuid
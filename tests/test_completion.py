@@ -4,63 +4,10 @@ from unittest.mock import Mock, patch
 
 import pytest
 
-from gimle.hugin.llm.completion import (
-    chat_completion,
-    make_completion_cache_key,
-)
+from gimle.hugin.llm.completion import chat_completion
 from gimle.hugin.llm.models.model import ModelResponse
 
 
-class TestMakeCompletionCacheKey:
-    """Test the make_completion_cache_key function."""
-
-    def test_make_completion_cache_key_basic(self):
-        """Test basic cache key generation."""
-        params = {"messages": [{"role": "user", "content": "hello"}]}
-        key = make_completion_cache_key("test", params)
-        assert key.startswith("test")
-        assert "messages=" in key
-
-    def test_make_completion_cache_key_short_messages(self):
-        """Test cache key with short message list."""
-        params = {"messages": [{"role": "user", "content": "hello"}]}
-        key = make_completion_cache_key("test", params)
-        # Should include the single message
-        assert "hello" in key
-
-    def test_make_completion_cache_key_long_messages(self):
-        """Test cache key with long message list (should be truncated)."""
-        messages = [
-            {"role": "user", "content": "message1"},
-            {"role": "user", "content": "message2"},
-            {"role": "user", "content": "message3"},
-            {"role": "user", "content": "message4"},
-            {"role": "user", "content": "message5"},
-            {"role": "user", "content": "message6"},
-            {"role": "user", "content": "message7"},
-        ]
-        params = {"messages": messages}
-        key = make_completion_cache_key("test", params)
-
-        # Should include first 2 messages and last 5 (nearest_context_window)
-        assert "message1" in key
-        assert "message2" in key
-        # The function should truncate the middle messages
-        # Check that the key contains the expected structure
-        assert "message1" in key
-        assert "message2" in key
-        # The last 5 messages should be included (message3, message4, message5, message6, message7)
-        assert "message6" in key  # Should be in last 5
-        assert "message7" in key  # Should be in last 5
-
-    def test_make_completion_cache_key_no_messages(self):
-        """Test cache key without messages."""
-        params = {"other_param": "value"}
-        key = make_completion_cache_key("test", params)
-        assert "other_param=value" in key
-        assert "messages=" not in key
-
-
 class TestChatCompletion:
     """Test the chat_completion function."""
 
@@ -75,6 +22,7 @@ class TestChatCompletion:
         """Test basic chat completion functionality."""
         # Setup mock
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = Mock()
         mock_model.chat_completion.return_value = ModelResponse(
             role="assistant",
@@ -109,6 +57,7 @@ class TestChatCompletion:
         """Test chat completion without tools."""
         # Setup mock
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = Mock()
         mock_model.chat_completion.return_value = ModelResponse(
             role="assistant",
@@ -137,6 +86,7 @@ class TestChatCompletion:
         """Test chat completion when model is not found."""
         # Setup mock to raise ValueError
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_registry.get_model.side_effect = ValueError(
             "Model test-model not found"
         )
@@ -158,6 +108,7 @@ class TestChatCompletion:
         """Test chat completion when model raises an error."""
         # Setup mock
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = Mock()
         mock_model.chat_completion.side_effect = Exception("Model error")
         mock_registry.get_model.return_value = mock_model
@@ -179,6 +130,7 @@ class TestChatCompletion:
         """Test that chat completion logs appropriately."""
         # Setup mock
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = Mock()
         mock_model.chat_completion.return_value = ModelResponse(
             role="assistant",
@@ -211,6 +163,7 @@ class TestChatCompletionCaching:
         # This test verifies the cache key function is used
         # The actual caching behavior would be tested with integration tests
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = Mock()
         mock_model.chat_completion.return_value = ModelResponse(
             role="assistant",
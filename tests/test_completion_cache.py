@@ -0,0 +1,165 @@
+"""Tests for the completion cache and record/replay mode."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.llm.completion import chat_completion
+from gimle.hugin.llm.completion_cache import (
+    CompletionCache,
+    CompletionCacheMiss,
+    completion_cache_key,
+)
+from gimle.hugin.llm.models.model import ModelResponse
+from gimle.hugin.tools.tool import Tool, ToolConfig
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def _tool(description="Search the web"):
+    return Tool(
+        name="search",
+        description=description,
+        parameters={"query": {"type": "string", "required": True}},
+        is_interactive=False,
+        options=ToolConfig(),
+    )
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Path of a fresh cache database."""
+    return tmp_path / "completions.db"
+
+
+@pytest.fixture
+def mock_model():
+    """Patch the model registry with a model that counts its calls."""
+    with patch("gimle.hugin.llm.completion.get_model_registry") as registry:
+        model = Mock()
+        model.chat_completion.return_value = ModelResponse(
+            role="assistant", content="Hi"
+        )
+        registry.return_value.get_model.return_value = model
+        registry.return_value.get_provider.return_value = None
+        registry.return_value.get_rate_limiter.return_value = None
+        yield model
+
+
+class TestCompletionCacheKey:
+    """Test the hashing of completion requests."""
+
+    def test_key_is_stable(self):
+        """Test that equal requests hash to the same key."""
+        first = completion_cache_key("model", "System", MESSAGES, [_tool()])
+        second = completion_cache_key(
+            "model", "System", [dict(MESSAGES[0])], [_tool()]
+        )
+        assert first == second
+
+    def test_key_covers_request(self):
+        """Test that model, prompt, messages and tools change the key."""
+        key = completion_cache_key("model", "System", MESSAGES, [_tool()])
+        assert key != completion_cache_key(
+            "other", "System", MESSAGES, [_tool()]
+        )
+        assert key != completion_cache_key(
+            "model", "Other", MESSAGES, [_tool()]
+        )
+        assert key != completion_cache_key("model", "System", [], [_tool()])
+        assert key != completion_cache_key(
+            "model", "System", MESSAGES, [_tool("Search")]
+        )
+
+
+class TestCompletionCache:
+    """Test the cache modes and eviction."""
+
+    def test_read_through(self, cache_path):
+        """Test that the model is only called on a miss."""
+        cache = CompletionCache(cache_path)
+        call = Mock(return_value={"content": "Hi"})
+
+        assert cache.complete("key", "model", call) == {"content": "Hi"}
+        assert cache.complete("key", "model", call) == {"content": "Hi"}
+        assert call.call_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_responses_are_copies(self, cache_path):
+        """Test that modifying a response does not modify the cache."""
+        cache = CompletionCache(cache_path)
+        cache.put("key", "model", {"content": "Hi"})
+        cache.get("key")["content"] = "Changed"
+        assert cache.get("key") == {"content": "Hi"}
+
+    def test_record_then_replay(self, cache_path):
+        """Test that a recorded run replays from disk without the model."""
+        recorder = CompletionCache(cache_path, mode="record")
+        call = Mock(return_value={"content": "Hi"})
+        recorder.complete("key", "model", call)
+        recorder.complete("key", "model", call)
+        assert call.call_count == 2
+        recorder.close()
+
+        replayer = CompletionCache(cache_path, mode="replay")
+        assert replayer.complete("key", "model", call) == {"content": "Hi"}
+        assert call.call_count == 2
+        with pytest.raises(CompletionCacheMiss):
+            replayer.complete("other", "model", call)
+
+    def test_unknown_mode(self, cache_path):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            CompletionCache(cache_path, mode="write")
+
+    def test_evicts_least_recently_used(self, cache_path):
+        """Test that the size bounds evict the oldest accessed entries."""
+        cache = CompletionCache(cache_path, max_entries=2)
+        cache.put("a", "model", {"content": "a"})
+        cache.put("b", "model", {"content": "b"})
+        cache.get("a")
+        cache.put("c", "model", {"content": "c"})
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+        cache = CompletionCache(cache_path.with_name("bytes.db"), max_bytes=1)
+        cache.put("a", "model", {"content": "a"})
+        cache.put("b", "model", {"content": "b"})
+        assert len(cache) == 1
+        assert cache.get("b") is not None
+
+    def test_from_env(self, cache_path, monkeypatch):
+        """Test configuration through environment variables."""
+        monkeypatch.delenv("HUGIN_COMPLETION_CACHE", raising=False)
+        assert CompletionCache.from_env() is None
+        assert Environment().completion_cache is None
+
+        monkeypatch.setenv("HUGIN_COMPLETION_CACHE", str(cache_path))
+        monkeypatch.setenv("HUGIN_COMPLETION_CACHE_MODE", "replay")
+        cache = Environment().completion_cache
+        assert cache is not None
+        assert cache.mode == "replay"
+        assert cache.path == cache_path
+
+
+class TestChatCompletionCache:
+    """Test chat_completion with a cache."""
+
+    def test_cached_completion(self, cache_path, mock_model):
+        """Test that a repeated request is answered from the cache."""
+        cache = CompletionCache(cache_path)
+        for _ in range(2):
+            result = chat_completion(
+                "System", MESSAGES, [_tool()], "test-model", cache=cache
+            )
+            assert result["content"] == "Hi"
+        assert mock_model.chat_completion.call_count == 1
+
+    def test_replay_miss(self, cache_path, mock_model):
+        """Test that replay never calls the model."""
+        cache = CompletionCache(cache_path, mode="replay")
+        with pytest.raises(CompletionCacheMiss):
+            chat_completion("System", MESSAGES, [], "test-model", cache=cache)
+        mock_model.chat_completion.assert_not_called()
@@ -806,10 +806,10 @@ class TestComplexSessionLoading:
             assert loaded_artifact.uuid == original_artifact.uuid
             assert loaded_artifact.interaction.uuid == task_def_uuid
 
-    def test_session_with_missing_interaction_handles_gracefully(
+    def test_session_with_missing_interaction_raises(
         self, environment, temp_storage
     ):
-        """Test that missing interactions are handled gracefully during loading."""
+        """Test that a session with a missing interaction is not loaded."""
         session = Session(environment=environment)
         session_uuid = session.uuid
 
@@ -820,7 +820,6 @@ class TestComplexSessionLoading:
             tools=[],
         )
         agent = Agent(session=session, config=config)
-        agent_uuid = agent.uuid
 
         task = Task(
             name="test_task",
@@ -830,7 +829,6 @@ class TestComplexSessionLoading:
             tools=[],
         )
         task_def = TaskDefinition(stack=agent.stack, task=task)
-        task_def_uuid = task_def.uuid
         agent.stack.add_interaction(task_def)
 
         # Add a valid interaction
@@ -850,21 +848,11 @@ class TestComplexSessionLoading:
         temp_storage.save_session(session)
 
         # Manually delete one interaction file to simulate corruption/loss
-        ask_oracle_path = temp_storage.base_path / ask_oracle_uuid
-        if ask_oracle_path.exists():
-            ask_oracle_path.unlink()
+        (temp_storage.base_path / "interactions" / ask_oracle_uuid).unlink()
 
-        # Load session - should handle missing interaction gracefully
-        # The stack.from_dict method should skip missing interactions
-        loaded_session = temp_storage.load_session(
-            session_uuid, environment=environment
-        )
-
-        # Should still load valid interactions
-        loaded_agent = loaded_session.get_agent(agent_uuid)
-        assert loaded_agent is not None
-        # Should have at least the valid interaction (task_def)
-        assert len(loaded_agent.stack.interactions) >= 1
-        # Verify valid interaction is present
-        interaction_uuids = [i.uuid for i in loaded_agent.stack.interactions]
-        assert task_def_uuid in interaction_uuids
+        # Load without the objects cached by the saves
+        storage = LocalStorage(base_path=temp_storage.base_path)
+        with pytest.raises(ValueError, match=ask_oracle_uuid):
+            storage.load_session(
+                session_uuid, environment=Environment(storage=storage)
+            )
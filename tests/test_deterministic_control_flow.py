@@ -1445,7 +1445,8 @@ class TestConfigHistory:
         assert "_config_history" in data
         assert len(data["_config_history"]) == 2
 
-        # Deserialize
+        # Deserialize, without the interactions the storage never saved
+        data["stack"] = {"interactions": []}
         restored = Agent.from_dict(
             data,
             storage=state_machine_session.storage,
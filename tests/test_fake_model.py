@@ -0,0 +1,193 @@
+"""Tests for the scripted fake model."""
+
+import asyncio
+import json
+
+import pytest
+
+from gimle.hugin.llm.models.fake import FakeModel
+from gimle.hugin.llm.models.model_registry import (
+    MODEL_PROVIDERS,
+    ModelRegistry,
+)
+from gimle.hugin.tools.tool import Tool, ToolConfig
+
+
+def _tool(name, options=None, **parameters):
+    return Tool(
+        name=name,
+        description=f"The {name} tool",
+        parameters=parameters,
+        is_interactive=False,
+        options=options or ToolConfig(),
+    )
+
+
+TOOLS = [
+    _tool(
+        "search",
+        query={"type": "string", "description": "Query", "required": True},
+        limit={"type": "integer", "description": "Limit"},
+    ),
+    _tool(
+        "count",
+        n={"type": "integer", "description": "N", "required": True},
+    ),
+    _tool(
+        "builtins.finish",
+        ToolConfig(include_reason=True),
+        finish_type={"type": "string", "description": "Type", "required": True},
+    ),
+]
+
+
+def _messages(steps):
+    messages = [{"role": "user", "content": "Task"}]
+    for step in range(steps):
+        messages.append({"role": "assistant", "content": f"step {step}"})
+        messages.append({"role": "user", "content": "result"})
+    return messages
+
+
+class TestFakeModelScripts:
+    """Test the responses of the scripts."""
+
+    def test_finish(self):
+        """Test that the finish script calls the finish tool."""
+        response = FakeModel().chat_completion("System", _messages(0), TOOLS)
+
+        assert response.tool_call == "builtins.finish"
+        assert response.content == {
+            "finish_type": "success",
+            "result": "Done.",
+            "reason": "Scripted",
+        }
+        assert response.input_tokens > 0
+        assert response.output_tokens == 50
+
+    def test_tools_then_finish(self):
+        """Test that the tools script calls each tool in turn, then finishes."""
+        model = FakeModel(script="tools", steps=3)
+        responses = [
+            model.chat_completion("System", _messages(step), TOOLS)
+            for step in range(4)
+        ]
+
+        assert [response.tool_call for response in responses] == [
+            "search",
+            "count",
+            "search",
+            "builtins.finish",
+        ]
+        assert responses[0].content == {"query": "fake"}
+        assert responses[1].content == {"n": 1}
+        assert responses[1].tool_call_id == "fake_1"
+
+    def test_text(self):
+        """Test that the text script responds without a tool call."""
+        response = FakeModel(script="text").chat_completion(
+            "System", _messages(0), TOOLS
+        )
+
+        assert response.tool_call is None
+        assert response.content == "Done."
+
+    def test_trace_is_replayed(self, tmp_path):
+        """Test that a trace is replayed by step, then finishes."""
+        trace = tmp_path / "trace.jsonl"
+        trace.write_text(
+            "\n".join(
+                json.dumps(response)
+                for response in [
+                    {
+                        "role": "assistant",
+                        "content": {"query": "a"},
+                        "tool_call": "search",
+                        "tool_call_id": "1",
+                        "output_tokens": 7,
+                    },
+                    {"role": "assistant", "content": "Thinking"},
+                ]
+            )
+        )
+        model = FakeModel(script=str(trace))
+
+        first = model.chat_completion("System", _messages(0), TOOLS)
+        second = model.chat_completion("System", _messages(1), TOOLS)
+        third = model.chat_completion("System", _messages(2), TOOLS)
+
+        assert (first.tool_call, first.content) == ("search", {"query": "a"})
+        assert first.output_tokens == 7
+        assert second.content == "Thinking"
+        assert third.tool_call == "builtins.finish"
+
+    def test_unknown_script(self):
+        """Test that a script that is not a trace file is rejected."""
+        with pytest.raises(ValueError, match="is not one of"):
+            FakeModel(script="missing.json")
+
+
+class TestFakeModelDistributions:
+    """Test the latency and token distributions."""
+
+    def test_draws_are_repeatable(self):
+        """Test that the same request gets the same output tokens."""
+        model = FakeModel(output_tokens=100, output_tokens_stddev=30, seed=1)
+        first = model.chat_completion("System", _messages(2), TOOLS)
+        again = model.chat_completion("System", _messages(2), TOOLS)
+        other_seed = FakeModel(
+            output_tokens=100, output_tokens_stddev=30, seed=2
+        ).chat_completion("System", _messages(2), TOOLS)
+
+        assert first.output_tokens == again.output_tokens
+        assert first.output_tokens != other_seed.output_tokens
+        assert first.output_tokens >= 0
+
+    def test_async_latency(self):
+        """Test that async calls wait concurrently."""
+        model = FakeModel(latency=0.2)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(
+                *[
+                    model.achat_completion("System", _messages(0), TOOLS)
+                    for _ in range(20)
+                ]
+            )
+            return loop.time() - start
+
+        assert 0.2 <= asyncio.run(run()) < 1.0
+
+
+class TestFakeModelRegistry:
+    """Test resolving fake models by name."""
+
+    def test_from_name(self):
+        """Test that options are parsed from the query string."""
+        model = FakeModel.from_name("fake:tools?steps=5&latency=0.5&seed=3")
+
+        assert model.script == "tools"
+        assert model.steps == 5
+        assert model.latency == 0.5
+        assert model.seed == 3
+        assert model.model_name == "fake:tools"
+
+    def test_from_name_unknown_option(self):
+        """Test that unknown options are rejected."""
+        with pytest.raises(ValueError, match="Unknown fake model option"):
+            FakeModel.from_name("fake:tools?speed=2")
+
+    def test_registry_creates_fake_models(self):
+        """Test that the registry creates a fake model once per name."""
+        registry = ModelRegistry()
+        model = registry.get_model("fake:tools?steps=2")
+
+        assert isinstance(model, FakeModel)
+        assert registry.get_model("fake:tools?steps=2") is model
+        assert registry.get_provider("fake:tools?steps=2") == "fake"
+        assert registry.get_models_by_provider("fake") == ["fake:tools?steps=2"]
+        assert "fake:tools?steps=2" not in MODEL_PROVIDERS
+        with pytest.raises(ValueError, match="not found"):
+            registry.get_model("other:tools")
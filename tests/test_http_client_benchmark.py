@@ -0,0 +1,113 @@
+"""Benchmark: per-call overhead of new versus shared provider clients."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anthropic
+import pytest
+
+from gimle.hugin.llm.models.anthropic import AnthropicModel
+from gimle.hugin.llm.models.clients import close_shared_clients
+
+RESPONSE = json.dumps(
+    {
+        "id": "msg_1",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-test",
+        "content": [{"type": "text", "text": "ok"}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 1, "output_tokens": 1},
+    }
+).encode()
+
+
+class MessagesHandler(BaseHTTPRequestHandler):
+    """Answers every request like the messages endpoint."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        """Count connections."""
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        """Return the canned message."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        """Keep the test output quiet."""
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Run a local stand-in for the Anthropic API."""
+    MessagesHandler.connections = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MessagesHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", base_url)
+    close_shared_clients()
+    yield base_url
+    close_shared_clients()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _timed(calls, call) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - start) / calls
+
+
+@pytest.mark.slow
+def test_shared_client_reuses_connections(server):
+    """A shared client keeps one connection open instead of one per call."""
+    calls = 200
+    messages = [{"role": "user", "content": "Hello"}]
+
+    def create(client):
+        client.messages.create(
+            messages=messages,
+            max_tokens=10,
+            model="claude-test",
+            system="System",
+        )
+
+    def new_client_per_call():
+        # What every call did before clients were shared
+        with anthropic.Anthropic() as client:
+            create(client)
+
+    before = _timed(calls, new_client_per_call)
+    connections_before = MessagesHandler.connections
+
+    MessagesHandler.connections = 0
+    model = AnthropicModel(model_name="claude-test")
+    after = _timed(calls, lambda: create(model.client))
+    connections_after = MessagesHandler.connections
+
+    print(
+        f"\nnew client per call: {before * 1000:.2f}ms/call, "
+        f"{connections_before} connections"
+        f"\nshared client: {after * 1000:.2f}ms/call, "
+        f"{connections_after} connections"
+    )
+    assert connections_before == calls
+    assert connections_after == 1
+    assert after < before
@@ -226,6 +226,23 @@ class TestMonitorFeedbackEndpoints:
         assert fb.source == "human"
         assert fb.rating == 5
 
+    def test_storage_opened_once(self, tmp_path):
+        """Test that requests share one storage whose cache updates clear."""
+        from gimle.hugin.cli import monitor_agents
+
+        storage = monitor_agents._open_storage(tmp_path)
+        try:
+            assert monitor_agents._open_storage(tmp_path) is storage
+            storage.store["session:s"] = object()
+
+            monitor_agents._storage_update_callback("session", "s")
+
+            assert "session:s" not in storage.store
+        finally:
+            monitor_agents._close_storages()
+        assert monitor_agents._open_storage(tmp_path) is not storage
+        monitor_agents._close_storages()
+
 
 class TestTuiRating:
     """Test TUI artifact rating."""
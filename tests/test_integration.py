@@ -26,6 +26,7 @@ class TestModelIntegration:
         """Test the complete workflow from LLMCall to model response."""
         # Setup mock registry with MockModel
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = MockModel(
             {
                 "model": "test-model",
@@ -63,6 +64,7 @@ class TestModelIntegration:
         """Test multiple calls to the same model."""
         # Setup mock registry
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = MockModel(
             {
                 "model": "test-model",
@@ -103,6 +105,7 @@ class TestModelIntegration:
         """Test using different models."""
         # Setup mock registry with multiple models
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
 
         model1 = MockModel(
             {
@@ -205,6 +208,7 @@ class TestErrorHandling:
         """Test error handling when model is not found."""
         # Setup mock to raise error
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_registry.get_model.side_effect = ValueError(
             "Model nonexistent not found"
         )
@@ -249,6 +253,7 @@ class TestPerformance:
 
         # Setup mock registry
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = MockModel(
             {
                 "model": "test-model",
@@ -284,6 +289,7 @@ class TestPerformance:
 
         # Setup mock registry
         mock_registry = Mock()
+        mock_registry.get_rate_limiter.return_value = None
         mock_model = MockModel(
             {
                 "model": "test-model",
@@ -0,0 +1,210 @@
+"""Tests for the job queue and its workers."""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from gimle.hugin.jobs.queue import DONE, FAILED, LEASED, QUEUED
+from gimle.hugin.jobs.sqlite import SqliteJobQueue
+from gimle.hugin.jobs.worker import QueueWorker, enqueue_session
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Create a SQLite job queue."""
+    queue = SqliteJobQueue(tmp_path / "jobs.db", max_attempts=2)
+    yield queue
+    queue.close()
+
+
+class TestSqliteJobQueue:
+    """Test leasing jobs from the SQLite job queue."""
+
+    def test_lease_is_exclusive(self, queue, tmp_path):
+        """Test that a leased job is not handed to another worker."""
+        job = queue.put("session-1", {"task_path": "apps/a"})
+        other = SqliteJobQueue(tmp_path / "jobs.db")
+
+        leased = queue.lease("worker-1", lease_seconds=60)
+
+        assert leased.id == job.id
+        assert leased.session_id == "session-1"
+        assert leased.payload == {"task_path": "apps/a"}
+        assert leased.status == LEASED
+        assert leased.attempts == 1
+        assert leased.owner == "worker-1"
+        assert other.lease("worker-2", lease_seconds=60) is None
+        other.close()
+
+    def test_delayed_job(self, queue):
+        """Test that a delayed job is not leased before its delay."""
+        queue.put("session-1", delay=60)
+
+        assert queue.lease("worker-1", lease_seconds=60) is None
+
+    def test_expired_lease(self, queue):
+        """Test that a job is leased again once its lease runs out."""
+        queue.put("session-1")
+        first = queue.lease("worker-1", lease_seconds=0.05)
+        time.sleep(0.1)
+
+        second = queue.lease("worker-2", lease_seconds=60)
+
+        assert second.id == first.id
+        assert second.owner == "worker-2"
+        assert second.attempts == 2
+        # The first worker lost its lease
+        assert not queue.heartbeat(first, lease_seconds=60)
+        assert not queue.complete(first)
+        assert queue.heartbeat(second, lease_seconds=60)
+
+    def test_heartbeat_extends_lease(self, queue):
+        """Test that heartbeats keep a job leased."""
+        queue.put("session-1")
+        job = queue.lease("worker-1", lease_seconds=0.2)
+        time.sleep(0.1)
+        assert queue.heartbeat(job, lease_seconds=0.2)
+        time.sleep(0.15)
+
+        assert queue.lease("worker-2", lease_seconds=60) is None
+
+    def test_release_and_complete(self, queue):
+        """Test that released jobs are leased again and done ones not."""
+        queue.put("session-1")
+        job = queue.lease("worker-1", lease_seconds=60)
+
+        assert queue.release(job)
+        job = queue.lease("worker-1", lease_seconds=60)
+        # Clean releases do not count as attempts
+        assert job.attempts == 1
+        assert queue.complete(job)
+
+        assert queue.lease("worker-1", lease_seconds=60) is None
+        assert queue.get(job.id).status == DONE
+
+    def test_max_attempts(self, queue):
+        """Test that a job is failed after max_attempts failed leases."""
+        job = queue.put("session-1")
+        for _ in range(2):
+            leased = queue.lease("worker-1", lease_seconds=60)
+            assert queue.release(leased, error="ValueError: boom")
+
+        assert queue.lease("worker-1", lease_seconds=60) is None
+        failed = queue.get(job.id)
+        assert failed.status == FAILED
+        assert failed.error == "ValueError: boom"
+
+    def test_counts_and_list(self, queue):
+        """Test counting and listing jobs by status."""
+        enqueue_session(queue, "session-1", "apps/a")
+        enqueue_session(queue, "session-2")
+        queue.lease("worker-1", lease_seconds=60)
+
+        assert queue.counts() == {QUEUED: 1, LEASED: 1, DONE: 0, FAILED: 0}
+        assert [job.session_id for job in queue.list_jobs(QUEUED)] == [
+            "session-2"
+        ]
+        assert queue.list_jobs()[0].payload == {"task_path": "apps/a"}
+
+
+class TestQueueWorker:
+    """Test stepping the sessions of queued jobs."""
+
+    def _worker(self, queue, session, **kwargs):
+        session.agents = []
+        storage = Mock()
+        storage.load_checkpoint.return_value = None
+        storage.load_session.return_value = session
+        worker = QueueWorker(
+            queue, storage, task_path="apps/a", worker_id="w", **kwargs
+        )
+        # Do not load the agent directory
+        worker._environment = Mock(return_value=Mock(storage=storage))
+        return worker, storage
+
+    def test_finished_session_completes_job(self, queue):
+        """Test that a session that finishes within its slice is done."""
+        session = Mock()
+        session.run.return_value = 3
+        job = queue.put("session-1")
+        worker, storage = self._worker(queue, session, slice_steps=10)
+
+        assert worker.run(exit_when_empty=True) == 1
+
+        storage.load_session.assert_called_once()
+        assert storage.load_session.call_args[0][0] == "session-1"
+        assert session.run.call_args.kwargs["max_steps"] == 10
+        storage.store.clear.assert_called_once()
+        assert queue.get(job.id).status == DONE
+
+    def test_unfinished_session_is_released(self, queue):
+        """Test that a session still running after its slice is queued."""
+        session = Mock()
+        session.run.return_value = 5
+        job = queue.put("session-1")
+        worker, _ = self._worker(queue, session, slice_steps=5)
+
+        assert worker.run(max_jobs=1) == 1
+
+        released = queue.get(job.id)
+        assert released.status == QUEUED
+        assert released.attempts == 0
+
+    def test_waiting_session_is_released(self, queue):
+        """Test that a session that stopped to wait is not done."""
+        session = Mock()
+        session.run.return_value = 2
+        job = queue.put("session-1")
+        worker, _ = self._worker(queue, session, wait_seconds=60)
+        agent = Mock()
+        session.agents = [agent]
+        session.scheduler.is_parked.return_value = True
+
+        assert worker.run(exit_when_empty=True) == 1
+
+        released = queue.get(job.id)
+        assert released.status == QUEUED
+        assert released.attempts == 0
+        # Not leased again before wait_seconds
+        assert queue.lease("w", lease_seconds=60) is None
+
+    def test_error_is_retried_then_failed(self, queue):
+        """Test that errors count as attempts until the job fails."""
+        session = Mock()
+        session.run.side_effect = RuntimeError("boom")
+        job = queue.put("session-1")
+        worker, _ = self._worker(queue, session)
+
+        assert worker.run(exit_when_empty=True) == 2
+
+        failed = queue.get(job.id)
+        assert failed.status == FAILED
+        assert failed.error == "RuntimeError: boom"
+
+    def test_lost_lease_stops_session(self, queue):
+        """Test that a worker stops stepping a job it lost the lease of."""
+        session = Mock()
+
+        def run(step_callback, **kwargs):
+            # Another worker takes over the job
+            job = queue.list_jobs()[0]
+            queue._conn.execute(
+                "UPDATE jobs SET lease_token = 'other' WHERE id = ?",
+                (job.id,),
+            )
+            time.sleep(0.1)
+            step_callback(1, Mock())
+            return 1
+
+        session.run.side_effect = run
+        queue.put("session-1")
+        worker, _ = self._worker(queue, session, lease_seconds=0.03)
+        job = queue.lease("w", lease_seconds=0.03)
+
+        worker.process(job)
+
+        # The job is left to the worker that took it over
+        taken = queue.get(job.id)
+        assert taken.status == LEASED
+        assert taken.lease_token == "other"
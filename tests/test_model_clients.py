@@ -0,0 +1,161 @@
+"""Tests for the shared HTTP clients of the model providers."""
+
+import asyncio
+
+import anthropic
+import httpx
+import openai
+import pytest
+
+from gimle.hugin.llm.models.anthropic import AnthropicModel
+from gimle.hugin.llm.models.clients import (
+    HttpClientConfig,
+    aclose_shared_async_clients,
+    close_shared_clients,
+    get_shared_async_client,
+    get_shared_client,
+)
+from gimle.hugin.llm.models.openai import OpenAIModel
+
+
+class FakeClient:
+    """Provider client stand-in that records being closed."""
+
+    def __init__(self, config):
+        """Initialize with the client settings."""
+        self.config = config
+        self.closed = False
+
+    def close(self):
+        """Record the close."""
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    """Start and end each test without shared clients."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    close_shared_clients()
+    yield
+    close_shared_clients()
+
+
+class FakeAsyncClient(FakeClient):
+    """Async provider client stand-in."""
+
+    async def close(self):
+        """Record the close."""
+        self.closed = True
+
+
+class TestSharedClients:
+    """Test sharing, settings and shutdown of provider clients."""
+
+    def test_clients_are_shared_per_provider_and_config(self):
+        """Test that one client serves all models with the same settings."""
+        small_pool = HttpClientConfig(max_connections=2)
+        first = get_shared_client("fake", FakeClient)
+        assert get_shared_client("fake", FakeClient) is first
+        assert get_shared_client("other", FakeClient) is not first
+
+        pooled = get_shared_client("fake", FakeClient, small_pool)
+        assert pooled is not first
+        assert pooled.config.max_connections == 2
+
+    def test_close_shared_clients(self):
+        """Test that closing clients closes them and creates new ones."""
+        first = get_shared_client("fake", FakeClient)
+        close_shared_clients()
+        assert first.closed
+        assert get_shared_client("fake", FakeClient) is not first
+
+    def test_models_share_clients(self):
+        """Test that registry models reuse one client per provider."""
+        haiku = AnthropicModel(model_name="claude-haiku")
+        sonnet = AnthropicModel(model_name="claude-sonnet")
+        assert haiku.client is sonnet.client
+        assert haiku.client.max_retries == 5
+        assert OpenAIModel(model_name="a").client is (
+            OpenAIModel(model_name="b").client
+        )
+
+    def test_http_client_settings(self):
+        """Test that pool and timeout settings reach the HTTP client."""
+        config = HttpClientConfig(timeout=5.0, connect_timeout=1.0)
+        model = AnthropicModel(
+            model_name="claude-test", http_client_config=config
+        )
+        timeout = model.client._client.timeout
+        assert timeout.read == 5.0
+        assert timeout.connect == 1.0
+
+    @pytest.mark.parametrize(
+        "client_class",
+        [
+            anthropic.DefaultHttpxClient,
+            anthropic.DefaultAsyncHttpxClient,
+            openai.DefaultHttpxClient,
+            openai.DefaultAsyncHttpxClient,
+        ],
+    )
+    def test_http_client_of_each_sdk(self, client_class):
+        """Test that settings reach the HTTP clients of the SDKs."""
+        config = HttpClientConfig(timeout=5.0, connect_timeout=1.0)
+        client = config.create_http_client(client_class)
+        assert client.timeout.read == 5.0
+        assert client.timeout.connect == 1.0
+        if hasattr(client, "aclose"):
+            asyncio.run(client.aclose())
+        else:
+            client.close()
+
+    def test_http_client_on_httpx(self):
+        """Test that clients of SDKs built on httpx get httpx settings."""
+
+        class OlderSdkClient(httpx.Client):
+            pass
+
+        config = HttpClientConfig(timeout=5.0, connect_timeout=1.0)
+        with config.create_http_client(OlderSdkClient) as client:
+            assert client.timeout.read == 5.0
+            assert client.timeout.connect == 1.0
+
+    def test_injected_client(self):
+        """Test that a client passed to the model is used as is."""
+        client = object()
+        assert AnthropicModel(model_name="m", client=client).client is client
+        assert OpenAIModel(model_name="m", client=client).client is client
+
+    def test_async_clients_are_shared_per_event_loop(self):
+        """Test that each event loop gets its own async clients."""
+
+        async def get_twice():
+            first = get_shared_async_client("fake", FakeAsyncClient)
+            assert get_shared_async_client("fake", FakeAsyncClient) is first
+            return first
+
+        first_loop = asyncio.run(get_twice())
+        assert asyncio.run(get_twice()) is not first_loop
+
+        async def get_and_close():
+            client = get_shared_async_client("fake", FakeAsyncClient)
+            await aclose_shared_async_clients()
+            return client
+
+        assert asyncio.run(get_and_close()).closed
+
+    def test_models_share_async_clients(self):
+        """Test that registry models reuse one async client per loop."""
+
+        async def clients():
+            return (
+                AnthropicModel(model_name="claude-haiku").async_client,
+                AnthropicModel(model_name="claude-sonnet").async_client,
+                OpenAIModel(model_name="a").async_client,
+            )
+
+        haiku, sonnet, openai_client = asyncio.run(clients())
+        assert haiku is sonnet
+        assert haiku.max_retries == 5
+        assert openai_client is not haiku
@@ -0,0 +1,104 @@
+"""Benchmark: throughput of concurrent calls to an Ollama host."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gimle.hugin.llm.models import ollama
+from gimle.hugin.llm.models.ollama import OllamaModel
+
+# Time the stub server takes to generate a response
+DELAY = 0.05
+
+RESPONSE = json.dumps(
+    {
+        "model": "stub",
+        "created_at": "2025-01-01T00:00:00Z",
+        "message": {"role": "assistant", "content": "ok"},
+        "done": True,
+        "prompt_eval_count": 1,
+        "eval_count": 1,
+    }
+).encode()
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """Answers every request like the chat endpoint, after a delay."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        """Return the canned chat response."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(DELAY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        """Keep the test output quiet."""
+
+
+@pytest.fixture
+def server():
+    """Run a local stand-in for an Ollama server."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _throughput(host, max_parallel_requests, calls=32) -> float:
+    """Run calls from as many threads, returning calls per second."""
+    model = OllamaModel(
+        model_name="stub",
+        host=host,
+        max_parallel_requests=max_parallel_requests,
+    )
+    messages = [{"role": "user", "content": "Hello"}]
+    with ThreadPoolExecutor(max_workers=calls) as executor:
+
+        def run() -> None:
+            list(
+                executor.map(
+                    lambda _: model.chat_completion("System", messages),
+                    range(calls),
+                )
+            )
+
+        # Open the pooled connections before timing
+        run()
+        start = time.perf_counter()
+        run()
+    return calls / (time.perf_counter() - start)
+
+
+@pytest.mark.slow
+def test_throughput_scales_with_parallelism(server, monkeypatch):
+    """More parallel requests per host complete more calls per second."""
+    results = {}
+    for max_parallel_requests in (1, 2, 4, 8):
+        # Each run gets a fresh semaphore for the host
+        monkeypatch.setattr(ollama, "_ollama_host_semaphores", {})
+        results[max_parallel_requests] = _throughput(
+            server, max_parallel_requests
+        )
+
+    print()
+    for max_parallel_requests, throughput in results.items():
+        print(
+            f"max_parallel_requests={max_parallel_requests}: "
+            f"{throughput:.1f} calls/s"
+        )
+    assert results[1] < 1 / DELAY
+    assert results[4] > 3 * results[1]
+    assert results[8] > results[4]
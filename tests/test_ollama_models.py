@@ -20,6 +20,7 @@ Models are automatically skipped if not installed locally.
 
 import logging
 import subprocess
+import time
 from typing import List
 
 import pytest
@@ -387,7 +388,9 @@ class TestOllamaModelHost:
         )
         with patch("gimle.hugin.llm.models.ollama.Client") as mock_client_cls:
             _ = model.client
-            mock_client_cls.assert_called_once_with(host="http://remote:11434")
+            mock_client_cls.assert_called_once_with(
+                host="http://remote:11434", timeout=60
+            )
 
     def test_client_created_without_host(self):
         """Client property creates default client for local."""
@@ -398,7 +401,7 @@ class TestOllamaModelHost:
         model = OllamaModel(model_name="test-model")
         with patch("gimle.hugin.llm.models.ollama.Client") as mock_client_cls:
             _ = model.client
-            mock_client_cls.assert_called_once_with()
+            mock_client_cls.assert_called_once_with(timeout=60)
 
     def test_client_is_lazy_and_cached(self):
         """Client is created lazily and reused."""
@@ -414,6 +417,126 @@ class TestOllamaModelHost:
             mock_client_cls.assert_called_once()
 
 
+class TestOllamaModelConcurrency:
+    """Test the per-host concurrency limit and timeouts."""
+
+    def _model(self, host, max_parallel_requests, delay=0.05):
+        """Create a model whose client tracks calls running at once."""
+        import threading
+        from unittest.mock import Mock
+
+        from ollama import ChatResponse, Message
+
+        from gimle.hugin.llm.models.ollama import OllamaModel
+
+        model = OllamaModel(
+            model_name="test-model",
+            host=host,
+            max_parallel_requests=max_parallel_requests,
+        )
+        model.running = 0
+        model.max_running = 0
+        lock = threading.Lock()
+
+        def chat(**kwargs):
+            with lock:
+                model.running += 1
+                model.max_running = max(model.max_running, model.running)
+            time.sleep(delay)
+            with lock:
+                model.running -= 1
+            return ChatResponse(
+                message=Message(role="assistant", content="Hi"),
+                prompt_eval_count=1,
+                eval_count=1,
+            )
+
+        model._client = Mock()
+        model._client.chat.side_effect = chat
+        return model
+
+    def _call_in_threads(self, model, calls):
+        import threading
+
+        threads = [
+            threading.Thread(
+                target=model.chat_completion,
+                args=("System", [{"role": "user", "content": "Hi"}]),
+            )
+            for _ in range(calls)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_parallel_requests_are_bounded(self):
+        """At most max_parallel_requests calls run on a host at once."""
+        model = self._model("http://parallel-test:11434", 3)
+        self._call_in_threads(model, 8)
+        assert model.max_running == 3
+        assert model._client.chat.call_count == 8
+
+    def test_different_limit_for_host_is_warned(self, caplog):
+        """A later model asking for another limit is warned about once."""
+        host = "http://mismatch-test:11434"
+        first = self._model(host, 2, delay=0)
+        first.chat_completion("System", [{"role": "user", "content": "Hi"}])
+        second = self._model(host, 4, delay=0)
+
+        with caplog.at_level("WARNING"):
+            for _ in range(2):
+                second.chat_completion(
+                    "System", [{"role": "user", "content": "Hi"}]
+                )
+            first.chat_completion("System", [{"role": "user", "content": "Hi"}])
+
+        warnings = [
+            r for r in caplog.records if "max_parallel_requests=4" in r.message
+        ]
+        assert len(warnings) == 1
+        assert "already runs 2 calls at once" in warnings[0].message
+
+    def test_keep_alive_is_sent(self):
+        """Calls ask the server to keep the model loaded."""
+        model = self._model("http://keep-alive-test:11434", 1, delay=0)
+        model.chat_completion("System", [{"role": "user", "content": "Hi"}])
+        assert model._client.chat.call_args.kwargs["keep_alive"] == "30m"
+
+    def test_default_parallelism_from_environment(self, monkeypatch):
+        """OLLAMA_NUM_PARALLEL sets the default concurrency."""
+        from gimle.hugin.llm.models.ollama import OllamaModel
+
+        monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "4")
+        assert OllamaModel(model_name="test-model").max_parallel_requests == 4
+        monkeypatch.delenv("OLLAMA_NUM_PARALLEL")
+        assert OllamaModel(model_name="test-model").max_parallel_requests == 1
+
+    def test_timeout_in_worker_thread(self):
+        """HTTP timeouts raise TimeoutError outside the main thread too."""
+        import threading
+
+        import httpx
+
+        model = self._model("http://timeout-test:11434", 1)
+        model._client.chat.side_effect = httpx.ReadTimeout("timed out")
+        errors = []
+
+        def call():
+            try:
+                model.chat_completion(
+                    "System", [{"role": "user", "content": "Hi"}]
+                )
+            except Exception as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        thread.join()
+        assert len(errors) == 1
+        assert isinstance(errors[0], TimeoutError)
+
+
 if __name__ == "__main__":
     # Allow running this test file directly
     pytest.main([__file__, "-v"])
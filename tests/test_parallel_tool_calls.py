@@ -0,0 +1,353 @@
+"""Tests for several tool calls in one model response."""
+
+import threading
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.task import Task
+from gimle.hugin.interaction.agent_call import AgentCall
+from gimle.hugin.interaction.agent_result import AgentResult
+from gimle.hugin.interaction.ask_oracle import AskOracle
+from gimle.hugin.interaction.oracle_response import OracleResponse
+from gimle.hugin.interaction.stack import Stack
+from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.interaction.task_result import TaskResult
+from gimle.hugin.interaction.tool_call import ToolCall
+from gimle.hugin.interaction.tool_result import ToolResult
+from gimle.hugin.llm.models.anthropic import AnthropicModel
+from gimle.hugin.llm.models.model import ModelResponse
+from gimle.hugin.llm.prompt.message import (
+    render_assistant_message,
+    render_user_message,
+)
+from gimle.hugin.tools.tool import Tool, ToolResponse
+
+
+def _tool_call(name, call_id, **args):
+    return {"tool_call": name, "tool_call_id": call_id, "content": args}
+
+
+@pytest.fixture
+def tools():
+    """Register a side-effect-free lookup tool and a write tool."""
+    calls = []
+    # Both lookups must run at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    @Tool.register(
+        name="lookup_tool",
+        description="Looks up a key",
+        parameters={"key": {"type": "string", "description": "Key"}},
+        options={"side_effect_free": True},
+    )
+    def lookup_tool(key: str, stack: Stack, **kwargs: Any) -> ToolResponse:
+        if key != "single":
+            barrier.wait()
+        calls.append(("lookup_tool", key))
+        return ToolResponse(is_error=False, content={"value": key.upper()})
+
+    @Tool.register(
+        name="write_tool",
+        description="Writes a key",
+        parameters={"key": {"type": "string", "description": "Key"}},
+    )
+    def write_tool(key: str, stack: Stack, **kwargs: Any) -> ToolResponse:
+        calls.append(("write_tool", key))
+        return ToolResponse(is_error=False, content={"written": key})
+
+    @Tool.register(
+        name="chain_tool",
+        description="Looks up a key, then writes it",
+        parameters={"key": {"type": "string", "description": "Key"}},
+        options={"side_effect_free": True},
+    )
+    def chain_tool(key: str, stack: Stack, **kwargs: Any) -> ToolResponse:
+        calls.append(("chain_tool", key))
+        return ToolResponse(
+            is_error=False,
+            content={"value": key.upper()},
+            next_tool="write_tool",
+            next_tool_args={"key": key},
+        )
+
+    @Tool.register(
+        name="delegate_tool",
+        description="Delegates a key to an agent",
+        parameters={"key": {"type": "string", "description": "Key"}},
+        options={"side_effect_free": True},
+    )
+    def delegate_tool(key: str, stack: Stack, **kwargs: Any) -> AgentCall:
+        calls.append(("delegate_tool", key))
+        return AgentCall(
+            stack=stack,
+            config=Config(
+                name="helper",
+                description="Helper",
+                system_template="system",
+            ),
+            task=Task(
+                name="help",
+                description="Help",
+                parameters={},
+                prompt=f"Look up {key}",
+            ),
+        )
+
+    yield calls
+    for name in ["lookup_tool", "write_tool", "chain_tool", "delegate_tool"]:
+        Tool.registry.remove(name)
+
+
+@pytest.fixture
+def stack(mock_agent, tools):
+    """Create a stack with a task that can use the tools."""
+    stack = mock_agent.stack
+    task = Task(
+        name="test_task",
+        description="Test",
+        parameters={},
+        prompt="Do something",
+        tools=["lookup_tool", "write_tool", "chain_tool", "delegate_tool"],
+    )
+    stack.add_interaction(TaskDefinition(stack=stack, task=task))
+    return stack
+
+
+def _oracle_response(stack, tool_calls):
+    response = ModelResponse.from_tool_calls(tool_calls).to_dict()
+    oracle_response = OracleResponse(stack=stack, response=response)
+    stack.add_interaction(oracle_response)
+    return oracle_response
+
+
+class TestModelResponse:
+    """Test ModelResponse with several tool calls."""
+
+    def test_single_tool_call(self):
+        """Test that a single tool call only sets the tool call fields."""
+        response = ModelResponse.from_tool_calls(
+            [_tool_call("lookup_tool", "1", key="a")]
+        )
+
+        assert response.tool_call == "lookup_tool"
+        assert response.tool_call_id == "1"
+        assert response.content == {"key": "a"}
+        assert response.tool_calls is None
+
+    def test_several_tool_calls(self):
+        """Test that the first of several tool calls is also the tool call."""
+        tool_calls = [
+            _tool_call("lookup_tool", "1", key="a"),
+            _tool_call("write_tool", "2", key="b"),
+        ]
+        response = ModelResponse.from_tool_calls(tool_calls)
+
+        assert response.tool_call == "lookup_tool"
+        assert response.tool_calls == tool_calls
+        assert response.to_dict()["tool_calls"] == tool_calls
+
+    def test_anthropic_keeps_all_tool_use_blocks(self):
+        """Test that every tool_use block of a response is kept."""
+        model = AnthropicModel(model_name="claude-test", client=object())
+        response = model.parse_response(
+            SimpleNamespace(
+                id="msg_1",
+                content=[
+                    SimpleNamespace(type="text", text="Looking up"),
+                    SimpleNamespace(
+                        type="tool_use",
+                        id="1",
+                        name="lookup_tool",
+                        input={"key": "a"},
+                    ),
+                    SimpleNamespace(
+                        type="tool_use",
+                        id="2",
+                        name="lookup_tool",
+                        input={"key": "b"},
+                    ),
+                ],
+                usage=SimpleNamespace(
+                    input_tokens=10,
+                    output_tokens=5,
+                    cache_read_input_tokens=0,
+                    cache_creation_input_tokens=0,
+                ),
+            )
+        )
+
+        assert [call["tool_call_id"] for call in response.tool_calls] == [
+            "1",
+            "2",
+        ]
+        assert response.extra_content == ["Looking up"]
+        assert "disable_parallel_tool_use" not in model.tool_choice
+
+
+class TestOracleResponseFanOut:
+    """Test stepping an OracleResponse with several tool calls."""
+
+    def test_side_effect_free_tools_run_concurrently(self, stack, tools):
+        """Test that side-effect-free tools run together, results in order."""
+        oracle_response = _oracle_response(
+            stack,
+            [
+                _tool_call("lookup_tool", "1", key="a"),
+                _tool_call("lookup_tool", "2", key="b"),
+            ],
+        )
+
+        assert oracle_response.step() is True
+
+        added = stack.interactions[-4:]
+        assert [type(i) for i in added] == [
+            ToolCall,
+            ToolResult,
+            ToolCall,
+            ToolResult,
+        ]
+        assert [i.tool_call_id for i in added] == ["1", "1", "2", "2"]
+        assert added[3].result == {"value": "B"}
+        assert sorted(tools) == [("lookup_tool", "a"), ("lookup_tool", "b")]
+
+    def test_tools_with_side_effects_run_in_order(self, stack, tools):
+        """Test that other tool calls are made one after another."""
+        oracle_response = _oracle_response(
+            stack,
+            [
+                _tool_call("write_tool", "1", key="a"),
+                _tool_call("lookup_tool", "2", key="single"),
+            ],
+        )
+        oracle_response.step()
+
+        tool_call = stack.interactions[-1]
+        assert isinstance(tool_call, ToolCall)
+        assert tool_call.tool == "write_tool"
+        assert [c["tool_call_id"] for c in tool_call.pending_tool_calls] == [
+            "2"
+        ]
+
+        tool_call.step()
+        stack.interactions[-1].step()
+
+        next_call = stack.interactions[-1]
+        assert isinstance(next_call, ToolCall)
+        assert next_call.tool == "lookup_tool"
+        assert next_call.pending_tool_calls is None
+        assert tools == [("write_tool", "a")]
+
+    def test_results_return_to_oracle_in_one_message(self, stack, tools):
+        """Test that the last result returns all results to the oracle."""
+        oracle_response = _oracle_response(
+            stack,
+            [
+                _tool_call("lookup_tool", "1", key="a"),
+                _tool_call("lookup_tool", "2", key="b"),
+            ],
+        )
+        oracle_response.step()
+        stack.interactions[-1].step()
+
+        ask_oracle = stack.interactions[-1]
+        assert isinstance(ask_oracle, AskOracle)
+        assert [r["tool_use_id"] for r in ask_oracle.tool_results] == [
+            "1",
+            "2",
+        ]
+
+        blocks = render_user_message(ask_oracle)
+        assert [block["tool_use_id"] for block in blocks] == ["1", "2"]
+        assert blocks[0]["content"][0]["text"] == "value: A"
+        assert blocks[1]["content"][0]["text"] == "value: B"
+
+        tool_uses = render_assistant_message(oracle_response)
+        assert [block["id"] for block in tool_uses] == ["1", "2"]
+
+    def test_tool_results_round_trip(self, stack, tools):
+        """Test that the joined results are serialized with the AskOracle."""
+        _oracle_response(
+            stack,
+            [
+                _tool_call("lookup_tool", "1", key="a"),
+                _tool_call("lookup_tool", "2", key="b"),
+            ],
+        ).step()
+        stack.interactions[-1].step()
+        ask_oracle = stack.interactions[-1]
+
+        data = ask_oracle.to_dict()
+        restored = AskOracle.from_dict(data, stack)
+
+        assert restored.tool_results == ask_oracle.tool_results
+
+    def test_calls_made_with_a_chain_are_not_made_again(self, stack, tools):
+        """Test that calls made concurrently wait for a chained call."""
+        _oracle_response(
+            stack,
+            [
+                _tool_call("chain_tool", "1", key="a"),
+                _tool_call("lookup_tool", "2", key="single"),
+            ],
+        ).step()
+
+        chained = stack.interactions[-1]
+        assert isinstance(chained, ToolResult)
+        assert chained.next_tool == "write_tool"
+        assert "result" in chained.pending_tool_calls[0]
+
+        while not isinstance(stack.interactions[-1], AskOracle):
+            stack.interactions[-1].step()
+
+        assert tools.count(("lookup_tool", "single")) == 1
+        assert ("write_tool", "a") in tools
+        ask_oracle = stack.interactions[-1]
+        results = {
+            r["tool_use_id"]: r["template_inputs"]
+            for r in ask_oracle.tool_results
+        }
+        assert results["1"] == {"written": "a", "is_error": False}
+        assert results["2"] is None
+        assert ask_oracle.template_inputs["value"] == "SINGLE"
+
+    def test_calls_pending_on_an_agent_are_made(self, stack, tools):
+        """Test that calls after an AgentCall are made once it returns."""
+        _oracle_response(
+            stack,
+            [
+                _tool_call("delegate_tool", "1", key="a"),
+                _tool_call("lookup_tool", "2", key="single"),
+                _tool_call("write_tool", "3", key="b"),
+            ],
+        ).step()
+
+        agent_call = stack.interactions[-1]
+        assert isinstance(agent_call, AgentCall)
+        task_result = TaskResult(
+            stack=stack, finish_type="success", result={"answer": 42}
+        )
+        stack.add_interaction(
+            AgentResult(stack=stack, task_result_id=task_result.uuid)
+        )
+        with patch.object(
+            stack.agent.session, "get_interaction", return_value=task_result
+        ):
+            while not isinstance(stack.interactions[-1], AskOracle):
+                stack.interactions[-1].step()
+
+        assert tools == [
+            ("delegate_tool", "a"),
+            ("lookup_tool", "single"),
+            ("write_tool", "b"),
+        ]
+        results = {
+            r["tool_use_id"]: r["template_inputs"]
+            for r in stack.interactions[-1].tool_results
+        }
+        assert results["1"] == {"answer": 42, "is_error": False}
+        assert results["2"] == {"value": "SINGLE", "is_error": False}
+        assert results["3"] is None
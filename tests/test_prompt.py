@@ -14,7 +14,10 @@ from gimle.hugin.agent.environment import Environment
 from gimle.hugin.agent.task import Task
 from gimle.hugin.interaction.oracle_response import OracleResponse
 from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.llm.prompt import jinja
 from gimle.hugin.llm.prompt.jinja import (
+    clear_jinja_cache,
+    compile_jinja,
     contains_jinja,
     render_jinja,
     render_jinja_recursive,
@@ -222,6 +225,40 @@ class TestJinja:
         # Note: render_jinja uses .strip() so trailing spaces are removed
         assert result == "Hello"
 
+    def test_compile_jinja_reuses_templates(self):
+        """Test that the same source is compiled once."""
+        clear_jinja_cache()
+        template = "Hello {{ name }}, compiled once"
+        assert compile_jinja(template) is compile_jinja(template)
+        assert render_jinja(template, {"name": "A"}) == "Hello A, compiled once"
+        assert render_jinja(template, {"name": "B"}) == "Hello B, compiled once"
+
+    def test_compile_jinja_evicts_least_recently_used(self):
+        """Test that the template cache is bounded."""
+        clear_jinja_cache()
+        with patch("gimle.hugin.llm.prompt.jinja.TEMPLATE_CACHE_SIZE", 2):
+            first = compile_jinja("{{ a }}")
+            compile_jinja("{{ b }}")
+            compile_jinja("{{ a }}")
+            compile_jinja("{{ c }}")
+            assert compile_jinja("{{ a }}") is first
+            assert len(jinja._compiled) == 2
+
+    def test_render_jinja_recursive_is_bounded(self):
+        """Test that self-referencing inputs stop after max_depth passes."""
+        inputs = {"loop": "again {{ loop }}"}
+        result = render_jinja_recursive("{{ loop }}", inputs, max_depth=3)
+        assert result == "again again again {{ loop }}"
+
+    def test_render_jinja_recursive_stops_at_fixed_point(self):
+        """Test that rendering stops once a pass changes nothing."""
+        inputs = {"text": "{{ text }}"}
+        with patch(
+            "gimle.hugin.llm.prompt.jinja.render_jinja", wraps=render_jinja
+        ) as render:
+            assert render_jinja_recursive("{{ text }}", inputs) == "{{ text }}"
+        assert render.call_count == 1
+
 
 class TestFormatDataFrame:
     """Test DataFrame formatting utilities."""
@@ -0,0 +1,81 @@
+"""Benchmark: system prompt rendering throughput."""
+
+import time
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.llm.prompt.jinja import clear_jinja_cache
+from gimle.hugin.llm.prompt.renderer import PromptRenderer
+from gimle.hugin.llm.prompt.template import Template
+
+from .memory_storage import MemoryStorage
+
+SYSTEM_TEMPLATE = """You are {{ agent.config.name }}.
+{% for rule in rules %}- {{ rule }}
+{% endfor %}{{ footer.template }}"""
+
+
+def _make_renderer(templates: int) -> PromptRenderer:
+    environment = Environment(storage=MemoryStorage())
+    for i in range(templates):
+        environment.template_registry.register(
+            Template(name=f"template_{i}", template=f"Template {i}")
+        )
+    environment.template_registry.register(
+        Template(name="footer", template="Answer as {{ name }}.")
+    )
+    environment.template_registry.register(
+        Template(name="system", template=SYSTEM_TEMPLATE)
+    )
+    session = Session(environment=environment)
+    config = Config(
+        name="bench",
+        description="Benchmark agent",
+        system_template="system",
+        llm_model="test-model",
+        tools=[],
+    )
+    agent = Agent(session=session, config=config)
+    task = Task(
+        name="bench_task",
+        description="Benchmark",
+        parameters={},
+        prompt="Answer",
+        tools=[],
+    )
+    agent.stack.add_interaction(TaskDefinition(stack=agent.stack, task=task))
+    return PromptRenderer(agent)
+
+
+@pytest.mark.slow
+def test_system_prompt_rendering_throughput():
+    """Rendering a cached template is faster than compiling it each time."""
+    renderer = _make_renderer(templates=50)
+    inputs = {"rules": [f"rule {i}" for i in range(10)], "name": "bench"}
+    expected = renderer.render_system_prompt(inputs)
+    assert expected.startswith("You are bench.")
+    assert expected.endswith("Answer as bench.")
+
+    renders = 2000
+    start = time.perf_counter()
+    for _ in range(renders):
+        assert renderer.render_system_prompt(inputs) == expected
+    cached = renders / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(renders // 10):
+        clear_jinja_cache()
+        renderer.render_system_prompt(inputs)
+    uncached = renders // 10 / (time.perf_counter() - start)
+
+    print(
+        f"\nsystem prompt: {cached:.0f} renders/s cached, "
+        f"{uncached:.0f} renders/s compiling every time"
+    )
+    assert cached > uncached
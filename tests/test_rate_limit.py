@@ -0,0 +1,229 @@
+"""Tests for the rate limiting of model calls."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from gimle.hugin.llm.completion import achat_completion, chat_completion
+from gimle.hugin.llm.models.model import Model, ModelResponse
+from gimle.hugin.llm.models.model_registry import (
+    ModelRegistry,
+    get_model_registry,
+)
+from gimle.hugin.llm.models.rate_limit import (
+    DEFAULT_BACKOFF,
+    RateLimiter,
+    RateLimits,
+    TokenBucket,
+    retry_after,
+)
+
+
+class RateLimitError(Exception):
+    """Error like the ones the provider SDKs raise on HTTP 429."""
+
+    status_code = 429
+
+    def __init__(self, headers):
+        """Initialize the error with the response headers."""
+        super().__init__("Rate limited")
+        self.response = SimpleNamespace(headers=headers)
+
+
+class CountingModel(Model):
+    """Model that tracks how many calls run at once."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        super().__init__(config={"model": "limited-test"})
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def chat_completion(self, system_prompt, messages, tools=None):
+        """Hold the call for a moment."""
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return ModelResponse(
+            role="assistant", content="Hi", input_tokens=10, output_tokens=5
+        )
+
+
+@pytest.fixture
+def limited_model():
+    """Register a model with a concurrency limit of two."""
+    model = CountingModel()
+    registry = get_model_registry()
+    registry.register_model("limited-test", model)
+    registry.set_rate_limits("limited-test", RateLimits(max_concurrency=2))
+    yield model
+    registry.models.pop("limited-test")
+    registry.rate_limits.pop("limited-test")
+    registry._rate_limiters.pop("limited-test", None)
+
+
+class TestTokenBucket:
+    """Test the token bucket."""
+
+    def test_take_on_credit(self):
+        """Test that units beyond the burst are waited for."""
+        bucket = TokenBucket(per_minute=60)
+        now = time.monotonic()
+        bucket.refill(now)
+        assert bucket.take(60) == 0.0
+        assert bucket.take(2) == pytest.approx(2.0)
+
+        bucket.refill(now + 2)
+        assert bucket.available == pytest.approx(0.0)
+        assert bucket.take(1, scale=0.5) == pytest.approx(2.0)
+
+    def test_refill_is_capped(self):
+        """Test that unused units do not accumulate beyond the burst."""
+        bucket = TokenBucket(per_minute=60)
+        bucket.refill(time.monotonic() + 600)
+        assert bucket.available == 60
+
+
+class TestRetryAfter:
+    """Test the detection of rate limit errors."""
+
+    def test_retry_after(self):
+        """Test reading the retry-after header."""
+        assert retry_after(RateLimitError({"retry-after": "3"})) == 3.0
+        assert retry_after(RateLimitError({})) == DEFAULT_BACKOFF
+        assert retry_after(ValueError("Bad request")) is None
+
+
+class TestRateLimiter:
+    """Test waiting for the rate and concurrency limits."""
+
+    def test_input_tokens_wait(self):
+        """Test that a call waits once the input tokens are used up."""
+        limiter = RateLimiter(RateLimits(input_tokens_per_minute=6000))
+        with limiter.limit(6000) as call:
+            assert call.waited < 0.05
+        with limiter.limit(10) as call:
+            assert call.waited >= 0.09
+
+    def test_output_tokens_delay_next_call(self):
+        """Test that recorded output tokens count against the limit."""
+        limiter = RateLimiter(RateLimits(output_tokens_per_minute=6000))
+        with limiter.limit(10) as call:
+            call.record(
+                ModelResponse(
+                    role="assistant", content="Hi", output_tokens=6010
+                )
+            )
+        with limiter.limit(10) as call:
+            assert call.waited >= 0.09
+
+    def test_concurrency_limit(self):
+        """Test that at most max_concurrency calls run at once."""
+        limiter = RateLimiter(RateLimits(max_concurrency=2))
+        model = CountingModel()
+
+        def call():
+            with limiter.limit(10):
+                model.chat_completion("System", [])
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert model.max_running == 2
+        metrics = limiter.metrics()
+        assert metrics["requests"] == 6
+        assert metrics["queue_depth"] == 0
+        assert metrics["in_flight"] == 0
+        assert metrics["wait_seconds"] > 0
+
+    def test_async_concurrency_limit(self):
+        """Test that async calls respect the concurrency limit."""
+        limiter = RateLimiter(RateLimits(max_concurrency=2))
+        running = []
+        max_running = []
+
+        async def call():
+            async with limiter.alimit(10):
+                running.append(1)
+                max_running.append(len(running))
+                await asyncio.sleep(0.02)
+                running.pop()
+
+        async def main():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(main())
+        assert max(max_running) == 2
+        assert limiter.metrics()["requests"] == 6
+
+    def test_backoff_on_rate_limit_error(self):
+        """Test that a 429 pauses calls and lowers the rates."""
+        limiter = RateLimiter(RateLimits(requests_per_minute=600))
+        with pytest.raises(RateLimitError):
+            with limiter.limit(10):
+                raise RateLimitError({"retry-after": "0.1"})
+        assert limiter.rate_scale == 0.5
+
+        with limiter.limit(10) as call:
+            call.record(ModelResponse(role="assistant", content="Hi"))
+        assert call.waited >= 0.09
+        assert limiter.rate_scale > 0.5
+        metrics = limiter.metrics()
+        assert metrics["rate_limited"] == 1
+        assert metrics["requests"] == 2
+
+    def test_other_errors_do_not_back_off(self):
+        """Test that errors other than 429 leave the rates alone."""
+        limiter = RateLimiter(RateLimits(max_concurrency=1))
+        with pytest.raises(ValueError):
+            with limiter.limit(10):
+                raise ValueError("Bad request")
+        assert limiter.rate_scale == 1.0
+        assert limiter.metrics()["in_flight"] == 0
+
+
+class TestRegistryRateLimits:
+    """Test configuring rate limits in the model registry."""
+
+    def test_model_limits_override_provider(self):
+        """Test the resolution of model and provider limits."""
+        registry = ModelRegistry()
+        assert registry.get_rate_limiter("gpt-4o") is None
+
+        registry.set_rate_limits("openai", RateLimits(requests_per_minute=60))
+        registry.set_rate_limits("gpt-4o", RateLimits(max_concurrency=1))
+        model_limiter = registry.get_rate_limiter("gpt-4o")
+        provider_limiter = registry.get_rate_limiter("gpt-4o-mini")
+        assert model_limiter.limits.max_concurrency == 1
+        assert provider_limiter.limits.requests_per_minute == 60
+        assert registry.get_rate_limiter("gpt-4.1-nano") is provider_limiter
+        assert registry.get_rate_limiter("sonnet-latest") is None
+        assert set(registry.rate_limiter_metrics()) == {"openai", "gpt-4o"}
+
+    def test_chat_completion_is_limited(self, limited_model):
+        """Test that completions run through the limiter."""
+        threads = [
+            threading.Thread(
+                target=chat_completion,
+                args=("System", [], [], "limited-test"),
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        asyncio.run(achat_completion("System", [], [], "limited-test"))
+
+        assert limited_model.max_running == 2
+        metrics = get_model_registry().rate_limiter_metrics()
+        assert metrics["limited-test"]["requests"] == 6
@@ -0,0 +1,86 @@
+"""Benchmark: re-rendering a long stack only renders new interactions."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.interaction.ask_oracle import AskOracle
+from gimle.hugin.interaction.oracle_response import OracleResponse
+from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.llm.prompt.message import render_user_message
+from gimle.hugin.llm.prompt.prompt import Prompt
+
+from .memory_storage import MemoryStorage
+
+
+def _add_round(stack, i):
+    stack.add_interaction(
+        AskOracle(
+            stack=stack,
+            prompt=Prompt(type="text", text=f"question {i}"),
+            template_inputs={},
+        )
+    )
+    stack.add_interaction(
+        OracleResponse(
+            stack=stack,
+            response={"content": f"answer {i}", "tool_call": None},
+        )
+    )
+
+
+def _make_stack(size: int):
+    session = Session(environment=Environment(storage=MemoryStorage()))
+    config = Config(
+        name="bench",
+        description="Benchmark agent",
+        system_template="bench",
+        llm_model="test-model",
+        tools=[],
+    )
+    agent = Agent(session=session, config=config)
+    task = Task(
+        name="bench_task",
+        description="Benchmark",
+        parameters={},
+        prompt="Answer",
+        tools=[],
+    )
+    agent.stack.add_interaction(TaskDefinition(stack=agent.stack, task=task))
+    for i in range(size // 2):
+        _add_round(agent.stack, i)
+    return agent.stack
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", [1000, 5000, 10000])
+def test_rerender_renders_new_interactions_only(size):
+    """Rendering after one more round only renders the new round."""
+    stack = _make_stack(size)
+
+    with patch(
+        "gimle.hugin.interaction.stack.render_user_message",
+        wraps=render_user_message,
+    ) as user:
+        start = time.perf_counter()
+        stack.render_stack_context()
+        first = time.perf_counter() - start
+        assert user.call_count == size // 2
+
+        _add_round(stack, size)
+        start = time.perf_counter()
+        messages = stack.render_stack_context()
+        again = time.perf_counter() - start
+
+    print(
+        f"\n{size} interactions: first render {first * 1000:.1f}ms, "
+        f"re-render {again * 1000:.1f}ms"
+    )
+    assert len(messages) == size + 2
+    assert user.call_count == size // 2 + 1
@@ -0,0 +1,204 @@
+"""Tests for running batches of sessions in worker processes."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from gimle.hugin.cli import run_batch as run_batch_module
+from gimle.hugin.cli.run_batch import (
+    COMPLETED,
+    FAILED,
+    MAX_STEPS,
+    BatchItem,
+    BatchOptions,
+    BatchResult,
+    _Worker,
+    load_batch,
+    percentile,
+    run_batch,
+    run_item,
+    summarize,
+    worker_storage_path,
+)
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def _make_agent_dir(tmp_path: Path) -> Path:
+    agent_dir = tmp_path / "agent_pkg"
+    _write(
+        agent_dir / "configs" / "config.yaml",
+        "\n".join(
+            [
+                "name: test_config",
+                "description: test config",
+                "system_template: system",
+                "llm_model: fake:finish",
+                "tools: []",
+                "",
+            ]
+        ),
+    )
+    _write(
+        agent_dir / "tasks" / "task.yaml",
+        "\n".join(
+            [
+                "name: test_task",
+                "description: test task",
+                "parameters:",
+                "  topic:",
+                "    type: string",
+                "    description: Topic",
+                "    required: true",
+                "prompt: |",
+                "  Write about {{ topic }}",
+                "",
+            ]
+        ),
+    )
+    return agent_dir
+
+
+class TestLoadBatch:
+    """Test reading batch files."""
+
+    def test_load_batch(self, tmp_path):
+        """Test that items are read in order, with line numbers as ids."""
+        batch = tmp_path / "batch.jsonl"
+        batch.write_text(
+            '{"task": "a", "parameters": {"x": 1}}\n'
+            "\n"
+            '{"task": "b", "config": "c", "id": "second"}\n'
+        )
+
+        items = load_batch(str(batch))
+
+        assert items == [
+            BatchItem(task="a", parameters={"x": 1}, id="1"),
+            BatchItem(task="b", config="c", id="second"),
+        ]
+
+    @pytest.mark.parametrize(
+        "line,message",
+        [
+            ("not json", "invalid JSON"),
+            ('{"config": "c"}', "expected an object with a task"),
+            ('{"task": "a", "model": "m"}', "unknown keys"),
+        ],
+    )
+    def test_invalid_lines(self, tmp_path, line, message):
+        """Test that invalid lines are rejected with their line number."""
+        batch = tmp_path / "batch.jsonl"
+        batch.write_text('{"task": "a"}\n' + line + "\n")
+
+        with pytest.raises(ValueError, match=f"Line 2: {message}"):
+            load_batch(str(batch))
+
+    def test_worker_storage_path(self):
+        """Test that each worker gets a storage next to the shared one."""
+        assert worker_storage_path("runs", 42) == str(Path("runs/worker-42"))
+        assert worker_storage_path("runs/hugin.db", 42) == str(
+            Path("runs/hugin-worker-42.db")
+        )
+
+
+class TestSummary:
+    """Test summarizing batch results."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [float(value) for value in range(1, 101)]
+
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([3.0], 90) == 3.0
+        assert percentile([], 50) == 0.0
+
+    def test_summarize(self):
+        """Test that the summary counts statuses, retries and tokens."""
+        results = [
+            BatchResult(0, "1", COMPLETED, seconds=1.0, steps=3, tokens=100),
+            BatchResult(1, "2", MAX_STEPS, seconds=2.0, steps=5, tokens=300),
+            BatchResult(2, "3", FAILED, attempts=3, seconds=3.0, error="x"),
+        ]
+
+        summary = summarize(results, seconds=2.0)
+
+        assert summary["sessions"] == 3
+        assert summary[COMPLETED] == 1
+        assert summary[MAX_STEPS] == 1
+        assert summary[FAILED] == 1
+        assert summary["retries"] == 2
+        assert summary["sessions_per_second"] == 1.5
+        assert summary["latency_p50"] == 2.0
+        assert summary["latency_max"] == 3.0
+        assert summary["tokens"] == 400
+        assert summary["tokens_per_second"] == 200.0
+
+
+class TestRunBatch:
+    """Test running batches on worker processes."""
+
+    def test_run_batch(self, tmp_path):
+        """Test that sessions run on workers and failures are retried."""
+        agent_dir = _make_agent_dir(tmp_path)
+        items = [
+            BatchItem(task="test_task", parameters={"topic": t}, id=t)
+            for t in ["a", "b", "c"]
+        ] + [BatchItem(task="missing_task", id="missing")]
+        results_path = tmp_path / "results.jsonl"
+
+        with open(results_path, "w", encoding="utf-8") as results_file:
+            results = run_batch(
+                items,
+                BatchOptions(
+                    task_path=str(agent_dir),
+                    storage_path=str(tmp_path / "storage"),
+                    per_worker_storage=True,
+                    max_steps=20,
+                ),
+                workers=2,
+                retries=1,
+                output=None,
+                results_file=results_file,
+            )
+
+        assert [result.id for result in results] == ["a", "b", "c", "missing"]
+        assert all(result.status != FAILED for result in results[:3])
+        assert all(result.session_id for result in results[:3])
+        assert results[3].status == FAILED
+        assert results[3].attempts == 2
+        assert "missing_task" in results[3].error
+        written = [
+            json.loads(line) for line in results_path.read_text().splitlines()
+        ]
+        assert sorted(result["id"] for result in written) == [
+            "a",
+            "b",
+            "c",
+            "missing",
+        ]
+        assert list((tmp_path / "storage").glob("worker-*"))
+
+    def test_cache_is_cleared_between_items(self, tmp_path, monkeypatch):
+        """Test that a worker does not keep finished sessions in memory."""
+        agent_dir = _make_agent_dir(tmp_path)
+        worker = _Worker(
+            BatchOptions(
+                task_path=str(agent_dir),
+                storage_path=str(tmp_path / "storage"),
+                max_steps=20,
+            ),
+            model=None,
+        )
+        monkeypatch.setattr(run_batch_module, "_worker", worker)
+
+        for index in range(5):
+            item = BatchItem(task="test_task", parameters={"topic": "a"})
+            assert run_item(index, item).status == COMPLETED
+
+        assert len(worker.storage.store) == 0
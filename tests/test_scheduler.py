@@ -0,0 +1,148 @@
+"""Tests for scheduling the agents of a session."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.scheduler import Budget, Scheduler, Usage
+from gimle.hugin.agent.session import Session
+from gimle.hugin.interaction.oracle_response import OracleResponse
+
+from .memory_storage import MemoryStorage
+
+
+def _agent(session, name, steps=None, calls=None):
+    """Add an agent that has activity for a number of steps, or always."""
+    config = Config(
+        name=name,
+        description="Test agent",
+        system_template="You are a helpful assistant.",
+        tools=[],
+    )
+    agent = Agent(session=session, config=config)
+
+    def step():
+        if calls is not None:
+            calls.append(name)
+        return steps is None or calls.count(name) <= steps
+
+    interaction = Mock()
+    interaction.step.side_effect = step
+    interaction.artifacts = []
+    agent.stack.add_interaction(interaction)
+    session.add_agent(agent)
+    return agent
+
+
+def _session(scheduler):
+    return Session(
+        environment=Environment(storage=MemoryStorage()), scheduler=scheduler
+    )
+
+
+class TestScheduler:
+    """Test ranking agents and parking them."""
+
+    def test_priority_classes_step_first(self):
+        """Test that lower priority agents wait for higher ones."""
+        scheduler = Scheduler(max_agents=1)
+        scheduler.set_share("orchestrator", priority=1)
+        session = _session(scheduler)
+        calls = []
+        _agent(session, "worker", steps=1, calls=calls)
+        _agent(session, "orchestrator", steps=2, calls=calls)
+
+        session.run()
+
+        assert calls[:3] == ["orchestrator", "orchestrator", "orchestrator"]
+        assert calls[3] == "worker"
+
+    def test_weighted_fair_share(self):
+        """Test that agents of a class share the steps by weight."""
+        scheduler = Scheduler(max_agents=1)
+        scheduler.set_share("heavy", weight=2.0)
+        session = _session(scheduler)
+        calls = []
+        _agent(session, "heavy", calls=calls)
+        _agent(session, "light", calls=calls)
+
+        assert session.run(max_steps=9) == 9
+
+        assert calls.count("heavy") == 6
+        assert calls.count("light") == 3
+
+    def test_new_agents_start_even_with_their_class(self):
+        """Test that a new agent does not get the steps it missed."""
+        scheduler = Scheduler(max_agents=1)
+        session = _session(scheduler)
+        calls = []
+        _agent(session, "first", calls=calls)
+        session.run(max_steps=4)
+        _agent(session, "second", calls=calls)
+
+        session.run(max_steps=4)
+
+        assert calls[4:] == ["first", "second", "first", "second"]
+
+    def test_budget_parks_agent(self):
+        """Test that an agent over budget is parked until it is raised."""
+        scheduler = Scheduler(budget=Budget(max_steps=2))
+        session = _session(scheduler)
+        agent = _agent(session, "worker")
+
+        assert session.run() == 2
+        assert scheduler.parked == {agent.id}
+        assert scheduler.get_usage(agent.id).steps == 2
+
+        scheduler.set_budget("worker", Budget(max_steps=3))
+
+        assert session.run() == 1
+        assert scheduler.parked == {agent.id}
+
+    def test_token_budget(self):
+        """Test that the tokens of oracle responses count to the budget."""
+        session = _session(Scheduler())
+        agent = _agent(session, "worker")
+        responses = [
+            OracleResponse(
+                stack=agent.stack,
+                response={"input_tokens": 100, "output_tokens": 20},
+            ),
+            OracleResponse(stack=agent.stack, response={"content": "text"}),
+        ]
+        scheduler = Scheduler(budget=Budget(max_tokens=200))
+
+        scheduler.record(agent, True, 0.5, Scheduler.count_tokens(responses))
+        assert not scheduler.is_parked(agent)
+        scheduler.record(agent, True, 0.5, Scheduler.count_tokens(responses))
+
+        assert scheduler.get_usage(agent.id) == Usage(
+            steps=2, seconds=1.0, tokens=240
+        )
+        assert scheduler.is_parked(agent)
+
+    def test_token_budget_counts_cached_input(self):
+        """Test that cached input tokens count to the budget."""
+        session = _session(Scheduler())
+        agent = _agent(session, "worker")
+        responses = [
+            OracleResponse(
+                stack=agent.stack,
+                response={
+                    "input_tokens": 10,
+                    "cache_read_tokens": 900,
+                    "cache_write_tokens": 50,
+                    "output_tokens": 20,
+                },
+            )
+        ]
+
+        assert Scheduler.count_tokens(responses) == 980
+
+    def test_invalid_share(self):
+        """Test that weights must be positive."""
+        with pytest.raises(ValueError, match="weight must be > 0"):
+            Scheduler().set_share("worker", weight=0)
@@ -1,5 +1,7 @@
 """Tests for Session functionality and full flow integration."""
 
+import threading
+import time
 from unittest.mock import Mock, patch
 
 import pytest
@@ -14,6 +16,8 @@ from gimle.hugin.artifacts.text import Text
 from gimle.hugin.interaction.ask_oracle import AskOracle
 from gimle.hugin.interaction.task_definition import TaskDefinition
 from gimle.hugin.interaction.tool_result import ToolResult
+from gimle.hugin.llm.models.model import Model, ModelResponse
+from gimle.hugin.llm.models.model_registry import get_model_registry
 from gimle.hugin.llm.prompt.prompt import Prompt
 from gimle.hugin.tools.tool import Tool
 
@@ -959,6 +963,34 @@ class TestSessionRun:
         assert step_count == 5
         assert mock_interaction.step.call_count == 5
 
+    def test_step_callback_error_skips_save(self):
+        """Test that a callback raising stops the run before the save."""
+        storage = MemoryStorage()
+        session = Session(environment=Environment(storage=storage))
+        agent = Agent(
+            session=session,
+            config=Config(
+                name="test-agent",
+                description="Test agent",
+                system_template="You are a helpful assistant.",
+                tools=[],
+            ),
+        )
+        mock_interaction = Mock()
+        mock_interaction.step.return_value = True
+        mock_interaction.artifacts = []
+        agent.stack.add_interaction(mock_interaction)
+        session.add_agent(agent)
+
+        def stop(step, agent):
+            raise RuntimeError("Stop")
+
+        with patch.object(storage, "save_session") as save_session:
+            with pytest.raises(RuntimeError):
+                session.run(step_callback=stop)
+
+        save_session.assert_not_called()
+
     def test_session_run_with_multiple_agents(self):
         """Test session.run() with multiple agents."""
         storage = MemoryStorage()
@@ -1165,3 +1197,126 @@ class TestSessionRun:
         # step() should have been called 3 times total
         # (once more after the last True to get the False)
         assert call_count[0] == 3
+
+
+class BarrierModel(Model):
+    """Model whose calls only return once all agents are calling it."""
+
+    def __init__(self, agents, timeout):
+        """Initialize the barrier for the number of agents."""
+        super().__init__(config={"model": "barrier-test"})
+        self.barrier = threading.Barrier(agents, timeout=timeout)
+
+    def chat_completion(self, system_prompt, messages, tools=None):
+        """Sleep at the barrier, which breaks if the calls are serial."""
+        time.sleep(0.01)
+        self.barrier.wait()
+        return ModelResponse(
+            role="assistant",
+            content={"finish_type": "success", "result": "done"},
+            tool_call="builtins.finish",
+            tool_call_id=threading.current_thread().name,
+        )
+
+
+class TestSessionParallel:
+    """Test stepping agents in parallel threads."""
+
+    @staticmethod
+    def _session(agents, timeout=5):
+        model = BarrierModel(agents, timeout)
+        get_model_registry().register_model("barrier-test", model)
+        session = Session(environment=Environment(storage=MemoryStorage()))
+        for index in range(agents):
+            session.create_agent_from_task(
+                Config(
+                    name=f"agent-{index}",
+                    description="Test agent",
+                    system_template="You are a helpful assistant.",
+                    tools=["builtins.finish"],
+                    llm_model="barrier-test",
+                ),
+                Task(
+                    name="task",
+                    description="Test task",
+                    parameters={},
+                    prompt="Finish the task.",
+                    tools=["builtins.finish"],
+                ),
+            )
+        return session
+
+    @pytest.fixture(autouse=True)
+    def unregister_model(self):
+        """Remove the barrier model after each test."""
+        yield
+        get_model_registry().models.pop("barrier-test", None)
+
+    def test_run_steps_agents_in_parallel(self):
+        """Test that all LLM calls of a step run at the same time."""
+        session = self._session(agents=4)
+        steps = session.run(max_steps=20, max_workers=4)
+
+        assert steps > 0
+        for agent in session.agents:
+            types = [type(i).__name__ for i in agent.stack.interactions]
+            assert "TaskResult" in types
+
+    def test_serial_step_breaks_barrier(self):
+        """Test that without workers the calls happen one after another."""
+        session = self._session(agents=2, timeout=0.2)
+        session.step()
+        with pytest.raises(threading.BrokenBarrierError):
+            session.step()
+
+    def test_step_results_keep_agent_order(self):
+        """Test that callbacks follow the agents, not thread timing."""
+        session = self._session(agents=3)
+        calls = []
+        session.run(
+            max_steps=1,
+            max_workers=3,
+            step_callback=lambda step, agent: calls.append(agent),
+        )
+        assert calls == session.agents
+
+    def test_parallel_step_raises_agent_error(self):
+        """Test that a failing agent raises after the others stepped."""
+        session = Session(environment=Environment())
+        agents = []
+        for index, result in enumerate([RuntimeError("Failed"), True]):
+            agent = Agent(
+                session=session,
+                config=Config(
+                    name=f"agent-{index}",
+                    description="Test agent",
+                    system_template="You are a helpful assistant.",
+                    tools=[],
+                ),
+            )
+            interaction = Mock()
+            interaction.step.side_effect = [result]
+            agent.stack.add_interaction(interaction)
+            session.add_agent(agent)
+            agents.append(interaction)
+
+        with pytest.raises(RuntimeError):
+            session.step(max_workers=2)
+        assert agents[1].step.called
+
+    def test_stepper_reuses_thread_pool(self):
+        """Test that stepping through a stepper keeps one thread pool."""
+        session = self._session(agents=2)
+        threads = set()
+        original = Agent.step
+
+        def step(agent):
+            threads.add(threading.current_thread())
+            return original(agent)
+
+        with patch.object(Agent, "step", step):
+            with session.stepper(max_workers=2) as stepper:
+                for _ in range(3):
+                    stepper()
+
+        assert len(threads) <= 2
@@ -1,5 +1,7 @@
 """Tests for SessionState."""
 
+import threading
+
 import pytest
 
 from gimle.hugin.agent.config import Config
@@ -351,3 +353,26 @@ def test_stack_helper_methods(session, agent_config):
         "key2", namespace="test_namespace", default=None
     )
     assert result is None
+
+
+def test_update_is_atomic(session, agent_config):
+    """Test that concurrent updates from threads are not lost."""
+    task = Task(name="test", description="test", prompt="test", parameters={})
+    agent = session.create_agent_from_task(agent_config, task)
+
+    def increment():
+        for _ in range(200):
+            agent.stack.update_shared_state(
+                "count", lambda count: count + 1, default=0
+            )
+
+    threads = [threading.Thread(target=increment) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert agent.stack.get_shared_state("count") == 1600
+    session.state.create_namespace("private", agent_ids=[])
+    with pytest.raises(PermissionError):
+        session.state.update("private", "count", lambda c: c, agent.id)
@@ -0,0 +1,323 @@
+"""Tests for SqliteStorage."""
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.artifacts.artifact import Artifact
+from gimle.hugin.artifacts.feedback import ArtifactFeedback
+from gimle.hugin.artifacts.query_engine import ArtifactQueryEngine
+from gimle.hugin.artifacts.text import Text
+from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.interaction.waiting import Waiting
+from gimle.hugin.storage.factory import create_storage
+from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.storage.sqlite import SqliteStorage, is_sqlite_path
+
+
+def _make_session(storage):
+    """Create a session with one agent holding one task definition."""
+    environment = Environment(storage=storage)
+    session = Session(environment=environment)
+    config = Config(
+        name="test-agent",
+        description="Test",
+        system_template="test",
+        tools=[],
+        llm_model="test-model",
+    )
+    agent = Agent(session=session, config=config)
+    task = Task(
+        name="test_task",
+        description="Test",
+        parameters={},
+        prompt="Do something",
+        tools=[],
+    )
+    task_def = TaskDefinition(stack=agent.stack, task=task)
+    agent.stack.add_interaction(task_def)
+    session.add_agent(agent)
+    return session, agent, task_def
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Create a SQLite storage in a temporary directory."""
+    storage = SqliteStorage(tmp_path / "storage.db")
+    yield storage
+    storage.close()
+
+
+class TestSqliteStorage:
+    """Test the Storage contract on SqliteStorage."""
+
+    def test_uses_wal_mode(self, storage):
+        """Test that the database runs in WAL mode."""
+        mode = storage._fetchone("PRAGMA journal_mode")
+        assert mode == ("wal",)
+
+    def test_save_and_load_session_round_trip(self, storage, tmp_path):
+        """Test that a saved session loads back from a fresh connection."""
+        session, agent, task_def = _make_session(storage)
+        artifact = Text(interaction=task_def, content="hello")
+        task_def.add_artifact(artifact)
+        storage.save_session(session)
+
+        fresh = SqliteStorage(tmp_path / "storage.db")
+        loaded = fresh.load_session(
+            session.uuid, environment=Environment(storage=fresh)
+        )
+
+        assert loaded.uuid == session.uuid
+        loaded_agent = loaded.agents[0]
+        assert loaded_agent.uuid == agent.uuid
+        assert loaded_agent.config.name == "test-agent"
+        loaded_interaction = loaded_agent.stack.interactions[0]
+        assert loaded_interaction.uuid == task_def.uuid
+        assert loaded_interaction.artifacts[0].content == "hello"
+        fresh.close()
+
+    def test_list_objects(self, storage):
+        """Test that list methods return saved objects."""
+        session, agent, task_def = _make_session(storage)
+        artifact = Artifact(interaction=task_def)
+        task_def.add_artifact(artifact)
+        storage.save_session(session)
+
+        assert storage.list_sessions() == [session.uuid]
+        assert storage.list_agents() == [agent.uuid]
+        assert storage.list_interactions() == [task_def.uuid]
+        assert storage.list_artifacts() == [artifact.uuid]
+
+    def test_load_missing_raises(self, storage):
+        """Test that loading a missing object raises ValueError."""
+        with pytest.raises(ValueError):
+            storage.load_artifact("missing")
+        with pytest.raises(ValueError):
+            storage.load_feedback("missing")
+        with pytest.raises(FileNotFoundError):
+            storage.load_file("files/missing")
+
+    def test_callbacks_fire_after_commit(self, tmp_path):
+        """Test that callbacks fire in save order once data is committed."""
+        calls = []
+        db_path = tmp_path / "storage.db"
+
+        def callback(kind, uuid):
+            # A second connection must already see the saved object
+            reader = SqliteStorage(db_path)
+            if kind == "interaction":
+                assert uuid in reader.list_interactions()
+            reader.close()
+            calls.append((kind, uuid))
+
+        storage = SqliteStorage(db_path, callback=callback)
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+
+        assert calls == [
+            ("interaction", task_def.id),
+            ("agent", agent.id),
+            ("session", session.id),
+        ]
+        storage.close()
+
+    def test_failed_save_rolls_back(self, storage):
+        """Test that a failing step leaves no partial writes behind."""
+        session, agent, task_def = _make_session(storage)
+
+        def fail(interaction):
+            raise RuntimeError("boom")
+
+        storage._save_interaction = fail
+        with pytest.raises(RuntimeError):
+            storage.save_session(session)
+
+        assert storage.list_sessions() == []
+        assert storage.list_agents() == []
+
+    def test_incremental_save(self, storage):
+        """Test that an unchanged agent is not rewritten."""
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        before = storage._fetchone(
+            "SELECT updated_at FROM agents WHERE uuid = ?", (agent.uuid,)
+        )
+
+        storage.save_session(session)
+        after = storage._fetchone(
+            "SELECT updated_at FROM agents WHERE uuid = ?", (agent.uuid,)
+        )
+        assert before == after
+
+        agent.stack.add_interaction(Waiting(stack=agent.stack))
+        storage.save_session(session)
+        assert len(storage.list_interactions()) == 2
+
+    def test_delete_session_cascades(self, storage):
+        """Test that deleting a session removes all its rows."""
+        session, agent, task_def = _make_session(storage)
+        artifact = Artifact(interaction=task_def)
+        task_def.add_artifact(artifact)
+        storage.save_session(session)
+        storage.save_feedback(
+            ArtifactFeedback(artifact_id=artifact.uuid, rating=4)
+        )
+
+        storage.delete_session(session)
+
+        assert storage.list_sessions() == []
+        assert storage.list_agents() == []
+        assert storage.list_interactions() == []
+        assert storage.list_artifacts() == []
+        assert storage.list_feedback() == []
+
+    def test_feedback(self, storage):
+        """Test saving, listing and rating feedback by artifact."""
+        fb1 = ArtifactFeedback(artifact_id="art-1", rating=5)
+        fb2 = ArtifactFeedback(artifact_id="art-1", rating=3)
+        fb3 = ArtifactFeedback(artifact_id="art-2", rating=1)
+        for fb in (fb1, fb2, fb3):
+            storage.save_feedback(fb)
+
+        assert sorted(storage.list_feedback("art-1")) == sorted(
+            [fb1.id, fb2.id]
+        )
+        assert len(storage.list_feedback()) == 3
+        assert storage.load_feedback(fb3.id).rating == 1
+        ratings = storage.load_feedback_ratings()
+        assert sorted(ratings["art-1"]) == [3, 5]
+        assert ratings["art-2"] == [1]
+
+        storage.delete_feedback(fb1)
+        assert storage.list_feedback("art-1") == [fb2.id]
+
+    def test_files(self, storage):
+        """Test saving and loading file content."""
+        path = storage.save_file("abc", b"\x00binary", "bin")
+        assert path == "files/abc.bin"
+        assert storage.load_file(path) == b"\x00binary"
+
+
+class TestSqliteStorageQueries:
+    """Test the indexed queries of SqliteStorage."""
+
+    def test_query_artifacts_by_type_and_age(self, storage):
+        """Test filtering artifacts by type and sorting newest first."""
+        session, agent, task_def = _make_session(storage)
+        old = Text(
+            interaction=task_def,
+            content="old",
+            created_at="2024-01-01T00:00:00",
+        )
+        new = Text(
+            interaction=task_def,
+            content="new",
+            created_at="2025-01-01T00:00:00",
+        )
+        other = Artifact(interaction=task_def)
+        for artifact in (old, new, other):
+            task_def.add_artifact(artifact)
+        storage.save_session(session)
+
+        assert storage.query_artifacts(
+            artifact_type="Text", newest_first=True
+        ) == [new.uuid, old.uuid]
+        assert storage.query_artifacts(newest_first=True, limit=1) == [
+            other.uuid
+        ]
+        assert sorted(storage.list_agent_artifacts(agent.uuid)) == sorted(
+            [old.uuid, new.uuid, other.uuid]
+        )
+
+    def test_query_engine_uses_index(self, storage):
+        """Test that the query engine only loads the artifacts it needs."""
+        session, agent, task_def = _make_session(storage)
+        for i in range(5):
+            task_def.add_artifact(
+                Text(
+                    interaction=task_def,
+                    content=f"note {i}",
+                    created_at=f"2025-01-0{i + 1}T00:00:00",
+                )
+            )
+        storage.save_session(session)
+        storage.save_feedback(
+            ArtifactFeedback(artifact_id=task_def.artifacts[4].uuid, rating=5)
+        )
+        storage.store.clear()
+
+        engine = ArtifactQueryEngine(storage)
+        results = engine.list_recent_artifacts(limit=2)
+
+        assert [r.content_preview for r in results] == ["note 4", "note 3"]
+        assert results[0].metadata["rating_count"] == 1
+        loaded = [key for key in storage.store if key.startswith("artifact:")]
+        assert len(loaded) == 2
+
+    def test_metadata_for_monitor(self, storage):
+        """Test lightweight metadata and agent summaries."""
+        session, agent, task_def = _make_session(storage)
+        artifact = Text(interaction=task_def, content="preview me")
+        task_def.add_artifact(artifact)
+        storage.save_session(session)
+
+        assert storage.load_artifact_metadata(artifact.uuid)["preview"] == (
+            "preview me"
+        )
+        raw = storage.load_interaction_metadata(task_def.uuid)
+        assert raw["type"] == "TaskDefinition"
+        assert storage.load_agent_metadata(agent.uuid)["uuid"] == agent.uuid
+        assert storage.load_session_metadata(session.uuid)["agents"] == [
+            agent.uuid
+        ]
+
+        summaries = storage.list_agent_summaries(session_id=session.uuid)
+        assert len(summaries) == 1
+        assert summaries[0]["id"] == agent.uuid
+        assert summaries[0]["config_name"] == "test-agent"
+        assert summaries[0]["num_interactions"] == 1
+
+    def test_list_changes(self, storage):
+        """Test listing objects written after a timestamp."""
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        (since,) = storage._fetchone("SELECT MAX(updated_at) FROM sessions")
+
+        waiting = Waiting(stack=agent.stack)
+        agent.stack.add_interaction(waiting)
+        storage.save_session(session)
+
+        changed = {
+            (kind, uuid) for kind, uuid, _ in storage.list_changes(since - 1)
+        }
+        assert ("interaction", waiting.uuid) in changed
+        assert storage.list_changes(float("inf")) == []
+
+
+class TestCreateStorage:
+    """Test picking the storage backend from a storage path."""
+
+    def test_sqlite_suffix(self, tmp_path):
+        """Test that database suffixes open a SqliteStorage."""
+        assert is_sqlite_path("storage.db")
+        assert is_sqlite_path("storage.SQLITE3")
+        assert not is_sqlite_path("storage")
+        storage = create_storage(tmp_path / "storage.sqlite")
+        assert isinstance(storage, SqliteStorage)
+
+    def test_directory(self, tmp_path):
+        """Test that other paths open a LocalStorage."""
+        storage = create_storage(tmp_path / "storage")
+        assert isinstance(storage, LocalStorage)
+
+    def test_cache_entries(self, tmp_path):
+        """Test that cache_entries bounds the cache of the storage."""
+        storage = create_storage(tmp_path / "storage", cache_entries=3)
+        assert storage.store.max_entries == 3
+        storage = create_storage(tmp_path / "storage.db", cache_entries=3)
+        assert storage.store.max_entries == 3
+        storage.close()
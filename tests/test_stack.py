@@ -1,5 +1,6 @@
 """Tests for Stack functionality and full flow integration."""
 
+import copy
 from typing import Any, Dict
 from unittest.mock import Mock, patch
 
@@ -14,6 +15,10 @@ from gimle.hugin.interaction.task_result import TaskResult
 from gimle.hugin.interaction.tool_call import ToolCall
 from gimle.hugin.interaction.tool_result import ToolResult
 from gimle.hugin.interaction.waiting import Waiting
+from gimle.hugin.llm.prompt.message import (
+    render_assistant_message,
+    render_user_message,
+)
 from gimle.hugin.llm.prompt.prompt import Prompt
 from gimle.hugin.tools.tool import Tool, ToolResponse
 
@@ -1270,3 +1275,375 @@ class TestStackBranching:
         assert len(feature_context) == 2
         assert "Main question" in str(feature_context)
         assert "Feature question" in str(feature_context)
+
+
+class TestLazyStack:
+    """Test loading a stack lazily from storage."""
+
+    def _save_agent(self, n_rounds=20):
+        """Save an agent with a task, oracle rounds and waiting interactions."""
+        from gimle.hugin.agent.agent import Agent
+        from gimle.hugin.agent.config import Config
+        from gimle.hugin.agent.environment import Environment
+        from gimle.hugin.agent.session import Session
+        from gimle.hugin.artifacts.text import Text
+
+        from .memory_storage import MemoryStorage
+
+        storage = MemoryStorage()
+        session = Session(environment=Environment(storage=storage))
+        config = Config(
+            name="test-agent",
+            description="Test",
+            system_template="test",
+            tools=[],
+            llm_model="test-model",
+        )
+        agent = Agent(session=session, config=config)
+        session.add_agent(agent)
+        task = Task(
+            name="test_task",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=[],
+        )
+        agent.stack.add_interaction(
+            TaskDefinition(stack=agent.stack, task=task)
+        )
+        for i in range(n_rounds):
+            prompt = Prompt(type="text", text=f"question {i}")
+            agent.stack.add_interaction(
+                AskOracle(stack=agent.stack, prompt=prompt, template_inputs={})
+            )
+            agent.stack.add_interaction(
+                OracleResponse(
+                    stack=agent.stack,
+                    response={"content": f"answer {i}", "tool_call": None},
+                )
+            )
+            waiting = Waiting(stack=agent.stack)
+            agent.stack.add_interaction(waiting)
+            waiting.add_artifact(Text(interaction=waiting, content=f"{i}"))
+        storage.save_session(session)
+        return storage, session, agent
+
+    def _load(self, storage, session, agent):
+        """Load the agent back lazily, counting interaction loads."""
+        storage.store.clear()
+        storage.lazy_stacks = True
+        loads = []
+        load_interaction = storage._load_interaction
+
+        def counting_load(uuid, stack):
+            loads.append(uuid)
+            return load_interaction(uuid, stack)
+
+        storage._load_interaction = counting_load
+        return storage.load_agent(agent.uuid, session), loads
+
+    def test_loads_no_interactions_up_front(self):
+        """Test that loading the agent only creates stubs."""
+        from gimle.hugin.interaction.lazy import LazyInteractionList
+
+        storage, session, agent = self._save_agent()
+        loaded, loads = self._load(storage, session, agent)
+
+        assert isinstance(loaded.stack.interactions, LazyInteractionList)
+        assert len(loaded.stack.interactions) == 61
+        assert loads == []
+        assert loaded.stack.get_active_branches() == [None]
+
+    def test_lookups_load_only_what_they_need(self):
+        """Test that tail lookups load a window of the stack."""
+        storage, session, agent = self._save_agent()
+        loaded, loads = self._load(storage, session, agent)
+
+        last = loaded.stack.get_last_interaction_for_branch(None)
+        assert isinstance(last, Waiting)
+        assert loaded.stack.get_task_definition().name == "test_task"
+        assert len(loads) == 2
+
+        context = loaded.stack.render_stack_context()
+        # Waiting interactions are not rendered and stay unloaded
+        assert len(loads) == 2 + 40
+        assert context == agent.stack.render_stack_context()
+
+    def test_iteration_loads_interactions_and_artifacts(self):
+        """Test that full iteration loads everything on first access."""
+        storage, session, agent = self._save_agent(n_rounds=3)
+        loaded, loads = self._load(storage, session, agent)
+
+        interactions = list(loaded.stack.interactions)
+        assert [i.uuid for i in interactions] == [
+            i.uuid for i in agent.stack.interactions
+        ]
+        assert interactions[3].artifacts[0].content == "0"
+        assert len(loads) == 10
+
+    def test_save_after_append_writes_only_new_interactions(self):
+        """Test that saving a lazy stack keeps unloaded interactions."""
+        storage, session, agent = self._save_agent()
+        loaded, loads = self._load(storage, session, agent)
+        saved = []
+        save_interaction = storage._save_interaction
+
+        def counting_save(interaction):
+            saved.append(interaction.uuid)
+            save_interaction(interaction)
+
+        storage._save_interaction = counting_save
+        waiting = Waiting(stack=loaded.stack)
+        loaded.stack.add_interaction(waiting)
+        storage.save_agent(loaded)
+
+        assert saved == [waiting.uuid]
+        assert loads == []
+        data = storage._agents[agent.uuid]["stack"]
+        assert len(data["interactions"]) == 62
+        assert data["artifacts"] == agent.stack.to_dict()["artifacts"]
+
+    def test_rewind(self):
+        """Test rewinding a lazy stack loads only the removed interactions."""
+        storage, session, agent = self._save_agent()
+        loaded, loads = self._load(storage, session, agent)
+
+        removed = loaded.stack.rewind_to(57, storage=storage)
+        assert len(removed) == 3
+        assert len(loaded.stack.interactions) == 58
+        assert len(loads) == 3
+
+    def test_missing_interaction_is_skipped(self):
+        """Test that an interaction missing from storage is dropped."""
+        storage, session, agent = self._save_agent(n_rounds=2)
+        del storage._interactions[agent.stack.interactions[-1].uuid]
+        loaded, loads = self._load(storage, session, agent)
+
+        assert isinstance(
+            loaded.stack.get_last_interaction_for_branch(None), OracleResponse
+        )
+        assert len(loaded.stack.interactions) == 6
+
+    def test_stack_without_stubs_loads_eagerly(self):
+        """Test that stacks saved without stubs are loaded up front."""
+        storage, session, agent = self._save_agent(n_rounds=2)
+        data = storage._agents[agent.uuid]["stack"]
+        del data["interaction_types"]
+        loaded, loads = self._load(storage, session, agent)
+
+        assert isinstance(loaded.stack.interactions, list)
+        assert len(loads) == 7
+
+
+class TestRenderCache:
+    """Test memoized message rendering in render_stack_context."""
+
+    def _add_task(self, stack):
+        task = Task(
+            name="test_task",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=[],
+        )
+        stack.add_interaction(TaskDefinition(stack=stack, task=task))
+
+    def _add_round(self, stack, i):
+        prompt = Prompt(type="text", text=f"question {i}")
+        stack.add_interaction(
+            AskOracle(stack=stack, prompt=prompt, template_inputs={})
+        )
+        stack.add_interaction(
+            OracleResponse(
+                stack=stack,
+                response={"content": f"answer {i}", "tool_call": None},
+            )
+        )
+
+    def test_renders_each_interaction_once(self, mock_agent):
+        """Test that re-rendering only renders new interactions."""
+        stack = mock_agent.stack
+        self._add_task(stack)
+        for i in range(3):
+            self._add_round(stack, i)
+
+        with (
+            patch(
+                "gimle.hugin.interaction.stack.render_user_message",
+                wraps=render_user_message,
+            ) as user,
+            patch(
+                "gimle.hugin.interaction.stack.render_assistant_message",
+                wraps=render_assistant_message,
+            ) as assistant,
+        ):
+            first = stack.render_stack_context()
+            assert user.call_count == 3
+            assert assistant.call_count == 3
+
+            assert stack.render_stack_context() == first
+            self._add_round(stack, 3)
+            stack.render_stack_context()
+            assert user.call_count == 4
+            assert assistant.call_count == 4
+
+    def test_returns_copies(self, mock_agent):
+        """Test that modifying rendered content does not change the cache."""
+        stack = mock_agent.stack
+        self._add_task(stack)
+        self._add_round(stack, 0)
+        stack.render_stack_context()[0]["content"][0]["text"] = "changed"
+
+        assert stack.render_stack_context()[0]["content"][0]["text"] == (
+            "question 0"
+        )
+
+    def test_rewind_invalidates(self, mock_agent):
+        """Test that rewound interactions are dropped from the cache."""
+        stack = mock_agent.stack
+        self._add_task(stack)
+        for i in range(2):
+            self._add_round(stack, i)
+        stack.render_stack_context()
+        assert len(stack._render_cache) == 4
+
+        stack.rewind_to(2)
+        assert len(stack._render_cache) == 2
+        stack.invalidate_render_cache()
+        assert stack._render_cache == {}
+
+
+class TestToolsetCache:
+    """Test caching of the resolved tools of a stack."""
+
+    @pytest.fixture
+    def tools(self):
+        """Register two tools, one shown only in a context window of 1."""
+
+        @Tool.register(name="cache_tool1", description="Tool 1", parameters={})
+        def cache_tool1():
+            pass
+
+        @Tool.register(
+            name="cache_tool2",
+            description="Tool 2",
+            parameters={},
+            options={
+                "include_only_in_context_window": True,
+                "context_window": 1,
+            },
+        )
+        def cache_tool2():
+            pass
+
+        yield
+        Tool.registry.remove("cache_tool1")
+        Tool.registry.remove("cache_tool2")
+
+    def _add_task(self, stack, tools):
+        task = Task(
+            name="test_task",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=tools,
+        )
+        stack.add_interaction(TaskDefinition(stack=stack, task=task))
+
+    def test_tools_are_resolved_once(self, mock_agent, tools):
+        """Test that repeated lookups reuse the resolved toolset."""
+        stack = mock_agent.stack
+        self._add_task(stack, ["cache_tool1", "cache_tool2"])
+
+        with patch.object(Tool, "get_tool", wraps=Tool.get_tool) as get_tool:
+            for _ in range(3):
+                assert stack.get_tool("cache_tool1").name == "cache_tool1"
+                assert len(stack.get_tools()) == 2
+            stack.add_interaction(Waiting(stack=stack))
+            assert stack.get_tool("cache_tool2") is not None
+        assert get_tool.call_count == 2
+        assert stack.get_tool("missing") is None
+
+    def test_new_task_definition_invalidates(self, mock_agent, tools):
+        """Test that a new TaskDefinition changes the tools."""
+        stack = mock_agent.stack
+        self._add_task(stack, ["cache_tool1"])
+        assert list(stack.get_toolset()) == ["cache_tool1"]
+
+        self._add_task(stack, ["cache_tool2"])
+        assert list(stack.get_toolset()) == ["cache_tool2"]
+
+        # Also when the interaction list is changed directly
+        task = Task(
+            name="direct",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=["cache_tool1", "cache_tool2"],
+        )
+        stack.interactions.append(TaskDefinition(stack=stack, task=task))
+        assert len(stack.get_toolset()) == 2
+
+    def test_config_and_registry_changes(self, mock_agent, tools):
+        """Test that config and tool registry changes are picked up."""
+        stack = mock_agent.stack
+        self._add_task(stack, None)
+        mock_agent.config.tools = ["cache_tool1"]
+        assert list(stack.get_toolset()) == ["cache_tool1"]
+
+        config = copy.copy(mock_agent.config)
+        config.tools = ["cache_tool2"]
+        mock_agent.config = config
+        assert list(stack.get_toolset()) == ["cache_tool2"]
+
+        Tool.registry.remove("cache_tool2")
+        try:
+            assert stack.get_toolset() == {}
+        finally:
+            Tool.register(name="cache_tool2", description="", parameters={})(
+                lambda: None
+            )
+
+    def test_rewind_invalidates(self, mock_agent, tools):
+        """Test that rewinding past a TaskDefinition changes the tools."""
+        stack = mock_agent.stack
+        self._add_task(stack, ["cache_tool1"])
+        self._add_task(stack, ["cache_tool2"])
+        assert list(stack.get_toolset()) == ["cache_tool2"]
+
+        stack.rewind_to(0)
+        assert list(stack.get_toolset()) == ["cache_tool1"]
+
+    def test_context_window_uses_tool_options(self, mock_agent, tools):
+        """Test that only the last call of a windowed tool is rendered."""
+        stack = mock_agent.stack
+        self._add_task(stack, ["cache_tool2"])
+        for i in range(3):
+            stack.add_interaction(
+                AskOracle(
+                    stack=stack,
+                    prompt=Prompt(type="tool_result", tool_name="cache_tool2"),
+                    template_inputs={"result": f"result {i}"},
+                )
+            )
+            stack.add_interaction(
+                OracleResponse(
+                    stack=stack,
+                    response={
+                        "content": {},
+                        "tool_call": "cache_tool2",
+                        "tool_call_id": f"call_{i}",
+                    },
+                )
+            )
+
+        # The last result, with the call it answers and the next call
+        messages = stack.render_stack_context()
+        assert [m["role"] for m in messages] == [
+            "assistant",
+            "user",
+            "assistant",
+        ]
+        assert "call_1" in str(messages[0]["content"])
+        assert "result 2" in str(messages[1]["content"])
+        assert "result 1" not in str(messages)
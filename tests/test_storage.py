@@ -1,6 +1,9 @@
 """Tests for Storage functionality."""
 
 import json
+import threading
+
+import pytest
 
 from gimle.hugin.agent.agent import Agent
 from gimle.hugin.agent.config import Config
@@ -9,11 +12,24 @@ from gimle.hugin.agent.session import Session
 from gimle.hugin.agent.task import Task
 from gimle.hugin.artifacts.artifact import Artifact
 from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.interaction.waiting import Waiting
 from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.storage.sqlite import SqliteStorage
 
 from .memory_storage import MemoryStorage
 
 
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    """Create each storage backend the storage contract tests run on."""
+    if request.param == "memory":
+        yield MemoryStorage()
+        return
+    storage = SqliteStorage(tmp_path / "storage.db")
+    yield storage
+    storage.close()
+
+
 class TestMemoryStorage:
     """Test MemoryStorage basic functionality."""
 
@@ -73,9 +89,8 @@ class TestMemoryStorage:
 class TestStorageWithSessions:
     """Test Storage with full session serialization."""
 
-    def test_save_and_load_session_with_agents(self):
+    def test_save_and_load_session_with_agents(self, storage):
         """Test saving and loading a session with agents."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
@@ -115,9 +130,8 @@ class TestStorageWithSessions:
         assert loaded_session.agents[0].uuid == agent.uuid
         assert loaded_session.agents[0].config.name == "test-agent"
 
-    def test_save_and_load_session_with_multiple_agents(self):
+    def test_save_and_load_session_with_multiple_agents(self, storage):
         """Test saving and loading a session with multiple agents."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
@@ -178,9 +192,8 @@ class TestStorageWithSessions:
         assert loaded_session.agents[0].uuid == agent1.uuid
         assert loaded_session.agents[1].uuid == agent2.uuid
 
-    def test_storage_caching(self):
+    def test_storage_caching(self, storage):
         """Test that storage caches loaded objects."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
@@ -566,14 +579,13 @@ class TestLocalStorage:
 class TestStorageCallbacks:
     """Test Storage callback functionality."""
 
-    def test_callback_on_save_artifact(self):
+    def test_callback_on_save_artifact(self, storage):
         """Test that callback is called when artifact is saved."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -601,14 +613,13 @@ class TestStorageCallbacks:
         assert len(callback_calls) == 1
         assert callback_calls[0] == ("artifact", artifact.id)
 
-    def test_callback_on_save_interaction(self):
+    def test_callback_on_save_interaction(self, storage):
         """Test that callback is called when interaction is saved."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -635,14 +646,13 @@ class TestStorageCallbacks:
         assert len(callback_calls) == 1
         assert callback_calls[0] == ("interaction", task_def.id)
 
-    def test_callback_on_save_interaction_with_artifact(self):
+    def test_callback_on_save_interaction_with_artifact(self, storage):
         """Test that callback is called for artifacts when saving interaction."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -672,14 +682,13 @@ class TestStorageCallbacks:
         assert callback_calls[0] == ("artifact", artifact.id)
         assert callback_calls[1] == ("interaction", task_def.id)
 
-    def test_callback_on_save_agent(self):
+    def test_callback_on_save_agent(self, storage):
         """Test that callback is called when agent is saved."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -713,14 +722,13 @@ class TestStorageCallbacks:
             call[0] == "agent" for call in callback_calls
         ), f"Expected callback with 'agent', got: {callback_calls}"
 
-    def test_callback_on_save_session(self):
+    def test_callback_on_save_session(self, storage):
         """Test that callback is called when session is saved."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -731,23 +739,21 @@ class TestStorageCallbacks:
         assert len(callback_calls) == 1
         assert callback_calls[0] == ("session", session.id)
 
-    def test_callback_with_no_callback_set(self):
+    def test_callback_with_no_callback_set(self, storage):
         """Test that no error occurs when callback is not set."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
         # Should not raise an error
         storage.save_session(session)
 
-    def test_callback_on_save_session_with_agents(self):
+    def test_callback_on_save_session_with_agents(self, storage):
         """Test callback is called for session and nested agents."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -780,14 +786,13 @@ class TestStorageCallbacks:
         # Bug: currently calls with "interaction" instead of "agent"
         # assert any(call[0] == "agent" for call in callback_calls)
 
-    def test_callback_multiple_artifacts(self):
+    def test_callback_multiple_artifacts(self, storage):
         """Test callback is called for each artifact."""
         callback_calls = []
 
         def mock_callback(obj_type: str, obj_id: str):
             callback_calls.append((obj_type, obj_id))
 
-        storage = MemoryStorage()
         storage.callback = mock_callback
         environment = Environment(storage=storage)
         session = Session(environment=environment)
@@ -829,9 +834,8 @@ class TestStorageCallbacks:
 class TestStorageDelete:
     """Test Storage delete functionality."""
 
-    def test_delete_artifact(self):
+    def test_delete_artifact(self, storage):
         """Test deleting an artifact."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
         config = Config(
@@ -860,9 +864,8 @@ class TestStorageDelete:
         storage.delete_artifact(artifact)
         assert artifact.uuid not in storage.list_artifacts()
 
-    def test_delete_interaction(self):
+    def test_delete_interaction(self, storage):
         """Test deleting an interaction."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
         config = Config(
@@ -890,9 +893,8 @@ class TestStorageDelete:
         storage.delete_interaction(task_def)
         assert task_def.uuid not in storage.list_interactions()
 
-    def test_delete_interaction_with_artifacts(self):
+    def test_delete_interaction_with_artifacts(self, storage):
         """Test deleting an interaction also deletes its artifacts."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
         config = Config(
@@ -928,9 +930,8 @@ class TestStorageDelete:
         assert artifact1.uuid not in storage.list_artifacts()
         assert artifact2.uuid not in storage.list_artifacts()
 
-    def test_delete_agent(self):
+    def test_delete_agent(self, storage):
         """Test deleting an agent."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
         config = Config(
@@ -949,9 +950,8 @@ class TestStorageDelete:
         storage.delete_agent(agent)
         assert agent.uuid not in storage.list_agents()
 
-    def test_delete_agent_with_interactions(self):
+    def test_delete_agent_with_interactions(self, storage):
         """Test deleting an agent also deletes its interactions."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
         config = Config(
@@ -982,9 +982,8 @@ class TestStorageDelete:
         assert agent.uuid not in storage.list_agents()
         assert task_def.uuid not in storage.list_interactions()
 
-    def test_delete_agent_with_interactions_and_artifacts(self):
+    def test_delete_agent_with_interactions_and_artifacts(self, storage):
         """Test deleting an agent also deletes its interactions and artifacts."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
         config = Config(
@@ -1019,9 +1018,8 @@ class TestStorageDelete:
         assert task_def.uuid not in storage.list_interactions()
         assert artifact.uuid not in storage.list_artifacts()
 
-    def test_delete_session(self):
+    def test_delete_session(self, storage):
         """Test deleting a session."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
@@ -1033,9 +1031,8 @@ class TestStorageDelete:
         storage.delete_session(session)
         assert session.uuid not in storage.list_sessions()
 
-    def test_delete_session_with_agents(self):
+    def test_delete_session_with_agents(self, storage):
         """Test deleting a session also deletes its agents."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
@@ -1059,9 +1056,8 @@ class TestStorageDelete:
         assert session.uuid not in storage.list_sessions()
         assert agent.uuid not in storage.list_agents()
 
-    def test_delete_session_with_agents_and_interactions(self):
+    def test_delete_session_with_agents_and_interactions(self, storage):
         """Test deleting a session also deletes all agents, interactions, and artifacts."""
-        storage = MemoryStorage()
         environment = Environment(storage=storage)
         session = Session(environment=environment)
 
@@ -1294,3 +1290,524 @@ class TestLocalStorageDelete:
         assert not agent_path.exists()
         assert not interaction_path.exists()
         assert not artifact_path.exists()
+
+
+class CountingStorage(MemoryStorage):
+    """MemoryStorage that records every write it performs."""
+
+    def __init__(self) -> None:
+        """Initialize the counting storage."""
+        super().__init__()
+        self.writes: list = []
+
+    def _save_agent(self, agent: Agent) -> None:
+        self.writes.append(("agent", agent.uuid))
+        super()._save_agent(agent)
+
+    def _save_interaction(self, interaction) -> None:
+        self.writes.append(("interaction", interaction.uuid))
+        super()._save_interaction(interaction)
+
+    def _save_artifact(self, artifact: Artifact) -> None:
+        self.writes.append(("artifact", artifact.uuid))
+        super()._save_artifact(artifact)
+
+
+class TestIncrementalSave:
+    """Test that save_session only writes what changed."""
+
+    def _make_session(self, storage):
+        environment = Environment(storage=storage)
+        session = Session(environment=environment)
+        config = Config(
+            name="test-agent",
+            description="Test",
+            system_template="test",
+            tools=[],
+        )
+        agent = Agent(session=session, config=config)
+        task = Task(
+            name="test_task",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=[],
+        )
+        task_def = TaskDefinition(stack=agent.stack, task=task)
+        agent.stack.add_interaction(task_def)
+        session.add_agent(agent)
+        return session, agent, task_def
+
+    def test_new_objects_are_dirty_until_saved(self):
+        """Test that new objects are dirty and saving marks them clean."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        assert agent.is_dirty
+        assert agent.stack.is_dirty
+        assert task_def.is_dirty
+
+        storage.save_session(session)
+
+        assert not agent.is_dirty
+        assert not agent.stack.is_dirty
+        assert not task_def.is_dirty
+
+    def test_unchanged_session_writes_nothing_but_session(self):
+        """Test that re-saving an unchanged session skips agents."""
+        storage = CountingStorage()
+        session, _, _ = self._make_session(storage)
+        storage.save_session(session)
+        storage.writes.clear()
+
+        storage.save_session(session)
+
+        assert storage.writes == []
+
+    def test_new_interaction_writes_only_delta(self):
+        """Test that adding an interaction writes it and its agent."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        storage.save_session(session)
+        storage.writes.clear()
+
+        waiting = Waiting(stack=agent.stack)
+        agent.stack.add_interaction(waiting)
+        storage.save_session(session)
+
+        assert storage.writes == [
+            ("agent", agent.uuid),
+            ("interaction", waiting.uuid),
+        ]
+
+    def test_attribute_change_marks_interaction_dirty(self):
+        """Test that assigning a field rewrites only that interaction."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        storage.save_session(session)
+        storage.writes.clear()
+
+        task_def.caller_id = "someone"
+        storage.save_session(session)
+
+        assert storage.writes == [("interaction", task_def.uuid)]
+        assert storage._interactions[task_def.uuid]["data"]["caller_id"] == (
+            "someone"
+        )
+
+    def test_add_artifact_writes_artifact_interaction_and_agent(self):
+        """Test that adding an artifact rewrites its owners."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        storage.save_session(session)
+        storage.writes.clear()
+
+        artifact = Artifact(interaction=task_def)
+        task_def.add_artifact(artifact)
+        storage.save_session(session)
+
+        assert storage.writes == [
+            ("agent", agent.uuid),
+            ("interaction", task_def.uuid),
+            ("artifact", artifact.uuid),
+        ]
+
+    def test_in_place_changes_mark_objects_dirty(self):
+        """Test that list changes without an assignment are saved."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        storage.save_session(session)
+        storage.writes.clear()
+
+        waiting = Waiting(stack=agent.stack)
+        agent.stack.interactions.append(waiting)
+        storage.save_session(session)
+
+        assert storage.writes == [
+            ("agent", agent.uuid),
+            ("interaction", waiting.uuid),
+        ]
+        storage.writes.clear()
+
+        artifact = Artifact(interaction=task_def)
+        task_def.artifacts.append(artifact)
+        storage.save_session(session)
+
+        assert storage.writes == [
+            ("interaction", task_def.uuid),
+            ("artifact", artifact.uuid),
+        ]
+
+    def test_explicit_save_always_writes(self):
+        """Test that explicit saves write even clean objects."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        storage.save_session(session)
+        storage.writes.clear()
+
+        storage.save_interaction(task_def)
+        storage.save_agent(agent)
+
+        assert storage.writes == [
+            ("interaction", task_def.uuid),
+            ("agent", agent.uuid),
+        ]
+
+    def test_loaded_objects_are_clean(self):
+        """Test that objects loaded from storage are not rewritten."""
+        storage = CountingStorage()
+        session, agent, task_def = self._make_session(storage)
+        artifact = Artifact(interaction=task_def)
+        task_def.add_artifact(artifact)
+        storage.save_session(session)
+
+        fresh = CountingStorage()
+        fresh._sessions = storage._sessions
+        fresh._agents = storage._agents
+        fresh._interactions = storage._interactions
+        fresh._artifacts = storage._artifacts
+        loaded = fresh.load_session(
+            session.uuid, environment=Environment(storage=fresh)
+        )
+        loaded_agent = loaded.agents[0]
+
+        assert not loaded_agent.is_dirty
+        assert not loaded_agent.stack.interactions[0].is_dirty
+        assert not loaded_agent.stack.interactions[0].artifacts[0].is_dirty
+        fresh.save_session(loaded)
+        assert fresh.writes == []
+
+
+class TestInteractionLogStorage:
+    """Test LocalStorage with per-agent interaction logs."""
+
+    def _make_session(self, storage):
+        environment = Environment(storage=storage)
+        session = Session(environment=environment)
+        config = Config(
+            name="test-agent",
+            description="Test",
+            system_template="test",
+            tools=[],
+        )
+        agent = Agent(session=session, config=config)
+        task = Task(
+            name="test_task",
+            description="Test",
+            parameters={},
+            prompt="Do something",
+            tools=[],
+        )
+        agent.stack.add_interaction(
+            TaskDefinition(stack=agent.stack, task=task)
+        )
+        session.add_agent(agent)
+        return session, agent
+
+    def _add_waiting(self, agent, count):
+        for _ in range(count):
+            agent.stack.add_interaction(Waiting(stack=agent.stack))
+
+    def _reload(self, tmp_path, session):
+        storage = LocalStorage(base_path=tmp_path)
+        return storage.load_session(
+            session.uuid, environment=Environment(storage=storage)
+        )
+
+    def test_interactions_are_appended_to_agent_log(self, tmp_path):
+        """Test that interactions go to the log instead of separate files."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        self._add_waiting(agent, 2)
+        storage.save_session(session)
+
+        assert list((tmp_path / "interactions").iterdir()) == []
+        assert (tmp_path / "logs" / f"{agent.uuid}.log").exists()
+        assert sorted(storage.list_interactions()) == sorted(
+            i.uuid for i in agent.stack.interactions
+        )
+
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert [i.uuid for i in loaded.stack.interactions] == [
+            i.uuid for i in agent.stack.interactions
+        ]
+
+    def test_one_fsync_per_step(self, tmp_path, monkeypatch):
+        """Test that saving a step syncs each agent log once."""
+        from gimle.hugin.storage import interaction_log
+
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+
+        syncs = []
+        real_fsync = interaction_log.os.fsync
+        monkeypatch.setattr(
+            interaction_log.os,
+            "fsync",
+            lambda fd: syncs.append(fd) or real_fsync(fd),
+        )
+        self._add_waiting(agent, 3)
+        storage.save_session(session)
+
+        assert len(syncs) == 1
+
+    def test_reload_reads_log_once(self, tmp_path, monkeypatch):
+        """Test that loading an agent reads its log sequentially once."""
+        from gimle.hugin.storage.interaction_log import InteractionLog
+
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        self._add_waiting(agent, 5)
+        storage.save_session(session)
+
+        calls = {"read_all": 0, "get": 0}
+        real_read_all = InteractionLog.read_all
+        real_get = InteractionLog.get
+
+        def read_all(log):
+            calls["read_all"] += 1
+            return real_read_all(log)
+
+        def get(log, uuid):
+            calls["get"] += 1
+            return real_get(log, uuid)
+
+        monkeypatch.setattr(InteractionLog, "read_all", read_all)
+        monkeypatch.setattr(InteractionLog, "get", get)
+        loaded = self._reload(tmp_path, session).agents[0]
+
+        assert len(loaded.stack.interactions) == 6
+        assert calls == {"read_all": 1, "get": 0}
+
+    def test_rewind_truncates_log(self, tmp_path):
+        """Test that rewinding truncates the log back to the kept prefix."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        self._add_waiting(agent, 1)
+        storage.save_session(session)
+        log_path = tmp_path / "logs" / f"{agent.uuid}.log"
+        size_before = log_path.stat().st_size
+
+        self._add_waiting(agent, 3)
+        storage.save_session(session)
+        assert log_path.stat().st_size > size_before
+
+        agent.rewind_to(1)
+        storage.save_session(session)
+
+        assert log_path.stat().st_size == size_before
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 2
+
+    def test_rewritten_interaction_supersedes_old_record(self, tmp_path):
+        """Test that a changed interaction is appended and wins on reload."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        self._add_waiting(agent, 2)
+        storage.save_session(session)
+
+        # Rewrite the first interaction, then rewind past the last one: the
+        # log cannot be truncated without losing the rewritten record
+        agent.stack.interactions[0].caller_id = "someone"
+        storage.save_session(session)
+        agent.rewind_to(1)
+        storage.save_session(session)
+
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 2
+        assert loaded.stack.interactions[0].caller_id == "someone"
+
+    def test_rewind_in_batch_drops_buffered_records(self, tmp_path):
+        """Test that interactions deleted mid-batch are not appended."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+
+        with storage.batch():
+            self._add_waiting(agent, 2)
+            storage.save_agent(agent)
+            agent.rewind_to(0)
+            storage.save_agent(agent)
+
+        assert storage.list_interactions() == [agent.stack.interactions[0].uuid]
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 1
+
+    def test_batches_on_threads(self, tmp_path):
+        """Test that overlapping batches of threads keep every record."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        sessions = [self._make_session(storage) for _ in range(4)]
+
+        def save(session, agent):
+            for _ in range(20):
+                self._add_waiting(agent, 1)
+                storage.save_session(session)
+
+        threads = [
+            threading.Thread(target=save, args=pair) for pair in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert storage._log_batch_depth == 0
+        assert storage._pending_log_records == {}
+        for session, agent in sessions:
+            loaded = self._reload(tmp_path, session).agents[0]
+            assert len(loaded.stack.interactions) == 21
+
+    def test_torn_record_is_ignored(self, tmp_path):
+        """Test that a partial record at the end of the log is skipped."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        log_path = tmp_path / "logs" / f"{agent.uuid}.log"
+        with open(log_path, "ab") as f:
+            f.write(b"\x00\x00\x01")
+
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 1
+
+    def test_log_readable_without_log_mode(self, tmp_path):
+        """Test that lightweight reads find logged interactions."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+
+        reader = LocalStorage(base_path=tmp_path)
+        interaction = agent.stack.interactions[0]
+        raw = reader.load_interaction_metadata(interaction.uuid)
+        assert raw["type"] == "TaskDefinition"
+
+    def test_delete_agent_removes_log(self, tmp_path):
+        """Test that deleting an agent removes its log."""
+        storage = LocalStorage(base_path=tmp_path, interaction_log=True)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+
+        storage.delete_agent(agent)
+
+        assert not (tmp_path / "logs" / f"{agent.uuid}.log").exists()
+        assert storage.list_interactions() == []
+
+
+class TestStackJournal:
+    """Test that LocalStorage appends stack changes to a journal."""
+
+    def _make_session(self, storage):
+        return TestInteractionLogStorage()._make_session(storage)
+
+    def _add_waiting(self, agent, count):
+        TestInteractionLogStorage()._add_waiting(agent, count)
+
+    def _reload(self, tmp_path, session):
+        return TestInteractionLogStorage()._reload(tmp_path, session)
+
+    def test_steps_append_to_journal(self, tmp_path):
+        """Test that saving a step does not rewrite the interaction ids."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        agent_path = tmp_path / "agents" / agent.uuid
+        journal_path = tmp_path / "stacks" / agent.uuid
+
+        sizes = []
+        for _ in range(20):
+            self._add_waiting(agent, 1)
+            storage.save_session(session)
+            sizes.append(agent_path.stat().st_size)
+
+        # The agent file only refers to the journal, which grows by a line
+        assert sizes[-1] - sizes[1] < 10
+        # The first save wrote the stack, each step appended a line
+        assert len(journal_path.read_bytes().splitlines()) == 21
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert [i.uuid for i in loaded.stack.interactions] == [
+            i.uuid for i in agent.stack.interactions
+        ]
+
+    def test_load_agent_metadata_includes_stack(self, tmp_path):
+        """Test that raw agent reads see the journaled stack."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        self._add_waiting(agent, 2)
+        storage.save_session(session)
+
+        data = LocalStorage(base_path=tmp_path).load_agent_metadata(agent.uuid)
+
+        assert (
+            "journal"
+            in json.loads((tmp_path / "agents" / agent.uuid).read_text())[
+                "stack"
+            ]
+        )
+        assert data["stack"] == agent.stack.to_dict()
+
+    def test_rewind_and_artifacts_are_journaled(self, tmp_path):
+        """Test that changes below the top of the stack are appended."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        self._add_waiting(agent, 3)
+        storage.save_session(session)
+
+        agent.rewind_to(1)
+        artifact = Artifact(interaction=agent.stack.interactions[1])
+        agent.stack.interactions[1].add_artifact(artifact)
+        storage.save_session(session)
+
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert [i.uuid for i in loaded.stack.interactions] == [
+            i.uuid for i in agent.stack.interactions
+        ]
+        assert loaded.stack.interactions[1].artifacts[0].uuid == artifact.uuid
+
+    def test_interrupted_append_is_ignored(self, tmp_path):
+        """Test that lines the agent file does not refer to are ignored."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        self._add_waiting(agent, 1)
+        storage.save_session(session)
+        with open(tmp_path / "stacks" / agent.uuid, "ab") as f:
+            f.write(b'[2, [["cut off')
+
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 2
+
+        self._add_waiting(agent, 1)
+        storage.save_session(session)
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 3
+
+    def test_journal_is_compacted(self, tmp_path):
+        """Test that a journal of repeated rewinds is rewritten."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        self._add_waiting(agent, 50)
+        storage.save_session(session)
+        journal_path = tmp_path / "stacks" / agent.uuid
+
+        for _ in range(20):
+            agent.rewind_to(0)
+            storage.save_session(session)
+            self._add_waiting(agent, 50)
+            storage.save_session(session)
+
+        assert len(journal_path.read_bytes().splitlines()) < 10
+        loaded = self._reload(tmp_path, session).agents[0]
+        assert len(loaded.stack.interactions) == 51
+
+    def test_delete_agent_removes_journal(self, tmp_path):
+        """Test that deleting an agent removes its stack journal."""
+        storage = LocalStorage(base_path=tmp_path)
+        session, agent = self._make_session(storage)
+        storage.save_session(session)
+        self._add_waiting(agent, 1)
+        storage.save_session(session)
+
+        storage.delete_agent(agent)
+
+        assert not (tmp_path / "stacks" / agent.uuid).exists()
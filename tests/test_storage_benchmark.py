@@ -0,0 +1,107 @@
+"""Benchmark: storage writes per Session.run stay linear in step count."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.storage.local import LocalStorage
+from gimle.hugin.tools.tool import Tool
+
+
+class CountingLocalStorage(LocalStorage):
+    """LocalStorage that counts the files it writes."""
+
+    writes = 0
+    agent_bytes = 0
+
+    def _write_file(self, path, data):
+        if path.parent.name == "agents":
+            self.agent_bytes += len(data)
+        super()._write_file(path, data)
+
+    def _save_session(self, session):
+        self.writes += 1
+        super()._save_session(session)
+
+    def _save_agent(self, agent):
+        self.writes += 1
+        super()._save_agent(agent)
+
+    def _save_interaction(self, interaction):
+        self.writes += 1
+        super()._save_interaction(interaction)
+
+    def _save_artifact(self, artifact):
+        self.writes += 1
+        super()._save_artifact(artifact)
+
+
+@pytest.fixture
+def noop_tool():
+    """Register a tool that always succeeds."""
+
+    @Tool.register(
+        name="benchmark_noop",
+        description="Do nothing",
+        parameters={},
+    )
+    def benchmark_noop(stack) -> dict:
+        return {"content": {"ok": True}}
+
+    yield
+    Tool.registry.remove("benchmark_noop")
+
+
+def _run(tmp_path, steps: int) -> CountingLocalStorage:
+    storage = CountingLocalStorage(base_path=str(tmp_path / f"run_{steps}"))
+    session = Session(environment=Environment(storage=storage))
+    config = Config(
+        name="bench",
+        description="Benchmark agent",
+        system_template="bench",
+        llm_model="test-model",
+        tools=["benchmark_noop"],
+    )
+    task = Task(
+        name="bench_task",
+        description="Benchmark",
+        parameters={},
+        prompt="Loop forever",
+        tools=["benchmark_noop"],
+    )
+    session.create_agent_from_task(config, task)
+    with patch("gimle.hugin.llm.completion.chat_completion") as completion:
+        completion.return_value = {
+            "role": "assistant",
+            "content": {},
+            "tool_call": "benchmark_noop",
+            "tool_call_id": "call",
+        }
+        start = time.perf_counter()
+        session.run(max_steps=steps)
+        elapsed = time.perf_counter() - start
+    print(
+        f"\n{steps} steps: {storage.writes} writes "
+        f"({storage.writes / steps:.2f}/step), "
+        f"{storage.agent_bytes} agent bytes in {elapsed:.2f}s"
+    )
+    return storage
+
+
+@pytest.mark.slow
+def test_session_run_writes_are_linear_in_steps(tmp_path, noop_tool):
+    """Doubling the number of steps at most doubles the number of writes."""
+    small = _run(tmp_path, 200)
+    large = _run(tmp_path, 400)
+
+    # Each step creates one interaction: session + agent + interaction
+    assert small.writes <= 3 * 200 + 10
+    assert large.writes <= 3 * 400 + 10
+    assert large.writes / small.writes < 2.1
+    # Agent files refer to the stack journal instead of listing the stack
+    assert large.agent_bytes / small.agent_bytes < 2.1
@@ -0,0 +1,166 @@
+"""Tests for the bounded storage cache."""
+
+import gc
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.artifacts.text import Text
+from gimle.hugin.interaction.waiting import Waiting
+from gimle.hugin.storage.cache import StorageCache, approximate_size
+from gimle.hugin.storage.local import LocalStorage
+
+from .memory_storage import MemoryStorage
+
+
+class Item:
+    """Weakly referenceable cached value."""
+
+    def __init__(self, name, payload=""):
+        """Initialize the item."""
+        self.name = name
+        self.payload = payload
+
+
+class TestStorageCache:
+    """Test eviction, pinning and counters of StorageCache."""
+
+    def test_unbounded_by_default(self):
+        """Test that a cache without limits keeps every entry."""
+        cache = StorageCache()
+        items = [Item(i) for i in range(100)]
+        for i, item in enumerate(items):
+            cache[f"agent:{i}"] = item
+        assert cache.stats()["entries"] == 100
+        assert cache.evictions == 0
+
+    def test_evicts_least_recently_used(self):
+        """Test that the entry cap evicts the least recently used entry."""
+        cache = StorageCache(max_entries=2)
+        cache["a"] = Item("a")
+        cache["b"] = Item("b")
+        cache.get("a")
+        cache["c"] = Item("c")
+
+        # "b" was dropped, nothing else references it
+        gc.collect()
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.evictions == 1
+
+    def test_byte_cap(self):
+        """Test that the byte cap evicts entries and keeps the newest."""
+        cache = StorageCache(max_bytes=1000, sizeof=lambda value: 400)
+        for name in "abcd":
+            cache[name] = Item(name)
+        assert cache.bytes == 800
+        assert cache.stats()["entries"] == 2
+
+        # An entry over the cap on its own is still cached
+        big = StorageCache(max_bytes=10)
+        big["big"] = Item("big", payload="x" * 1000)
+        assert big.get("big").name == "big"
+
+    def test_approximate_size_counts_content(self):
+        """Test that large attribute values count towards the size."""
+        assert approximate_size(Item("a", "x" * 10000)) > 10000
+
+    def test_pinned_entries_are_not_evicted(self):
+        """Test that pinned keys survive eviction until unpinned."""
+        cache = StorageCache(max_entries=1)
+        cache.pin("a")
+        cache["a"] = Item("a")
+        cache["b"] = Item("b")
+        cache["c"] = Item("c")
+        assert list(cache._entries) == ["a", "c"]
+
+        cache.unpin("a")
+        gc.collect()
+        assert "a" not in cache
+
+    def test_evicted_live_objects_are_revived(self):
+        """Test that evicted objects still in use keep their identity."""
+        cache = StorageCache(max_entries=1)
+        kept = Item("kept")
+        cache["kept"] = kept
+        cache["other"] = Item("other")
+        assert cache.evictions == 1
+
+        assert cache.get("kept") is kept
+        assert list(cache._entries)[-1] == "kept"
+
+    def test_len_counts_live_entries(self):
+        """Test that evicted entries are not counted or iterated."""
+        cache = StorageCache(max_entries=2)
+        items = [Item(name) for name in "abcd"]
+        for item in items:
+            cache[item.name] = item
+
+        # The evicted entries are still referenced by items
+        assert "a" in cache
+        assert len(cache) == 2
+        assert list(cache) == ["c", "d"]
+
+    def test_counters(self):
+        """Test hit and miss counters of get lookups."""
+        cache = StorageCache()
+        cache["a"] = Item("a")
+        cache.get("a")
+        cache.get("missing")
+        assert "a" in cache
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+
+class TestStorageWithBoundedCache:
+    """Test the storage load paths with a bounded cache."""
+
+    def _make_agent(self, storage):
+        environment = Environment(storage=storage)
+        session = Session(environment=environment)
+        config = Config(
+            name="test-agent",
+            description="Test",
+            system_template="test",
+            tools=[],
+            llm_model="test-model",
+        )
+        agent = Agent(session=session, config=config)
+        session.add_agent(agent)
+        return session, agent
+
+    def test_load_counts_hits_and_misses(self):
+        """Test that loads count cache hits and misses."""
+        storage = MemoryStorage()
+        session, agent = self._make_agent(storage)
+        waiting = Waiting(stack=agent.stack)
+        agent.stack.add_interaction(waiting)
+        storage.save_session(session)
+
+        storage.load_interaction(waiting.uuid, agent.stack)
+        storage.store.clear()
+        storage.load_interaction(waiting.uuid, agent.stack)
+        assert storage.store.hits == 1
+        assert storage.store.misses == 1
+
+    def test_live_agent_objects_survive_eviction(self, tmp_path):
+        """Test that loads return the instances held by a live agent."""
+        storage = LocalStorage(
+            base_path=str(tmp_path), cache=StorageCache(max_entries=3)
+        )
+        session, agent = self._make_agent(storage)
+        for i in range(10):
+            waiting = Waiting(stack=agent.stack)
+            waiting.add_artifact(Text(interaction=waiting, content=f"{i}"))
+            agent.stack.add_interaction(waiting)
+        storage.save_session(session)
+
+        assert storage.store.stats()["entries"] == 3
+        assert storage.store.evictions > 0
+        first = agent.stack.interactions[0]
+        assert storage.load_interaction(first.uuid, agent.stack) is first
+        artifact = first.artifacts[0]
+        assert storage.load_artifact(artifact.uuid) is artifact
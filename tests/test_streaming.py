@@ -0,0 +1,458 @@
+"""Tests for streamed chat completions."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anthropic
+import openai
+import pytest
+
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.cli import monitor_agents
+from gimle.hugin.llm.completion import chat_completion
+from gimle.hugin.llm.models.anthropic import AnthropicModel
+from gimle.hugin.llm.models.model import Model, ModelResponse, StreamDelta
+from gimle.hugin.llm.models.model_registry import get_model_registry
+from gimle.hugin.llm.models.openai import OpenAIModel
+from gimle.hugin.llm.models.streaming import (
+    PartialJSONParser,
+    parse_partial_json,
+)
+from gimle.hugin.tools.tool import Tool, ToolConfig
+
+from .memory_storage import MemoryStorage
+
+ARGUMENTS = {"path": "main.py", "code": 'print("Hello, world")\n'}
+# The arguments as the model generates them, in pieces
+ARGUMENT_PIECES = [
+    '{"path": "ma',
+    'in.py", "co',
+    'de": "print(\\"Hel',
+    'lo, world\\")\\n"}',
+]
+TEXT_PIECES = ["I will save ", "the code."]
+
+ANTHROPIC_MESSAGE = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-test",
+    "content": [
+        {"type": "text", "text": "".join(TEXT_PIECES)},
+        {
+            "type": "tool_use",
+            "id": "toolu_1",
+            "name": "save_code",
+            "input": ARGUMENTS,
+        },
+    ],
+    "stop_reason": "tool_use",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 10, "output_tokens": 20},
+}
+
+
+def _anthropic_events():
+    yield "message_start", {
+        "type": "message_start",
+        "message": {
+            **ANTHROPIC_MESSAGE,
+            "content": [],
+            "stop_reason": None,
+            "usage": {"input_tokens": 10, "output_tokens": 1},
+        },
+    }
+    yield "content_block_start", {
+        "type": "content_block_start",
+        "index": 0,
+        "content_block": {"type": "text", "text": ""},
+    }
+    for text in TEXT_PIECES:
+        yield "content_block_delta", {
+            "type": "content_block_delta",
+            "index": 0,
+            "delta": {"type": "text_delta", "text": text},
+        }
+    yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+    yield "content_block_start", {
+        "type": "content_block_start",
+        "index": 1,
+        "content_block": {
+            "type": "tool_use",
+            "id": "toolu_1",
+            "name": "save_code",
+            "input": {},
+        },
+    }
+    for piece in ARGUMENT_PIECES:
+        yield "content_block_delta", {
+            "type": "content_block_delta",
+            "index": 1,
+            "delta": {"type": "input_json_delta", "partial_json": piece},
+        }
+    yield "content_block_stop", {"type": "content_block_stop", "index": 1}
+    yield "message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": "tool_use", "stop_sequence": None},
+        "usage": {"output_tokens": 20},
+    }
+    yield "message_stop", {"type": "message_stop"}
+
+
+OPENAI_COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-test",
+    "choices": [
+        {
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": "".join(TEXT_PIECES),
+                "tool_calls": [
+                    {
+                        "id": "call_1",
+                        "type": "function",
+                        "function": {
+                            "name": "save_code",
+                            "arguments": "".join(ARGUMENT_PIECES),
+                        },
+                    }
+                ],
+            },
+            "finish_reason": "tool_calls",
+        }
+    ],
+    "usage": {
+        "prompt_tokens": 10,
+        "completion_tokens": 20,
+        "total_tokens": 30,
+    },
+}
+
+
+def _openai_chunks():
+    def chunk(delta, finish_reason=None):
+        return {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-test",
+            "choices": [
+                {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            ],
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    for text in TEXT_PIECES:
+        yield chunk({"content": text})
+    yield chunk(
+        {
+            "tool_calls": [
+                {
+                    "index": 0,
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "save_code", "arguments": ""},
+                }
+            ]
+        }
+    )
+    for piece in ARGUMENT_PIECES:
+        yield chunk(
+            {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]}
+        )
+    yield chunk({}, finish_reason="tool_calls")
+    yield {
+        **chunk({}),
+        "choices": [],
+        "usage": OPENAI_COMPLETION["usage"],
+    }
+
+
+class ProviderHandler(BaseHTTPRequestHandler):
+    """Answers like the Anthropic and OpenAI APIs, streamed on request."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        """Return the canned response, as events if asked to stream."""
+        request = json.loads(
+            self.rfile.read(int(self.headers["Content-Length"]))
+        )
+        is_openai = self.path.endswith("/chat/completions")
+        if not request.get("stream"):
+            body = json.dumps(
+                OPENAI_COMPLETION if is_openai else ANTHROPIC_MESSAGE
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if is_openai:
+            events = [f"data: {json.dumps(c)}\n\n" for c in _openai_chunks()]
+            events.append("data: [DONE]\n\n")
+        else:
+            events = [
+                f"event: {name}\ndata: {json.dumps(data)}\n\n"
+                for name, data in _anthropic_events()
+            ]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            data = event.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        """Keep the test output quiet."""
+
+
+@pytest.fixture(scope="module")
+def server():
+    """Run a local stand-in for the provider APIs."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ProviderHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _tools():
+    return [
+        Tool(
+            name="save_code",
+            description="Save code to a file",
+            parameters={
+                "path": {"type": "string", "description": "The path"},
+                "code": {"type": "string", "description": "The code"},
+            },
+            is_interactive=False,
+            options=ToolConfig(),
+        )
+    ]
+
+
+class StubAnthropicModel(AnthropicModel):
+    """Anthropic model for the stub server."""
+
+    def build_request(self, system_prompt, messages, tools):
+        """Leave out the temperature, which not all SDK versions accept."""
+        request = super().build_request(system_prompt, messages, tools)
+        request.pop("temperature")
+        return request
+
+
+def _anthropic_model(server):
+    return StubAnthropicModel(
+        model_name="claude-test",
+        client=anthropic.Anthropic(api_key="test", base_url=server),
+        async_client=anthropic.AsyncAnthropic(api_key="test", base_url=server),
+    )
+
+
+def _openai_model(server):
+    return OpenAIModel(
+        model_name="gpt-test",
+        client=openai.OpenAI(api_key="test", base_url=f"{server}/v1"),
+        async_client=openai.AsyncOpenAI(
+            api_key="test", base_url=f"{server}/v1"
+        ),
+    )
+
+
+MESSAGES = [{"role": "user", "content": "Save a hello world script"}]
+
+
+class TestPartialJSONParser:
+    """Test parsing JSON as it is generated."""
+
+    def test_incremental_arguments(self):
+        """Test the values parsed after each piece."""
+        parser = PartialJSONParser()
+        values = [parser.feed(piece) for piece in ARGUMENT_PIECES]
+        assert values == [
+            {"path": "ma"},
+            {"path": "main.py"},
+            {"path": "main.py", "code": 'print("Hel'},
+            ARGUMENTS,
+        ]
+
+    @pytest.mark.parametrize(
+        "text, value",
+        [
+            ("", None),
+            ("{", {}),
+            ('{"a": 1, "b": tr', {"a": 1}),
+            ('{"a": 1, "b": ', {"a": 1}),
+            ('{"a": 1, "b', {"a": 1}),
+            ('{"a": [1, 2', {"a": [1, 2]}),
+            ('{"a": {"b": "c\\', {"a": {"b": "c"}}),
+            ('{"a": "x, y", "b": {"c', {"a": "x, y", "b": {}}),
+            ('{"a": 1}', {"a": 1}),
+            ('{"a": "b\\u00', {"a": "b"}),
+            ('["\\ud83d\\ude00", 1.5e', ["\U0001f600"]),
+            ('{"a": 1} x', None),
+        ],
+    )
+    def test_cut_off_text(self, text, value):
+        """Test completing text that is cut off at different points."""
+        assert parse_partial_json(text) == value
+
+    def test_values_are_snapshots(self):
+        """Test that feeding more text does not change returned values."""
+        parser = PartialJSONParser()
+        first = parser.feed('{"a": [1, {"b": "c')
+        parser.feed('d"}, 2], "e": 3}')
+
+        assert first == {"a": [1, {"b": "c"}]}
+
+
+class TestProviderStreaming:
+    """Test streaming from the providers against a local SSE server."""
+
+    @pytest.mark.parametrize("create_model", [_anthropic_model, _openai_model])
+    def test_stream_matches_completion(self, server, create_model):
+        """Test that streaming builds the same response as a plain call."""
+        model = create_model(server)
+        expected = model.chat_completion("System", list(MESSAGES), _tools())
+        deltas = []
+        response = model.stream_chat_completion(
+            "System", list(MESSAGES), _tools(), deltas.append
+        )
+
+        assert response.tool_call_id == expected.tool_call_id
+        response.tool_call_id = expected.tool_call_id
+        assert response == expected
+        assert response.content == ARGUMENTS
+        assert "".join(delta.text for delta in deltas) == "".join(TEXT_PIECES)
+        assert StreamDelta(tool_call="save_code") in deltas
+        argument_deltas = [delta for delta in deltas if delta.arguments_delta]
+        assert [delta.arguments_delta for delta in argument_deltas] == (
+            ARGUMENT_PIECES
+        )
+        assert argument_deltas[2].arguments == {
+            "path": "main.py",
+            "code": 'print("Hel',
+        }
+        assert argument_deltas[-1].arguments == ARGUMENTS
+
+    @pytest.mark.parametrize("create_model", [_anthropic_model, _openai_model])
+    def test_async_stream(self, server, create_model):
+        """Test streaming with the async clients."""
+        model = create_model(server)
+        deltas = []
+        response = asyncio.run(
+            model.astream_chat_completion(
+                "System", list(MESSAGES), _tools(), deltas.append
+            )
+        )
+        assert response.content == ARGUMENTS
+        assert deltas[-1].arguments == ARGUMENTS
+
+
+class ScriptedModel(Model):
+    """Model that finishes without streaming support."""
+
+    def __init__(self):
+        """Initialize the model."""
+        super().__init__(config={"model": "scripted-test"})
+
+    def chat_completion(self, system_prompt, messages, tools=None):
+        """Call the finish tool."""
+        return ModelResponse(
+            role="assistant",
+            content={"finish_type": "success", "result": "done"},
+            tool_call="builtins.finish",
+            tool_call_id="call_1",
+        )
+
+
+@pytest.fixture
+def scripted_model():
+    """Register the scripted model."""
+    registry = get_model_registry()
+    registry.register_model("scripted-test", ScriptedModel())
+    yield
+    registry.models.pop("scripted-test")
+
+
+class TestStreamingCompletion:
+    """Test streaming through chat_completion and the environment."""
+
+    def test_default_single_delta(self, scripted_model):
+        """Test that models without streaming report one delta."""
+        deltas = []
+        response = chat_completion(
+            "System", [], [], "scripted-test", on_delta=deltas.append
+        )
+        assert response["tool_call"] == "builtins.finish"
+        assert deltas == [
+            StreamDelta(
+                tool_call="builtins.finish",
+                arguments={"finish_type": "success", "result": "done"},
+            )
+        ]
+
+    def test_environment_stream_callback(self, scripted_model):
+        """Test that agents report deltas with their id."""
+        streamed = []
+        session = Session(
+            environment=Environment(
+                storage=MemoryStorage(),
+                stream_callback=lambda agent_id, delta: streamed.append(
+                    (agent_id, delta)
+                ),
+            )
+        )
+        session.create_agent_from_task(
+            Config(
+                name="agent",
+                description="Test agent",
+                system_template="You are a helpful assistant.",
+                tools=["builtins.finish"],
+                llm_model="scripted-test",
+            ),
+            Task(
+                name="task",
+                description="Test task",
+                parameters={},
+                prompt="Finish the task.",
+                tools=["builtins.finish"],
+            ),
+        )
+        session.run(max_steps=10)
+        agent = session.agents[0]
+        assert [agent_id for agent_id, _ in streamed] == [agent.id]
+        assert streamed[0][1].tool_call == "builtins.finish"
+
+    def test_monitor_stream_callback(self, monkeypatch):
+        """Test that deltas are queued only while a client listens."""
+        callback = monitor_agents.get_monitor_stream_callback()
+        updates = monitor_agents._update_queue
+        while not updates.empty():
+            updates.get_nowait()
+
+        callback("agent-1", StreamDelta(text="Hello"))
+        assert updates.empty()
+
+        monkeypatch.setattr(monitor_agents, "_stream_clients", 1)
+        callback("agent-1", StreamDelta(text="Hello"))
+        assert updates.get_nowait() == {
+            "type": "stream",
+            "agent_id": "agent-1",
+            **StreamDelta(text="Hello").to_dict(),
+        }
@@ -655,3 +655,71 @@ class TestToolLoadImplementation:
             Tool._load_implementation("test_noncallable_module.not_a_function")
 
         del sys.modules["test_noncallable_module"]
+
+
+class TestToolSchema:
+    """Test the per-provider schema cache of tools."""
+
+    @staticmethod
+    def _build(tool):
+        return {"name": tool.name, "parameters": list(tool.parameters)}
+
+    def test_schema_is_built_once_per_provider(self):
+        """Test that the schema is built on first use and then reused."""
+        tool = Tool(
+            name="schema_tool",
+            description="A tool",
+            parameters={"query": {"type": "string", "description": "Query"}},
+            is_interactive=False,
+            options=ToolConfig(),
+        )
+        built = []
+
+        def build(tool):
+            built.append(tool.name)
+            return self._build(tool)
+
+        schema = tool.get_schema("provider", build)
+
+        assert tool.get_schema("provider", build) is schema
+        assert schema == {"name": "schema_tool", "parameters": ["query"]}
+        tool.get_schema("other_provider", build)
+        assert built == ["schema_tool", "schema_tool"]
+
+    def test_register_instance_drops_schemas(self):
+        """Test that registering a changed tool rebuilds its schema."""
+        Tool.registry.clear()
+        tool = Tool(
+            name="schema_tool",
+            description="A tool",
+            parameters={},
+            is_interactive=False,
+            options=ToolConfig(),
+            func=lambda: None,
+        )
+        Tool.register_instance(tool)
+        tool.get_schema("provider", self._build)
+
+        tool.parameters = {"query": {"type": "string", "description": "Q"}}
+        Tool.register_instance(tool)
+
+        assert tool.get_schema("provider", self._build)["parameters"] == [
+            "query"
+        ]
+        Tool.registry.clear()
+
+    def test_aliased_tool_has_own_schema(self):
+        """Test that a tool fetched by alias is not given the base schema."""
+        Tool.registry.clear()
+
+        @Tool.register(name="base_tool", description="A tool")
+        def base_tool() -> dict:
+            return {}
+
+        Tool.get_tool("base_tool").get_schema("provider", self._build)
+        alias = Tool.get_tool("base_tool:alias_tool")
+
+        assert alias.get_schema("provider", self._build)["name"] == (
+            "alias_tool"
+        )
+        Tool.registry.clear()
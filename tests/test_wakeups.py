@@ -0,0 +1,245 @@
+"""Tests for waking agents blocked on Waiting interactions."""
+
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import AsyncSession, Session
+from gimle.hugin.agent.wakeups import Wakeup, Wakeups, stack_event, state_event
+from gimle.hugin.interaction.conditions import Condition
+from gimle.hugin.interaction.waiting import Waiting
+
+from .memory_storage import MemoryStorage
+
+
+def _agent(session, name="test-agent"):
+    config = Config(
+        name=name,
+        description="Test agent",
+        system_template="You are a helpful assistant.",
+        tools=[],
+    )
+    agent = Agent(session=session, config=config)
+    session.add_agent(agent)
+    return agent
+
+
+@pytest.fixture
+def until_deadline():
+    """Register a condition that waits 0.2 seconds, counting evaluations."""
+    evaluations = []
+    deadline = time.time() + 0.2
+
+    def deadline_wakeup(stack, branch):
+        return Wakeup(deadline=deadline)
+
+    @Condition.register(wakeup=deadline_wakeup)
+    def until_deadline(stack, branch):
+        evaluations.append(time.time())
+        return time.time() < deadline
+
+    yield evaluations
+    Condition.registry.remove("until_deadline")
+    Condition.wakeups.remove("until_deadline")
+
+
+class TestWakeups:
+    """Test blocking and waking agents."""
+
+    def test_notify_wakes_blocked_agent(self):
+        """Test that an event unblocks the agents waiting for it."""
+        wakeups = Wakeups()
+        assert wakeups.block("a", Wakeup(events=frozenset(["e"])), 0)
+        assert wakeups.block("b", Wakeup(events=frozenset(["f"])), 0)
+
+        wakeups.notify("e")
+
+        assert not wakeups.is_blocked("a")
+        assert wakeups.is_blocked("b")
+        assert wakeups.woken == 1
+
+    def test_event_during_step_prevents_blocking(self):
+        """Test that an event notified while the agent stepped is not lost."""
+        wakeups = Wakeups()
+        since = wakeups.sequence
+        wakeups.notify("e")
+
+        assert not wakeups.block("a", Wakeup(events=frozenset(["e"])), since)
+        assert not wakeups.is_blocked("a")
+
+    def test_deadline_unblocks(self):
+        """Test that an agent is unblocked once its deadline has passed."""
+        wakeups = Wakeups()
+        wakeups.block("a", Wakeup(deadline=time.time() + 0.1), 0)
+
+        assert wakeups.is_blocked("a")
+        start = time.time()
+        assert wakeups.wait() is True
+        assert time.time() - start >= 0.09
+        assert not wakeups.is_blocked("a")
+
+    def test_wait_without_deadline(self):
+        """Test that waiting returns at once if only an event can wake."""
+        wakeups = Wakeups()
+        wakeups.block("a", Wakeup(events=frozenset(["e"])), 0)
+
+        assert wakeups.wait() is False
+
+    def test_passed_deadline_does_not_wake(self):
+        """Test that an agent blocked after its deadline is not woken by it."""
+        wakeups = Wakeups()
+        wakeups.block("a", Wakeup(deadline=time.time() - 1), 0)
+
+        assert wakeups.is_blocked("a")
+        assert wakeups.wait() is False
+
+    def test_merge(self):
+        """Test that merged wakeups wake at the first deadline or any event."""
+        merged = Wakeup.merge(
+            [
+                Wakeup(deadline=2.0, events=frozenset(["e"])),
+                Wakeup(deadline=1.0),
+                Wakeup(events=frozenset(["f"])),
+            ]
+        )
+
+        assert merged == Wakeup(deadline=1.0, events=frozenset(["e", "f"]))
+
+
+class TestWaitingWakeup:
+    """Test the wakeups of Waiting interactions."""
+
+    def test_without_condition_waits_for_stack(self):
+        """Test that waiting without a condition wakes on the stack."""
+        agent = _agent(Session(environment=Environment()))
+        waiting = Waiting(stack=agent.stack)
+        agent.stack.add_interaction(waiting)
+
+        assert waiting.wakeup() == Wakeup(
+            events=frozenset([stack_event(agent.id)])
+        )
+        assert agent.stack.get_wakeup() == waiting.wakeup()
+
+    def test_shared_state_condition(self):
+        """Test that waiting for a shared state key wakes on its changes."""
+        agent = _agent(Session(environment=Environment()))
+        waiting = Waiting(
+            stack=agent.stack,
+            condition=Condition(
+                evaluator="wait_for_shared_state",
+                parameters={"key": "ready"},
+            ),
+        )
+
+        assert waiting.wakeup() == Wakeup(
+            events=frozenset([state_event("common", "ready")])
+        )
+
+    def test_polled_condition(self):
+        """Test that conditions without a wakeup are polled every step."""
+        agent = _agent(Session(environment=Environment()))
+        agent.stack.add_interaction(
+            Waiting(
+                stack=agent.stack,
+                condition=Condition(
+                    evaluator="wait_for_ticks", parameters={"ticks": 3}
+                ),
+            )
+        )
+
+        assert agent.stack.get_wakeup() is None
+
+
+class TestSessionWakeups:
+    """Test that sessions skip blocked agents."""
+
+    def test_blocked_agent_is_skipped_until_event(self):
+        """Test that a waiting agent only steps again after its event."""
+        session = Session(environment=Environment(storage=MemoryStorage()))
+        waiting_agent = _agent(session, "waiting")
+        waiting_agent.stack.add_interaction(
+            Waiting(
+                stack=waiting_agent.stack,
+                condition=Condition(
+                    evaluator="wait_for_shared_state",
+                    parameters={"key": "ready"},
+                ),
+            )
+        )
+        worker = _agent(session, "worker")
+        worker_steps = []
+
+        def work():
+            worker_steps.append(len(worker_steps))
+            if len(worker_steps) == 3:
+                session.state.set("common", "ready", True, worker.id)
+            return len(worker_steps) <= 3
+
+        interaction = Mock()
+        interaction.step.side_effect = work
+        interaction.artifacts = []
+        worker.stack.add_interaction(interaction)
+
+        with patch.object(
+            Waiting, "step", autospec=True, side_effect=Waiting.step
+        ) as waiting_step:
+            step_count = session.run()
+
+        assert step_count == 3
+        # Once to block, once after the shared state was set
+        assert waiting_step.call_count == 2
+
+    def test_session_sleeps_until_deadline(self, until_deadline):
+        """Test that waiting steps are not counted or busy polled."""
+        session = Session(environment=Environment(storage=MemoryStorage()))
+        agent = _agent(session)
+        agent.stack.add_interaction(
+            Waiting(
+                stack=agent.stack,
+                condition=Condition(evaluator="until_deadline"),
+            )
+        )
+
+        step_count = session.run()
+
+        assert step_count == 0
+        assert len(until_deadline) == 2
+        assert until_deadline[1] - until_deadline[0] >= 0.15
+
+    def test_async_session_sleeps_until_deadline(self, until_deadline):
+        """Test that async sessions also sleep until the deadline."""
+        session = AsyncSession(environment=Environment(storage=MemoryStorage()))
+        agent = _agent(session)
+        agent.stack.add_interaction(
+            Waiting(
+                stack=agent.stack,
+                condition=Condition(evaluator="until_deadline"),
+            )
+        )
+
+        step_count = asyncio.run(session.run())
+
+        assert step_count == 0
+        assert len(until_deadline) == 2
+
+    def test_stepper_sleeps_until_deadline(self, until_deadline):
+        """Test that stepping through a stepper skips waiting steps."""
+        session = Session(environment=Environment(storage=MemoryStorage()))
+        agent = _agent(session)
+        agent.stack.add_interaction(
+            Waiting(
+                stack=agent.stack,
+                condition=Condition(evaluator="until_deadline"),
+            )
+        )
+
+        with session.stepper() as step:
+            assert step() is False
+
+        assert len(until_deadline) == 2
+        assert until_deadline[1] - until_deadline[0] >= 0.15
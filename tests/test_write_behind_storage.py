@@ -0,0 +1,331 @@
+"""Tests for WriteBehindStorage."""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from gimle.hugin.agent.agent import Agent
+from gimle.hugin.agent.config import Config
+from gimle.hugin.agent.environment import Environment
+from gimle.hugin.agent.session import Session
+from gimle.hugin.agent.task import Task
+from gimle.hugin.artifacts.text import Text
+from gimle.hugin.interaction.lazy import LazyInteractionList
+from gimle.hugin.interaction.task_definition import TaskDefinition
+from gimle.hugin.interaction.waiting import Waiting
+from gimle.hugin.storage.factory import create_storage
+from gimle.hugin.storage.sqlite import SqliteStorage
+from gimle.hugin.storage.write_behind import WriteBehindStorage
+
+from .memory_storage import MemoryStorage
+
+
+class GatedStorage(MemoryStorage):
+    """Memory storage that counts writes and can hold the flusher."""
+
+    def __init__(self):
+        """Initialize with an open gate."""
+        super().__init__()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self.agent_writes = 0
+        self.batches = 0
+
+    @contextmanager
+    def batch(self):
+        """Count batches."""
+        self.batches += 1
+        yield
+
+    def _save_agent(self, agent):
+        """Wait for the gate, then save the agent."""
+        self.entered.set()
+        self.gate.wait()
+        self.agent_writes += 1
+        super()._save_agent(agent)
+
+
+def _make_session(storage):
+    """Create a session with one agent holding one task definition."""
+    environment = Environment(storage=storage)
+    session = Session(environment=environment)
+    config = Config(
+        name="test-agent",
+        description="Test",
+        system_template="test",
+        tools=[],
+        llm_model="test-model",
+    )
+    agent = Agent(session=session, config=config)
+    task = Task(
+        name="test_task",
+        description="Test",
+        parameters={},
+        prompt="Do something",
+        tools=[],
+    )
+    task_def = TaskDefinition(stack=agent.stack, task=task)
+    agent.stack.add_interaction(task_def)
+    session.add_agent(agent)
+    return session, agent, task_def
+
+
+@contextmanager
+def _held(inner, storage, agent):
+    """Hold the flusher inside a write of the agent."""
+    inner.gate.clear()
+    inner.entered.clear()
+    storage.save_agent(agent)
+    assert inner.entered.wait(timeout=5)
+    try:
+        yield
+    finally:
+        inner.gate.set()
+
+
+@pytest.fixture
+def inner():
+    """Create the storage written to."""
+    return GatedStorage()
+
+
+@pytest.fixture
+def storage(inner):
+    """Create a write-behind storage around the gated storage."""
+    storage = WriteBehindStorage(inner)
+    yield storage
+    inner.gate.set()
+    storage.close()
+
+
+class TestWriteBehindStorage:
+    """Test queueing, coalescing and flushing writes."""
+
+    def test_save_is_written_after_flush(self, storage, inner):
+        """Test that queued saves reach the inner storage."""
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        storage.flush()
+
+        assert list(inner._sessions) == [session.uuid]
+        assert list(inner._agents) == [agent.uuid]
+        assert list(inner._interactions) == [task_def.uuid]
+
+    def test_reads_see_queued_writes(self, storage, inner):
+        """Test that lists and loads wait for queued writes."""
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        storage.store.clear()
+
+        assert storage.list_sessions() == [session.uuid]
+        loaded = storage.load_session(
+            session.uuid, environment=Environment(storage=storage)
+        )
+        assert loaded.agents[0].uuid == agent.uuid
+
+    def test_repeated_saves_coalesce(self, storage, inner):
+        """Test that saving an object again replaces its queued write."""
+        session, agent, task_def = _make_session(storage)
+        with _held(inner, storage, agent):
+            for _ in range(10):
+                storage.save_agent(agent)
+        storage.flush()
+
+        # The held write and one write for the ten queued saves
+        assert inner.agent_writes == 2
+
+    def test_writes_are_batched(self, storage, inner):
+        """Test that writes queued while the flusher is busy share a batch."""
+        session, agent, task_def = _make_session(storage)
+        with _held(inner, storage, agent):
+            for _ in range(10):
+                waiting = Waiting(stack=agent.stack)
+                agent.stack.add_interaction(waiting)
+                storage.save_interaction(waiting)
+        storage.flush()
+
+        # The ten waitings and the task definition saved with the agent
+        assert len(inner._interactions) == 11
+        assert inner.batches == 2
+
+    def test_back_pressure(self, inner):
+        """Test that saving a new object blocks while the queue is full."""
+        storage = WriteBehindStorage(inner, max_pending=2)
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        storage.flush()
+        with _held(inner, storage, agent):
+            waitings = [Waiting(stack=agent.stack) for _ in range(2)]
+            for waiting in waitings:
+                storage.save_interaction(waiting)
+            # Saving a queued object again does not need a slot
+            storage.save_interaction(waitings[0])
+
+            blocked = threading.Thread(
+                target=storage.save_interaction,
+                args=(Waiting(stack=agent.stack),),
+            )
+            blocked.start()
+            blocked.join(timeout=0.1)
+            assert blocked.is_alive()
+        blocked.join(timeout=5)
+        assert not blocked.is_alive()
+        storage.close()
+        assert len(inner._interactions) == 4
+
+    def test_callbacks_fire_after_write(self, inner):
+        """Test that callbacks report objects once they are written."""
+        calls = []
+
+        def callback(kind, uuid):
+            if kind == "agent":
+                assert uuid in inner._agents
+            calls.append((kind, uuid))
+
+        storage = WriteBehindStorage(inner, callback=callback)
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        storage.flush()
+        storage.close()
+
+        assert calls == [
+            ("interaction", task_def.id),
+            ("agent", agent.id),
+            ("session", session.id),
+        ]
+
+    def test_failed_write_is_retried(self, inner):
+        """Test that a write that fails once is written on retry."""
+        storage = WriteBehindStorage(inner, retry_delay=0)
+        session, agent, task_def = _make_session(storage)
+        save_agent = inner._save_agent
+        failures = []
+
+        def fail_once(agent):
+            if not failures:
+                failures.append(agent)
+                raise RuntimeError("boom")
+            save_agent(agent)
+
+        inner._save_agent = fail_once
+        storage.save_agent(agent)
+        storage.flush()
+        storage.close()
+
+        assert list(inner._agents) == [agent.uuid]
+
+    def test_failing_write_is_raised_by_flush(self, inner):
+        """Test that flush raises the error of a write that keeps failing."""
+        storage = WriteBehindStorage(inner, max_retries=2, retry_delay=0)
+        session, agent, task_def = _make_session(storage)
+
+        def fail(agent):
+            raise RuntimeError("boom")
+
+        inner._save_agent = fail
+        storage.save_agent(agent)
+        with pytest.raises(RuntimeError, match="boom"):
+            storage.flush()
+        # The error is reported once
+        storage.flush()
+        storage.close()
+
+    def test_queued_write_is_a_snapshot(self, storage, inner):
+        """Test that changes after a save are not written by it."""
+        session, agent, task_def = _make_session(storage)
+        with _held(inner, storage, agent):
+            storage.save_interaction(task_def)
+            task_def.branch = "changed"
+        storage.flush()
+
+        assert inner._interactions[task_def.uuid]["data"]["branch"] is None
+
+    @pytest.mark.filterwarnings(
+        "ignore::pytest.PytestUnhandledThreadExceptionWarning"
+    )
+    def test_dead_flusher_raises(self, storage, inner):
+        """Test that saves fail once the flusher thread died."""
+        session, agent, task_def = _make_session(storage)
+
+        def die(batch):
+            raise SystemExit()
+
+        storage._write_batch = die
+        storage.save_agent(agent)
+        with pytest.raises(SystemExit):
+            storage.flush()
+        with pytest.raises(RuntimeError, match="flusher thread died"):
+            storage.save_agent(agent)
+
+    def test_close(self, storage, inner):
+        """Test that close writes queued saves and stops the flusher."""
+        session, agent, task_def = _make_session(storage)
+        storage.save_session(session)
+        storage.close()
+
+        assert list(inner._sessions) == [session.uuid]
+        assert not storage._thread.is_alive()
+        with pytest.raises(RuntimeError):
+            storage.save_session(session)
+
+    def test_session_run_flushes(self, inner):
+        """Test that Session.run returns once its saves are written."""
+
+        class SlowStorage(GatedStorage):
+            def _save_session(self, session):
+                time.sleep(0.05)
+                super()._save_session(session)
+
+        slow = SlowStorage()
+        storage = WriteBehindStorage(slow)
+        session = Session(environment=Environment(storage=storage))
+        session.run()
+
+        assert list(slow._sessions) == [session.uuid]
+        storage.close()
+
+
+class TestWriteBehindSqliteStorage:
+    """Test write-behind on top of SqliteStorage."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that writes reach the database and load back."""
+        db_path = tmp_path / "storage.db"
+        storage = create_storage(db_path, write_behind=True)
+        assert isinstance(storage, WriteBehindStorage)
+        session, agent, task_def = _make_session(storage)
+        task_def.add_artifact(Text(interaction=task_def, content="hello"))
+        storage.save_session(session)
+        storage.close()
+
+        fresh = SqliteStorage(db_path)
+        loaded = fresh.load_session(
+            session.uuid, environment=Environment(storage=fresh)
+        )
+        assert loaded.agents[0].stack.interactions[0].artifacts[0].content == (
+            "hello"
+        )
+        fresh.close()
+
+    def test_lazy_stacks(self, tmp_path):
+        """Test that agents are loaded lazily by the inner storage."""
+        db_path = tmp_path / "storage.db"
+        storage = create_storage(db_path, write_behind=True)
+        session, agent, _ = _make_session(storage)
+        storage.save_session(session)
+        storage.close()
+
+        storage = create_storage(db_path, write_behind=True, lazy_stacks=True)
+        assert isinstance(storage, WriteBehindStorage)
+        assert storage.inner.lazy_stacks
+        loaded = storage.load_session(
+            session.uuid, environment=Environment(storage=storage)
+        )
+
+        assert isinstance(
+            loaded.agents[0].stack.interactions, LazyInteractionList
+        )
+        storage.close()